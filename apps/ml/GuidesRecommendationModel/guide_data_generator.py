@@ -3,10 +3,18 @@ Mock data generator for guide recommendation system.
 Generates 1000 realistic guide records for testing ML algorithms.
 """
 
-import json
+import os
 import random
+import sys
 import uuid
-from typing import List, Dict
+from typing import Iterable, Iterator, List, Dict
+
+# Make the ML package root importable when run as a script
+app_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if app_dir not in sys.path:
+    sys.path.append(app_dir)
+
+from catalog_io import append_records, write_catalog
 
 # Sri Lankan provinces and major cities (matching accommodation data)
 PROVINCES = {
@@ -69,8 +77,19 @@ def generate_mock_guides(count: int = 1000) -> List[Dict]:
     Returns:
         List of guide dictionaries
     """
-    guides = []
+    return list(iter_mock_guides(count))
+
+
+def iter_mock_guides(count: int = 1000) -> Iterator[Dict]:
+    """
+    Yield mock guides one at a time.
+    
+    Args:
+        count: Number of guides to generate (default: 1000)
     
+    Yields:
+        Guide dictionaries
+    """
     for i in range(count):
         # Select province and city
         province = random.choice(list(PROVINCES.keys()))
@@ -171,16 +190,31 @@ def generate_mock_guides(count: int = 1000) -> List[Dict]:
             "availability": availability,
         }
         
-        guides.append(guide)
-    
-    return guides
+        yield guide
 
 
-def save_mock_data(guides: List[Dict], filename: str = "mock_guides.json"):
-    """Save generated guides to JSON file."""
-    with open(filename, 'w', encoding='utf-8') as f:
-        json.dump(guides, f, indent=2, ensure_ascii=False)
-    print(f"✓ Generated {len(guides)} guides")
+def save_mock_data(guides: Iterable[Dict], filename: str = "mock_guides.json", append: bool = False):
+    """
+    Save generated guides to a JSON or JSON Lines file.
+    
+    A JSON Lines filename (.jsonl or .ndjson) is written one record per line
+    as the records arrive, so a generator from iter_mock_guides never has
+    to be held in memory.
+    
+    Args:
+        guides: Guides to save (list or generator)
+        filename: Output path (.json for an indented array, .jsonl or .ndjson
+            for JSON Lines)
+        append: Append to an existing JSON Lines file instead of replacing it
+    
+    Raises:
+        ValueError: If append is set and filename is not a JSON Lines file
+    """
+    if append:
+        count = append_records(guides, filename)
+    else:
+        count = write_catalog(guides, filename)
+    print(f"✓ Generated {count} guides")
     print(f"✓ Saved to {filename}")
 
 
@@ -6,7 +6,24 @@ as specified in architecture spec section 4.2
 
 import json
 import math
-from typing import List, Dict, Optional, Set
+import os
+import re
+import sys
+from typing import Iterable, Iterator, List, Dict, Optional, Set, Tuple, Union
+
+# Make the ML package root importable when run as a script
+app_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if app_dir not in sys.path:
+    sys.path.append(app_dir)
+
+from catalog_io import read_catalog
+from deadlines import NO_DEADLINE
+from metrics import NULL_TIMER
+from reason_fragments import FragmentIndex, list_reason, lookup, term_fragments, title_term
+from records import GuideRecord
+
+# Years of experience in an experience entry, e.g. "5 years", "12 year", "10+ years"
+EXPERIENCE_YEARS = re.compile(r'(\d+)\s*year')
 
 
 class GuideRecommender:
@@ -20,16 +37,34 @@ class GuideRecommender:
     4. Ranking and reason generation
     """
     
-    import re
+    # Hard filter rules, in the order _apply_hard_filters applies them
+    FILTER_RULES = ["availability", "language", "budget", "city", "gender"]
     
-    def __init__(self, guides: List[Dict]):
+    # Scoring checks the deadline once per this many candidates
+    DEADLINE_CHECK_EVERY = 64
+    
+    # Reason text that depends only on the guide, built once per catalog record
+    # (see reason_fragments.FragmentIndex)
+    REASON_FRAGMENTS = {
+        "languages": lambda guide: term_fragments(guide.languages, label=title_term),
+        "expertise": lambda guide: term_fragments(guide.expertise, label=title_term),
+        "specializes": lambda guide: list_reason("🎯 Specializes in: {}", guide.expertise[:3]),
+        "experience": lambda guide: list_reason("📚 {}", guide.experience[:1]),
+    }
+    
+    def __init__(self, guides: Iterable[Dict], fragments: Optional[FragmentIndex] = None):
         """
         Initialize recommender with guide data.
         
         Args:
-            guides: List of guide dictionaries
+            guides: List of guide dictionaries or GuideRecords, or any iterable of
+                them (e.g. the generator returned by iter_guides); dictionaries
+                are converted to records
+            fragments: Prebuilt reason fragments for (some of) the guides;
+                the rest are built when their reasons are (optional)
         """
-        self.guides = guides
+        self.guides = GuideRecord.from_dicts(guides)
+        self.fragments = fragments
     
     def recommend(
         self,
@@ -41,7 +76,12 @@ class GuideRecommender:
         province: Optional[str] = None,
         city_only: bool = False,
         gender_preference: Optional[str] = None,
-        top_k: int = 10
+        top_k: int = 10,
+        timer=NULL_TIMER,
+        funnel: Optional[Dict] = None,
+        deadline=NO_DEADLINE,
+        include_reasons: bool = True,
+        explanations: Optional[Dict] = None
     ) -> Dict:
         """
         Generate guide recommendations.
@@ -56,6 +96,14 @@ class GuideRecommender:
             city_only: If True, hard filter to city only
             gender_preference: Preferred gender (male/female, optional)
             top_k: Number of recommendations to return
+            timer: StageTimer that records filter/score/sort/reasons times (optional)
+            funnel: Dict filled with the candidate funnel: input size, rejections
+                per hard-filter rule and candidates passed (optional)
+            deadline: Deadline after which scoring stops and the best-so-far
+                top-k is returned, marked "partial" (optional)
+            include_reasons: If False, recommendations carry no "reasons" (see explain())
+            explanations: Dict filled with id -> (guide, score components) for
+                each returned recommendation, the inputs explain() needs (optional)
         
         Returns:
             Dictionary with recommendations and metadata
@@ -63,13 +111,23 @@ class GuideRecommender:
         expertise = expertise or []
         
         # Apply hard rule filters
-        candidates = self._apply_hard_filters(
-            budget_min=budget_min,
-            budget_max=budget_max,
-            languages=languages,
-            city=city if city_only else None,
-            gender_preference=gender_preference
-        )
+        rejections = {}
+        with timer.stage("filter"):
+            candidates = self._apply_hard_filters(
+                budget_min=budget_min,
+                budget_max=budget_max,
+                languages=languages,
+                city=city if city_only else None,
+                gender_preference=gender_preference,
+                rejections=rejections
+            )
+        
+        if funnel is not None:
+            funnel.update({
+                "input": len(self.guides),
+                "rejected": rejections,
+                "passed": len(candidates)
+            })
         
         if not candidates:
             return {
@@ -81,73 +139,86 @@ class GuideRecommender:
                 "message": "No guides match your criteria"
             }
         
-        # Calculate max attainable points for normalization
-        max_points = self._calculate_max_points(languages, expertise, gender_preference)
-        
-        # Score and rank candidates
-        scored_candidates = []
-        for guide in candidates:
-            score, score_components = self._calculate_score(
-                guide=guide,
-                languages=languages,
-                expertise=expertise,
-                city=city,
-                province=province,
-                gender_preference=gender_preference,
-                candidates=candidates,
-                max_points=max_points,
-                budget_min=budget_min,
-                budget_max=budget_max
-            )
+        with timer.stage("score"):
+            # Calculate max attainable points for normalization
+            max_points = self._calculate_max_points(languages, expertise, gender_preference)
             
-            scored_candidates.append({
-                "guide": guide,
-                "score": score,
-                "score_components": score_components
-            })
+            # Score and rank candidates
+            scored_candidates = []
+            for index, guide in enumerate(candidates):
+                if index and index % self.DEADLINE_CHECK_EVERY == 0 and deadline.expired():
+                    break
+                score, score_components = self._calculate_score(
+                    guide=guide,
+                    languages=languages,
+                    expertise=expertise,
+                    city=city,
+                    province=province,
+                    gender_preference=gender_preference,
+                    candidates=candidates,
+                    max_points=max_points,
+                    budget_min=budget_min,
+                    budget_max=budget_max
+                )
+                
+                scored_candidates.append({
+                    "guide": guide,
+                    "score": score,
+                    "score_components": score_components
+                })
         
         # Sort by score (descending), then rating, then prior_bookings
-        scored_candidates.sort(
-            key=lambda x: (
-                x.get("score") or 0.0,
-                x["guide"].get("rating") or 0.0,
-                x["guide"].get("prior_bookings") or 0
-            ),
-            reverse=True
-        )
-        
-        # Generate top-k recommendations with reasons
-        recommendations = []
-        for item in scored_candidates[:top_k]:
-            guide = item["guide"]
-            reasons = self._generate_reasons(
-                item["score_components"],
-                guide,
-                user_languages=languages,
-                user_expertise=expertise
+        with timer.stage("sort"):
+            scored_candidates.sort(
+                key=lambda x: (
+                    x.get("score") or 0.0,
+                    x["guide"].rating or 0.0,
+                    x["guide"].prior_bookings or 0
+                ),
+                reverse=True
             )
-            
-            recommendations.append({
-                "id": guide["id"],
-                "name": guide["name"],
-                "city": guide.get("city"),
-                "province": guide.get("province"),
-                "price": guide.get("price"),
-                "rating": guide.get("rating"),
-                "languages": guide.get("languages", []),
-                "expertise": guide.get("expertise", []),
-                "score": round(item["score"], 3),
-                "reasons": reasons,
-                "in_system": guide.get("in_system", False)
-            })
         
-        return {
+        # Generate top-k recommendations with reasons
+        with timer.stage("reasons"):
+            top = scored_candidates[:top_k]
+            if include_reasons:
+                reasons = self._generate_reasons(
+                    [(item["guide"], item["score_components"]) for item in top],
+                    user_languages=languages,
+                    user_expertise=expertise
+                )
+            recommendations = []
+            for index, item in enumerate(top):
+                guide = item["guide"]
+                recommendation = {
+                    "id": guide.id,
+                    "name": guide.name,
+                    "city": guide.city,
+                    "province": guide.province,
+                    "price": guide.price,
+                    "rating": guide.rating,
+                    "languages": list(guide.languages),
+                    "expertise": list(guide.expertise),
+                    "score": round(item["score"], 3),
+                }
+                if include_reasons:
+                    recommendation["reasons"] = reasons[index]
+                recommendation["in_system"] = guide.in_system
+                recommendations.append(recommendation)
+                if explanations is not None:
+                    explanations[guide.id] = (guide, item["score_components"])
+        
+        results = {
             "recommendations": recommendations,
             "total_candidates": len(candidates),
             "filters_applied": self._get_filters_applied(
                 budget_min, budget_max, languages, expertise, city, city_only, gender_preference
             ),
         }
+        if len(scored_candidates) < len(candidates):
+            results["partial"] = True
+            results["scored_candidates"] = len(scored_candidates)
+        return results
     
     def _apply_hard_filters(
         self,
@@ -155,42 +226,55 @@ class GuideRecommender:
         budget_max: float,
         languages: List[str],
         city: Optional[str] = None,
-        gender_preference: Optional[str] = None
+        gender_preference: Optional[str] = None,
+        rejections: Optional[Dict[str, int]] = None
     ) -> List[Dict]:
-        """Apply hard rule filters to guides."""
+        """
+        Apply hard rule filters to guides.
+        
+        Args:
+            rejections: Dict filled with the number of guides each rule
+                (FILTER_RULES) removed; a guide counts against the first rule it fails
+        """
         filtered = []
+        rejected = dict.fromkeys(self.FILTER_RULES, 0)
         
         for guide in self.guides:
             # 1. Availability filter
-            if not guide.get("availability", True):
+            if not guide.availability:
+                rejected["availability"] += 1
                 continue
             
             # 2. Language filter: must have at least one requested language
-            guide_languages = [lang.lower() for lang in guide.get("languages", [])]
+            guide_languages = [lang.lower() for lang in guide.languages]
             user_languages = [lang.lower() for lang in languages]
             
             if not any(lang in guide_languages for lang in user_languages):
+                rejected["language"] += 1
                 continue
             
             # 3. Price filter (within budget)
-            guide_price = guide.get("price", 0) or 0  # Handle None and 0
+            guide_price = guide.price or 0  # Handle None and 0
             if not (budget_min <= guide_price <= budget_max):
+                rejected["budget"] += 1
                 continue
             
             # 4. Location filter (if city_only is True) - case-insensitive
             if city:
-                guide_city = guide.get("city", "")
-                if guide_city.lower() != city.lower():
+                if (guide.city or "").lower() != city.lower():
+                    rejected["city"] += 1
                     continue
             
             # 5. Gender preference filter (optional)
             if gender_preference:
-                guide_gender = guide.get("gender", "")
-                if guide_gender.lower() != gender_preference.lower():
+                if (guide.gender or "").lower() != gender_preference.lower():
+                    rejected["gender"] += 1
                     continue
             
             filtered.append(guide)
         
+        if rejections is not None:
+            rejections.update(rejected)
         return filtered
     
     def _calculate_max_points(
@@ -253,8 +337,8 @@ class GuideRecommender:
         
         # Location tier score
         location_points = self._location_score(
-            guide.get("city"),
-            guide.get("province"),
+            guide.city,
+            guide.province,
             city,
             province
         )
@@ -263,7 +347,7 @@ class GuideRecommender:
         
         # Language match score
         language_points = self._language_score(
-            guide.get("languages", []),
+            guide.languages,
             languages
         )
         points += language_points
@@ -271,7 +355,7 @@ class GuideRecommender:
         
         # Expertise match score
         expertise_points = self._expertise_score(
-            guide.get("expertise", []),
+            guide.expertise,
             expertise
         )
         points += expertise_points
@@ -280,28 +364,28 @@ class GuideRecommender:
         # Gender match score
         gender_points = 0
         if gender_preference:
-            if guide.get("gender", "").lower() == gender_preference.lower():
+            if (guide.gender or "").lower() == gender_preference.lower():
                 gender_points = 1
         points += gender_points
         components["gender"] = gender_points
         
         # Popularity score
         popularity_points = self._popularity_score(
-            guide.get("prior_bookings", 0),
+            guide.prior_bookings,
             candidates
         )
         points += popularity_points
         components["popularity"] = popularity_points
         
         # Rating score (up to +3)
-        rating = guide.get("rating", 0)
+        rating = guide.rating
         rating_points = (rating / 5.0) * 3 if rating else 0
         points += rating_points
         components["rating"] = rating_points
         
         # Price score (up to +5)
         price_points = self._price_score(
-            guide.get("price", 0),
+            guide.price,
             budget_min,
             budget_max
         )
@@ -309,12 +393,12 @@ class GuideRecommender:
         components["price"] = price_points
         
         # Experience score (up to +5)
-        experience_points = self._experience_score(guide.get("experience", []))
+        experience_points = self._experience_score(guide.experience)
         points += experience_points
         components["experience"] = experience_points
         
         # DB priority score (+5 for guides in system)
-        db_priority_points = 5 if guide.get("in_system", False) else 0
+        db_priority_points = 5 if guide.in_system else 0
         points += db_priority_points
         components["db_priority"] = db_priority_points
         
@@ -415,14 +499,11 @@ class GuideRecommender:
         Award points based on years: 10+ (5 pts), 5-10 (4 pts), 3-5 (3 pts), <3 (2 pts).
         Default: 2 points.
         """
-        import re
-        
         max_years = 0
         found = False
         
         for item in experience_list:
-            # Look for patterns like "5 years", "12 year", "10+ years"
-            matches = re.findall(r'(\d+)\s*year', item.lower())
+            matches = EXPERIENCE_YEARS.findall(item.lower())
             if matches:
                 found = True
                 years = [int(m) for m in matches]
@@ -446,7 +527,7 @@ class GuideRecommender:
         +1 if above median
         +2 if top quartile
         """
-        bookings = [g.get("prior_bookings", 0) for g in candidates]
+        bookings = [g.prior_bookings for g in candidates]
         
         if not bookings:
             return 0
@@ -465,80 +546,137 @@ class GuideRecommender:
         else:
             return 0
     
-    def _generate_reasons(
+    def explain(
         self,
-        score_components: Dict[str, any],
         guide: Dict,
+        score_components: Dict[str, any],
+        languages: List[str] = None,
+        expertise: List[str] = None,
+        **query
+    ) -> List[str]:
+        """
+        Reasons for one recommended guide, as recommend() would give them.
+        
+        Args:
+            guide: The recommended guide (record or dictionary)
+            score_components: Its score components, as reported through recommend(explanations=...)
+            languages: Requested languages from the query
+            expertise: Desired expertise from the query
+            **query: The rest of the recommend() arguments (unused)
+        
+        Returns:
+            List of reason strings
+        """
+        if not isinstance(guide, GuideRecord):
+            guide = GuideRecord.from_dict(guide)
+        return self._generate_reasons(
+            [(guide, score_components)], user_languages=languages, user_expertise=expertise or []
+        )[0]
+    
+    def _reason_flags(self, ranked: List[Tuple[Dict, Dict[str, any]]]) -> Dict[str, List[bool]]:
+        """
+        Decide which threshold reasons fire for every ranked guide at once,
+        a column of the score component matrix at a time.
+        
+        Args:
+            ranked: (guide, score components) pairs in rank order
+        
+        Returns:
+            Dict of reason name -> one flag per ranked guide
+        """
+        components = [item[1] for item in ranked]
+        location = [c["location"] for c in components]
+        popularity = [c["popularity"] for c in components]
+        return {
+            "city": [points >= 3 for points in location],
+            "province": [2 <= points < 3 for points in location],
+            "rating": [(guide.rating or 0) >= 4.0 for guide, _ in ranked],
+            "highly_popular": [points >= 2 for points in popularity],
+            "popular": [1 <= points < 2 for points in popularity],
+            "price": [bool(guide.price) for guide, _ in ranked],
+            "in_system": [bool(guide.in_system) for guide, _ in ranked],
+        }
+    
+    def _generate_reasons(
+        self,
+        ranked: List[Tuple[Dict, Dict[str, any]]],
         user_languages: List[str] = None,
         user_expertise: List[str] = None
-    ) -> List[str]:
-        """Generate comprehensive reasons for recommendation."""
-        reasons = []
-        user_languages = user_languages or []
-        user_expertise = user_expertise or []
-        
-        # Location match
-        if score_components["location"] >= 3:
-            reasons.append(f"📍 Located in {guide.get('city', 'your selected city')}")
-        elif score_components["location"] >= 2:
-            reasons.append(f"📍 Located in {guide.get('province', 'your selected province')}")
-        
-        # Language match
-        if user_languages:
-            guide_langs = set(lang.lower() for lang in guide.get("languages", []))
-            user_langs = set(lang.lower() for lang in user_languages)
-            matching_langs = guide_langs & user_langs
+    ) -> List[List[str]]:
+        """
+        Generate comprehensive reasons for every ranked guide in one pass.
+        
+        Args:
+            ranked: (guide, score components) pairs in rank order
+            user_languages: Requested languages from the query
+            user_expertise: Desired expertise from the query
+        
+        Returns:
+            One list of reason strings per ranked guide
+        """
+        flags = self._reason_flags(ranked)
+        user_langs = {lang.lower() for lang in user_languages or []}
+        user_exp = {exp.lower() for exp in user_expertise or []}
+        
+        all_reasons = []
+        for index, (guide, _) in enumerate(ranked):
+            reasons = []
+            fragments = lookup(self.fragments, guide, self.REASON_FRAGMENTS)
             
-            if matching_langs:
-                lang_text = ", ".join(matching_langs)
-                reasons.append(f"🗣️ Speaks: {lang_text.title()}")
-        
-        # Expertise match
-        if user_expertise:
-            guide_exp = set(exp.lower() for exp in guide.get("expertise", []))
-            user_exp = set(exp.lower() for exp in user_expertise)
-            matching_exp = guide_exp & user_exp
+            # Location match
+            if flags["city"][index]:
+                reasons.append(f"📍 Located in {guide.city or 'your selected city'}")
+            elif flags["province"][index]:
+                reasons.append(f"📍 Located in {guide.province or 'your selected province'}")
             
-            if matching_exp:
-                exp_text = ", ".join(matching_exp)
-                reasons.append(f"🎯 Expert in: {exp_text.title()}")
-        else:
-            # Show guide expertise even if no user preference
-            expertise = guide.get("expertise", [])
-            if expertise:
-                exp_text = ", ".join(expertise[:3])
-                reasons.append(f"🎯 Specializes in: {exp_text}")
-        
-        # Rating
-        rating = guide.get("rating") or 0
-        if rating >= 4.0:
-            reasons.append(f"⭐ {rating:.1f}/5.0 rating")
-        
-        # Popularity
-        if score_components["popularity"] >= 2:
-            reasons.append("🔥 Highly popular guide")
-        elif score_components["popularity"] >= 1:
-            reasons.append("👍 Popular choice")
-        
-        # Price
-        price = guide.get("price", 0)
-        if price:
-            reasons.append(f"💰 {price:.0f} LKR per day")
-        
-        # Experience
-        experience = guide.get("experience", [])
-        if experience:
-            reasons.append(f"📚 {experience[0]}")
-        
-        # Database availability
-        if guide.get("in_system", False):
-            reasons.append("✅ Available in our system")
-        
-        # Ensure we have at least 1 reason
-        if not reasons:
-            reasons.append(f"Professional guide in {guide.get('province', 'Sri Lanka')}")
-        
-        return reasons
+            # Language match
+            if user_langs:
+                guide_langs = fragments["languages"]
+                matching_langs = guide_langs.mask(user_langs)
+                
+                if matching_langs:
+                    reasons.append(f"🗣️ Speaks: {guide_langs.join(matching_langs)}")
+            
+            # Expertise match
+            if user_exp:
+                guide_exp = fragments["expertise"]
+                matching_exp = guide_exp.mask(user_exp)
+                
+                if matching_exp:
+                    reasons.append(f"🎯 Expert in: {guide_exp.join(matching_exp)}")
+            elif fragments["specializes"]:
+                # Show guide expertise even if no user preference
+                reasons.append(fragments["specializes"])
+            
+            # Rating
+            if flags["rating"][index]:
+                reasons.append(f"⭐ {guide.rating:.1f}/5.0 rating")
+            
+            # Popularity
+            if flags["highly_popular"][index]:
+                reasons.append("🔥 Highly popular guide")
+            elif flags["popular"][index]:
+                reasons.append("👍 Popular choice")
+            
+            # Price
+            if flags["price"][index]:
+                reasons.append(f"💰 {guide.price:.0f} LKR per day")
+            
+            # Experience
+            if fragments["experience"]:
+                reasons.append(fragments["experience"])
+            
+            # Database availability
+            if flags["in_system"][index]:
+                reasons.append("✅ Available in our system")
+            
+            # Ensure we have at least 1 reason
+            if not reasons:
+                reasons.append(f"Professional guide in {guide.province or 'Sri Lanka'}")
+            
+            all_reasons.append(reasons)
+        
+        return all_reasons
     
     def _get_filters_applied(
         self,
@@ -573,17 +711,38 @@ class GuideRecommender:
         return filters
 
 
+def _default_guides_path() -> str:
+    """Resolve data/mock_guides.json relative to this package."""
+    base_dir = os.path.dirname(os.path.abspath(__file__))
+    return os.path.join(base_dir, "..", "data", "mock_guides.json")
+
+
 def load_guides(filename: str = None) -> List[Dict]:
-    """Load guides from JSON file."""
+    """Load guides from a JSON or JSON Lines file."""
+    if filename is None:
+        filename = _default_guides_path()
+    
+    return list(read_catalog(filename))
+
+
+def iter_guides(
+    filename: str = None,
+    batch_size: Optional[int] = None
+) -> Union[Iterator[Dict], Iterator[List[Dict]]]:
+    """
+    Stream guides from a JSON or JSON Lines file.
+    
+    Args:
+        filename: Path to the catalog file (defaults to data/mock_guides.json)
+        batch_size: If given, yield lists of this many guides
+    
+    Returns:
+        Generator of guides, or of guide batches when batch_size is set
+    """
     if filename is None:
-        import os
-        # Get the directory where this script is located
-        base_dir = os.path.dirname(os.path.abspath(__file__))
-        # Resolve to data/mock_guides.json relative to the script location
-        filename = os.path.join(base_dir, "..", "data", "mock_guides.json")
-        
-    with open(filename, 'r', encoding='utf-8') as f:
-        return json.load(f)
+        filename = _default_guides_path()
+    
+    return read_catalog(filename, batch_size=batch_size)
 
 
 if __name__ == "__main__":
@@ -0,0 +1,185 @@
+"""
+Admission control for the recommendation endpoints.
+Each (endpoint, traffic class) pair gets a bounded number of concurrent
+requests and a short wait queue; anything beyond that is rejected at once so
+the caller can back off (503 + Retry-After) instead of piling onto the CPU
+and the database. Batch and interactive traffic have separate budgets, so a
+batch job saturating its own budget cannot push interactive latency up.
+
+Limits are per process: with N preloaded workers the service admits N times
+the configured concurrency. AdmissionLimiter blocks a worker thread while a
+request waits; AsyncAdmissionLimiter does the same for the asyncio server
+without tying up a thread.
+"""
+
+import asyncio
+import threading
+import time
+from collections import deque
+from typing import Dict, Optional, Tuple
+
+TRAFFIC_CLASSES = ("interactive", "batch")
+
+# concurrency: requests running at once; queue: requests allowed to wait for a slot;
+# retry_after_s: Retry-After sent with a rejection
+DEFAULT_BUDGETS = {
+    "interactive": {"concurrency": 8, "queue": 16, "retry_after_s": 1},
+    "batch": {"concurrency": 2, "queue": 4, "retry_after_s": 5},
+}
+
+
+class AdmissionLimiter:
+    """Counting limiter with a bounded, time-limited wait queue."""
+
+    def __init__(self, max_concurrent: int, max_queue: int, queue_timeout_ms: float):
+        """
+        Args:
+            max_concurrent: Requests admitted at once
+            max_queue: Requests allowed to wait for a slot; more are rejected immediately
+            queue_timeout_ms: Longest a queued request waits before it is rejected
+        """
+        self.max_concurrent = max_concurrent
+        self.max_queue = max_queue
+        self.queue_timeout_ms = queue_timeout_ms
+        self.active = 0
+        self.waiting = 0
+        self._cond = threading.Condition()
+
+    def try_acquire(self) -> bool:
+        """
+        Take a slot, waiting up to queue_timeout_ms if the queue has room.
+
+        Returns:
+            True if admitted (call release() when done), False if rejected
+        """
+        with self._cond:
+            # New arrivals do not jump ahead of requests already waiting
+            if self.active < self.max_concurrent and self.waiting == 0:
+                self.active += 1
+                return True
+            if self.waiting >= self.max_queue or self.queue_timeout_ms <= 0:
+                return False
+
+            expires_at = time.monotonic() + self.queue_timeout_ms / 1000.0
+            self.waiting += 1
+            try:
+                while self.active >= self.max_concurrent:
+                    remaining = expires_at - time.monotonic()
+                    if remaining <= 0:
+                        return False
+                    self._cond.wait(remaining)
+                self.active += 1
+                return True
+            finally:
+                self.waiting -= 1
+
+    def release(self):
+        """Give a slot back and wake one queued request."""
+        with self._cond:
+            self.active -= 1
+            self._cond.notify()
+
+
+class AsyncAdmissionLimiter:
+    """
+    AdmissionLimiter for coroutines on one event loop.
+
+    A released slot is handed straight to the longest-waiting request, so
+    waiters are served in arrival order.
+    """
+
+    def __init__(self, max_concurrent: int, max_queue: int, queue_timeout_ms: float):
+        """
+        Args:
+            max_concurrent: Requests admitted at once
+            max_queue: Requests allowed to wait for a slot; more are rejected immediately
+            queue_timeout_ms: Longest a queued request waits before it is rejected
+        """
+        self.max_concurrent = max_concurrent
+        self.max_queue = max_queue
+        self.queue_timeout_ms = queue_timeout_ms
+        self.active = 0
+        self._waiters: deque = deque()
+
+    @property
+    def waiting(self) -> int:
+        return len(self._waiters)
+
+    async def try_acquire(self) -> bool:
+        """
+        Take a slot, waiting up to queue_timeout_ms if the queue has room.
+
+        Returns:
+            True if admitted (call release() when done), False if rejected
+        """
+        if self.active < self.max_concurrent and not self._waiters:
+            self.active += 1
+            return True
+        if len(self._waiters) >= self.max_queue or self.queue_timeout_ms <= 0:
+            return False
+
+        waiter = asyncio.get_running_loop().create_future()
+        self._waiters.append(waiter)
+        try:
+            await asyncio.wait([waiter], timeout=self.queue_timeout_ms / 1000.0)
+        except asyncio.CancelledError:
+            # Client went away while queued: give back a slot handed over meanwhile
+            if waiter.done():
+                self.release()
+            else:
+                self._waiters.remove(waiter)
+            raise
+        if waiter.done():
+            return True
+        self._waiters.remove(waiter)
+        return False
+
+    def release(self):
+        """Give a slot back, handing it to the first queued request if there is one."""
+        if self._waiters:
+            self._waiters.popleft().set_result(None)
+        else:
+            self.active -= 1
+
+
+class AdmissionController:
+    """Limiters per (endpoint, traffic class), created on first use."""
+
+    def __init__(
+        self,
+        budgets: Optional[Dict[str, Dict]] = None,
+        queue_timeout_ms: float = 250.0,
+        limiter_class=AdmissionLimiter
+    ):
+        """
+        Args:
+            budgets: Budget per traffic class, shaped like DEFAULT_BUDGETS
+            queue_timeout_ms: Longest a request waits in a queue
+            limiter_class: AdmissionLimiter, or AsyncAdmissionLimiter under asyncio
+        """
+        self.budgets = budgets or DEFAULT_BUDGETS
+        self.queue_timeout_ms = queue_timeout_ms
+        self.limiter_class = limiter_class
+        self._limiters: Dict[Tuple[str, str], AdmissionLimiter] = {}
+        self._lock = threading.Lock()
+
+    def limiter(self, endpoint: str, traffic_class: str) -> AdmissionLimiter:
+        key = (endpoint, traffic_class)
+        with self._lock:
+            if key not in self._limiters:
+                budget = self.budgets[traffic_class]
+                self._limiters[key] = self.limiter_class(budget["concurrency"], budget["queue"], self.queue_timeout_ms)
+            return self._limiters[key]
+
+    def retry_after_s(self, traffic_class: str) -> int:
+        return self.budgets[traffic_class]["retry_after_s"]
+
+    def in_flight(self) -> Dict[Tuple[str, str], int]:
+        """Admitted requests per (endpoint, traffic class)."""
+        with self._lock:
+            return {key: limiter.active for key, limiter in self._limiters.items()}
+
+    def queued(self) -> Dict[Tuple[str, str], int]:
+        """Waiting requests per (endpoint, traffic class)."""
+        with self._lock:
+            return {key: limiter.waiting for key, limiter in self._limiters.items()}
@@ -3,20 +3,81 @@ Flask API for ML-based accommodation and guide recommendations.
 Integrates with PostgreSQL database and recommendation engines.
 """
 
+import atexit
 import os
-import json
-from typing import List, Dict, Optional
-from flask import Flask, request, jsonify
+import hmac
+import logging
+import multiprocessing
+import random
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import List, Dict, Optional, Tuple
+from flask import Flask, Response, g, request, jsonify
 from flask_cors import CORS
 import psycopg2
 from psycopg2.extras import RealDictCursor
 from dotenv import load_dotenv
-from recommender import AccommodationRecommender, load_accommodations
-from GuidesRecommendationModel.guide_recommender import GuideRecommender
+from admission import DEFAULT_BUDGETS, TRAFFIC_CLASSES, AdmissionController
+from catalog_sql import accommodation_from_row, accommodations_query, guide_from_row, guides_query
+from deadlines import NO_DEADLINE, Deadline, DeadlineExceeded, ResultCache
+from explanations import ExplanationCache
+from catalog import Catalog
+from catalog_manager import CatalogManager
+from reason_fragments import FragmentIndex
+from records import AccommodationRecord, GuideRecord
+from recommender import AccommodationRecommender, iter_accommodations
+from GuidesRecommendationModel.guide_recommender import GuideRecommender, iter_guides
+from fake_db import FakeDatabase
+from log_config import RowSampler, configure_logging
+from profiling import PROFILE_MODES, RequestProfiler
+from queries import (
+    QUERY_PARSERS,
+    TRIP_SECTIONS,
+    canonical_query,
+    parse_accommodation_query,
+    parse_guide_query,
+    parse_include_reasons,
+    parse_response_fields,
+    parse_trip_query,
+    query_tag,
+    split_trip_body,
+)
+from query_log import QueryLog
+from serialization import compress, dumps, select_fields
+from slow_log import SlowRequestLog
+from warmup import warmup_queries
+from metrics import (
+    ADMISSION_REJECTIONS,
+    ADMISSION_WAIT,
+    CANDIDATES,
+    CATALOG_REQUESTS,
+    DB_FETCH_LATENCY,
+    DB_ROWS_FETCHED,
+    DEGRADED_RESPONSES,
+    FILTER_INPUT,
+    FILTER_REJECTIONS,
+    HTTP_LATENCY,
+    HTTP_REQUESTS,
+    MOCK_FALLBACKS,
+    NULL_TIMER,
+    REGISTRY,
+    STAGE_LATENCY,
+    CallbackGauge,
+    StageTimer,
+    render_prometheus,
+)
 
 # Load environment variables
 load_dotenv()
 
+# Logging goes through a queue to a background writer (LOG_LEVEL, LOG_FORMAT)
+log_handler = configure_logging()
+logger = logging.getLogger('wbth.api')
+
+# Fraction of fetched rows logged individually at DEBUG level
+row_sampler = RowSampler(float(os.getenv('LOG_ROW_SAMPLE_RATE', '0.01')))
+
 app = Flask(__name__)
 CORS(app)  # Enable CORS for frontend API calls
 
@@ -24,13 +85,557 @@ CORS(app)  # Enable CORS for frontend API calls
 DATABASE_URL = os.getenv('DATABASE_URL')
 FLASK_PORT = os.getenv('FLASK_PORT')
 
+# Mock catalogs used to top up sparse DB results (.json or .jsonl)
+MOCK_ACCOMMODATIONS_FILE = os.getenv('MOCK_ACCOMMODATIONS_FILE', 'data/mock_accommodations.json')
+MOCK_GUIDES_FILE = os.getenv('MOCK_GUIDES_FILE', 'data/mock_guides.json')
+
+# X-Admin-Token for the /api/admin/catalogs endpoints (reload and item changes),
+# kept apart from PROFILE_ADMIN_TOKEN so profiling access cannot rewrite catalogs
+CATALOG_ADMIN_TOKEN = os.getenv('CATALOG_ADMIN_TOKEN')
+
+# Data source: "postgres" (default) or "fake" to serve catalog files from memory
+DATA_SOURCE = os.getenv('DATA_SOURCE', 'postgres')
+FAKE_DB_ACCOMMODATIONS_FILE = os.getenv('FAKE_DB_ACCOMMODATIONS_FILE', MOCK_ACCOMMODATIONS_FILE)
+FAKE_DB_GUIDES_FILE = os.getenv('FAKE_DB_GUIDES_FILE', MOCK_GUIDES_FILE)
+FAKE_DB_LATENCY_MS = float(os.getenv('FAKE_DB_LATENCY_MS', '0'))
+
+fake_db = None
+if DATA_SOURCE == 'fake':
+    fake_db = FakeDatabase.from_files(
+        FAKE_DB_ACCOMMODATIONS_FILE, FAKE_DB_GUIDES_FILE, latency_ms=FAKE_DB_LATENCY_MS
+    )
+
+# Connections opened since startup; shared memory so forked (preloaded) workers share one count
+_db_connections_opened = multiprocessing.Value('Q', 0)
+
+
+def count_db_connection():
+    """Record that a database connection was opened."""
+    with _db_connections_opened.get_lock():
+        _db_connections_opened.value += 1
+
+
+def get_db_connections_opened() -> int:
+    """Return the number of database connections opened since startup."""
+    return _db_connections_opened.value
+
+
+REGISTRY.register(CallbackGauge(
+    "wbth_log_records_dropped_total",
+    "Log records dropped because the log queue was full",
+    lambda: log_handler.dropped,
+    metric_type="counter"
+))
+
+REGISTRY.register(CallbackGauge(
+    "wbth_db_connections_opened_total",
+    "Database connections opened since startup",
+    get_db_connections_opened,
+    metric_type="counter",
+    per_process=False
+))
+
+
+def record_db_fetch(table: str, started: float, rows: List[Dict]) -> List[Dict]:
+    """Record fetch latency and row count for one catalog fetch and pass the rows through."""
+    DB_FETCH_LATENCY.labels(table).observe((time.perf_counter() - started) * 1000)
+    DB_ROWS_FETCHED.labels(table).observe(len(rows))
+    return rows
+
+
+# Opt-in profiling: "X-Profile: cprofile|sample" plus a matching X-Admin-Token,
+# or a random PROFILE_SAMPLE_RATE fraction of recommendation requests
+PROFILE_DIR = os.getenv('PROFILE_DIR', 'profiles')
+PROFILE_ADMIN_TOKEN = os.getenv('PROFILE_ADMIN_TOKEN')
+PROFILE_SAMPLE_RATE = float(os.getenv('PROFILE_SAMPLE_RATE', '0'))
+PROFILE_MODE = os.getenv('PROFILE_MODE', 'sample')
+
+profiler = RequestProfiler(PROFILE_DIR, max_profiles=int(os.getenv('PROFILE_MAX_FILES', '50')))
+
+
+def _token_matches(token: str, expected: Optional[str]) -> bool:
+    """Whether an X-Admin-Token value matches a configured token (never, if it is unset)."""
+    return bool(expected) and hmac.compare_digest(token, expected)
+
+
+def admin_authorized(token: str) -> bool:
+    """Whether an X-Admin-Token value grants on-demand profiling (PROFILE_ADMIN_TOKEN)."""
+    return _token_matches(token, PROFILE_ADMIN_TOKEN)
+
+
+def catalog_admin_authorized(token: str) -> bool:
+    """Whether an X-Admin-Token value may reload or change catalogs (CATALOG_ADMIN_TOKEN)."""
+    return _token_matches(token, CATALOG_ADMIN_TOKEN)
+
+
+def _profile_mode_for_request() -> Optional[str]:
+    """Return the profiling mode for the current request, or None."""
+    if not request.path.startswith('/api/'):
+        return None
+    mode = request.headers.get('X-Profile', '').lower()
+    if mode:
+        token = request.headers.get('X-Admin-Token', '')
+        if mode in PROFILE_MODES and admin_authorized(token):
+            return mode
+        return None
+    if PROFILE_SAMPLE_RATE > 0 and random.random() < PROFILE_SAMPLE_RATE:
+        return PROFILE_MODE
+    return None
+
+
+@app.before_request
+def _start_request_clock():
+    g.request_started = time.perf_counter()
+
+
+# Admission control: bounded concurrency plus a short wait queue per endpoint and traffic
+# class ("X-Traffic-Class: batch" for batch jobs, interactive otherwise); excess requests
+# are turned away at once with 503 and Retry-After. Limits are per worker process.
+ADMISSION_ENABLED = os.getenv('ADMISSION_ENABLED', 'true').lower() in ('1', 'true', 'yes')
+ADMISSION_QUEUE_TIMEOUT_MS = float(os.getenv('ADMISSION_QUEUE_TIMEOUT_MS', '250'))
+ADMISSION_BUDGETS = {
+    traffic_class: {
+        key: int(os.getenv(f'ADMISSION_{traffic_class.upper()}_{key.upper()}', default))
+        for key, default in budget.items()
+    }
+    for traffic_class, budget in DEFAULT_BUDGETS.items()
+}
+TRAFFIC_CLASS_HEADER = 'X-Traffic-Class'
+
+# View functions under admission control, by endpoint name
+ADMISSION_ENDPOINTS = {
+    'recommend_accommodations': 'accommodations',
+    'recommend_guides': 'guides',
+    'match_guides': 'guides',
+    'recommend_trip': 'trip',
+    'explain_recommendation': 'explain',
+}
+
+admission = AdmissionController(ADMISSION_BUDGETS, ADMISSION_QUEUE_TIMEOUT_MS) if ADMISSION_ENABLED else None
+
+if admission is not None:
+    REGISTRY.register(CallbackGauge(
+        "wbth_admission_in_flight",
+        "Requests currently admitted",
+        admission.in_flight,
+        label_names=("endpoint", "traffic_class")
+    ))
+    REGISTRY.register(CallbackGauge(
+        "wbth_admission_queued",
+        "Requests currently waiting for an admission slot",
+        admission.queued,
+        label_names=("endpoint", "traffic_class")
+    ))
+
+
+def _traffic_class() -> str:
+    """Traffic class of the current request (unknown values count as interactive)."""
+    value = request.headers.get(TRAFFIC_CLASS_HEADER, '').lower()
+    return value if value in TRAFFIC_CLASSES else 'interactive'
+
+
+@app.before_request
+def _admit_request():
+    """Take an admission slot for a recommendation request, or reject it with 503."""
+    endpoint = ADMISSION_ENDPOINTS.get(request.endpoint)
+    if admission is None or endpoint is None:
+        return None
+    traffic_class = _traffic_class()
+    limiter = admission.limiter(endpoint, traffic_class)
+    started = time.perf_counter()
+    if not limiter.try_acquire():
+        ADMISSION_REJECTIONS.inc(endpoint, traffic_class)
+        response = jsonify({"error": "Service is busy, please retry later", "traffic_class": traffic_class})
+        response.status_code = 503
+        response.headers['Retry-After'] = str(admission.retry_after_s(traffic_class))
+        return response
+    ADMISSION_WAIT.labels(endpoint, traffic_class).observe((time.perf_counter() - started) * 1000)
+    g.admission_limiter = limiter
+    return None
+
+
+@app.teardown_request
+def _release_admission(exc):
+    """Give the request's admission slot back."""
+    limiter = g.pop('admission_limiter', None)
+    if limiter is not None:
+        limiter.release()
+
+
+@app.before_request
+def _start_profile():
+    mode = _profile_mode_for_request()
+    if mode:
+        g.profile_session = profiler.start(mode)
+
+
+@app.after_request
+def _finish_profile(response):
+    """Write the request's profile, tagged with its canonical query."""
+    session = g.pop('profile_session', None)
+    if session is None:
+        return response
+    try:
+        canonical = g.get('canonical_query') or request.get_data(as_text=True)
+        endpoint = g.get('query_endpoint') or 'unknown'
+        path = profiler.finish(session, endpoint, query_tag(canonical), {
+            "canonical_query": canonical,
+            "status": response.status_code,
+            "timestamp": time.time(),
+        })
+        response.headers['X-Profile-File'] = os.path.basename(path)
+    except OSError as e:
+        logger.error("Could not write profile: %s", e)
+    return response
+
+
+@app.teardown_request
+def _release_profile(exc):
+    """Stop profiling a request that failed before after_request ran."""
+    session = g.pop('profile_session', None)
+    if session is not None:
+        profiler.release(session)
+
+
+def _set_request_query(endpoint: str, query: Dict, body: Dict):
+    """Remember the request's parsed query for profiling and logging, and capture its body."""
+    g.query_endpoint = endpoint
+    g.query = query
+    g.canonical_query = canonical_query(endpoint, query)
+    if query_log is not None:
+        query_log.record(endpoint, body, time.time())
+
+
+@app.after_request
+def _record_request(response):
+    """Count every request and record its latency by endpoint."""
+    started = g.get('request_started')
+    endpoint = request.url_rule.rule if request.url_rule else 'unmatched'
+    HTTP_REQUESTS.inc(endpoint, str(response.status_code))
+    if started is not None:
+        HTTP_LATENCY.labels(endpoint).observe((time.perf_counter() - started) * 1000)
+    return response
+
+
+# Stage timings feed in-process histograms; send "X-Debug-Timings: 1" to get them back per request
+STAGE_TIMINGS_ENABLED = os.getenv('STAGE_TIMINGS_ENABLED', 'true').lower() in ('1', 'true', 'yes')
+DEBUG_TIMINGS_HEADER = 'X-Debug-Timings'
+
+# Per-rule filter rejections feed metrics; send "X-Debug-Funnel: 1" to get them back per request
+DEBUG_FUNNEL_HEADER = 'X-Debug-Funnel'
+
+# Requests slower than the threshold are appended to a JSON Lines slow log (<= 0 disables)
+SLOW_LOG_FILE = os.getenv('SLOW_LOG_FILE', 'logs/slow_requests.jsonl')
+SLOW_LOG_THRESHOLD_MS = float(os.getenv('SLOW_LOG_THRESHOLD_MS', '500'))
+slow_log = SlowRequestLog(SLOW_LOG_FILE, SLOW_LOG_THRESHOLD_MS) if SLOW_LOG_THRESHOLD_MS > 0 else None
+
+# Recommendation request bodies are captured for offline replay when QUERY_LOG_FILE is set
+QUERY_LOG_FILE = os.getenv('QUERY_LOG_FILE')
+QUERY_LOG_SAMPLE_RATE = float(os.getenv('QUERY_LOG_SAMPLE_RATE', '1.0'))
+query_log = QueryLog(QUERY_LOG_FILE, QUERY_LOG_SAMPLE_RATE) if QUERY_LOG_FILE else None
+if query_log is not None:
+    atexit.register(query_log.close)
+
+# Per-request deadline (<= 0 disables). The DB fetch gets the remaining budget as its
+# statement timeout and scoring stops early at the deadline; when the deadline is blown
+# before scoring starts, the last good result for the same query is served from an LRU
+# cache, or failing that a quick ranking of the mock catalog within SNAPSHOT_BUDGET_MS
+REQUEST_DEADLINE_MS = float(os.getenv('REQUEST_DEADLINE_MS', '2000'))
+SNAPSHOT_BUDGET_MS = float(os.getenv('SNAPSHOT_BUDGET_MS', '100'))
+DB_CONNECT_TIMEOUT_S = int(os.getenv('DB_CONNECT_TIMEOUT_S', '5'))
+result_cache = ResultCache(int(os.getenv('RESULT_CACHE_SIZE', '1000')))
+
+# Score components of recent rankings, for /api/recommendations/explain
+explanation_cache = ExplanationCache(int(os.getenv('EXPLANATION_CACHE_SIZE', '1000')))
+
+# Cache lookups per endpoint; hit ratio = hits / (hits + misses). The callbacks
+# look the caches up at scrape time, so a replaced cache is followed
+REGISTRY.register(CallbackGauge(
+    "wbth_result_cache_hits_total",
+    "Degraded requests served from the result cache",
+    lambda: result_cache.hits(),
+    label_names=("endpoint",),
+    metric_type="counter"
+))
+
+REGISTRY.register(CallbackGauge(
+    "wbth_result_cache_misses_total",
+    "Degraded requests with no cached result, served from a snapshot",
+    lambda: result_cache.misses(),
+    label_names=("endpoint",),
+    metric_type="counter"
+))
+
+REGISTRY.register(CallbackGauge(
+    "wbth_explanation_cache_hits_total",
+    "Explain requests answered from cached score components",
+    lambda: explanation_cache.hits(),
+    label_names=("endpoint",),
+    metric_type="counter"
+))
+
+REGISTRY.register(CallbackGauge(
+    "wbth_explanation_cache_misses_total",
+    "Explain requests that had to rank their query again",
+    lambda: explanation_cache.misses(),
+    label_names=("endpoint",),
+    metric_type="counter"
+))
+
+# Recommendation responses of COMPRESS_MIN_BYTES or more are brotli/gzip-compressed
+# when the client's Accept-Encoding allows it (brotli needs the brotli package)
+RESPONSE_COMPRESSION = os.getenv('RESPONSE_COMPRESSION', 'true').lower() in ('1', 'true', 'yes')
+COMPRESS_MIN_BYTES = int(os.getenv('COMPRESS_MIN_BYTES', '1024'))
+GZIP_LEVEL = int(os.getenv('GZIP_LEVEL', '5'))
+BROTLI_QUALITY = int(os.getenv('BROTLI_QUALITY', '4'))
+
+
+def _debug_header_set(header: str) -> bool:
+    """Whether a boolean debug header is set on the current request."""
+    return request.headers.get(header, '').lower() in ('1', 'true', 'yes')
+
+
+def _debug_timings_requested() -> bool:
+    """Whether the caller asked for per-request stage timings."""
+    return _debug_header_set(DEBUG_TIMINGS_HEADER)
+
+
+def _record_funnel(endpoint: str, funnel: Dict):
+    """Add one request's candidate funnel to the filter metrics."""
+    if not funnel:
+        return
+    FILTER_INPUT.inc(endpoint, amount=funnel['input'])
+    for rule, count in funnel['rejected'].items():
+        if count:
+            FILTER_REJECTIONS.inc(endpoint, rule, amount=count)
+
+
+def request_timer(debug: bool):
+    """Return a StageTimer for this request, or the no-op timer when timing is off."""
+    return StageTimer() if STAGE_TIMINGS_ENABLED or debug or slow_log is not None else NULL_TIMER
+
+
+def request_deadline(started: Optional[float] = None):
+    """
+    Return a request's deadline, or NO_DEADLINE when deadlines are off.
+    
+    Args:
+        started: perf_counter() value when the request arrived; time spent
+            since then (e.g. queued for admission) counts against the deadline
+    """
+    if REQUEST_DEADLINE_MS <= 0:
+        return NO_DEADLINE
+    waited_ms = (time.perf_counter() - started) * 1000 if started is not None else 0.0
+    return Deadline(REQUEST_DEADLINE_MS - waited_ms)
+
+
+def fetch_timeout_ms(deadline) -> Optional[float]:
+    """Statement timeout for a DB fetch: what is left of the deadline (None when off)."""
+    if not deadline.enabled:
+        return None
+    if deadline.expired():
+        raise DeadlineExceeded("deadline passed before the DB fetch")
+    return deadline.remaining_ms()
+
+
+def _mark_degraded(results: Dict, endpoint: str, reason: str, source: str):
+    """
+    Flag a response as degraded.
+
+    Args:
+        results: Response body to flag
+        endpoint: Endpoint name for the metric
+        reason: Why: "db_timeout" or "deadline"
+        source: What was served: "partial" (best-so-far top-k), "cache" or "snapshot"
+    """
+    results['degraded'] = True
+    results['degraded_reason'] = reason
+    results['degraded_source'] = source
+    DEGRADED_RESPONSES.inc(endpoint, reason)
+    logger.warning(
+        "Serving degraded %s response", endpoint,
+        extra={"endpoint": endpoint, "reason": reason, "source": source}
+    )
+
+
+def _snapshot_results(endpoint: str, query: Dict) -> Dict:
+    """Rank the mock catalog alone, within SNAPSHOT_BUDGET_MS."""
+    engine = AccommodationRecommender if endpoint == 'accommodations' else GuideRecommender
+    try:
+        catalog = mock_catalog(endpoint)
+    except OSError as e:
+        logger.error("Could not load snapshot catalog: %s", e)
+        return {"recommendations": [], "total_candidates": 0,
+                "message": "Recommendations are temporarily unavailable. Please retry."}
+    results = engine(catalog).recommend(**query, deadline=Deadline(SNAPSHOT_BUDGET_MS))
+    results.pop('partial', None)
+    for rec in results['recommendations']:
+        rec['in_system'] = False
+    return results
+
+
+def degraded_results(endpoint: str, reason: str, query: Dict, timer) -> Dict:
+    """
+    Results for a query whose deadline was blown before scoring: the cached result
+    for the same canonical query if there is one, otherwise a mock-catalog snapshot.
+    """
+    cached = result_cache.get(canonical_query(endpoint, query), endpoint)
+    if cached is not None:
+        results, age = cached
+        results['cache_age_s'] = round(age, 3)
+        source = 'cache'
+    else:
+        with timer.stage('snapshot'):
+            results = _snapshot_results(endpoint, query)
+        source = 'snapshot'
+    _mark_degraded(results, endpoint, reason, source)
+    return results
+
+
+def _finish_ranking(endpoint: str, query: Dict, results: Dict, explanations: Dict, include_reasons: bool) -> Dict:
+    """
+    Keep the ranking's score components for explain requests, then flag partial
+    (deadline-cut) results as degraded, or cache complete ones for fallback.
+    Results without reasons are not cached, so a fallback always has them.
+    """
+    canonical = canonical_query(endpoint, query)
+    explanation_cache.put(canonical, explanations)
+    if results.pop('partial', False):
+        _mark_degraded(results, endpoint, 'deadline', 'partial')
+    elif include_reasons:
+        result_cache.put(canonical, results)
+    return results
+
+
+def catalog_version(endpoint: str) -> str:
+    """
+    Identify the catalog a request ran against: data source plus mock catalog
+    file and mtime, and the number of in-place changes made to the loaded catalog.
+    """
+    endpoints = [endpoint] if endpoint in ('accommodations', 'guides') else ['accommodations', 'guides']
+    versions = []
+    for name in endpoints:
+        mock_file = MOCK_ACCOMMODATIONS_FILE if name == 'accommodations' else MOCK_GUIDES_FILE
+        try:
+            mtime = int(os.stat(mock_file).st_mtime)
+        except OSError:
+            mtime = 0
+        version = f"{os.path.basename(mock_file)}@{mtime}"
+        loaded = catalogs.current(name)
+        if loaded is not None and loaded.source[0] == mock_file and loaded.catalog.version:
+            version += f"+{loaded.catalog.version}"
+        versions.append(version)
+    return f"{DATA_SOURCE}:{'+'.join(versions)}"
+
+
+def log_slow_request(
+    endpoint: str,
+    results: Dict,
+    timer,
+    stats: Optional[Dict],
+    funnel: Optional[Dict],
+    query: Optional[Dict],
+    canonical: Optional[str]
+):
+    """Append a replayable entry for a slow request to the slow log."""
+    canonical = canonical or ''
+    # Trip results hold one result set per engine
+    sections = [results[name] for name in TRIP_SECTIONS if name in results] or [results]
+    entry = {
+        "endpoint": endpoint,
+        "elapsed_ms": round(timer.timings.get('total', 0.0), 3),
+        "tag": query_tag(canonical),
+        "query": query,
+        "catalog_version": catalog_version(endpoint),
+        "candidates": sum(part.get('total_candidates', 0) for part in sections),
+        "returned": sum(len(part.get('recommendations', [])) for part in sections),
+        "rows": stats or {},
+        "funnel": funnel or {},
+        "stages_ms": {name: round(ms, 3) for name, ms in timer.timings.items()},
+    }
+    try:
+        slow_log.record(entry)
+    except OSError as e:
+        logger.error("Could not write slow log entry: %s", e)
+    logger.warning(
+        "Slow %s request: %.1f ms", endpoint, entry["elapsed_ms"],
+        extra={"endpoint": endpoint, "tag": entry["tag"], "elapsed_ms": entry["elapsed_ms"]}
+    )
+
+
+def encode_response(results: Dict, timer, accept_encoding: str) -> Tuple[bytes, Optional[str]]:
+    """Serialize results and compress them if the client accepts it (serialize and compress stages)."""
+    with timer.stage('serialize'):
+        body = dumps(results)
+    if not RESPONSE_COMPRESSION:
+        return body, None
+    with timer.stage('compress'):
+        return compress(body, accept_encoding, COMPRESS_MIN_BYTES, GZIP_LEVEL, BROTLI_QUALITY)
+
+
+def _timed_response(
+    results: Dict,
+    timer,
+    endpoint: str,
+    debug: bool,
+    stats: Optional[Dict] = None,
+    funnel: Optional[Dict] = None,
+    fields: Optional[Tuple[str, ...]] = None
+):
+    """
+    Serialize results, record the request's stage timings and candidate count and, in debug mode,
+    attach them as a "timings" block and a Server-Timing header. Slow requests
+    also go to the slow log, with the DB/mock row counts in stats and the filter funnel.
+    Results not flagged by _mark_degraded are reported as "degraded": false;
+    recommendations are trimmed to fields when the caller asked for a subset.
+    """
+    select_fields(results, fields)
+    results.setdefault('degraded', False)
+    if debug:
+        results['timings'] = {name: round(ms, 3) for name, ms in timer.timings.items()}
+    body, encoding = encode_response(results, timer, request.headers.get('Accept-Encoding', ''))
+    response = Response(body, mimetype='application/json')
+    if encoding:
+        response.headers['Content-Encoding'] = encoding
+    if RESPONSE_COMPRESSION:
+        response.headers['Vary'] = 'Accept-Encoding'
+    record_response(results, timer, endpoint, stats, funnel, g.get('query'), g.get('canonical_query'))
+    if debug:
+        response.headers['Server-Timing'] = server_timing(timer)
+    return response
+
+
+def record_response(
+    results: Dict,
+    timer,
+    endpoint: str,
+    stats: Optional[Dict],
+    funnel: Optional[Dict],
+    query: Optional[Dict],
+    canonical: Optional[str]
+):
+    """Close the request's timer, record its stage timings and candidate count, and slow-log it if needed."""
+    timer.add('total', timer.elapsed_ms())
+    timer.observe_into(STAGE_LATENCY, endpoint)
+    if 'total_candidates' in results:
+        CANDIDATES.labels(endpoint).observe(results['total_candidates'])
+    if slow_log is not None and timer.enabled and slow_log.is_slow(timer.timings['total']):
+        log_slow_request(endpoint, results, timer, stats, funnel, query, canonical)
+
+
+def server_timing(timer) -> str:
+    """Server-Timing header value for a request's stage timings."""
+    return ', '.join(f"{name};dur={ms:.3f}" for name, ms in timer.timings.items())
+
+
 def get_db_connection():
     """Create and return a database connection."""
     try:
-        conn = psycopg2.connect(DATABASE_URL)
+        conn = psycopg2.connect(DATABASE_URL, connect_timeout=DB_CONNECT_TIMEOUT_S)
+        count_db_connection()
         return conn
     except Exception as e:
-        print(f"Database connection error: {e}")
+        logger.error("Database connection error: %s", e)
         raise
 
 
@@ -39,7 +644,8 @@ def fetch_accommodations_from_db(
     budget_max: Optional[float] = None,
     district: Optional[str] = None,
     province: Optional[str] = None,
-    amenities: Optional[List[str]] = None
+    amenities: Optional[List[str]] = None,
+    timeout_ms: Optional[float] = None
 ) -> List[Dict]:
     """
     Fetch accommodations from PostgreSQL database.
@@ -50,94 +656,163 @@ def fetch_accommodations_from_db(
         district: District filter (optional)
         province: Province filter (optional)
         amenities: List of required amenities (optional)
+        timeout_ms: Statement timeout; DeadlineExceeded is raised when it fires (optional)
     
     Returns:
         List of accommodation dictionaries in ML model format
     """
+    started = time.perf_counter()
+    if fake_db is not None:
+        count_db_connection()
+        return record_db_fetch(
+            'accommodations', started, fake_db.fetch_accommodations(budget_min, budget_max, district, province, timeout_ms)
+        )
+
     conn = get_db_connection()
     cur = conn.cursor(cursor_factory=RealDictCursor)
     
     try:
-        # Build dynamic query
-        query = """
-            SELECT 
-                a.id,
-                a.name,
-                a.type,
-                a.amenities,
-                a.rating,
-                a.district,
-                a.price_range_min,
-                a.price_range_max,
-                a.province,
-                a.interests,
-                a.travel_style,
-                a.group_size,
-                a.prior_bookings,
-                ap.company_name as provider_name
-            FROM accommodations a
-            LEFT JOIN accommodation_providers ap ON a.provider_id = ap.provider_id
-            WHERE 1=1
-        """
-        params = []
-        
-        # Add filters
-        if budget_min is not None and budget_max is not None:
-            query += " AND (a.price_range_min <= %s AND a.price_range_max >= %s)"
-            params.extend([budget_max, budget_min])
-        
-        if district:
-            query += " AND a.district = %s"
-            params.append(district)
-        
-        if province:
-            query += " AND a.province = %s"
-            params.append(province)
+        query, params = accommodations_query(budget_min, budget_max, district, province)
         
         # Execute query
+        if timeout_ms is not None:
+            cur.execute("SET statement_timeout = %s", [max(1, int(timeout_ms))])
         cur.execute(query, params)
-        results = cur.fetchall()
         
         # Transform to ML model format
-        accommodations = []
-        for row in results:
-            # Amenities filter removed - now treated as preference in scoring
-            # This allows partial amenity matches
-            
-            accommodation = {
-                'id': row['id'],
-                'name': row['name'],
-                'type': row.get('type') or [],
-                'amenities': row.get('amenities') or [],
-                'rating': row.get('rating'),
-                'district': row.get('district'),
-                'price_range_min': row.get('price_range_min') or 0,
-                'price_range_max': row.get('price_range_max') or 0,
-                'province': row.get('province'),
-                'interests': row.get('interests') or [],
-                'travel_style': row.get('travel_style') or [],
-                'group_size': row.get('group_size') or 1,
-                'prior_bookings': row.get('prior_bookings') or 0,
-                'availability': True,  # Assume available
-                'provider_name': row.get('provider_name'),
-                'in_system': True  # Flag to indicate this is real data
-            }
-            accommodations.append(accommodation)
+        accommodations = [accommodation_from_row(row) for row in cur.fetchall()]
         
-        return accommodations
+        return record_db_fetch('accommodations', started, accommodations)
     
+    except psycopg2.extensions.QueryCanceledError as e:
+        raise DeadlineExceeded(str(e)) from e
     finally:
         cur.close()
         conn.close()
 
 
+def _mock_source(endpoint: str) -> Tuple[str, int]:
+    """The endpoint's mock catalog file and its mtime."""
+    mock_file = MOCK_ACCOMMODATIONS_FILE if endpoint == 'accommodations' else MOCK_GUIDES_FILE
+    return mock_file, os.stat(mock_file).st_mtime_ns
+
+
+def _build_mock_catalog(endpoint: str) -> Tuple[Tuple[str, int], Catalog]:
+    """Parse the endpoint's mock file into a Catalog with its reason fragments."""
+    if endpoint == 'accommodations':
+        load, record_type, builders = iter_accommodations, AccommodationRecord, AccommodationRecommender.REASON_FRAGMENTS
+    else:
+        load, record_type, builders = iter_guides, GuideRecord, GuideRecommender.REASON_FRAGMENTS
+    source = _mock_source(endpoint)
+    records = (dict(record, in_system=False) for record in load(source[0]))
+    return source, Catalog(records, record_type, fragment_builders=builders)
+
+
+# Mock catalogs are parsed once per process (once in the master under a preloading
+# server, see preload()) into a Catalog shared by every request, together with
+# their reason fragments. Single items can then be changed in place through
+# served_catalog(). A changed file is re-read on a background thread while the
+# current catalog keeps serving, then swapped in (dropping in-place changes)
+catalogs = CatalogManager(_build_mock_catalog)
+
+
+def served_catalog(endpoint: str) -> Catalog:
+    """
+    Return the in-memory Catalog behind the endpoint's mock records, loading
+    it from its file on first use.
+    
+    Args:
+        endpoint: "accommodations" or "guides"
+    
+    Returns:
+        The endpoint's Catalog; use upsert/patch/remove on it for incremental updates
+    """
+    return catalogs.get(endpoint, _mock_source(endpoint))
+
+
+def mock_catalog(endpoint: str) -> List:
+    """
+    Return the endpoint's mock catalog, every record marked not in system.
+    
+    The list is a snapshot: changes made to the catalog later are not seen
+    through it. The list and its records are shared between requests and
+    must not be mutated.
+    
+    Args:
+        endpoint: "accommodations" or "guides"
+    
+    Returns:
+        List of AccommodationRecords or GuideRecords
+    """
+    return served_catalog(endpoint).view().records()
+
+
+def mock_fragments(endpoint: str) -> Optional[FragmentIndex]:
+    """
+    Reason fragments of the endpoint's mock catalog, for the engines.
+    
+    Does no I/O: returns None if mock_catalog() has not loaded the catalog yet,
+    in which case no mock records are being ranked either. Records of a catalog
+    swapped out meanwhile are not in the index and get their fragments built lazily.
+    """
+    loaded = catalogs.current(endpoint)
+    return loaded.catalog.fragments if loaded is not None else None
+
+
+def add_mock_fallback(
+    endpoint: str,
+    real_rows: List[Dict],
+    min_total: int,
+    timer=NULL_TIMER,
+    stats: Optional[Dict] = None
+) -> List[Dict]:
+    """
+    Top up fetched rows with the endpoint's mock catalog when there are too few.
+    
+    Args:
+        endpoint: "accommodations" or "guides"
+        real_rows: Rows fetched from the data source
+        min_total: Minimum number of rows before mock data is added
+        timer: StageTimer for the mock_load stage (optional)
+        stats: Dict filled with db_rows and mock_rows counts (optional)
+    
+    Returns:
+        List of rows (real + mock if needed)
+    """
+    logger.debug("Found %d real %s from database", len(real_rows), endpoint)
+    CATALOG_REQUESTS.inc(endpoint)
+    
+    # If insufficient real data to satisfy top_k, supplement with mock data
+    if len(real_rows) < min_total:
+        MOCK_FALLBACKS.inc(endpoint)
+        logger.info(
+            "Insufficient %s, adding mock data", endpoint,
+            extra={"endpoint": endpoint, "found": len(real_rows), "target": min_total}
+        )
+        
+        with timer.stage('mock_load'):
+            mock_rows = mock_catalog(endpoint)
+        
+        all_rows = real_rows + mock_rows
+    else:
+        mock_rows = []
+        all_rows = real_rows
+    
+    if stats is not None:
+        stats.update(db_rows=len(real_rows), mock_rows=len(mock_rows))
+    return all_rows
+
+
 def get_hybrid_accommodations(
     budget_min: float,
     budget_max: float,
     required_amenities: List[str],
     district: Optional[str] = None,
     province: Optional[str] = None,
-    min_total: int = 10
+    min_total: int = 10,
+    timer=NULL_TIMER,
+    stats: Optional[Dict] = None,
+    deadline=NO_DEADLINE
 ) -> List[Dict]:
     """
     Get accommodations with hybrid approach: real DB data + mock data fallback.
@@ -149,38 +824,78 @@ def get_hybrid_accommodations(
         district: Preferred district
         province: Preferred province
         min_total: Minimum number of total accommodations before using mock data
+        timer: StageTimer for the db_fetch and mock_load stages (optional)
+        stats: Dict filled with db_rows and mock_rows counts (optional)
+        deadline: Request deadline; the DB fetch gets what is left of it as its
+            statement timeout and raises DeadlineExceeded past it (optional)
     
     Returns:
         List of accommodations (real + mock if needed)
     """
     # Fetch real accommodations from database
-    real_accommodations = fetch_accommodations_from_db(
-        budget_min=budget_min,
-        budget_max=budget_max,
-        district=district,
-        province=province,
-        amenities=required_amenities
-    )
+    with timer.stage('db_fetch'):
+        real_accommodations = fetch_accommodations_from_db(
+            budget_min=budget_min,
+            budget_max=budget_max,
+            district=district,
+            province=province,
+            amenities=required_amenities,
+            timeout_ms=fetch_timeout_ms(deadline)
+        )
     
-    print(f"Found {len(real_accommodations)} real accommodations from database")
+    return add_mock_fallback('accommodations', real_accommodations, min_total, timer, stats)
+
+
+def rank_accommodations(
+    query: Dict,
+    accommodations: List[Dict],
+    timer=NULL_TIMER,
+    deadline=NO_DEADLINE,
+    funnel: Optional[Dict] = None,
+    include_reasons: bool = True
+) -> Dict:
+    """
+    Run the accommodation engine over fetched accommodations.
     
-    # If insufficient real data to satisfy top_k, supplement with mock data
-    if len(real_accommodations) < min_total:
-        print(f"Insufficient data to meet target of {min_total} (found {len(real_accommodations)}), adding mock data")
-        
-        # Load mock accommodations
-        mock_accommodations = load_accommodations('data/mock_accommodations.json')
-        
-        # Mark mock data as not in system
-        for acc in mock_accommodations:
-            acc['in_system'] = False
-        
-        # Combine real and mock
-        all_accommodations = real_accommodations + mock_accommodations
-    else:
-        all_accommodations = real_accommodations
+    Args:
+        query: Parsed accommodation query
+        accommodations: Hybrid catalog from get_hybrid_accommodations
+        timer: StageTimer for the engine and annotate stages (optional)
+        deadline: Request deadline; a blown deadline degrades the result (optional)
+        funnel: Dict filled with the candidate funnel (optional)
+        include_reasons: If False, reasons are left to /api/recommendations/explain
+    
+    Returns:
+        Recommendation results, flagged when degraded
+    """
+    if not accommodations:
+        return {
+            "recommendations": [],
+            "total_candidates": 0,
+            "message": "No accommodations found. Try adjusting your filters."
+        }
     
-    return all_accommodations
+    if deadline.expired():
+        return degraded_results('accommodations', 'deadline', query, timer)
+    
+    # Initialize recommender with hybrid data
+    recommender = AccommodationRecommender(accommodations, fragments=mock_fragments('accommodations'))
+    
+    # Generate recommendations (best-so-far top-k if the deadline hits mid-scoring)
+    explanations = {}
+    results = recommender.recommend(
+        **query, timer=timer, funnel=funnel, deadline=deadline,
+        include_reasons=include_reasons, explanations=explanations
+    )
+    _record_funnel('accommodations', funnel)
+    
+    # Add in_system flag to recommendations
+    with timer.stage('annotate'):
+        for rec in results['recommendations']:
+            # Take the in_system flag from the ranked accommodation
+            rec['in_system'] = explanations[rec['id']][0].in_system
+    
+    return _finish_ranking('accommodations', query, results, explanations, include_reasons)
 
 
 @app.route('/api/recommendations/accommodations', methods=['POST'])
@@ -207,6 +922,9 @@ def recommend_accommodations():
         JSON response with recommendations
     """
     try:
+        deadline = request_deadline(g.get('request_started'))
+        debug_timings = _debug_timings_requested()
+        timer = request_timer(debug_timings)
         data = request.get_json()
         
         # Validate required fields
@@ -214,68 +932,42 @@ def recommend_accommodations():
             return jsonify({"error": "No data provided"}), 400
         
         # Extract parameters with defaults
-        budget_min = data.get('budget_min', 1000.0)
-        budget_max = data.get('budget_max', 50000.0)
-        required_amenities = data.get('required_amenities', [])
-        interests = data.get('interests', [])
-        travel_style = data.get('travel_style', 'budget')
-        group_size = data.get('group_size', 1)
-        accommodation_type = data.get('accommodation_type', 'any')
-        district = data.get('district')
-        province = data.get('province')
-        city_only = data.get('city_only', False)
-        top_k = data.get('top_k', 10)
+        query = parse_accommodation_query(data)
+        _set_request_query('accommodations', query, data)
+        try:
+            fields = parse_response_fields(data)
+        except ValueError as e:
+            return jsonify({"error": str(e)}), 400
         
         # Get hybrid accommodations (real + mock if needed)
-        accommodations = get_hybrid_accommodations(
-            budget_min=budget_min,
-            budget_max=budget_max,
-            required_amenities=required_amenities,
-            district=district,
-            province=province,
-            min_total=top_k
-        )
+        stats = {}
+        try:
+            accommodations = get_hybrid_accommodations(
+                budget_min=query['budget_min'],
+                budget_max=query['budget_max'],
+                required_amenities=query['required_amenities'],
+                district=query['district'],
+                province=query['province'],
+                min_total=query['top_k'],
+                timer=timer,
+                stats=stats,
+                deadline=deadline
+            )
+        except DeadlineExceeded:
+            results = degraded_results('accommodations', 'db_timeout', query, timer)
+            return _timed_response(results, timer, 'accommodations', debug_timings, stats, fields=fields), 200
         
-        if not accommodations:
-            return jsonify({
-                "recommendations": [],
-                "total_candidates": 0,
-                "message": "No accommodations found. Try adjusting your filters."
-            }), 200
-        
-        # Initialize recommender with hybrid data
-        recommender = AccommodationRecommender(accommodations)
-        
-        # Generate recommendations
-        results = recommender.recommend(
-            budget_min=budget_min,
-            budget_max=budget_max,
-            required_amenities=required_amenities,
-            interests=interests,
-            travel_style=travel_style,
-            group_size=group_size,
-            accommodation_type=accommodation_type,
-            district=district,
-            province=province,
-            city_only=city_only,
-            top_k=top_k
+        funnel = {}
+        results = rank_accommodations(
+            query, accommodations, timer, deadline, funnel, parse_include_reasons(data, fields)
         )
+        if funnel and _debug_header_set(DEBUG_FUNNEL_HEADER):
+            results['funnel'] = funnel
         
-        # Add in_system flag to recommendations
-        for rec in results['recommendations']:
-            # Find the original accommodation to get in_system flag
-            acc_id = rec['id']
-            for acc in accommodations:
-                if acc['id'] == acc_id:
-                    rec['in_system'] = acc.get('in_system', False)
-                    break
-        
-        return jsonify(results), 200
+        return _timed_response(results, timer, 'accommodations', debug_timings, stats, funnel, fields), 200
     
     except Exception as e:
-        print(f"Error in recommend_accommodations: {e}")
-        import traceback
-        traceback.print_exc()
+        logger.exception("Error in recommend_accommodations: %s", e)
         return jsonify({"error": str(e)}), 500
 
 
@@ -284,69 +976,40 @@ def fetch_guides_from_db(
     budget_max: Optional[float] = None,
     city: Optional[str] = None,
     province: Optional[str] = None,
-    languages: Optional[List[str]] = None
+    languages: Optional[List[str]] = None,
+    timeout_ms: Optional[float] = None
 ) -> List[Dict]:
-    """Fetch guides from PostgreSQL database."""
+    """Fetch guides from PostgreSQL database (DeadlineExceeded when timeout_ms fires)."""
+    started = time.perf_counter()
+    if fake_db is not None:
+        count_db_connection()
+        return record_db_fetch('guides', started, fake_db.fetch_guides(budget_min, budget_max, city, province, timeout_ms))
+
     conn = get_db_connection()
     cur = conn.cursor(cursor_factory=RealDictCursor)
     
     try:
-        query = """
-            SELECT 
-                g.user_id as id,
-                u.name,
-                g.experience,
-                g.languages,
-                g.expertise,
-                g.rating,
-                g.price,
-                g.availability,
-                g.city,
-                g.province,
-                g.gender
-            FROM guides g
-            LEFT JOIN users u ON g.user_id = u.id
-            WHERE 1=1
-        """
-        params = []
-        
-        if budget_min is not None and budget_max is not None:
-            query += " AND (g.price >= %s AND g.price <= %s)"
-            params.extend([budget_min, budget_max])
-        
-        if city:
-            query += " AND g.city = %s"
-            params.append(city)
-        
-        if province:
-            query += " AND g.province = %s"
-            params.append(province)
+        query, params = guides_query(budget_min, budget_max, city, province)
         
+        if timeout_ms is not None:
+            cur.execute("SET statement_timeout = %s", [max(1, int(timeout_ms))])
         cur.execute(query, params)
         results = cur.fetchall()
         
         guides = []
         for row in results:
-            guide = {
-                'id': row['id'],
-                'user_id': row['id'],
-                'name': row['name'],
-                'experience': row.get('experience') or [],
-                'languages': row.get('languages') or [],
-                'expertise': row.get('expertise') or [],
-                'rating': row.get('rating'),
-                'price': row.get('price') or 0,
-                'availability': row.get('availability', True),
-                'city': row.get('city'),
-                'province': row.get('province'),
-                'gender': row.get('gender'),
-                'in_system': True
-            }
-            print(f"DEBUG: Fetched guide {guide['name']} with price {guide['price']} (type: {type(guide['price'])})")
+            guide = guide_from_row(row)
+            if logger.isEnabledFor(logging.DEBUG) and row_sampler.sample():
+                logger.debug(
+                    "Fetched guide",
+                    extra={"guide": guide['name'], "price": guide['price'], "price_type": type(guide['price']).__name__}
+                )
             guides.append(guide)
         
-        print(f"DEBUG: Total guides fetched from DB: {len(guides)}")
-        return guides
+        logger.debug("Total guides fetched from DB: %d", len(guides))
+        return record_db_fetch('guides', started, guides)
+    except psycopg2.extensions.QueryCanceledError as e:
+        raise DeadlineExceeded(str(e)) from e
     finally:
         cur.close()
         conn.close()
@@ -358,93 +1021,329 @@ def get_hybrid_guides(
     languages: List[str],
     city: Optional[str] = None,
     province: Optional[str] = None,
-    min_total: int = 10
+    min_total: int = 10,
+    timer=NULL_TIMER,
+    stats: Optional[Dict] = None,
+    deadline=NO_DEADLINE
 ) -> List[Dict]:
     """Get guides with hybrid approach: real DB data + mock data fallback."""
-    real_guides = fetch_guides_from_db(
-        budget_min=budget_min,
-        budget_max=budget_max,
-        city=city,
-        province=province,
-        languages=languages
-    )
+    with timer.stage('db_fetch'):
+        real_guides = fetch_guides_from_db(
+            budget_min=budget_min,
+            budget_max=budget_max,
+            city=city,
+            province=province,
+            languages=languages,
+            timeout_ms=fetch_timeout_ms(deadline)
+        )
     
-    print(f"Found {len(real_guides)} real guides from database")
+    return add_mock_fallback('guides', real_guides, min_total, timer, stats)
+
+
+def rank_guides(
+    query: Dict,
+    guides: List[Dict],
+    timer=NULL_TIMER,
+    deadline=NO_DEADLINE,
+    funnel: Optional[Dict] = None,
+    include_reasons: bool = True
+) -> Dict:
+    """Run the guide engine over fetched guides (see rank_accommodations)."""
+    if not guides:
+        return {
+            "recommendations": [],
+            "total_candidates": 0,
+            "message": "No guides found. Try adjusting your filters."
+        }
     
-    if len(real_guides) < min_total:
-        print(f"Insufficient guides to meet target of {min_total} (found {len(real_guides)}), adding mock data")
-        
-        with open('data/mock_guides.json', 'r', encoding='utf-8') as f:
-            mock_guides = json.load(f)
-        
-        for guide in mock_guides:
-            guide['in_system'] = False
-        
-        all_guides = real_guides + mock_guides
-    else:
-        all_guides = real_guides
+    if deadline.expired():
+        return degraded_results('guides', 'deadline', query, timer)
     
-    return all_guides
+    recommender = GuideRecommender(guides, fragments=mock_fragments('guides'))
+    explanations = {}
+    results = recommender.recommend(
+        **query, timer=timer, funnel=funnel, deadline=deadline,
+        include_reasons=include_reasons, explanations=explanations
+    )
+    _record_funnel('guides', funnel)
+    return _finish_ranking('guides', query, results, explanations, include_reasons)
 
 
 @app.route('/api/recommendations/guides', methods=['POST'])
 def recommend_guides():
     """Generate guide recommendations based on user preferences."""
     try:
+        deadline = request_deadline(g.get('request_started'))
+        debug_timings = _debug_timings_requested()
+        timer = request_timer(debug_timings)
         data = request.get_json()
         
         if not data:
             return jsonify({"error": "No data provided"}), 400
         
-        budget_min = data.get('budget_min', 2000.0)
-        budget_max = data.get('budget_max', 20000.0)
-        languages = data.get('languages', ["English"])
-        expertise = data.get('expertise', [])
-        city = data.get('city')
-        province = data.get('province')
-        city_only = data.get('city_only', False)
-        gender_preference = data.get('gender_preference')
-        top_k = data.get('top_k', 10)
+        query = parse_guide_query(data)
+        _set_request_query('guides', query, data)
+        try:
+            fields = parse_response_fields(data)
+        except ValueError as e:
+            return jsonify({"error": str(e)}), 400
         
-        if not languages:
+        if not query['languages']:
             return jsonify({"error": "At least one language is required"}), 400
         
-        guides = get_hybrid_guides(
-            budget_min=budget_min,
-            budget_max=budget_max,
-            languages=languages,
-            city=city,
-            province=province,
-            min_total=top_k
-        )
+        stats = {}
+        try:
+            guides = get_hybrid_guides(
+                budget_min=query['budget_min'],
+                budget_max=query['budget_max'],
+                languages=query['languages'],
+                city=query['city'],
+                province=query['province'],
+                min_total=query['top_k'],
+                timer=timer,
+                stats=stats,
+                deadline=deadline
+            )
+        except DeadlineExceeded:
+            results = degraded_results('guides', 'db_timeout', query, timer)
+            return _timed_response(results, timer, 'guides', debug_timings, stats, fields=fields), 200
         
-        if not guides:
-            return jsonify({
-                "recommendations": [],
-                "total_candidates": 0,
-                "message": "No guides found. Try adjusting your filters."
-            }), 200
+        funnel = {}
+        results = rank_guides(query, guides, timer, deadline, funnel, parse_include_reasons(data, fields))
+        if funnel and _debug_header_set(DEBUG_FUNNEL_HEADER):
+            results['funnel'] = funnel
         
-        recommender = GuideRecommender(guides)
+        return _timed_response(results, timer, 'guides', debug_timings, stats, funnel, fields), 200
+    
+    except Exception as e:
+        logger.exception("Error in recommend_guides: %s", e)
+        return jsonify({"error": str(e)}), 500
+
+
+# Trip requests fetch both catalogs concurrently on a small per-process thread pool
+TRIP_FETCH_WORKERS = int(os.getenv('TRIP_FETCH_WORKERS', '8'))
+_trip_pool: Optional[ThreadPoolExecutor] = None
+_trip_pool_pid: Optional[int] = None
+_trip_pool_lock = threading.Lock()
+
+
+def _trip_fetch_pool() -> ThreadPoolExecutor:
+    """Return this process's fetch pool; a forked worker creates its own on first use."""
+    global _trip_pool, _trip_pool_pid
+    if _trip_pool is not None and _trip_pool_pid == os.getpid():
+        return _trip_pool
+    with _trip_pool_lock:
+        if _trip_pool is None or _trip_pool_pid != os.getpid():
+            _trip_pool = ThreadPoolExecutor(max_workers=TRIP_FETCH_WORKERS, thread_name_prefix='trip-fetch')
+            _trip_pool_pid = os.getpid()
+        return _trip_pool
+
+
+@app.route('/api/recommendations/trip', methods=['POST'])
+def recommend_trip():
+    """
+    Recommend accommodations and guides for one trip in a single request.
+    
+    Both catalog fetches run concurrently, so the fetch phase costs the slower
+    of the two rather than their sum; both engines then run on the results.
+    
+    Expected JSON body: fields shared by both engines at the top level, and
+    per-engine fields (overriding the shared ones) under "accommodations" and "guides":
+    {
+        "province": "Central",
+        "top_k": 5,
+        "accommodations": {"budget_min": 5000.0, "budget_max": 15000.0, "district": "Kandy"},
+        "guides": {"budget_min": 2000.0, "budget_max": 10000.0, "languages": ["English"], "city": "Kandy"}
+    }
+    
+    Returns:
+        JSON response with "accommodations" and "guides" results, each as
+        returned by its own endpoint, and an overall "degraded" flag
+    """
+    try:
+        deadline = request_deadline(g.get('request_started'))
+        debug_timings = _debug_timings_requested()
+        timer = request_timer(debug_timings)
+        data = request.get_json()
         
-        results = recommender.recommend(
-            budget_min=budget_min,
-            budget_max=budget_max,
-            languages=languages,
-            expertise=expertise,
-            city=city,
-            province=province,
-            city_only=city_only,
-            gender_preference=gender_preference,
-            top_k=top_k
-        )
+        if not data:
+            return jsonify({"error": "No data provided"}), 400
+        
+        query = parse_trip_query(data)
+        _set_request_query('trip', query, data)
+        acc_query, guide_query = query['accommodations'], query['guides']
+        bodies = split_trip_body(data)
+        try:
+            fields = {section: parse_response_fields(body) for section, body in bodies.items()}
+        except ValueError as e:
+            return jsonify({"error": str(e)}), 400
         
-        return jsonify(results), 200
+        if not guide_query['languages']:
+            return jsonify({"error": "At least one language is required"}), 400
+        
+        # Both fetches in flight at once; the per-fetch timers are off because
+        # StageTimer is not thread-safe, and db_fetch records the wall time of both
+        stats = {'accommodations': {}, 'guides': {}}
+        pool = _trip_fetch_pool()
+        with timer.stage('db_fetch'):
+            futures = {
+                'accommodations': pool.submit(
+                    get_hybrid_accommodations,
+                    budget_min=acc_query['budget_min'],
+                    budget_max=acc_query['budget_max'],
+                    required_amenities=acc_query['required_amenities'],
+                    district=acc_query['district'],
+                    province=acc_query['province'],
+                    min_total=acc_query['top_k'],
+                    stats=stats['accommodations'],
+                    deadline=deadline
+                ),
+                'guides': pool.submit(
+                    get_hybrid_guides,
+                    budget_min=guide_query['budget_min'],
+                    budget_max=guide_query['budget_max'],
+                    languages=guide_query['languages'],
+                    city=guide_query['city'],
+                    province=guide_query['province'],
+                    min_total=guide_query['top_k'],
+                    stats=stats['guides'],
+                    deadline=deadline
+                ),
+            }
+            fetched = {}
+            for section, future in futures.items():
+                try:
+                    fetched[section] = future.result()
+                except DeadlineExceeded:
+                    fetched[section] = None
+        
+        # Engine stages accumulate over both sections
+        rankers = {'accommodations': rank_accommodations, 'guides': rank_guides}
+        results = {}
+        funnels = {}
+        for section, rank in rankers.items():
+            if fetched[section] is None:
+                results[section] = degraded_results(section, 'db_timeout', query[section], timer)
+                continue
+            funnels[section] = {}
+            results[section] = rank(
+                query[section], fetched[section], timer, deadline, funnels[section],
+                parse_include_reasons(bodies[section], fields[section])
+            )
+            if funnels[section] and _debug_header_set(DEBUG_FUNNEL_HEADER):
+                results[section]['funnel'] = funnels[section]
+        
+        for section in rankers:
+            select_fields(results[section], fields[section])
+        results['degraded'] = any(results[section].get('degraded', False) for section in rankers)
+        return _timed_response(results, timer, 'trip', debug_timings, stats, funnels), 200
     
     except Exception as e:
-        print(f"Error in recommend_guides: {e}")
-        import traceback
-        traceback.print_exc()
+        logger.exception("Error in recommend_trip: %s", e)
+        return jsonify({"error": str(e)}), 500
+
+
+ENGINES = {'accommodations': AccommodationRecommender, 'guides': GuideRecommender}
+
+
+def explanation_response(endpoint: str, query: Dict, item_id, ranked: Dict, cached: bool):
+    """
+    Build the explain response for one item of a ranking from ExplanationCache.
+    
+    Returns:
+        Tuple of (response body, HTTP status)
+    """
+    entry = ranked.get(str(item_id))
+    if entry is None:
+        return {"error": "Item is not among the recommendations for this query"}, 404
+    item, components = entry
+    return {
+        "endpoint": endpoint,
+        "item_id": item_id,
+        "reasons": ENGINES[endpoint]([], fragments=mock_fragments(endpoint)).explain(item, components, **query),
+        "score_components": {
+            name: round(value, 3) if isinstance(value, float) else value
+            for name, value in components.items()
+        },
+        "cached": cached,
+    }, 200
+
+
+def parse_explain_request(data: Optional[Dict]):
+    """
+    Validate an explain request body.
+    
+    Returns:
+        Tuple of (endpoint, parsed query, item id)
+    
+    Raises:
+        ValueError: With the message for a 400 response
+    """
+    if not data:
+        raise ValueError("No data provided")
+    endpoint = data.get('endpoint')
+    if endpoint not in QUERY_PARSERS:
+        raise ValueError('"endpoint" must be "accommodations" or "guides"')
+    item_id = data.get('item_id')
+    if item_id is None:
+        raise ValueError('"item_id" is required')
+    query = QUERY_PARSERS[endpoint](data.get('query') or {})
+    if endpoint == 'guides' and not query['languages']:
+        raise ValueError("At least one language is required")
+    return endpoint, query, item_id
+
+
+@app.route('/api/recommendations/explain', methods=['POST'])
+def explain_recommendation():
+    """
+    Reasons for one recommended item, built on demand.
+    
+    Expected JSON body: the endpoint, the recommendation request body under
+    "query", and the id of an item it returned:
+    {
+        "endpoint": "guides",
+        "query": {"languages": ["English"], "city": "Kandy"},
+        "item_id": "u-1"
+    }
+    
+    The score components are taken from the recent ranking of the same
+    query; if it has been evicted the query is ranked again (without reasons).
+    
+    Returns:
+        JSON response with the item's reasons and score components
+    """
+    try:
+        try:
+            endpoint, query, item_id = parse_explain_request(request.get_json(silent=True))
+        except ValueError as e:
+            return jsonify({"error": str(e)}), 400
+        
+        ranked = explanation_cache.get(canonical_query(endpoint, query), endpoint)
+        cached = ranked is not None
+        if not cached:
+            deadline = request_deadline(g.get('request_started'))
+            try:
+                if endpoint == 'accommodations':
+                    rows = get_hybrid_accommodations(
+                        query['budget_min'], query['budget_max'], query['required_amenities'],
+                        query['district'], query['province'], query['top_k'], deadline=deadline
+                    )
+                    rank_accommodations(query, rows, deadline=deadline, include_reasons=False)
+                else:
+                    rows = get_hybrid_guides(
+                        query['budget_min'], query['budget_max'], query['languages'],
+                        query['city'], query['province'], query['top_k'], deadline=deadline
+                    )
+                    rank_guides(query, rows, deadline=deadline, include_reasons=False)
+            except DeadlineExceeded:
+                return jsonify({"error": "Could not rank the query in time, please retry"}), 503
+            ranked = explanation_cache.get(canonical_query(endpoint, query)) or {}
+        
+        body, status = explanation_response(endpoint, query, item_id, ranked, cached)
+        return jsonify(body), status
+    
+    except Exception as e:
+        logger.exception("Error in explain_recommendation: %s", e)
         return jsonify({"error": str(e)}), 500
 
 
@@ -454,13 +1353,253 @@ def match_guides():
     return recommend_guides()
 
 
+# Set by preload() once the catalogs are loaded and both engines have run; /ready reports it
+engines_ready = threading.Event()
+
+REGISTRY.register(CallbackGauge(
+    "wbth_engines_ready",
+    "1 once catalogs are loaded and both engines are warm",
+    lambda: 1 if engines_ready.is_set() else 0
+))
+
+
+# Startup warm-up: before the process reports ready, run the WARMUP_QUERIES hottest
+# queries of WARMUP_QUERY_LOG (default QUERY_LOG_FILE), or the canned query shapes,
+# on the mock catalogs
+WARMUP_ENABLED = os.getenv('WARMUP_ENABLED', 'true').lower() in ('1', 'true', 'yes')
+WARMUP_QUERIES = int(os.getenv('WARMUP_QUERIES', '20'))
+WARMUP_QUERY_LOG = os.getenv('WARMUP_QUERY_LOG', QUERY_LOG_FILE)
+
+
+def _warm_query(endpoint: str, body: Dict):
+    """
+    Rank and serialize one query the way its request would, against the
+    in-memory mock catalog.
+    
+    The database is never queried: warm-up runs in the gunicorn master before
+    fork, where no connection may be opened, and a database that is down
+    would hold every query up for the connect timeout.
+    """
+    query = QUERY_PARSERS[endpoint](body)
+    if endpoint == 'guides' and not query['languages']:
+        raise ValueError("At least one language is required")
+    rows = list(mock_catalog(endpoint))
+    rank = rank_accommodations if endpoint == 'accommodations' else rank_guides
+    results = rank(query, rows, deadline=request_deadline())
+    encode_response(results, NULL_TIMER, 'br, gzip')
+
+
+def warm_up(queries: Optional[List[Tuple[str, Dict]]] = None) -> Dict:
+    """
+    Run warm-up queries through the rank and serialize path of requests, on
+    the mock catalogs and without touching the database.
+    
+    Their results land in the result cache (the degraded-response fallback)
+    and the explanation cache. Everything requests otherwise build on first
+    use is built too: fragment and display-text caches, the serializer and
+    compressors. Warm-up queries are not counted in the HTTP metrics or
+    captured in the query log.
+    
+    Args:
+        queries: (endpoint, request body) pairs; defaults to warmup_queries()
+            of WARMUP_QUERY_LOG, at most WARMUP_QUERIES of them
+    
+    Returns:
+        Dictionary with the number of queries run and failed, and the time taken
+    """
+    if queries is None:
+        queries = warmup_queries(WARMUP_QUERY_LOG, WARMUP_QUERIES)
+    started = time.perf_counter()
+    failed = 0
+    for endpoint, body in queries:
+        try:
+            _warm_query(endpoint, body)
+        except Exception as e:
+            failed += 1
+            logger.warning("Warm-up query failed: %s", e, extra={"endpoint": endpoint})
+    return {
+        "queries": len(queries),
+        "failed": failed,
+        "elapsed_ms": round((time.perf_counter() - started) * 1000, 1),
+    }
+
+
+def preload():
+    """
+    Load the catalogs and run both engines once, then warm up (WARMUP_ENABLED)
+    and only then mark the process ready.
+    
+    Preloading servers (wsgi.py) call this in the master before forking, so
+    the parsed catalogs, imported modules and warmed caches are shared
+    copy-on-write by every worker instead of being built on each worker's
+    first requests.
+    """
+    started = time.perf_counter()
+    warm_queries = {
+        'accommodations': (AccommodationRecommender, parse_accommodation_query({})),
+        'guides': (GuideRecommender, parse_guide_query({})),
+    }
+    for endpoint, (engine, query) in warm_queries.items():
+        catalog = mock_catalog(endpoint)
+        engine(catalog).recommend(**query)
+    warmed = warm_up() if WARMUP_ENABLED else None
+    engines_ready.set()
+    logger.info(
+        "Engines ready", extra={
+            "elapsed_ms": round((time.perf_counter() - started) * 1000, 1),
+            "accommodations": len(mock_catalog('accommodations')),
+            "guides": len(mock_catalog('guides')),
+            "warmup": warmed,
+        }
+    )
+
+
+def reload_catalogs(data: Optional[Dict]) -> Tuple[Dict, int]:
+    """
+    Rebuild mock catalogs in the background and wait until they are swapped in.
+    
+    Requests keep being served from the current catalogs meanwhile. Only this
+    worker process reloads; under a multi-worker server, each worker has its own copy.
+    
+    Args:
+        data: Request body; {"endpoints": [...]} limits the reload (default: both catalogs)
+    
+    Returns:
+        Response body with each catalog's build report, and the HTTP status
+    """
+    endpoints = (data or {}).get('endpoints') or list(ENGINES)
+    if isinstance(endpoints, str):
+        endpoints = [endpoints]
+    unknown = [endpoint for endpoint in endpoints if endpoint not in ENGINES]
+    if unknown:
+        return {"error": f"Unknown catalogs: {', '.join(map(str, unknown))}"}, 400
+    
+    started = time.perf_counter()
+    builds = {endpoint: catalogs.reload(endpoint) for endpoint in endpoints}
+    reloaded, errors = {}, {}
+    for endpoint, build in builds.items():
+        try:
+            loaded = build.result()
+        except Exception as e:
+            errors[endpoint] = str(e)
+            continue
+        reloaded[endpoint] = dict(loaded.summary(), file=os.path.basename(loaded.source[0]))
+    
+    body = {
+        "reloaded": reloaded,
+        "elapsed_ms": round((time.perf_counter() - started) * 1000, 1),
+        "pid": os.getpid(),
+    }
+    if errors:
+        body["errors"] = errors
+        return body, 500
+    return body, 200
+
+
+@app.route('/api/admin/catalogs/reload', methods=['POST'])
+def reload_catalogs_endpoint():
+    """Rebuild the mock catalogs without pausing requests; needs CATALOG_ADMIN_TOKEN."""
+    if not catalog_admin_authorized(request.headers.get('X-Admin-Token', '')):
+        return jsonify({"error": "Admin token required"}), 403
+    body, status = reload_catalogs(request.get_json(silent=True))
+    return jsonify(body), status
+
+
+def apply_catalog_changes(data: Optional[Dict]) -> Tuple[Dict, int]:
+    """
+    Apply item changes to a served mock catalog without rebuilding it.
+    
+    Each change is visible to requests as soon as it is applied. Changes stay
+    in this worker process and are dropped when the catalog is reloaded from
+    its file. The database is not touched.
+    
+    Args:
+        data: Request body: {"endpoint": "accommodations" | "guides",
+            "upsert": [item, ...], "patch": [{"id": ..., "fields": {...}}, ...],
+            "remove": [id, ...]}
+    
+    Returns:
+        Response body with the counts applied, ids not found and the catalog's
+        version, and the HTTP status
+    """
+    data = data or {}
+    endpoint = data.get('endpoint')
+    if endpoint not in ENGINES:
+        return {"error": '"endpoint" must be "accommodations" or "guides"'}, 400
+    upserts, patches, removals = data.get('upsert') or [], data.get('patch') or [], data.get('remove') or []
+    if not all(isinstance(item, dict) and 'id' in item for item in upserts + patches):
+        return {"error": 'Every upserted and patched item needs an "id"'}, 400
+    
+    catalog = served_catalog(endpoint)
+    missing = []
+    for item in upserts:
+        catalog.upsert(item)
+    for change in patches:
+        try:
+            catalog.patch(change['id'], change.get('fields') or {})
+        except KeyError:
+            missing.append(change['id'])
+        except ValueError as e:
+            return {"error": str(e), "id": change['id']}, 400
+    removed = 0
+    for item_id in removals:
+        if catalog.remove(item_id):
+            removed += 1
+        else:
+            missing.append(item_id)
+    
+    return {
+        "upserted": len(upserts),
+        "patched": len(patches) - sum(1 for change in patches if change['id'] in missing),
+        "removed": removed,
+        "missing": missing,
+        "version": catalog.version,
+        "items": len(catalog),
+        "pid": os.getpid(),
+    }, 200
+
+
+@app.route('/api/admin/catalogs/changes', methods=['POST'])
+def catalog_changes_endpoint():
+    """Upsert, patch or remove items of a served mock catalog; needs CATALOG_ADMIN_TOKEN."""
+    if not catalog_admin_authorized(request.headers.get('X-Admin-Token', '')):
+        return jsonify({"error": "Admin token required"}), 403
+    body, status = apply_catalog_changes(request.get_json(silent=True))
+    return jsonify(body), status
+
+
+@app.route('/ready', methods=['GET'])
+def readiness_check():
+    """Readiness probe: 503 until preload() has warmed the engines."""
+    if not engines_ready.is_set():
+        return jsonify({"status": "warming"}), 503
+    return jsonify({"status": "ready"}), 200
+
+
+@app.route('/metrics', methods=['GET'])
+def metrics():
+    """Prometheus metrics endpoint (text exposition format)."""
+    return Response(
+        render_prometheus(REGISTRY, worker=str(os.getpid())),
+        mimetype='text/plain; version=0.0.4; charset=utf-8'
+    )
+
+
 @app.route('/health', methods=['GET'])
 def health_check():
     """Health check endpoint."""
-    return jsonify({"status": "ok"}), 200
+    return jsonify({
+        "status": "ok",
+        "data_source": DATA_SOURCE,
+        "db_connections_opened": get_db_connections_opened()
+    }), 200
 
 
 if __name__ == '__main__':
+    # The debug reloader re-runs this script in a child process that serves the
+    # requests; preload only there, not in the watching parent as well
+    if os.environ.get('WERKZEUG_RUN_MAIN'):
+        preload()
     print(f"Starting Flask API on port {FLASK_PORT}")
     print(f"Database URL: {DATABASE_URL}")
     app.run(debug=True, host='0.0.0.0', port=FLASK_PORT)
@@ -0,0 +1,537 @@
+"""
+ASGI server for the recommendation API (async serving mode).
+Serves the same recommendation endpoints as api.py, but catalog fetches are
+awaited on an asyncpg connection pool (or the fake data source), so a worker
+process keeps hundreds of requests waiting on the database without tying up
+a thread for each. Scoring is CPU-bound and runs on a small per-process
+thread pool so it never blocks the event loop; add processes (--workers),
+not threads, for more scoring throughput.
+
+Configuration (DATA_SOURCE, deadlines, admission budgets, slow and query
+logs) is shared with api.py. The profiling headers are Flask-only.
+
+Usage:
+    uvicorn asgi_api:app --host 0.0.0.0 --port 5000 --workers 4
+"""
+
+import asyncio
+import json
+import logging
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor
+from functools import partial
+from typing import Dict, List, Optional, Tuple
+
+import api
+from admission import TRAFFIC_CLASSES, AdmissionController, AsyncAdmissionLimiter
+from catalog_sql import accommodation_from_row, accommodations_query, guide_from_row, guides_query
+from deadlines import DeadlineExceeded
+from metrics import (
+    ADMISSION_REJECTIONS,
+    ADMISSION_WAIT,
+    HTTP_LATENCY,
+    HTTP_REQUESTS,
+    NULL_TIMER,
+    REGISTRY,
+    CallbackGauge,
+    render_prometheus,
+)
+from queries import (
+    TRIP_SECTIONS,
+    canonical_query,
+    parse_accommodation_query,
+    parse_guide_query,
+    parse_include_reasons,
+    parse_response_fields,
+    parse_trip_query,
+    split_trip_body,
+)
+from serialization import dumps, select_fields
+
+logger = logging.getLogger('wbth.asgi')
+
+# asyncpg pool per worker process; requests beyond DB_POOL_MAX_SIZE wait (without a thread) for a connection
+DB_POOL_MIN_SIZE = int(os.getenv('DB_POOL_MIN_SIZE', '2'))
+DB_POOL_MAX_SIZE = int(os.getenv('DB_POOL_MAX_SIZE', '20'))
+
+# Threads per process running the engines
+SCORING_WORKERS = int(os.getenv('SCORING_WORKERS', '2'))
+
+# Load the catalogs and warm the engines at startup; /ready answers 503 until then
+PRELOAD_ENGINES = os.getenv('PRELOAD_ENGINES', 'true').lower() in ('1', 'true', 'yes')
+
+# Created at lifespan startup, once per worker process
+db_pool = None
+scoring_pool: Optional[ThreadPoolExecutor] = None
+
+# Requests currently being handled by this process
+_in_flight = 0
+
+admission = AdmissionController(
+    api.ADMISSION_BUDGETS, api.ADMISSION_QUEUE_TIMEOUT_MS, limiter_class=AsyncAdmissionLimiter
+) if api.ADMISSION_ENABLED else None
+
+REGISTRY.register(CallbackGauge(
+    "wbth_requests_in_flight",
+    "Requests currently being handled by the ASGI server",
+    lambda: _in_flight
+))
+
+REGISTRY.register(CallbackGauge(
+    "wbth_db_pool_connections_in_use",
+    "Connections checked out of the asyncpg pool",
+    lambda: db_pool.get_size() - db_pool.get_idle_size() if db_pool is not None else 0
+))
+
+if admission is not None:
+    REGISTRY.register(CallbackGauge(
+        "wbth_admission_in_flight",
+        "Requests currently admitted",
+        admission.in_flight,
+        label_names=("endpoint", "traffic_class")
+    ))
+    REGISTRY.register(CallbackGauge(
+        "wbth_admission_queued",
+        "Requests currently waiting for an admission slot",
+        admission.queued,
+        label_names=("endpoint", "traffic_class")
+    ))
+
+
+class Request:
+    """The parts of an HTTP request the handlers need."""
+
+    def __init__(self, scope: Dict, body: bytes, started: float):
+        self.method = scope['method']
+        self.path = scope['path']
+        self.headers = {name.decode('latin-1').lower(): value.decode('latin-1') for name, value in scope['headers']}
+        self.body = body
+        self.started = started
+        self.query: Optional[Dict] = None
+        self.canonical: Optional[str] = None
+
+    def json(self):
+        """Parsed JSON body, or None when it is empty or not JSON."""
+        try:
+            return json.loads(self.body) if self.body else None
+        except ValueError:
+            return None
+
+    def flag(self, header: str) -> bool:
+        """Whether a boolean debug header is set."""
+        return self.headers.get(header.lower(), '').lower() in ('1', 'true', 'yes')
+
+    def traffic_class(self) -> str:
+        value = self.headers.get(api.TRAFFIC_CLASS_HEADER.lower(), '').lower()
+        return value if value in TRAFFIC_CLASSES else 'interactive'
+
+    def set_query(self, endpoint: str, query: Dict, body: Dict):
+        """Remember the parsed query for the slow log, and capture the body for replay."""
+        self.query = query
+        self.canonical = canonical_query(endpoint, query)
+        if api.query_log is not None:
+            api.query_log.record(endpoint, body, time.time())
+
+
+# (status, headers, body)
+Response = Tuple[int, List[Tuple[str, str]], bytes]
+
+JSON_CONTENT_TYPE = ('Content-Type', 'application/json')
+
+
+def json_response(payload, status: int = 200, headers: Optional[List[Tuple[str, str]]] = None) -> Response:
+    return status, [JSON_CONTENT_TYPE] + (headers or []), dumps(payload)
+
+
+def _timed_response(request: Request, results: Dict, timer, endpoint: str, debug: bool,
+                    stats: Optional[Dict] = None, funnel: Optional[Dict] = None,
+                    fields: Optional[Tuple[str, ...]] = None) -> Response:
+    """Serialize results and record timings, as api._timed_response does for Flask."""
+    select_fields(results, fields)
+    results.setdefault('degraded', False)
+    if debug:
+        results['timings'] = {name: round(ms, 3) for name, ms in timer.timings.items()}
+    body, encoding = api.encode_response(results, timer, request.headers.get('accept-encoding', ''))
+    api.record_response(results, timer, endpoint, stats, funnel, request.query, request.canonical)
+    headers = [JSON_CONTENT_TYPE]
+    if encoding:
+        headers.append(('Content-Encoding', encoding))
+    if api.RESPONSE_COMPRESSION:
+        headers.append(('Vary', 'Accept-Encoding'))
+    if debug:
+        headers.append(('Server-Timing', api.server_timing(timer)))
+    return 200, headers, body
+
+
+async def _run(func, *args):
+    """Run a blocking call (scoring, mock catalog load) on the scoring pool."""
+    return await asyncio.get_running_loop().run_in_executor(scoring_pool, partial(func, *args))
+
+
+def _seconds(timeout_ms: Optional[float]) -> Optional[float]:
+    return timeout_ms / 1000.0 if timeout_ms is not None else None
+
+
+async def _fetch_rows(sql: str, params, deadline) -> List:
+    """Run a catalog query on the pool, cancelling it when the deadline runs out."""
+    if db_pool is None:
+        raise RuntimeError("Database pool is not initialised (is the ASGI lifespan enabled?)")
+    try:
+        async with db_pool.acquire(timeout=_seconds(api.fetch_timeout_ms(deadline))) as conn:
+            return await conn.fetch(sql, *params, timeout=_seconds(api.fetch_timeout_ms(deadline)))
+    except asyncio.TimeoutError as e:
+        raise DeadlineExceeded("catalog query timed out") from e
+
+
+async def fetch_accommodations(query: Dict, deadline) -> List[Dict]:
+    """Async counterpart of api.fetch_accommodations_from_db for a parsed accommodation query."""
+    started = time.perf_counter()
+    if api.fake_db is not None:
+        api.count_db_connection()
+        rows = await api.fake_db.fetch_accommodations_async(
+            query['budget_min'], query['budget_max'], query['district'], query['province'],
+            api.fetch_timeout_ms(deadline)
+        )
+        return api.record_db_fetch('accommodations', started, rows)
+
+    sql, params = accommodations_query(
+        query['budget_min'], query['budget_max'], query['district'], query['province'], style='numeric'
+    )
+    rows = await _fetch_rows(sql, params, deadline)
+    return api.record_db_fetch('accommodations', started, [accommodation_from_row(row) for row in rows])
+
+
+async def fetch_guides(query: Dict, deadline) -> List[Dict]:
+    """Async counterpart of api.fetch_guides_from_db for a parsed guide query."""
+    started = time.perf_counter()
+    if api.fake_db is not None:
+        api.count_db_connection()
+        rows = await api.fake_db.fetch_guides_async(
+            query['budget_min'], query['budget_max'], query['city'], query['province'],
+            api.fetch_timeout_ms(deadline)
+        )
+        return api.record_db_fetch('guides', started, rows)
+
+    sql, params = guides_query(
+        query['budget_min'], query['budget_max'], query['city'], query['province'], style='numeric'
+    )
+    rows = await _fetch_rows(sql, params, deadline)
+    return api.record_db_fetch('guides', started, [guide_from_row(row) for row in rows])
+
+
+FETCHERS = {'accommodations': fetch_accommodations, 'guides': fetch_guides}
+PARSERS = {'accommodations': parse_accommodation_query, 'guides': parse_guide_query}
+
+
+def _rank_section(section: str, query: Dict, rows: List[Dict], timer, stats: Dict, deadline, funnel: Dict,
+                  include_reasons: bool = True) -> Dict:
+    """Top up with mock data and rank one section (runs on the scoring pool)."""
+    rows = api.add_mock_fallback(section, rows, query['top_k'], timer, stats)
+    rank = api.rank_accommodations if section == 'accommodations' else api.rank_guides
+    return rank(query, rows, timer, deadline, funnel, include_reasons)
+
+
+async def recommend(request: Request, section: str) -> Response:
+    """Accommodation or guide recommendations (same body and response as the Flask routes)."""
+    deadline = api.request_deadline(request.started)
+    debug = request.flag(api.DEBUG_TIMINGS_HEADER)
+    timer = api.request_timer(debug)
+    data = request.json()
+
+    if not data:
+        return json_response({"error": "No data provided"}, 400)
+
+    query = PARSERS[section](data)
+    request.set_query(section, query, data)
+    try:
+        fields = parse_response_fields(data)
+    except ValueError as e:
+        return json_response({"error": str(e)}, 400)
+
+    if section == 'guides' and not query['languages']:
+        return json_response({"error": "At least one language is required"}, 400)
+
+    stats = {}
+    try:
+        with timer.stage('db_fetch'):
+            rows = await FETCHERS[section](query, deadline)
+    except DeadlineExceeded:
+        results = await _run(api.degraded_results, section, 'db_timeout', query, timer)
+        return _timed_response(request, results, timer, section, debug, stats, fields=fields)
+
+    funnel = {}
+    results = await _run(
+        _rank_section, section, query, rows, timer, stats, deadline, funnel, parse_include_reasons(data, fields)
+    )
+    if funnel and request.flag(api.DEBUG_FUNNEL_HEADER):
+        results['funnel'] = funnel
+
+    return _timed_response(request, results, timer, section, debug, stats, funnel, fields)
+
+
+async def recommend_trip(request: Request) -> Response:
+    """Trip recommendations: both catalog fetches awaited together, then both engines."""
+    deadline = api.request_deadline(request.started)
+    debug = request.flag(api.DEBUG_TIMINGS_HEADER)
+    timer = api.request_timer(debug)
+    data = request.json()
+
+    if not data:
+        return json_response({"error": "No data provided"}, 400)
+
+    query = parse_trip_query(data)
+    request.set_query('trip', query, data)
+    bodies = split_trip_body(data)
+    try:
+        fields = {section: parse_response_fields(body) for section, body in bodies.items()}
+    except ValueError as e:
+        return json_response({"error": str(e)}, 400)
+
+    if not query['guides']['languages']:
+        return json_response({"error": "At least one language is required"}, 400)
+
+    with timer.stage('db_fetch'):
+        fetched = await asyncio.gather(
+            *(FETCHERS[section](query[section], deadline) for section in TRIP_SECTIONS),
+            return_exceptions=True
+        )
+
+    stats = {section: {} for section in TRIP_SECTIONS}
+    results = {}
+    funnels = {}
+    for section, rows in zip(TRIP_SECTIONS, fetched):
+        if isinstance(rows, DeadlineExceeded):
+            results[section] = await _run(api.degraded_results, section, 'db_timeout', query[section], timer)
+            continue
+        if isinstance(rows, BaseException):
+            raise rows
+        funnels[section] = {}
+        results[section] = await _run(
+            _rank_section, section, query[section], rows, timer, stats[section], deadline, funnels[section],
+            parse_include_reasons(bodies[section], fields[section])
+        )
+        if funnels[section] and request.flag(api.DEBUG_FUNNEL_HEADER):
+            results[section]['funnel'] = funnels[section]
+
+    for section in TRIP_SECTIONS:
+        select_fields(results[section], fields[section])
+    results['degraded'] = any(results[section].get('degraded', False) for section in TRIP_SECTIONS)
+    return _timed_response(request, results, timer, 'trip', debug, stats, funnels)
+
+
+async def explain(request: Request) -> Response:
+    """Reasons for one recommended item (see api.explain_recommendation)."""
+    try:
+        endpoint, query, item_id = api.parse_explain_request(request.json())
+    except ValueError as e:
+        return json_response({"error": str(e)}, 400)
+
+    ranked = api.explanation_cache.get(canonical_query(endpoint, query), endpoint)
+    cached = ranked is not None
+    if not cached:
+        deadline = api.request_deadline(request.started)
+        try:
+            rows = await FETCHERS[endpoint](query, deadline)
+        except DeadlineExceeded:
+            return json_response({"error": "Could not rank the query in time, please retry"}, 503)
+        await _run(_rank_section, endpoint, query, rows, NULL_TIMER, None, deadline, None, False)
+        ranked = api.explanation_cache.get(canonical_query(endpoint, query)) or {}
+
+    body, status = api.explanation_response(endpoint, query, item_id, ranked, cached)
+    return json_response(body, status)
+
+
+async def reload_catalogs(request: Request) -> Response:
+    """Rebuild the mock catalogs without pausing requests (see api.reload_catalogs_endpoint)."""
+    if not api.catalog_admin_authorized(request.headers.get('x-admin-token', '')):
+        return json_response({"error": "Admin token required"}, 403)
+    # Waits on the background builds, so off the loop but not on the scoring pool
+    body, status = await asyncio.get_running_loop().run_in_executor(None, api.reload_catalogs, request.json())
+    return json_response(body, status)
+
+
+async def catalog_changes(request: Request) -> Response:
+    """Change items of a served mock catalog (see api.catalog_changes_endpoint)."""
+    if not api.catalog_admin_authorized(request.headers.get('x-admin-token', '')):
+        return json_response({"error": "Admin token required"}, 403)
+    body, status = await _run(api.apply_catalog_changes, request.json())
+    return json_response(body, status)
+
+
+async def health(request: Request) -> Response:
+    return json_response({
+        "status": "ok",
+        "data_source": api.DATA_SOURCE,
+        "server": "asgi",
+        "db_connections_opened": api.get_db_connections_opened()
+    })
+
+
+async def ready(request: Request) -> Response:
+    if not api.engines_ready.is_set():
+        return json_response({"status": "warming"}, 503)
+    return json_response({"status": "ready"})
+
+
+async def metrics(request: Request) -> Response:
+    return 200, [('Content-Type', 'text/plain; version=0.0.4; charset=utf-8')], \
+        render_prometheus(REGISTRY, worker=str(os.getpid())).encode('utf-8')
+
+
+# path: (methods, handler, admission endpoint or None)
+ROUTES = {
+    '/api/recommendations/accommodations': (('POST',), partial(recommend, section='accommodations'), 'accommodations'),
+    '/api/recommendations/guides': (('POST',), partial(recommend, section='guides'), 'guides'),
+    '/api/match/guides': (('POST',), partial(recommend, section='guides'), 'guides'),
+    '/api/recommendations/trip': (('POST',), recommend_trip, 'trip'),
+    '/api/recommendations/explain': (('POST',), explain, 'explain'),
+    '/api/admin/catalogs/reload': (('POST',), reload_catalogs, None),
+    '/api/admin/catalogs/changes': (('POST',), catalog_changes, None),
+    '/metrics': (('GET',), metrics, None),
+    '/health': (('GET',), health, None),
+    '/ready': (('GET',), ready, None),
+}
+
+
+async def _admitted(request: Request, endpoint: str, handler) -> Response:
+    """Run handler under the endpoint's admission budget, or reject with 503."""
+    if admission is None:
+        return await handler(request)
+    traffic_class = request.traffic_class()
+    limiter = admission.limiter(endpoint, traffic_class)
+    started = time.perf_counter()
+    if not await limiter.try_acquire():
+        ADMISSION_REJECTIONS.inc(endpoint, traffic_class)
+        return json_response(
+            {"error": "Service is busy, please retry later", "traffic_class": traffic_class}, 503,
+            [('Retry-After', str(admission.retry_after_s(traffic_class)))]
+        )
+    ADMISSION_WAIT.labels(endpoint, traffic_class).observe((time.perf_counter() - started) * 1000)
+    try:
+        return await handler(request)
+    finally:
+        limiter.release()
+
+
+async def _dispatch(request: Request) -> Tuple[str, Response]:
+    """Route a request; returns the route (metric label) and the response."""
+    route = ROUTES.get(request.path)
+    if route is None:
+        return 'unmatched', json_response({"error": "Not found"}, 404)
+    methods, handler, endpoint = route
+    if request.method == 'OPTIONS':
+        # CORS preflight, answered for any origin like flask_cors does
+        allow_headers = request.headers.get('access-control-request-headers', '')
+        return request.path, (200, [
+            ('Access-Control-Allow-Methods', ', '.join(methods + ('OPTIONS',))),
+            ('Access-Control-Allow-Headers', allow_headers),
+        ], b'')
+    if request.method not in methods:
+        return request.path, json_response({"error": "Method not allowed"}, 405)
+    try:
+        if endpoint is None:
+            return request.path, await handler(request)
+        return request.path, await _admitted(request, endpoint, handler)
+    except Exception as e:
+        logger.exception("Error in %s: %s", request.path, e)
+        return request.path, json_response({"error": str(e)}, 500)
+
+
+async def _read_body(receive) -> bytes:
+    chunks = []
+    while True:
+        message = await receive()
+        if message['type'] == 'http.disconnect':
+            break
+        chunks.append(message.get('body', b''))
+        if not message.get('more_body', False):
+            break
+    return b''.join(chunks)
+
+
+async def startup():
+    """
+    Create this worker's scoring pool and, for Postgres, its asyncpg connection
+    pool, then warm the engines (uvicorn spawns workers, so each one preloads).
+    """
+    global db_pool, scoring_pool
+    scoring_pool = ThreadPoolExecutor(max_workers=SCORING_WORKERS, thread_name_prefix='scoring')
+    if api.fake_db is None:
+        await _create_db_pool()
+    if PRELOAD_ENGINES and not api.engines_ready.is_set():
+        await _run(api.preload)
+
+
+async def _create_db_pool():
+    global db_pool
+    try:
+        import asyncpg
+    except ImportError:
+        raise RuntimeError("asyncpg is required for the ASGI server with DATA_SOURCE=postgres (pip install asyncpg)")
+
+    async def count_connection(conn):
+        api.count_db_connection()
+
+    db_pool = await asyncpg.create_pool(
+        api.DATABASE_URL,
+        min_size=DB_POOL_MIN_SIZE,
+        max_size=DB_POOL_MAX_SIZE,
+        timeout=api.DB_CONNECT_TIMEOUT_S,
+        init=count_connection
+    )
+    logger.info("Database pool ready", extra={"min_size": DB_POOL_MIN_SIZE, "max_size": DB_POOL_MAX_SIZE})
+
+
+async def shutdown():
+    global db_pool, scoring_pool
+    if db_pool is not None:
+        await db_pool.close()
+        db_pool = None
+    if scoring_pool is not None:
+        scoring_pool.shutdown(wait=False)
+        scoring_pool = None
+
+
+async def _lifespan(receive, send):
+    while True:
+        message = await receive()
+        if message['type'] == 'lifespan.startup':
+            try:
+                await startup()
+            except Exception as e:
+                logger.exception("Startup failed: %s", e)
+                await send({'type': 'lifespan.startup.failed', 'message': str(e)})
+                return
+            await send({'type': 'lifespan.startup.complete'})
+        elif message['type'] == 'lifespan.shutdown':
+            await shutdown()
+            await send({'type': 'lifespan.shutdown.complete'})
+            return
+
+
+async def app(scope, receive, send):
+    """ASGI entry point."""
+    global _in_flight
+    if scope['type'] == 'lifespan':
+        await _lifespan(receive, send)
+        return
+    if scope['type'] != 'http':
+        return
+
+    request = Request(scope, await _read_body(receive), time.perf_counter())
+    _in_flight += 1
+    try:
+        route, (status, headers, body) = await _dispatch(request)
+    finally:
+        _in_flight -= 1
+    HTTP_REQUESTS.inc(route, str(status))
+    HTTP_LATENCY.labels(route).observe((time.perf_counter() - request.started) * 1000)
+
+    headers = headers + [('Access-Control-Allow-Origin', '*'), ('Content-Length', str(len(body)))]
+    await send({
+        'type': 'http.response.start',
+        'status': status,
+        'headers': [(name.lower().encode('latin-1'), value.encode('latin-1')) for name, value in headers],
+    })
+    await send({'type': 'http.response.body', 'body': body})
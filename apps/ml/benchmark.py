@@ -0,0 +1,292 @@
+"""
+Performance benchmark for the accommodation and guide recommendation engines.
+Times recommend() across catalog sizes and query shapes, breaks each run down
+by pipeline stage (filter, score, sort, reasons), records peak memory, and
+flags superlinear scaling or regressions against a stored baseline.
+
+Usage:
+    python benchmark.py --sizes 1000,10000,100000,1000000 --output benchmark_results.json
+    python benchmark.py --baseline benchmarks/baseline.json
+"""
+
+import argparse
+import json
+import math
+import platform
+import statistics
+import sys
+import time
+import tracemalloc
+from datetime import datetime, timezone
+from typing import Dict, List, Optional
+
+from recommender import AccommodationRecommender
+from GuidesRecommendationModel.guide_recommender import GuideRecommender
+from data.scale_generator import DEFAULT_SEED, iter_scale_records
+from metrics import StageTimer
+from queries import ACCOMMODATION_QUERIES, GUIDE_QUERIES
+
+DEFAULT_SIZES = [1_000, 10_000, 100_000, 1_000_000]
+STAGES = ["filter", "score", "sort", "reasons"]
+
+ENGINES = {
+    "accommodations": {
+        "factory": AccommodationRecommender,
+        "queries": ACCOMMODATION_QUERIES,
+    },
+    "guides": {
+        "factory": GuideRecommender,
+        "queries": GUIDE_QUERIES,
+    },
+}
+
+
+# ============================================================================
+# Measurement
+# ============================================================================
+
+def measure(
+    recommender,
+    query: Dict,
+    repeats: int = 5,
+    min_time: float = 0.5
+) -> Dict:
+    """
+    Benchmark one query against one recommender.
+
+    recommend() is run up to `repeats` times (stopping early once `min_time`
+    seconds have been spent), then once with a StageTimer for the per-stage
+    breakdown and once under tracemalloc for peak memory.
+
+    Returns:
+        Dictionary with median/min total time, per-stage times, candidates and peak memory
+    """
+    totals = []
+    spent = 0.0
+    while len(totals) < repeats and (not totals or spent < min_time):
+        start = time.perf_counter()
+        recommender.recommend(**query)
+        elapsed = time.perf_counter() - start
+        totals.append(elapsed)
+        spent += elapsed
+
+    timer = StageTimer()
+    staged = recommender.recommend(**query, timer=timer)
+
+    tracemalloc.start()
+    try:
+        recommender.recommend(**query)
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+
+    return {
+        "candidates": staged["total_candidates"],
+        "runs": len(totals),
+        "total_ms": round(statistics.median(totals) * 1000, 3),
+        "min_ms": round(min(totals) * 1000, 3),
+        "stages_ms": {stage: round(timer.timings.get(stage, 0.0), 3) for stage in STAGES},
+        "peak_memory_bytes": peak,
+    }
+
+
+def scaling_exponent(size_a: int, time_a: float, size_b: int, time_b: float) -> Optional[float]:
+    """
+    Empirical growth exponent k in time ~ size^k between two measurements.
+
+    Returns None if either time is zero (too fast to measure).
+    """
+    if time_a <= 0 or time_b <= 0 or size_a == size_b:
+        return None
+    return math.log(time_b / time_a) / math.log(size_b / size_a)
+
+
+def build_catalog(engine: str, size: int, seed: int):
+    """Generate a catalog of the given size and wrap it in the engine."""
+    return ENGINES[engine]["factory"](iter_scale_records(engine, size, seed=seed))
+
+
+def run_benchmarks(
+    engines: List[str],
+    sizes: List[int],
+    shapes: Optional[List[str]] = None,
+    seed: int = DEFAULT_SEED,
+    repeats: int = 5,
+    max_exponent: float = 1.25,
+    noise_floor_ms: float = 2.0,
+    max_seconds: float = 60.0
+) -> Dict:
+    """
+    Run the benchmark matrix.
+
+    Sizes are run in ascending order. For each (engine, shape) the scaling
+    exponent between consecutive sizes is checked against max_exponent; a
+    shape that grows superlinearly, or whose observed growth projects a single
+    run beyond max_seconds, is recorded as a failure and not run at larger sizes.
+
+    Returns:
+        Results document (see write_results)
+    """
+    sizes = sorted(sizes)
+    results = []
+    failures = []
+
+    for engine in engines:
+        spec = ENGINES[engine]
+        engine_shapes = [s for s in spec["queries"] if not shapes or s in shapes]
+        history = {}     # shape -> {"size", "seconds", "exponent"} of the last run
+        abandoned = set()
+
+        for size in sizes:
+            active = [s for s in engine_shapes if s not in abandoned]
+            if not active:
+                break
+
+            # Project this size from the last two points before paying for it
+            runnable = []
+            for shape in active:
+                if shape in history:
+                    prev = history[shape]
+                    exponent = max(prev["exponent"] or 1.0, 1.0)
+                    projected = prev["seconds"] * (size / prev["size"]) ** exponent
+                    if projected > max_seconds:
+                        failures.append({
+                            "engine": engine, "shape": shape, "size": size,
+                            "reason": f"projected {projected:.0f}s per run exceeds {max_seconds:.0f}s "
+                                      f"(growth exponent {exponent:.2f})"
+                        })
+                        abandoned.add(shape)
+                        continue
+                runnable.append(shape)
+            if not runnable:
+                continue
+
+            print(f"[{engine}] building {size:,}-item catalog...")
+            recommender = build_catalog(engine, size, seed)
+
+            for shape in runnable:
+                result = measure(recommender, spec["queries"][shape], repeats=repeats)
+                result.update({"engine": engine, "shape": shape, "size": size})
+
+                seconds = result["total_ms"] / 1000
+                exponent = None
+                if shape in history:
+                    prev = history[shape]
+                    exponent = scaling_exponent(prev["size"], prev["seconds"], size, seconds)
+                    result["scaling_exponent"] = round(exponent, 3) if exponent is not None else None
+                    if (exponent is not None and exponent > max_exponent
+                            and result["total_ms"] >= noise_floor_ms):
+                        failures.append({
+                            "engine": engine, "shape": shape, "size": size,
+                            "reason": f"superlinear growth: exponent {exponent:.2f} > {max_exponent:.2f} "
+                                      f"from {prev['size']:,} to {size:,} items"
+                        })
+                        abandoned.add(shape)
+                history[shape] = {"size": size, "seconds": seconds, "exponent": exponent}
+
+                results.append(result)
+                stages = ", ".join(f"{k} {v:.1f}" for k, v in result["stages_ms"].items())
+                print(f"  {shape:<24} {result['total_ms']:>10.2f} ms  "
+                      f"({result['candidates']:,} candidates; {stages}; "
+                      f"peak {result['peak_memory_bytes'] / 1e6:.1f} MB)")
+
+            del recommender
+
+    return {
+        "meta": {
+            "timestamp": datetime.now(timezone.utc).isoformat(),
+            "python": sys.version.split()[0],
+            "platform": platform.platform(),
+            "seed": seed,
+            "sizes": sizes,
+            "max_exponent": max_exponent,
+        },
+        "results": results,
+        "failures": failures,
+    }
+
+
+def compare_to_baseline(current: Dict, baseline: Dict, tolerance: float = 0.25, noise_floor_ms: float = 2.0) -> List[Dict]:
+    """
+    Compare median times against a baseline results document.
+
+    Returns:
+        Regression entries for every (engine, shape, size) slower than
+        baseline * (1 + tolerance); runs below noise_floor_ms are ignored
+    """
+    baseline_times = {
+        (r["engine"], r["shape"], r["size"]): r["total_ms"]
+        for r in baseline.get("results", [])
+    }
+
+    regressions = []
+    for result in current["results"]:
+        key = (result["engine"], result["shape"], result["size"])
+        if key not in baseline_times:
+            continue
+        before, after = baseline_times[key], result["total_ms"]
+        result["baseline_ms"] = before
+        if after >= noise_floor_ms and after > before * (1 + tolerance):
+            regressions.append({
+                "engine": key[0], "shape": key[1], "size": key[2],
+                "reason": f"regression: {after:.2f} ms vs baseline {before:.2f} ms "
+                          f"(+{(after / before - 1) * 100:.0f}%)"
+            })
+    return regressions
+
+
+def write_results(results: Dict, filename: str):
+    """Write a results document as JSON."""
+    with open(filename, 'w', encoding='utf-8') as f:
+        json.dump(results, f, indent=2)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the recommendation engines")
+    parser.add_argument("--engines", default="accommodations,guides", help="Comma-separated engines")
+    parser.add_argument("--sizes", default=",".join(str(s) for s in DEFAULT_SIZES), help="Comma-separated catalog sizes")
+    parser.add_argument("--shapes", default=None, help="Comma-separated query shapes (default: all)")
+    parser.add_argument("--seed", type=int, default=DEFAULT_SEED)
+    parser.add_argument("--repeats", type=int, default=5)
+    parser.add_argument("--max-exponent", type=float, default=1.25,
+                        help="Fail when time grows faster than size^k between sizes")
+    parser.add_argument("--max-seconds", type=float, default=60.0,
+                        help="Skip (and fail) sizes projected to take longer than this per run")
+    parser.add_argument("--output", default="benchmark_results.json", help="Where to write JSON results")
+    parser.add_argument("--baseline", default=None, help="Baseline results JSON to compare against")
+    parser.add_argument("--tolerance", type=float, default=0.25, help="Allowed slowdown vs baseline (0.25 = 25%%)")
+    args = parser.parse_args()
+
+    engines = [e.strip() for e in args.engines.split(",") if e.strip()]
+    unknown = [e for e in engines if e not in ENGINES]
+    if unknown:
+        parser.error(f"Unknown engine(s): {', '.join(unknown)}")
+
+    sizes = [int(s) for s in args.sizes.split(",") if s.strip()]
+    shapes = [s.strip() for s in args.shapes.split(",")] if args.shapes else None
+
+    print("=== Recommendation Engine Benchmark ===\n")
+    results = run_benchmarks(
+        engines, sizes, shapes=shapes, seed=args.seed, repeats=args.repeats,
+        max_exponent=args.max_exponent, max_seconds=args.max_seconds
+    )
+
+    if args.baseline:
+        with open(args.baseline, 'r', encoding='utf-8') as f:
+            baseline = json.load(f)
+        results["failures"].extend(compare_to_baseline(results, baseline, tolerance=args.tolerance))
+
+    write_results(results, args.output)
+    print(f"\n✓ Results written to {args.output}")
+
+    if results["failures"]:
+        print(f"\n✗ {len(results['failures'])} failure(s):")
+        for failure in results["failures"]:
+            print(f"  - [{failure['engine']}/{failure['shape']} @ {failure['size']:,}] {failure['reason']}")
+        sys.exit(1)
+
+    print("✓ No superlinear growth or regressions detected")
+
+
+if __name__ == "__main__":
+    main()
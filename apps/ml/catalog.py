@@ -0,0 +1,216 @@
+"""
+In-memory catalog with incremental updates.
+
+A Catalog holds the records of one endpoint (accommodations or guides) and
+takes single-item changes, upsert, patch and remove, without being rebuilt.
+Records live in append-only slots: a change appends the new record and
+tombstones the slot of the old one, and the catalog is compacted once
+tombstones pile up. Readers work from a CatalogView, an immutable snapshot
+that a change replaces with a single reference swap, so a reader sees every
+change or none of it, and never a half-applied one.
+"""
+
+import sys
+import threading
+from typing import Callable, Dict, Iterable, List, Optional
+
+from reason_fragments import FragmentIndex
+
+# Retirement version of a slot that is still live
+LIVE = sys.maxsize
+
+
+class CatalogView:
+    """The live records of a catalog at one version. Never changes once published."""
+
+    __slots__ = ("version", "live", "_slots", "_retired", "_length", "_records")
+
+    def __init__(self, version: int, live: int, slots: List, retired: List[int]):
+        self.version = version
+        self.live = live
+        self._slots = slots
+        self._retired = retired
+        self._length = len(slots)
+        self._records: Optional[List] = None
+
+    def __len__(self) -> int:
+        return self.live
+
+    def records(self) -> List:
+        """
+        The live records in slot order, built once per view.
+
+        The list is shared by every reader of the view and must not be mutated.
+        """
+        records = self._records
+        if records is None:
+            slots, retired, version = self._slots, self._retired, self.version
+            if self.live == self._length:
+                records = slots[:self._length]
+            else:
+                records = [slots[slot] for slot in range(self._length) if retired[slot] > version]
+            self._records = records
+        return records
+
+
+class Catalog:
+    """
+    One endpoint's records, updated in place.
+
+    Each slot records the version that retired it (LIVE until then), so a
+    view of version v counts a slot as live while its retirement version is
+    greater than v. Slots appended after a view was taken lie beyond its
+    length. A change therefore costs the same however large the catalog is.
+    Writers are serialized by a lock; readers never take it.
+    """
+
+    def __init__(
+        self,
+        records: Iterable,
+        record_type,
+        fragment_builders: Optional[Dict[str, Callable]] = None,
+        compact_ratio: float = 0.25,
+        compact_min: int = 64
+    ):
+        """
+        Args:
+            records: Initial records (dictionaries or record_type instances)
+            record_type: AccommodationRecord or GuideRecord
+            fragment_builders: The engine's REASON_FRAGMENTS; when given, the
+                catalog keeps a FragmentIndex in step with its records (optional)
+            compact_ratio: Compact once tombstones exceed this fraction of live records
+            compact_min: ... and there are more than this many of them
+        """
+        self.record_type = record_type
+        self.compact_ratio = compact_ratio
+        self.compact_min = compact_min
+        self.compactions = 0
+        self._lock = threading.Lock()
+
+        # Later duplicates of an id replace earlier ones
+        by_id = {record.id: record for record in record_type.from_dicts(records)}
+        self._reset(0, list(by_id.values()))
+
+        self.fragments = None
+        if fragment_builders is not None:
+            self.fragments = FragmentIndex(self._slots, fragment_builders)
+
+    def view(self) -> CatalogView:
+        """The current snapshot; take it once per request and read only from it."""
+        return self._view
+
+    @property
+    def version(self) -> int:
+        """Number of changes applied since the catalog was built."""
+        return self._view.version
+
+    def __len__(self) -> int:
+        return len(self._view)
+
+    def get(self, item_id):
+        """The current record for item_id, or None."""
+        with self._lock:
+            slot = self._positions.get(item_id)
+            return self._slots[slot] if slot is not None else None
+
+    def upsert(self, item):
+        """
+        Add an item, or replace the item with the same id.
+
+        Args:
+            item: Record or dictionary in catalog format
+
+        Returns:
+            The stored record
+        """
+        record = item if type(item) is self.record_type else self.record_type.from_dict(item)
+        with self._lock:
+            self._store(record)
+        return record
+
+    def patch(self, item_id, fields: Dict):
+        """
+        Change some fields of an item, e.g. {"price_range_min": 9000}.
+
+        Args:
+            item_id: Id of the item to change
+            fields: Field name -> new value; the id cannot be changed
+
+        Returns:
+            The stored record
+
+        Raises:
+            KeyError: No item has item_id
+            ValueError: fields tries to change the id
+        """
+        if 'id' in fields and fields['id'] != item_id:
+            raise ValueError("patch cannot change an item's id")
+        with self._lock:
+            slot = self._positions.get(item_id)
+            if slot is None:
+                raise KeyError(item_id)
+            record = self.record_type.from_dict({**self._slots[slot].to_dict(), **fields})
+            self._store(record)
+        return record
+
+    def remove(self, item_id) -> bool:
+        """
+        Remove an item.
+
+        Returns:
+            False if no item had item_id
+        """
+        with self._lock:
+            slot = self._positions.pop(item_id, None)
+            if slot is None:
+                return False
+            version = self._view.version + 1
+            self._retire(slot, version)
+            self._publish(version, self._view.live - 1)
+        return True
+
+    def compact(self):
+        """Drop tombstoned slots now, rather than waiting for the threshold."""
+        with self._lock:
+            self._compact(self._view.version + 1)
+
+    def _store(self, record):
+        version = self._view.version + 1
+        live = self._view.live + 1
+        slot = self._positions.get(record.id)
+        if slot is not None:
+            self._retire(slot, version)
+            live -= 1
+        self._slots.append(record)
+        self._retired.append(LIVE)
+        self._positions[record.id] = len(self._slots) - 1
+        if self.fragments is not None:
+            self.fragments.add(record)
+        self._publish(version, live)
+
+    def _retire(self, slot: int, version: int):
+        """Tombstone a slot as of version; views of earlier versions still see it."""
+        self._retired[slot] = version
+        if self.fragments is not None:
+            self.fragments.discard(self._slots[slot])
+
+    def _publish(self, version: int, live: int):
+        """Make a change visible, compacting instead if tombstones have piled up."""
+        tombstones = len(self._slots) - live
+        if tombstones > max(self.compact_min, self.compact_ratio * live):
+            self._compact(version)
+        else:
+            self._view = CatalogView(version, live, self._slots, self._retired)
+
+    def _compact(self, version: int):
+        """Copy the live records into fresh slots; old views keep the old slot list."""
+        self._reset(version, [
+            record for record, retired in zip(self._slots, self._retired) if retired == LIVE
+        ])
+        self.compactions += 1
+
+    def _reset(self, version: int, records: List):
+        self._slots = records
+        self._retired = [LIVE] * len(records)
+        self._positions = {record.id: slot for slot, record in enumerate(records)}
+        self._view = CatalogView(version, len(records), records, self._retired)
@@ -0,0 +1,350 @@
+"""
+Catalog file I/O for the recommendation engines.
+Reads and writes accommodation/guide catalogs as either a single JSON array,
+JSON Lines (one record per line) or a binary columnar .npz file. JSON Lines
+and columnar files are streamed, so catalogs of millions of rows can be
+ingested with bounded memory.
+"""
+
+import json
+import os
+import uuid
+from functools import lru_cache
+from typing import TYPE_CHECKING, Dict, Iterable, Iterator, List, Optional, Sequence, Tuple, Union
+
+# numpy is only needed for columnar (.npz) catalogs and is imported when one is
+# read or written, so JSON and JSON Lines loading (the servers) stays numpy-free
+if TYPE_CHECKING:
+    import numpy as np
+
+# File extensions treated as JSON Lines
+JSONL_EXTENSIONS = ('.jsonl', '.ndjson')
+
+# File extension of the binary columnar catalog format
+COLUMNAR_EXTENSION = '.npz'
+
+# All extensions recognised when reading a directory of catalog shards
+CATALOG_EXTENSIONS = ('.json',) + JSONL_EXTENSIONS + (COLUMNAR_EXTENSION,)
+
+
+def is_jsonl(filename: str) -> bool:
+    """Return True if the file should be read/written as JSON Lines."""
+    return filename.lower().endswith(JSONL_EXTENSIONS)
+
+
+def is_columnar(filename: str) -> bool:
+    """Return True if the file is a binary columnar catalog."""
+    return filename.lower().endswith(COLUMNAR_EXTENSION)
+
+
+def iter_records(filename: str) -> Iterator[Dict]:
+    """
+    Yield catalog records from a catalog file or a directory of shards.
+
+    JSON Lines files are parsed one line at a time and columnar files are
+    decoded in chunks. Plain JSON arrays have to be parsed in full first, so
+    use JSON Lines or .npz for large catalogs. A directory is read as the
+    concatenation of its catalog files in sorted name order.
+
+    Args:
+        filename: Path to a .json, .jsonl, .ndjson or .npz file, or a directory of them
+
+    Yields:
+        One record dictionary per catalog item
+    """
+    if os.path.isdir(filename):
+        for name in sorted(os.listdir(filename)):
+            if name.lower().endswith(CATALOG_EXTENSIONS):
+                yield from iter_records(os.path.join(filename, name))
+        return
+
+    if is_columnar(filename):
+        yield from iter_columnar_records(filename)
+        return
+
+    with open(filename, 'r', encoding='utf-8') as f:
+        if not is_jsonl(filename):
+            yield from json.load(f)
+            return
+
+        for line_no, line in enumerate(f, 1):
+            line = line.strip()
+            if not line:
+                continue
+            try:
+                yield json.loads(line)
+            except json.JSONDecodeError as e:
+                raise ValueError(f"{filename}:{line_no}: invalid JSON Lines record ({e})") from e
+
+
+def iter_batches(records: Iterable[Dict], batch_size: int) -> Iterator[List[Dict]]:
+    """
+    Group a record stream into lists of at most batch_size records.
+
+    Args:
+        records: Any iterable of records
+        batch_size: Maximum number of records per batch
+
+    Yields:
+        Lists of records (the last batch may be shorter)
+    """
+    if batch_size <= 0:
+        raise ValueError("batch_size must be positive")
+
+    batch = []
+    for record in records:
+        batch.append(record)
+        if len(batch) >= batch_size:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
+
+
+def read_catalog(
+    filename: str,
+    batch_size: Optional[int] = None
+) -> Union[Iterator[Dict], Iterator[List[Dict]]]:
+    """
+    Stream a catalog file as records or batches of records.
+
+    Args:
+        filename: Path to a catalog file or a directory of catalog shards
+        batch_size: If given, yield lists of this many records instead of single records
+
+    Returns:
+        Generator of records, or of record batches when batch_size is set
+    """
+    records = iter_records(filename)
+    if batch_size:
+        return iter_batches(records, batch_size)
+    return records
+
+
+def _ensure_parent_dir(filename: str):
+    """Create the parent directory of filename if it does not exist."""
+    directory = os.path.dirname(filename)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+
+
+def append_records(records: Iterable[Dict], filename: str, flush_every: int = 10000) -> int:
+    """
+    Append records to a JSON Lines file, writing each one as it arrives.
+
+    Args:
+        records: Any iterable of records (may be a generator)
+        filename: Path to a .jsonl or .ndjson file (created if missing)
+        flush_every: Flush the file buffer after this many records
+
+    Returns:
+        Number of records written
+    """
+    if not is_jsonl(filename):
+        raise ValueError(f"Incremental writes need a JSON Lines file, got {filename}")
+
+    _ensure_parent_dir(filename)
+
+    count = 0
+    with open(filename, 'a', encoding='utf-8') as f:
+        for record in records:
+            f.write(json.dumps(record, ensure_ascii=False))
+            f.write('\n')
+            count += 1
+            if count % flush_every == 0:
+                f.flush()
+    return count
+
+
+def write_catalog(records: Iterable[Dict], filename: str) -> int:
+    """
+    Write a catalog file, replacing any existing file.
+
+    JSON Lines files are written incrementally; .json files are written as a
+    single indented array (the original mock data format).
+
+    Args:
+        records: Any iterable of records
+        filename: Destination path
+
+    Returns:
+        Number of records written
+    """
+    _ensure_parent_dir(filename)
+    if is_jsonl(filename):
+        open(filename, 'w', encoding='utf-8').close()
+        return append_records(records, filename)
+
+    records = list(records)
+    with open(filename, 'w', encoding='utf-8') as f:
+        json.dump(records, f, indent=2, ensure_ascii=False)
+    return len(records)
+
+
+# ============================================================================
+# Binary columnar format (.npz)
+# ============================================================================
+#
+# A columnar catalog is an uncompressed NumPy .npz archive holding one array
+# per column plus a JSON "__schema__" entry that says how to turn a row of
+# columns back into a record. Each schema entry has a "field" (the record key)
+# and a "kind":
+#
+#   value     -> column scalar as a Python int/float/bool
+#   uuid      -> (n, 16) uint8 column formatted as a UUID string
+#   category  -> integer codes into "vocab"
+#   category_list -> integer codes into "vocab", as a one-element list
+#   mask      -> integer bitmask into "vocab", decoded to a list (vocab order)
+#   format    -> "format" string filled from "parts" (each a column, optionally
+#                with a "vocab")
+#   format_list -> like format, but the part columns are (n, m); slots whose
+#                first part is 0 are skipped and the rest become a list
+
+
+def write_columnar(filename: str, columns: Dict[str, "np.ndarray"], schema: List[Dict]) -> int:
+    """
+    Write a binary columnar catalog.
+
+    Args:
+        filename: Destination .npz path
+        columns: Column name -> array, all with the same first dimension
+        schema: Field decoding rules (see the format notes above)
+
+    Returns:
+        Number of rows written
+    """
+    if not is_columnar(filename):
+        raise ValueError(f"Columnar catalogs must use the {COLUMNAR_EXTENSION} extension, got {filename}")
+
+    lengths = {len(col) for col in columns.values()}
+    if len(lengths) > 1:
+        raise ValueError("All columns must have the same number of rows")
+
+    import numpy as np
+
+    _ensure_parent_dir(filename)
+    np.savez(filename, __schema__=np.array(json.dumps(schema)), **columns)
+    return lengths.pop() if lengths else 0
+
+
+@lru_cache(maxsize=None)
+def _mask_decoder(vocab: Tuple[str, ...]):
+    """Build a cached bitmask -> list decoder for one vocabulary."""
+    @lru_cache(maxsize=65536)
+    def decode(mask: int) -> Tuple[str, ...]:
+        return tuple(term for bit, term in enumerate(vocab) if mask >> bit & 1)
+    return decode
+
+
+def _format_uuid(raw: Sequence[int]) -> str:
+    """Format 16 raw bytes as a UUID string."""
+    return str(uuid.UUID(bytes=bytes(raw)))
+
+
+def _decode_field(spec: Dict, data, start: int, stop: int) -> List:
+    """Decode one schema field for rows [start, stop) into Python values."""
+    kind = spec["kind"]
+
+    if kind == "value":
+        return data[spec["column"]][start:stop].tolist()
+
+    if kind == "uuid":
+        return [_format_uuid(row) for row in data[spec["column"]][start:stop].tolist()]
+
+    if kind == "category":
+        vocab = spec["vocab"]
+        return [vocab[code] for code in data[spec["column"]][start:stop].tolist()]
+
+    if kind == "category_list":
+        vocab = spec["vocab"]
+        return [[vocab[code]] for code in data[spec["column"]][start:stop].tolist()]
+
+    if kind == "mask":
+        decode = _mask_decoder(tuple(spec["vocab"]))
+        return [list(decode(mask)) for mask in data[spec["column"]][start:stop].tolist()]
+
+    if kind in ("format", "format_list"):
+        template = spec["format"]
+        parts = []
+        for part in spec["parts"]:
+            values = data[part["column"]][start:stop].tolist()
+            if "vocab" in part:
+                vocab = part["vocab"]
+                if kind == "format":
+                    values = [vocab[v] for v in values]
+                else:
+                    values = [[vocab[v] for v in row] for row in values]
+            parts.append(values)
+
+        if kind == "format":
+            return [template.format(*row) for row in zip(*parts)]
+
+        decoded = []
+        for row in zip(*parts):
+            decoded.append([
+                template.format(*slot)
+                for slot in zip(*row)
+                if slot[0]
+            ])
+        return decoded
+
+    raise ValueError(f"Unknown columnar field kind: {kind}")
+
+
+def iter_columnar_records(filename: str, chunk_size: int = 50000) -> Iterator[Dict]:
+    """
+    Yield records from a binary columnar catalog, decoding chunk by chunk.
+
+    The compact column arrays of one file are held in memory while only
+    chunk_size rows at a time are expanded into dictionaries, so split very
+    large catalogs into several shard files.
+
+    Args:
+        filename: Path to a .npz catalog written by write_columnar
+        chunk_size: Number of rows decoded at a time
+
+    Yields:
+        One record dictionary per row
+    """
+    import numpy as np
+
+    with np.load(filename, allow_pickle=False) as archive:
+        columns = {name: archive[name] for name in archive.files}
+
+    schema = json.loads(str(columns.pop("__schema__")))
+    yield from iter_column_records(columns, schema, chunk_size=chunk_size)
+
+
+def iter_column_records(
+    columns: Dict[str, "np.ndarray"],
+    schema: List[Dict],
+    chunk_size: int = 50000
+) -> Iterator[Dict]:
+    """
+    Yield records from in-memory columns, decoding chunk by chunk.
+
+    Args:
+        columns: Column name -> array (as passed to write_columnar)
+        schema: Field decoding rules
+        chunk_size: Number of rows decoded at a time
+
+    Yields:
+        One record dictionary per row
+    """
+    if not schema:
+        return
+    total = len(columns[_first_column(schema[0])])
+    fields = [spec["field"] for spec in schema]
+
+    for start in range(0, total, chunk_size):
+        stop = min(start + chunk_size, total)
+        values = [_decode_field(spec, columns, start, stop) for spec in schema]
+        for row in zip(*values):
+            yield dict(zip(fields, row))
+
+
+def _first_column(spec: Dict) -> str:
+    """Return the name of a column referenced by a schema entry."""
+    if "column" in spec:
+        return spec["column"]
+    return spec["parts"][0]["column"]
@@ -0,0 +1,140 @@
+"""
+Double-buffered catalog reloads.
+
+A CatalogManager holds the live Catalog of each endpoint and builds the
+next version on a background thread: it loads the source, builds the
+records and precomputes their reason fragments. The finished catalog then
+replaces the live one in a single reference swap. Requests keep the records
+they took until they finish, so a reload never stalls or changes a request
+in flight. A replaced catalog is freed once the last request holding its
+records is done.
+"""
+
+import logging
+import threading
+import time
+from concurrent.futures import Future
+from typing import Callable, Dict, Hashable, Optional, Tuple
+
+from catalog import Catalog
+from metrics import CATALOG_BUILDS
+
+logger = logging.getLogger('wbth.catalog')
+
+# (identity, version) of what a catalog was built from, e.g. (file path, mtime)
+Source = Tuple[Hashable, Hashable]
+
+
+class LoadedCatalog:
+    """A built catalog version, and what it was built from."""
+
+    __slots__ = ("endpoint", "source", "catalog", "generation", "build_ms", "loaded_at")
+
+    def __init__(self, endpoint: str, source: Source, catalog: Catalog, generation: int, build_ms: float):
+        self.endpoint = endpoint
+        self.source = source
+        self.catalog = catalog
+        self.generation = generation
+        self.build_ms = build_ms
+        self.loaded_at = time.time()
+
+    def summary(self) -> Dict:
+        """Build report, as returned by the reload endpoint."""
+        return {
+            "generation": self.generation,
+            "items": len(self.catalog),
+            "build_ms": round(self.build_ms, 1),
+            "loaded_at": round(self.loaded_at, 3),
+        }
+
+
+class CatalogManager:
+    """
+    Live catalogs by endpoint, rebuilt in the background.
+
+    At most one build per endpoint runs at a time; asking for a reload while
+    one is running joins it. Reading the live catalog takes no lock.
+    """
+
+    def __init__(self, build: Callable[[str], Tuple[Source, Catalog]]):
+        """
+        Args:
+            build: Builds an endpoint's catalog from its current source and
+                returns the source it read along with the catalog
+        """
+        self._build = build
+        self._live: Dict[str, LoadedCatalog] = {}
+        self._pending: Dict[str, Future] = {}
+        self._lock = threading.Lock()
+        self._generation = 0
+
+    def current(self, endpoint: str) -> Optional[LoadedCatalog]:
+        """The live version of the endpoint's catalog, or None before the first build."""
+        return self._live.get(endpoint)
+
+    def get(self, endpoint: str, source: Source) -> Catalog:
+        """
+        The endpoint's catalog for source.
+
+        When only the source's version has changed, the next catalog is built
+        in the background and the live one is served until it is swapped in.
+        When there is nothing to serve meanwhile (first load, or a source
+        with another identity), the build is waited for.
+
+        Args:
+            endpoint: "accommodations" or "guides"
+            source: The endpoint's current source, (identity, version)
+
+        Returns:
+            The live Catalog
+        """
+        loaded = self._live.get(endpoint)
+        if loaded is not None and loaded.source[0] == source[0]:
+            if loaded.source != source:
+                self.reload(endpoint)
+            return loaded.catalog
+        loaded = self.reload(endpoint).result()
+        if loaded.source[0] != source[0]:
+            # Joined a build of the previous source; build again from this one
+            loaded = self.reload(endpoint).result()
+        return loaded.catalog
+
+    def reload(self, endpoint: str) -> Future:
+        """
+        Start building the endpoint's next catalog on a background thread,
+        or join the build already running.
+
+        Returns:
+            Future of the LoadedCatalog, set once it is live; it holds the
+            build's exception if the build failed, and the old catalog stays live
+        """
+        with self._lock:
+            future = self._pending.get(endpoint)
+            if future is not None:
+                return future
+            future = self._pending[endpoint] = Future()
+        threading.Thread(
+            target=self._run_build, args=(endpoint, future), name=f"catalog-build-{endpoint}", daemon=True
+        ).start()
+        return future
+
+    def _run_build(self, endpoint: str, future: Future):
+        started = time.perf_counter()
+        try:
+            source, catalog = self._build(endpoint)
+        except Exception as e:
+            logger.exception("Catalog build failed", extra={"endpoint": endpoint})
+            with self._lock:
+                del self._pending[endpoint]
+            future.set_exception(e)
+            return
+        build_ms = (time.perf_counter() - started) * 1000
+        with self._lock:
+            self._generation += 1
+            loaded = LoadedCatalog(endpoint, source, catalog, self._generation, build_ms)
+            # Copy, then swap: readers see the old dict or the new one, never a dict being changed
+            self._live = {**self._live, endpoint: loaded}
+            del self._pending[endpoint]
+        CATALOG_BUILDS.labels(endpoint).observe(build_ms)
+        logger.info("Catalog swapped in", extra=dict(loaded.summary(), endpoint=endpoint))
+        future.set_result(loaded)
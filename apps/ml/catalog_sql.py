@@ -0,0 +1,163 @@
+"""
+SQL and row mapping for the catalog fetches, shared by the synchronous
+(psycopg2) and async (asyncpg) serving modes.
+The two drivers differ only in their parameter placeholders: psycopg2 uses
+%s, asyncpg uses $1, $2, ...
+"""
+
+from typing import Dict, List, Optional, Sequence, Tuple
+
+PLACEHOLDER_STYLES = ("pyformat", "numeric")
+
+ACCOMMODATIONS_SQL = """
+    SELECT
+        a.id,
+        a.name,
+        a.type,
+        a.amenities,
+        a.rating,
+        a.district,
+        a.price_range_min,
+        a.price_range_max,
+        a.province,
+        a.interests,
+        a.travel_style,
+        a.group_size,
+        a.prior_bookings,
+        ap.company_name as provider_name
+    FROM accommodations a
+    LEFT JOIN accommodation_providers ap ON a.provider_id = ap.provider_id
+    WHERE 1=1
+"""
+
+GUIDES_SQL = """
+    SELECT
+        g.user_id as id,
+        u.name,
+        g.experience,
+        g.languages,
+        g.expertise,
+        g.rating,
+        g.price,
+        g.availability,
+        g.city,
+        g.province,
+        g.gender
+    FROM guides g
+    LEFT JOIN users u ON g.user_id = u.id
+    WHERE 1=1
+"""
+
+
+class _Params:
+    """Collects query parameters and hands out matching placeholders."""
+
+    def __init__(self, style: str):
+        if style not in PLACEHOLDER_STYLES:
+            raise ValueError(f"Unknown placeholder style '{style}'")
+        self.style = style
+        self.values: List = []
+
+    def add(self, value) -> str:
+        self.values.append(value)
+        return "%s" if self.style == "pyformat" else f"${len(self.values)}"
+
+
+def accommodations_query(
+    budget_min: Optional[float] = None,
+    budget_max: Optional[float] = None,
+    district: Optional[str] = None,
+    province: Optional[str] = None,
+    style: str = "pyformat"
+) -> Tuple[str, Sequence]:
+    """
+    Build the accommodation fetch.
+
+    Amenities are not filtered here; they are a scoring preference, so
+    partial amenity matches still come back.
+
+    Returns:
+        Tuple of (SQL, parameters) for the given placeholder style
+    """
+    query = ACCOMMODATIONS_SQL
+    params = _Params(style)
+
+    if budget_min is not None and budget_max is not None:
+        query += f" AND (a.price_range_min <= {params.add(budget_max)} AND a.price_range_max >= {params.add(budget_min)})"
+
+    if district:
+        query += f" AND a.district = {params.add(district)}"
+
+    if province:
+        query += f" AND a.province = {params.add(province)}"
+
+    return query, params.values
+
+
+def guides_query(
+    budget_min: Optional[float] = None,
+    budget_max: Optional[float] = None,
+    city: Optional[str] = None,
+    province: Optional[str] = None,
+    style: str = "pyformat"
+) -> Tuple[str, Sequence]:
+    """
+    Build the guide fetch.
+
+    Returns:
+        Tuple of (SQL, parameters) for the given placeholder style
+    """
+    query = GUIDES_SQL
+    params = _Params(style)
+
+    if budget_min is not None and budget_max is not None:
+        query += f" AND (g.price >= {params.add(budget_min)} AND g.price <= {params.add(budget_max)})"
+
+    if city:
+        query += f" AND g.city = {params.add(city)}"
+
+    if province:
+        query += f" AND g.province = {params.add(province)}"
+
+    return query, params.values
+
+
+def accommodation_from_row(row) -> Dict:
+    """Convert an accommodations row (dict-like) to the ML model format."""
+    return {
+        'id': row['id'],
+        'name': row['name'],
+        'type': row.get('type') or [],
+        'amenities': row.get('amenities') or [],
+        'rating': row.get('rating'),
+        'district': row.get('district'),
+        'price_range_min': row.get('price_range_min') or 0,
+        'price_range_max': row.get('price_range_max') or 0,
+        'province': row.get('province'),
+        'interests': row.get('interests') or [],
+        'travel_style': row.get('travel_style') or [],
+        'group_size': row.get('group_size') or 1,
+        'prior_bookings': row.get('prior_bookings') or 0,
+        'availability': True,  # Assume available
+        'provider_name': row.get('provider_name'),
+        'in_system': True  # Flag to indicate this is real data
+    }
+
+
+def guide_from_row(row) -> Dict:
+    """Convert a guides row (dict-like) to the ML model format."""
+    return {
+        'id': row['id'],
+        'user_id': row['id'],
+        'name': row['name'],
+        'experience': row.get('experience') or [],
+        'languages': row.get('languages') or [],
+        'expertise': row.get('expertise') or [],
+        'rating': row.get('rating'),
+        'price': row.get('price') or 0,
+        'availability': row.get('availability', True),
+        'city': row.get('city'),
+        'province': row.get('province'),
+        'gender': row.get('gender'),
+        'in_system': True
+    }
@@ -3,10 +3,18 @@ Mock data generator for accommodation recommendation system.
 Generates 1000 realistic accommodation records for testing ML algorithms.
 """
 
-import json
+import os
 import random
+import sys
 import uuid
-from typing import List, Dict
+from typing import Iterable, Iterator, List, Dict
+
+# Make the ML package root importable when run as a script
+app_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if app_dir not in sys.path:
+    sys.path.append(app_dir)
+
+from catalog_io import append_records, write_catalog
 
 # Sri Lankan provinces and major cities
 PROVINCES = {
@@ -69,8 +77,19 @@ def generate_mock_accommodations(count: int = 1000) -> List[Dict]:
     Returns:
         List of accommodation dictionaries
     """
-    accommodations = []
+    return list(iter_mock_accommodations(count))
+
+
+def iter_mock_accommodations(count: int = 1000) -> Iterator[Dict]:
+    """
+    Yield mock accommodations one at a time.
+    
+    Args:
+        count: Number of accommodations to generate (default: 1000)
     
+    Yields:
+        Accommodation dictionaries
+    """
     for i in range(count):
         # Select province and city
         province = random.choice(list(PROVINCES.keys()))
@@ -157,16 +176,35 @@ def generate_mock_accommodations(count: int = 1000) -> List[Dict]:
             "availability": random.random() > 0.1,  # 90% available
         }
         
-        accommodations.append(accommodation)
-    
-    return accommodations
+        yield accommodation
 
 
-def save_mock_data(accommodations: List[Dict], filename: str = "mock_accommodations.json"):
-    """Save generated accommodations to JSON file."""
-    with open(filename, 'w', encoding='utf-8') as f:
-        json.dump(accommodations, f, indent=2, ensure_ascii=False)
-    print(f"✓ Generated {len(accommodations)} accommodations")
+def save_mock_data(
+    accommodations: Iterable[Dict],
+    filename: str = "mock_accommodations.json",
+    append: bool = False
+):
+    """
+    Save generated accommodations to a JSON or JSON Lines file.
+    
+    A JSON Lines filename (.jsonl or .ndjson) is written one record per line
+    as the records arrive, so a generator from iter_mock_accommodations never has
+    to be held in memory.
+    
+    Args:
+        accommodations: Accommodations to save (list or generator)
+        filename: Output path (.json for an indented array, .jsonl or .ndjson
+            for JSON Lines)
+        append: Append to an existing JSON Lines file instead of replacing it
+    
+    Raises:
+        ValueError: If append is set and filename is not a JSON Lines file
+    """
+    if append:
+        count = append_records(accommodations, filename)
+    else:
+        count = write_catalog(accommodations, filename)
+    print(f"✓ Generated {count} accommodations")
     print(f"✓ Saved to {filename}")
 
 
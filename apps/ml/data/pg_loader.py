@@ -0,0 +1,376 @@
+"""
+Bulk loader for synthetic catalogs into a local, disposable PostgreSQL.
+Streams generated (or file-backed) accommodations and guides into the
+users, accommodation_providers, accommodations and guides tables with
+COPY FROM STDIN in batches, then builds the lookup indexes used by
+fetch_accommodations_from_db / fetch_guides_from_db.
+
+Usage:
+    DATABASE_URL=postgresql://postgres@localhost:5432/wbth_load \\
+        python data/pg_loader.py --accommodations 1000000 --guides 200000 --create-schema --truncate
+"""
+
+import argparse
+import io
+import os
+import sys
+import time
+from typing import Dict, Iterable, Iterator, Optional, Sequence, Tuple
+
+import psycopg2
+from psycopg2.extensions import parse_dsn
+from dotenv import load_dotenv
+
+# Make the ML package root and this directory importable when run as a script
+data_dir = os.path.dirname(os.path.abspath(__file__))
+base_dir = os.path.dirname(data_dir)
+for path in (base_dir, data_dir):
+    if path not in sys.path:
+        sys.path.append(path)
+
+from catalog_io import iter_batches, read_catalog
+from scale_generator import DEFAULT_SEED, iter_scale_records
+
+DEFAULT_BATCH_SIZE = 50_000
+LOCAL_HOSTS = ("", "localhost", "127.0.0.1", "::1")
+PLACEHOLDER_PASSWORD_HASH = "loadtest-not-a-password-hash"
+
+# Column lists copied into each table (all other columns keep their defaults)
+USER_COLUMNS = ("id", "name", "email", "password_hash", "role")
+PROVIDER_COLUMNS = ("user_id", "provider_id", "company_name")
+ACCOMMODATION_COLUMNS = (
+    "id", "provider_id", "name", "type", "amenities", "rating", "district",
+    "price_range_min", "price_range_max", "province", "interests",
+    "travel_style", "group_size", "prior_bookings"
+)
+GUIDE_COLUMNS = (
+    "user_id", "experience", "languages", "expertise", "rating", "price",
+    "availability", "city", "province", "gender"
+)
+
+# Subset of the Prisma schema (packages/prisma/schema.prisma) read by the ML API.
+# Primary keys and unique constraints are added after the load.
+SCHEMA_DDL = """
+DO $$ BEGIN
+    CREATE TYPE "UserRole" AS ENUM ('tourist', 'guide', 'accommodation_provider', 'admin');
+EXCEPTION WHEN duplicate_object THEN NULL;
+END $$;
+
+CREATE TABLE IF NOT EXISTS users (
+    id TEXT NOT NULL,
+    name TEXT NOT NULL,
+    email TEXT NOT NULL,
+    password_hash TEXT NOT NULL,
+    contact_no TEXT,
+    role "UserRole" NOT NULL DEFAULT 'tourist',
+    created_at TIMESTAMP(3) NOT NULL DEFAULT CURRENT_TIMESTAMP,
+    email_notifications_enabled BOOLEAN NOT NULL DEFAULT true
+);
+
+CREATE TABLE IF NOT EXISTS accommodation_providers (
+    user_id TEXT NOT NULL,
+    provider_id TEXT NOT NULL,
+    company_name TEXT NOT NULL,
+    logo TEXT,
+    location TEXT
+);
+
+CREATE TABLE IF NOT EXISTS accommodations (
+    id TEXT NOT NULL,
+    provider_id TEXT NOT NULL,
+    name TEXT NOT NULL,
+    type TEXT[],
+    amenities TEXT[],
+    rating DOUBLE PRECISION,
+    account_no TEXT,
+    budget TEXT[],
+    district TEXT NOT NULL,
+    price_range_min DOUBLE PRECISION,
+    price_range_max DOUBLE PRECISION,
+    province TEXT,
+    interests TEXT[],
+    group_size INTEGER,
+    num_booking_dates INTEGER,
+    prior_bookings INTEGER,
+    images TEXT[],
+    travel_style TEXT[],
+    location TEXT,
+    booking_price DOUBLE PRECISION
+);
+
+CREATE TABLE IF NOT EXISTS guides (
+    user_id TEXT NOT NULL,
+    experience TEXT[],
+    languages TEXT[],
+    expertise TEXT[],
+    rating DOUBLE PRECISION,
+    account_no TEXT,
+    price DOUBLE PRECISION,
+    availability BOOLEAN NOT NULL DEFAULT true,
+    profile_picture TEXT,
+    city TEXT,
+    province TEXT,
+    gender TEXT,
+    booking_price DOUBLE PRECISION
+);
+"""
+
+# Constraints matching the Prisma migrations, only added to tables created here
+CONSTRAINT_DDL = [
+    ('users', 'users_pkey', 'ALTER TABLE users ADD CONSTRAINT users_pkey PRIMARY KEY (id)'),
+    ('accommodation_providers', 'accommodation_providers_pkey',
+     'ALTER TABLE accommodation_providers ADD CONSTRAINT accommodation_providers_pkey PRIMARY KEY (user_id)'),
+    ('accommodations', 'accommodations_pkey',
+     'ALTER TABLE accommodations ADD CONSTRAINT accommodations_pkey PRIMARY KEY (id)'),
+    ('guides', 'guides_pkey', 'ALTER TABLE guides ADD CONSTRAINT guides_pkey PRIMARY KEY (user_id)'),
+]
+UNIQUE_INDEX_DDL = [
+    'CREATE UNIQUE INDEX IF NOT EXISTS users_email_key ON users (email)',
+    'CREATE UNIQUE INDEX IF NOT EXISTS accommodation_providers_provider_id_key ON accommodation_providers (provider_id)',
+]
+
+# Secondary indexes serving the WHERE clauses in api.py; dropped before and rebuilt after a load
+LOOKUP_INDEXES = {
+    'ml_accommodations_district_idx': 'CREATE INDEX ml_accommodations_district_idx ON accommodations (district)',
+    'ml_accommodations_province_idx': 'CREATE INDEX ml_accommodations_province_idx ON accommodations (province)',
+    'ml_accommodations_price_idx':
+        'CREATE INDEX ml_accommodations_price_idx ON accommodations (price_range_min, price_range_max)',
+    'ml_accommodations_provider_idx': 'CREATE INDEX ml_accommodations_provider_idx ON accommodations (provider_id)',
+    'ml_guides_city_idx': 'CREATE INDEX ml_guides_city_idx ON guides (city)',
+    'ml_guides_province_idx': 'CREATE INDEX ml_guides_province_idx ON guides (province)',
+    'ml_guides_price_idx': 'CREATE INDEX ml_guides_price_idx ON guides (price)',
+}
+
+
+# ============================================================================
+# COPY text format encoding
+# ============================================================================
+
+_COPY_ESCAPES = str.maketrans({'\\': '\\\\', '\t': '\\t', '\n': '\\n', '\r': '\\r'})
+
+
+def pg_array(values: Optional[Sequence[str]]) -> Optional[str]:
+    """Encode a list of strings as a PostgreSQL array literal."""
+    if values is None:
+        return None
+    items = []
+    for value in values:
+        escaped = str(value).replace('\\', '\\\\').replace('"', '\\"')
+        items.append(f'"{escaped}"')
+    return '{' + ','.join(items) + '}'
+
+
+def copy_field(value) -> str:
+    """Encode one value as a field of COPY ... FROM STDIN (text format)."""
+    if value is None:
+        return '\\N'
+    if isinstance(value, bool):
+        return 't' if value else 'f'
+    if isinstance(value, (list, tuple)):
+        value = pg_array(value)
+    return str(value).translate(_COPY_ESCAPES)
+
+
+def copy_line(row: Sequence) -> str:
+    """Encode a row as one line of COPY text format."""
+    return '\t'.join(copy_field(v) for v in row) + '\n'
+
+
+# ============================================================================
+# Record -> table rows
+# ============================================================================
+
+def accommodation_rows(acc: Dict) -> Tuple[Tuple, Tuple, Tuple]:
+    """
+    Rows for one accommodation: its provider's user, the provider, and the accommodation.
+
+    Each generated accommodation gets its own provider, keyed by provider_id.
+    """
+    provider_id = acc["provider_id"]
+    user = (provider_id, acc["name"], f"{provider_id}@loadtest.local", PLACEHOLDER_PASSWORD_HASH, "accommodation_provider")
+    provider = (provider_id, provider_id, acc["name"])
+    accommodation = (
+        acc["id"], provider_id, acc["name"], acc.get("type"), acc.get("amenities"),
+        acc.get("rating"), acc["district"], acc.get("price_range_min"), acc.get("price_range_max"),
+        acc.get("province"), acc.get("interests"), acc.get("travel_style"),
+        acc.get("group_size"), acc.get("prior_bookings")
+    )
+    return user, provider, accommodation
+
+
+def guide_rows(guide: Dict) -> Tuple[Tuple, Tuple]:
+    """Rows for one guide: its user and the guide profile."""
+    user_id = guide.get("user_id") or guide["id"]
+    user = (user_id, guide["name"], f"{user_id}@loadtest.local", PLACEHOLDER_PASSWORD_HASH, "guide")
+    profile = (
+        user_id, guide.get("experience"), guide.get("languages"), guide.get("expertise"),
+        guide.get("rating"), guide.get("price"), guide.get("availability", True),
+        guide.get("city"), guide.get("province"), guide.get("gender")
+    )
+    return user, profile
+
+
+# ============================================================================
+# Loading
+# ============================================================================
+
+def is_local_database(database_url: str) -> bool:
+    """True if the connection string points at a local server or Unix socket."""
+    host = parse_dsn(database_url).get("host", "")
+    return host in LOCAL_HOSTS or host.startswith("/")
+
+
+def _copy(cur, table: str, columns: Sequence[str], rows: Iterable[Sequence]) -> int:
+    """COPY rows into table from an in-memory text buffer; returns the row count."""
+    buffer = io.StringIO()
+    count = 0
+    for row in rows:
+        buffer.write(copy_line(row))
+        count += 1
+    buffer.seek(0)
+    cur.copy_expert(f"COPY {table} ({', '.join(columns)}) FROM STDIN", buffer)
+    return count
+
+
+def drop_lookup_indexes(cur):
+    """Drop the secondary indexes so COPY does not maintain them row by row."""
+    for name in LOOKUP_INDEXES:
+        cur.execute(f"DROP INDEX IF EXISTS {name}")
+
+
+def build_indexes(cur, created_schema: bool):
+    """Create constraints (for tables created here), lookup indexes, and refresh statistics."""
+    if created_schema:
+        for table, name, ddl in CONSTRAINT_DDL:
+            cur.execute(
+                "SELECT 1 FROM pg_constraint WHERE conname = %s AND conrelid = %s::regclass",
+                (name, table)
+            )
+            if cur.fetchone() is None:
+                cur.execute(ddl)
+        for ddl in UNIQUE_INDEX_DDL:
+            cur.execute(ddl)
+
+    for ddl in LOOKUP_INDEXES.values():
+        cur.execute(ddl)
+
+    for table in ("users", "accommodation_providers", "accommodations", "guides"):
+        cur.execute(f"ANALYZE {table}")
+
+
+def load_accommodations(conn, records: Iterable[Dict], batch_size: int = DEFAULT_BATCH_SIZE) -> int:
+    """
+    Stream accommodations (with their providers and provider users) into Postgres.
+
+    Each batch is copied into users, accommodation_providers and accommodations
+    (in foreign-key order) and committed.
+
+    Returns:
+        Number of accommodations loaded
+    """
+    total = 0
+    start = time.perf_counter()
+    with conn.cursor() as cur:
+        for batch in iter_batches(records, batch_size):
+            rows = [accommodation_rows(acc) for acc in batch]
+            _copy(cur, "users", USER_COLUMNS, (r[0] for r in rows))
+            _copy(cur, "accommodation_providers", PROVIDER_COLUMNS, (r[1] for r in rows))
+            total += _copy(cur, "accommodations", ACCOMMODATION_COLUMNS, (r[2] for r in rows))
+            conn.commit()
+            print(f"  accommodations: {total:,} ({total / (time.perf_counter() - start):,.0f} rows/s)")
+    return total
+
+
+def load_guides(conn, records: Iterable[Dict], batch_size: int = DEFAULT_BATCH_SIZE) -> int:
+    """
+    Stream guides (with their users) into Postgres.
+
+    Returns:
+        Number of guides loaded
+    """
+    total = 0
+    start = time.perf_counter()
+    with conn.cursor() as cur:
+        for batch in iter_batches(records, batch_size):
+            rows = [guide_rows(guide) for guide in batch]
+            _copy(cur, "users", USER_COLUMNS, (r[0] for r in rows))
+            total += _copy(cur, "guides", GUIDE_COLUMNS, (r[1] for r in rows))
+            conn.commit()
+            print(f"  guides: {total:,} ({total / (time.perf_counter() - start):,.0f} rows/s)")
+    return total
+
+
+def _records(kind: str, count: int, filename: Optional[str], seed: int) -> Iterator[Dict]:
+    """Records to load: from a catalog file/directory if given, else generated."""
+    if filename:
+        records = read_catalog(filename)
+        if count:
+            records = (r for _, r in zip(range(count), records))
+        return records
+    return iter_scale_records(kind, count, seed=seed)
+
+
+def main():
+    load_dotenv()
+
+    parser = argparse.ArgumentParser(description="Bulk-load synthetic catalogs into a local Postgres with COPY")
+    parser.add_argument("--database-url", default=os.getenv("DATABASE_URL"))
+    parser.add_argument("--accommodations", type=int, default=0, help="Number of accommodations to load")
+    parser.add_argument("--guides", type=int, default=0, help="Number of guides to load")
+    parser.add_argument("--accommodations-file", help="Load accommodations from a catalog file or shard directory")
+    parser.add_argument("--guides-file", help="Load guides from a catalog file or shard directory")
+    parser.add_argument("--seed", type=int, default=DEFAULT_SEED)
+    parser.add_argument("--batch-size", type=int, default=DEFAULT_BATCH_SIZE)
+    parser.add_argument("--create-schema", action="store_true", help="Create the tables if they do not exist")
+    parser.add_argument("--truncate", action="store_true", help="Empty the four tables before loading")
+    parser.add_argument("--skip-fk-checks", action="store_true",
+                        help="Disable FK triggers during the load (needs superuser)")
+    parser.add_argument("--allow-remote", action="store_true", help="Allow a non-local database host")
+    args = parser.parse_args()
+
+    if not args.database_url:
+        parser.error("DATABASE_URL is not set (use --database-url)")
+    if not args.allow_remote and not is_local_database(args.database_url):
+        parser.error("Refusing to bulk-load a non-local database (use --allow-remote for a disposable remote DB)")
+    if not (args.accommodations or args.guides or args.accommodations_file or args.guides_file):
+        parser.error("Nothing to load: pass --accommodations/--guides counts or catalog files")
+
+    conn = psycopg2.connect(args.database_url)
+    start = time.perf_counter()
+    try:
+        with conn.cursor() as cur:
+            if args.create_schema:
+                cur.execute(SCHEMA_DDL)
+            if args.truncate:
+                cur.execute("TRUNCATE accommodations, accommodation_providers, guides, users CASCADE")
+            if args.skip_fk_checks:
+                cur.execute("SET session_replication_role = replica")
+            drop_lookup_indexes(cur)
+        conn.commit()
+
+        if args.accommodations or args.accommodations_file:
+            print("Loading accommodations...")
+            records = _records("accommodations", args.accommodations, args.accommodations_file, args.seed)
+            load_accommodations(conn, records, args.batch_size)
+
+        if args.guides or args.guides_file:
+            print("Loading guides...")
+            records = _records("guides", args.guides, args.guides_file, args.seed)
+            load_guides(conn, records, args.batch_size)
+
+        print("Building indexes...")
+        index_start = time.perf_counter()
+        with conn.cursor() as cur:
+            if args.skip_fk_checks:
+                cur.execute("SET session_replication_role = DEFAULT")
+            build_indexes(cur, created_schema=args.create_schema)
+        conn.commit()
+        print(f"✓ Indexes built in {time.perf_counter() - index_start:.1f}s")
+    finally:
+        conn.close()
+
+    print(f"✓ Load complete in {time.perf_counter() - start:.1f}s")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,509 @@
+"""
+Vectorized mock data generator for scale and load testing.
+Generates millions of accommodation or guide records with NumPy, using
+deterministic per-shard seeds and configurable skew, and writes them as
+JSON Lines or binary columnar (.npz) catalog shards.
+
+Usage:
+    python data/scale_generator.py accommodations --count 5000000 --workers 8
+    python data/scale_generator.py guides --count 1000000 --format jsonl
+"""
+
+import argparse
+import math
+import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+from typing import Dict, Iterator, List, Optional, Tuple
+
+import numpy as np
+
+# Make the ML package root and this directory importable when run as a script
+data_dir = os.path.dirname(os.path.abspath(__file__))
+base_dir = os.path.dirname(data_dir)
+for path in (base_dir, data_dir):
+    if path not in sys.path:
+        sys.path.append(path)
+
+from catalog_io import append_records, iter_column_records, write_columnar
+from data_generator import AMENITIES, INTERESTS, PROVINCES, TRAVEL_STYLES, TYPES
+from GuidesRecommendationModel.guide_data_generator import (
+    EXPERTISE,
+    FIRST_NAMES,
+    LANGUAGES,
+    LAST_NAMES,
+)
+
+DEFAULT_SEED = 42
+DEFAULT_ROWS_PER_SHARD = 500_000
+
+# Flattened district table; Zipf ranks follow this order (Colombo most popular)
+DISTRICTS = [city for cities in PROVINCES.values() for city in cities]
+PROVINCE_NAMES = list(PROVINCES.keys())
+DISTRICT_PROVINCE = np.array(
+    [PROVINCE_NAMES.index(prov) for prov, cities in PROVINCES.items() for _ in cities],
+    dtype=np.uint8
+)
+
+# Accommodation name parts (same vocabulary as data_generator.generate_accommodation_name)
+NAME_PREFIXES = ["The", "Grand", "Royal", "Paradise", "Ocean", "Hill", "Palm", "Green", "Blue", "Golden"]
+HOMESTAY_PREFIXES = ["Cozy", "Comfortable", "Family", "Traditional"]
+TYPE_LABELS = [t.title() for t in TYPES]
+TYPE_WEIGHTS = [0.30, 0.20, 0.30, 0.20]  # hotel, villa, resort, homestay
+
+# Per-type ranges, indexed like TYPES: hotel, villa, resort, homestay
+PRICE_MIN_RANGE = np.array([[2000, 8000], [5000, 15000], [5000, 15000], [1000, 3000]])
+PRICE_SPREAD_RANGE = np.array([[2000, 8000], [5000, 20000], [5000, 20000], [1000, 3000]])
+GROUP_SIZE_RANGE = np.array([[2, 20], [4, 12], [2, 20], [2, 6]])
+
+COASTAL_CITIES = ["Galle", "Mirissa", "Hikkaduwa", "Negombo", "Trincomalee", "Arugam Bay", "Tangalle"]
+HILL_CITIES = ["Nuwara Eliya", "Ella", "Kandy", "Badulla"]
+
+# Guide location-specific expertise (mirrors guide_data_generator)
+GUIDE_EXPERTISE_RULES = [
+    (["Galle", "Mirissa", "Hikkaduwa", "Arugam Bay"], ["Surfing", "Diving", "Whale Watching", "Beach Activities"]),
+    (["Kandy", "Anuradhapura", "Polonnaruwa", "Sigiriya"], ["Cultural", "Historical", "Religious Sites"]),
+    (["Nuwara Eliya", "Ella", "Badulla"], ["Hiking", "Tea Plantation", "Nature Trails"]),
+]
+WILDLIFE_CITIES = ["Trincomalee", "Arugam Bay"]
+TAMIL_PROVINCES = ["Northern", "Eastern"]
+GENDERS = ["male", "female"]
+MAX_EXPERIENCE_ENTRIES = 3
+
+# Stable spawn keys so each kind/shard pair gets an independent stream
+KIND_KEYS = {"accommodations": 1, "guides": 2}
+
+
+def zipf_weights(n: int, skew: float) -> np.ndarray:
+    """
+    Zipf probabilities over n ranked items.
+
+    Args:
+        n: Number of items
+        skew: Zipf exponent (0 = uniform, ~1 = typical popularity skew)
+
+    Returns:
+        Probability vector of length n
+    """
+    weights = np.arange(1, n + 1, dtype=np.float64) ** -skew
+    return weights / weights.sum()
+
+
+def shard_rng(kind: str, seed: int, shard: int) -> np.random.Generator:
+    """Deterministic random generator for one shard of one catalog kind."""
+    return np.random.default_rng(np.random.SeedSequence(seed, spawn_key=(KIND_KEYS[kind], shard)))
+
+
+def _random_uuids(rng: np.random.Generator, n: int) -> np.ndarray:
+    """Random version-4 UUIDs as an (n, 16) uint8 array."""
+    raw = rng.integers(0, 256, size=(n, 16), dtype=np.uint8)
+    raw[:, 6] = (raw[:, 6] & 0x0F) | 0x40
+    raw[:, 8] = (raw[:, 8] & 0x3F) | 0x80
+    return raw
+
+
+def _random_masks(rng: np.random.Generator, n: int, vocab_size: int, k_min: int, k_max: int) -> np.ndarray:
+    """
+    Bitmasks with a uniformly random subset of k_min..k_max bits set per row.
+
+    Equivalent to random.sample(vocab, random.randint(k_min, k_max)).
+    """
+    order = np.argsort(rng.random((n, vocab_size), dtype=np.float32), axis=1)
+    k = rng.integers(k_min, k_max + 1, size=n)
+    take = np.arange(vocab_size) < k[:, None]
+    bits = np.left_shift(np.int64(1), order.astype(np.int64))
+    return (bits * take).sum(axis=1).astype(np.uint32)
+
+
+def _positions(vocab: List[str], terms: List[str]) -> np.ndarray:
+    """Indexes (bit positions) of terms within vocab."""
+    return np.array([vocab.index(t) for t in terms], dtype=np.int64)
+
+
+def _maybe_add_bit(rng: np.random.Generator, masks: np.ndarray, where: np.ndarray, bit: int, p: float) -> np.ndarray:
+    """Set bit on rows in where that lack it, each with probability p."""
+    missing = where & (((masks >> np.uint32(bit)) & 1) == 0)
+    add = missing & (rng.random(len(masks)) < p)
+    return masks | np.where(add, np.uint32(1 << bit), np.uint32(0))
+
+
+def _popcount(masks: np.ndarray, width: int) -> np.ndarray:
+    """Number of set bits per mask."""
+    counts = np.zeros(len(masks), dtype=np.int64)
+    for bit in range(width):
+        counts += (masks >> np.uint32(bit)) & 1
+    return counts
+
+
+def _lognormal_counts(rng: np.random.Generator, n: int, mu: float, sigma: float, cap: int) -> np.ndarray:
+    """Integer log-normal counts capped at cap (like int(random.lognormvariate))."""
+    return np.minimum(rng.lognormal(mu, sigma, size=n).astype(np.int64), cap).astype(np.int32)
+
+
+def _districts(rng: np.random.Generator, n: int, district_skew: float) -> np.ndarray:
+    """District codes drawn from a Zipf distribution over DISTRICTS."""
+    return rng.choice(len(DISTRICTS), size=n, p=zipf_weights(len(DISTRICTS), district_skew)).astype(np.uint8)
+
+
+def generate_accommodation_columns(
+    count: int,
+    seed: int = DEFAULT_SEED,
+    shard: int = 0,
+    district_skew: float = 1.1,
+    bookings_mu: float = 3.0,
+    bookings_sigma: float = 1.5,
+    max_bookings: int = 500
+) -> Dict[str, np.ndarray]:
+    """
+    Generate accommodation columns for one shard.
+
+    Args:
+        count: Number of accommodations
+        seed: Base random seed (same seed + shard -> identical output)
+        shard: Shard number, used to derive an independent random stream
+        district_skew: Zipf exponent over districts (0 = uniform)
+        bookings_mu: Log-normal mu for prior_bookings
+        bookings_sigma: Log-normal sigma for prior_bookings
+        max_bookings: Cap on prior_bookings
+
+    Returns:
+        Column name -> array, decodable with accommodation_schema()
+    """
+    rng = shard_rng("accommodations", seed, shard)
+
+    district = _districts(rng, count, district_skew)
+    type_idx = rng.choice(len(TYPES), size=count, p=TYPE_WEIGHTS).astype(np.uint8)
+
+    # Price range and capacity depend on type
+    price_min = rng.integers(PRICE_MIN_RANGE[type_idx, 0], PRICE_MIN_RANGE[type_idx, 1] + 1)
+    price_max = price_min + rng.integers(PRICE_SPREAD_RANGE[type_idx, 0], PRICE_SPREAD_RANGE[type_idx, 1] + 1)
+    group_size = rng.integers(GROUP_SIZE_RANGE[type_idx, 0], GROUP_SIZE_RANGE[type_idx, 1] + 1).astype(np.int16)
+
+    # Amenities (3-8) plus common basics
+    amenities = _random_masks(rng, count, len(AMENITIES), 3, 8)
+    everywhere = np.ones(count, dtype=bool)
+    amenities = _maybe_add_bit(rng, amenities, everywhere, AMENITIES.index("wifi"), 0.8)
+    amenities = _maybe_add_bit(rng, amenities, everywhere, AMENITIES.index("hot_water"), 0.9)
+
+    # Interests (2-5) plus location tags
+    interests = _random_masks(rng, count, len(INTERESTS), 2, 5)
+    coastal = np.isin(district, _positions(DISTRICTS, COASTAL_CITIES))
+    hills = np.isin(district, _positions(DISTRICTS, HILL_CITIES))
+    interests = _maybe_add_bit(rng, interests, coastal, INTERESTS.index("coastal"), 1.0)
+    interests = _maybe_add_bit(rng, interests, hills, INTERESTS.index("hiking"), 0.5)
+
+    travel_style = _random_masks(rng, count, len(TRAVEL_STYLES), 1, 3)
+
+    homestay = type_idx == TYPES.index("homestay")
+    name_prefix = np.where(
+        homestay,
+        len(NAME_PREFIXES) + rng.integers(0, len(HOMESTAY_PREFIXES), size=count),
+        rng.integers(0, len(NAME_PREFIXES), size=count)
+    ).astype(np.uint8)
+
+    return {
+        "id": _random_uuids(rng, count),
+        "provider_id": _random_uuids(rng, count),
+        "name_prefix": name_prefix,
+        "type": type_idx,
+        "amenities": amenities,
+        "rating": np.round(rng.triangular(2.5, 4.2, 5.0, size=count), 1),
+        "district": district,
+        "province": DISTRICT_PROVINCE[district],
+        "price_range_min": price_min.astype(np.float64),
+        "price_range_max": price_max.astype(np.float64),
+        "interests": interests,
+        "travel_style": travel_style,
+        "group_size": group_size,
+        "prior_bookings": _lognormal_counts(rng, count, bookings_mu, bookings_sigma, max_bookings),
+        "availability": rng.random(count) > 0.1,
+    }
+
+
+def accommodation_schema() -> List[Dict]:
+    """Columnar schema for generate_accommodation_columns output."""
+    return [
+        {"field": "id", "kind": "uuid", "column": "id"},
+        {"field": "name", "kind": "format", "format": "{} {} {}", "parts": [
+            {"column": "name_prefix", "vocab": NAME_PREFIXES + HOMESTAY_PREFIXES},
+            {"column": "district", "vocab": DISTRICTS},
+            {"column": "type", "vocab": TYPE_LABELS},
+        ]},
+        {"field": "provider_id", "kind": "uuid", "column": "provider_id"},
+        {"field": "type", "kind": "category_list", "column": "type", "vocab": TYPES},
+        {"field": "amenities", "kind": "mask", "column": "amenities", "vocab": AMENITIES},
+        {"field": "rating", "kind": "value", "column": "rating"},
+        {"field": "district", "kind": "category", "column": "district", "vocab": DISTRICTS},
+        {"field": "price_range_min", "kind": "value", "column": "price_range_min"},
+        {"field": "price_range_max", "kind": "value", "column": "price_range_max"},
+        {"field": "province", "kind": "category", "column": "province", "vocab": PROVINCE_NAMES},
+        {"field": "interests", "kind": "mask", "column": "interests", "vocab": INTERESTS},
+        {"field": "travel_style", "kind": "mask", "column": "travel_style", "vocab": TRAVEL_STYLES},
+        {"field": "group_size", "kind": "value", "column": "group_size"},
+        {"field": "prior_bookings", "kind": "value", "column": "prior_bookings"},
+        {"field": "availability", "kind": "value", "column": "availability"},
+    ]
+
+
+def generate_guide_columns(
+    count: int,
+    seed: int = DEFAULT_SEED,
+    shard: int = 0,
+    district_skew: float = 1.1,
+    bookings_mu: float = 2.5,
+    bookings_sigma: float = 1.3,
+    max_bookings: int = 300
+) -> Dict[str, np.ndarray]:
+    """
+    Generate guide columns for one shard.
+
+    Args:
+        count: Number of guides
+        seed: Base random seed (same seed + shard -> identical output)
+        shard: Shard number, used to derive an independent random stream
+        district_skew: Zipf exponent over cities (0 = uniform)
+        bookings_mu: Log-normal mu for prior_bookings
+        bookings_sigma: Log-normal sigma for prior_bookings
+        max_bookings: Cap on prior_bookings
+
+    Returns:
+        Column name -> array, decodable with guide_schema()
+    """
+    rng = shard_rng("guides", seed, shard)
+
+    city = _districts(rng, count, district_skew)
+    province = DISTRICT_PROVINCE[city]
+    gender = (rng.random(count) >= 0.7).astype(np.uint8)  # ~70% male
+
+    # Languages (1-4), English for ~90%, regional language by province
+    languages = _random_masks(rng, count, len(LANGUAGES), 1, 4)
+    everywhere = np.ones(count, dtype=bool)
+    tamil_region = np.isin(province, _positions(PROVINCE_NAMES, TAMIL_PROVINCES))
+    languages = _maybe_add_bit(rng, languages, everywhere, LANGUAGES.index("English"), 0.9)
+    languages = _maybe_add_bit(rng, languages, tamil_region, LANGUAGES.index("Tamil"), 0.7)
+    languages = _maybe_add_bit(rng, languages, ~tamil_region, LANGUAGES.index("Sinhala"), 0.8)
+
+    # Expertise (2-5) plus location-specific specialities
+    expertise = _random_masks(rng, count, len(EXPERTISE), 2, 5)
+    for cities, options in GUIDE_EXPERTISE_RULES:
+        option_bits = _positions(EXPERTISE, options)
+        group_mask = np.uint32(sum(1 << int(b) for b in option_bits))
+        lacking = np.isin(city, _positions(DISTRICTS, cities)) & ((expertise & group_mask) == 0)
+        chosen = option_bits[rng.integers(0, len(option_bits), size=count)]
+        expertise = expertise | np.where(lacking, np.left_shift(1, chosen).astype(np.uint32), np.uint32(0))
+    expertise = _maybe_add_bit(
+        rng, expertise, np.isin(city, _positions(DISTRICTS, WILDLIFE_CITIES)), EXPERTISE.index("Wildlife"), 0.7
+    )
+
+    # Experience: 1-3 "<years> years in <area>" entries, area drawn from the guide's expertise
+    entries = rng.integers(1, MAX_EXPERIENCE_ENTRIES + 1, size=count)
+    years = rng.integers(1, 16, size=(count, MAX_EXPERIENCE_ENTRIES)).astype(np.uint8)
+    years[np.arange(MAX_EXPERIENCE_ENTRIES) >= entries[:, None]] = 0
+    has_bit = ((expertise[:, None] >> np.arange(len(EXPERTISE), dtype=np.uint32)) & 1).astype(bool)
+    area_keys = rng.random((count, MAX_EXPERIENCE_ENTRIES, len(EXPERTISE)), dtype=np.float32)
+    area_keys[~np.broadcast_to(has_bit[:, None, :], area_keys.shape)] = -1.0
+    area = area_keys.argmax(axis=2).astype(np.uint8)
+
+    # Price: base + multilingual / specialist / premium-skill bonuses, capped
+    price = rng.integers(2000, 8001, size=count)
+    price += np.where(_popcount(languages, len(LANGUAGES)) >= 3, 2000, 0)
+    price += np.where(_popcount(expertise, len(EXPERTISE)) >= 4, 1500, 0)
+    premium = np.uint32((1 << EXPERTISE.index("Photography")) | (1 << EXPERTISE.index("Ayurveda")))
+    price += np.where((expertise & premium) != 0, 2000, 0)
+
+    return {
+        "id": _random_uuids(rng, count),
+        "user_id": _random_uuids(rng, count),
+        "first_name": rng.integers(0, len(FIRST_NAMES), size=count).astype(np.uint8),
+        "last_name": rng.integers(0, len(LAST_NAMES), size=count).astype(np.uint8),
+        "gender": gender,
+        "city": city,
+        "province": province,
+        "languages": languages,
+        "expertise": expertise,
+        "experience_years": years,
+        "experience_area": area,
+        "price": np.minimum(price, 20000).astype(np.float64),
+        "rating": np.round(rng.triangular(3.0, 4.3, 5.0, size=count), 1),
+        "prior_bookings": _lognormal_counts(rng, count, bookings_mu, bookings_sigma, max_bookings),
+        "availability": rng.random(count) > 0.2,
+    }
+
+
+def guide_schema() -> List[Dict]:
+    """Columnar schema for generate_guide_columns output."""
+    return [
+        {"field": "id", "kind": "uuid", "column": "id"},
+        {"field": "user_id", "kind": "uuid", "column": "user_id"},
+        {"field": "name", "kind": "format", "format": "{} {}", "parts": [
+            {"column": "first_name", "vocab": FIRST_NAMES},
+            {"column": "last_name", "vocab": LAST_NAMES},
+        ]},
+        {"field": "gender", "kind": "category", "column": "gender", "vocab": GENDERS},
+        {"field": "city", "kind": "category", "column": "city", "vocab": DISTRICTS},
+        {"field": "province", "kind": "category", "column": "province", "vocab": PROVINCE_NAMES},
+        {"field": "languages", "kind": "mask", "column": "languages", "vocab": LANGUAGES},
+        {"field": "expertise", "kind": "mask", "column": "expertise", "vocab": EXPERTISE},
+        {"field": "experience", "kind": "format_list", "format": "{} years in {}", "parts": [
+            {"column": "experience_years"},
+            {"column": "experience_area", "vocab": EXPERTISE},
+        ]},
+        {"field": "price", "kind": "value", "column": "price"},
+        {"field": "rating", "kind": "value", "column": "rating"},
+        {"field": "prior_bookings", "kind": "value", "column": "prior_bookings"},
+        {"field": "availability", "kind": "value", "column": "availability"},
+    ]
+
+
+GENERATORS = {
+    "accommodations": (generate_accommodation_columns, accommodation_schema),
+    "guides": (generate_guide_columns, guide_schema),
+}
+
+
+def shard_sizes(count: int, rows_per_shard: int = DEFAULT_ROWS_PER_SHARD) -> List[int]:
+    """Split count rows into shards of at most rows_per_shard rows."""
+    if count <= 0:
+        return []
+    shards = math.ceil(count / rows_per_shard)
+    base, extra = divmod(count, shards)
+    return [base + (1 if i < extra else 0) for i in range(shards)]
+
+
+def iter_scale_records(
+    kind: str,
+    count: int,
+    seed: int = DEFAULT_SEED,
+    rows_per_shard: int = DEFAULT_ROWS_PER_SHARD,
+    **options
+) -> Iterator[Dict]:
+    """
+    Yield generated records shard by shard, in-process.
+
+    Output is identical to reading back the shards written by generate_catalog
+    with the same kind, count, seed and rows_per_shard.
+
+    Args:
+        kind: "accommodations" or "guides"
+        count: Total number of records
+        seed: Base random seed
+        rows_per_shard: Maximum rows generated at once (bounds memory)
+        **options: Skew options passed to the column generator
+
+    Yields:
+        Record dictionaries in the same shape as the mock JSON data
+    """
+    generate, schema = GENERATORS[kind]
+    for shard, rows in enumerate(shard_sizes(count, rows_per_shard)):
+        columns = generate(rows, seed=seed, shard=shard, **options)
+        yield from iter_column_records(columns, schema())
+
+
+def _write_shard(job: Tuple[str, int, int, int, str, Dict]) -> Tuple[str, int]:
+    """Generate and write one shard (runs in a worker process)."""
+    kind, shard, rows, seed, path, options = job
+    generate, schema = GENERATORS[kind]
+    columns = generate(rows, seed=seed, shard=shard, **options)
+
+    if path.endswith(".npz"):
+        write_columnar(path, columns, schema())
+    else:
+        if os.path.exists(path):
+            os.remove(path)
+        append_records(iter_column_records(columns, schema()), path)
+    return path, rows
+
+
+def generate_catalog(
+    kind: str,
+    count: int,
+    out_dir: str,
+    fmt: str = "npz",
+    seed: int = DEFAULT_SEED,
+    rows_per_shard: int = DEFAULT_ROWS_PER_SHARD,
+    workers: Optional[int] = None,
+    **options
+) -> List[str]:
+    """
+    Generate a sharded catalog on disk using a pool of worker processes.
+
+    Each shard is seeded from (seed, shard), so the output does not depend on
+    the number of workers.
+
+    Args:
+        kind: "accommodations" or "guides"
+        count: Total number of records
+        out_dir: Directory for shard files (<kind>-00000.<fmt>, ...)
+        fmt: "npz" (binary columnar) or "jsonl"
+        seed: Base random seed
+        rows_per_shard: Maximum rows per shard file
+        workers: Worker processes (default: CPU count, 1 = in-process)
+        **options: Skew options passed to the column generator
+
+    Returns:
+        List of shard file paths in shard order
+    """
+    if kind not in GENERATORS:
+        raise ValueError(f"Unknown catalog kind: {kind}")
+    if fmt not in ("npz", "jsonl"):
+        raise ValueError(f"Unknown output format: {fmt}")
+
+    os.makedirs(out_dir, exist_ok=True)
+    jobs = [
+        (kind, shard, rows, seed, os.path.join(out_dir, f"{kind}-{shard:05d}.{fmt}"), options)
+        for shard, rows in enumerate(shard_sizes(count, rows_per_shard))
+    ]
+
+    workers = workers or os.cpu_count() or 1
+    if workers == 1 or len(jobs) == 1:
+        results = [_write_shard(job) for job in jobs]
+    else:
+        with ProcessPoolExecutor(max_workers=min(workers, len(jobs))) as pool:
+            results = list(pool.map(_write_shard, jobs))
+
+    return [path for path, _ in results]
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Generate large synthetic catalogs for scale testing")
+    parser.add_argument("kind", choices=sorted(GENERATORS))
+    parser.add_argument("--count", type=int, default=1_000_000, help="Total number of records")
+    parser.add_argument("--out", default=None, help="Output directory (default: data/scale/<kind>)")
+    parser.add_argument("--format", choices=["npz", "jsonl"], default="npz")
+    parser.add_argument("--seed", type=int, default=DEFAULT_SEED)
+    parser.add_argument("--rows-per-shard", type=int, default=DEFAULT_ROWS_PER_SHARD)
+    parser.add_argument("--workers", type=int, default=None, help="Worker processes (default: CPU count)")
+    parser.add_argument("--district-skew", type=float, default=1.1, help="Zipf exponent over districts (0 = uniform)")
+    parser.add_argument("--bookings-mu", type=float, default=None, help="Log-normal mu for prior_bookings")
+    parser.add_argument("--bookings-sigma", type=float, default=None, help="Log-normal sigma for prior_bookings")
+    args = parser.parse_args()
+
+    options = {"district_skew": args.district_skew}
+    if args.bookings_mu is not None:
+        options["bookings_mu"] = args.bookings_mu
+    if args.bookings_sigma is not None:
+        options["bookings_sigma"] = args.bookings_sigma
+
+    out_dir = args.out or os.path.join(data_dir, "scale", args.kind)
+
+    print(f"Generating {args.count:,} {args.kind} ({args.format}, seed {args.seed})...")
+    start = time.perf_counter()
+    paths = generate_catalog(
+        args.kind,
+        args.count,
+        out_dir,
+        fmt=args.format,
+        seed=args.seed,
+        rows_per_shard=args.rows_per_shard,
+        workers=args.workers,
+        **options
+    )
+    elapsed = time.perf_counter() - start
+
+    print(f"✓ Wrote {len(paths)} shard(s) to {out_dir}")
+    print(f"✓ {args.count / elapsed:,.0f} records/s ({elapsed:.1f}s)")
+
+
+if __name__ == "__main__":
+    main()
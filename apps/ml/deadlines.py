@@ -0,0 +1,119 @@
+"""
+Request deadlines and the fallback result cache for the recommendation API.
+A Deadline is threaded through the DB fetch (as a statement timeout) and the
+scoring loop (which stops early); when it is blown before scoring can start
+the API serves the last good result for the same query from ResultCache.
+"""
+
+import threading
+import time
+from collections import OrderedDict
+from typing import Dict, Optional, Tuple
+
+from serialization import dumps, loads
+
+
+class DeadlineExceeded(Exception):
+    """Raised when an operation ran out of its share of the request deadline."""
+
+
+class Deadline:
+    """Absolute point in time by which a request should be answered."""
+
+    enabled = True
+
+    def __init__(self, budget_ms: float):
+        """
+        Args:
+            budget_ms: Milliseconds from now until the deadline
+        """
+        self.budget_ms = budget_ms
+        self.expires_at = time.perf_counter() + budget_ms / 1000.0
+
+    def remaining_ms(self) -> float:
+        """Milliseconds left (negative once the deadline has passed)."""
+        return (self.expires_at - time.perf_counter()) * 1000
+
+    def expired(self) -> bool:
+        return time.perf_counter() >= self.expires_at
+
+
+class NoDeadline:
+    """Deadline that never expires, used when deadlines are disabled."""
+
+    enabled = False
+    budget_ms = None
+
+    def remaining_ms(self) -> float:
+        return float('inf')
+
+    def expired(self) -> bool:
+        return False
+
+
+NO_DEADLINE = NoDeadline()
+
+
+class ResultCache:
+    """
+    Thread-safe LRU of recent complete results, keyed by canonical query.
+
+    Results are stored serialized, so the cache holds an immutable copy that
+    costs one (C-speed) serialization to store and one parse to hand out,
+    instead of deep copies of the result tree.
+    """
+
+    def __init__(self, max_entries: int = 1000):
+        """
+        Args:
+            max_entries: Results kept; the least recently used are evicted
+        """
+        self.max_entries = max_entries
+        self._entries: "OrderedDict[str, Tuple[bytes, float]]" = OrderedDict()
+        self._hits: Dict[str, int] = {}
+        self._misses: Dict[str, int] = {}
+        self._lock = threading.Lock()
+
+    def put(self, key: str, results: Dict):
+        """Store results as JSON (later mutation by the caller does not leak in)."""
+        if self.max_entries <= 0:
+            return
+        stored = dumps(results)
+        with self._lock:
+            self._entries[key] = (stored, time.time())
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def get(self, key: str, endpoint: Optional[str] = None) -> Optional[Tuple[Dict, float]]:
+        """
+        Args:
+            key: Canonical query
+            endpoint: Endpoint to count the hit or miss under (not counted without one)
+
+        Returns:
+            Tuple of (freshly parsed results, age in seconds), or None on a miss
+        """
+        with self._lock:
+            entry = self._entries.get(key)
+            if endpoint is not None:
+                counts = self._misses if entry is None else self._hits
+                counts[endpoint] = counts.get(endpoint, 0) + 1
+            if entry is None:
+                return None
+            self._entries.move_to_end(key)
+        body, stored_at = entry
+        return loads(body), time.time() - stored_at
+
+    def hits(self) -> Dict[Tuple[str], int]:
+        """Counted hits per endpoint, as {(endpoint,): count}."""
+        with self._lock:
+            return {(endpoint,): count for endpoint, count in self._hits.items()}
+
+    def misses(self) -> Dict[Tuple[str], int]:
+        """Counted misses per endpoint, as {(endpoint,): count}."""
+        with self._lock:
+            return {(endpoint,): count for endpoint, count in self._misses.items()}
+
+    def __len__(self) -> int:
+        return len(self._entries)
@@ -0,0 +1,75 @@
+"""
+Score components behind recent recommendation results.
+The engines can skip reason generation (include_reasons=False) and report each
+returned item's score components instead; they are kept here per canonical
+query so /api/recommendations/explain can build the reasons for one item when
+the UI actually shows them.
+"""
+
+import threading
+from collections import OrderedDict
+from typing import Dict, Optional, Tuple
+
+
+class ExplanationCache:
+    """Thread-safe LRU of canonical query -> {item id: (item, score components)}."""
+
+    def __init__(self, max_entries: int = 1000):
+        """
+        Args:
+            max_entries: Rankings kept; the least recently used are evicted
+        """
+        self.max_entries = max_entries
+        self._entries: "OrderedDict[str, Dict[str, Tuple[Dict, Dict]]]" = OrderedDict()
+        self._hits: Dict[str, int] = {}
+        self._misses: Dict[str, int] = {}
+        self._lock = threading.Lock()
+
+    def put(self, key: str, explanations: Dict):
+        """
+        Store the explanations filled in by recommend(explanations=...).
+
+        Items and components are kept by reference: catalog records are
+        shared read-only and the components are built fresh per request.
+        Item ids are stored as strings, as they arrive in explain requests.
+        """
+        if self.max_entries <= 0:
+            return
+        entry = {str(item_id): value for item_id, value in explanations.items()}
+        with self._lock:
+            self._entries[key] = entry
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def get(self, key: str, endpoint: Optional[str] = None) -> Optional[Dict[str, Tuple[Dict, Dict]]]:
+        """
+        Args:
+            key: Canonical query
+            endpoint: Endpoint to count the hit or miss under; re-reads of a
+                ranking just stored pass none and are not counted
+
+        Returns:
+            Dictionary of item id -> (item, score components), or None on a miss
+        """
+        with self._lock:
+            entry = self._entries.get(key)
+            if endpoint is not None:
+                counts = self._misses if entry is None else self._hits
+                counts[endpoint] = counts.get(endpoint, 0) + 1
+            if entry is not None:
+                self._entries.move_to_end(key)
+            return entry
+
+    def hits(self) -> Dict[Tuple[str], int]:
+        """Counted hits per endpoint, as {(endpoint,): count}."""
+        with self._lock:
+            return {(endpoint,): count for endpoint, count in self._hits.items()}
+
+    def misses(self) -> Dict[Tuple[str], int]:
+        """Counted misses per endpoint, as {(endpoint,): count}."""
+        with self._lock:
+            return {(endpoint,): count for endpoint, count in self._misses.items()}
+
+    def __len__(self) -> int:
+        return len(self._entries)
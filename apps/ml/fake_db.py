@@ -0,0 +1,190 @@
+"""
+In-memory stand-in for the PostgreSQL catalog used by the Flask API.
+Serves accommodation and guide rows from catalog files with the same WHERE
+filters and row format as the SQL fetchers, so the API can be load tested
+without a production database. Each fetch has a blocking and an asyncio
+variant, for the Flask and ASGI servers respectively.
+"""
+
+import asyncio
+import time
+from typing import Dict, Iterable, List, Optional
+
+from catalog_io import read_catalog
+from deadlines import DeadlineExceeded
+
+
+class FakeDatabase:
+    """
+    Pluggable data source that mimics fetch_*_from_db in api.py.
+
+    Each fetch can sleep for a fixed latency to stand in for the query
+    round trip, and honours a statement timeout the way Postgres does.
+    """
+
+    def __init__(
+        self,
+        accommodations: Iterable[Dict] = (),
+        guides: Iterable[Dict] = (),
+        latency_ms: float = 0.0
+    ):
+        """
+        Initialize the fake database.
+
+        Args:
+            accommodations: Accommodation records in mock JSON format
+            guides: Guide records in mock JSON format
+            latency_ms: Simulated query round-trip time per fetch
+        """
+        self.accommodations = list(accommodations)
+        self.guides = list(guides)
+        self.latency_ms = latency_ms
+
+    @classmethod
+    def from_files(
+        cls,
+        accommodations_file: Optional[str] = None,
+        guides_file: Optional[str] = None,
+        latency_ms: float = 0.0
+    ) -> "FakeDatabase":
+        """
+        Build a fake database from catalog files (.json, .jsonl, .npz or shard directory).
+
+        Args:
+            accommodations_file: Accommodation catalog path (optional)
+            guides_file: Guide catalog path (optional)
+            latency_ms: Simulated query round-trip time per fetch
+
+        Returns:
+            FakeDatabase serving the loaded catalogs
+        """
+        accommodations = read_catalog(accommodations_file) if accommodations_file else []
+        guides = read_catalog(guides_file) if guides_file else []
+        return cls(accommodations, guides, latency_ms=latency_ms)
+
+    def _round_trip(self, timeout_ms: Optional[float] = None):
+        """Wait out the simulated query round trip, cancelling it at timeout_ms."""
+        if timeout_ms is not None and self.latency_ms > timeout_ms:
+            time.sleep(max(0.0, timeout_ms) / 1000.0)
+            raise DeadlineExceeded(f"statement timeout after {timeout_ms:.0f} ms")
+        if self.latency_ms > 0:
+            time.sleep(self.latency_ms / 1000.0)
+
+    async def _round_trip_async(self, timeout_ms: Optional[float] = None):
+        """Like _round_trip, but yields to the event loop while waiting."""
+        if timeout_ms is not None and self.latency_ms > timeout_ms:
+            await asyncio.sleep(max(0.0, timeout_ms) / 1000.0)
+            raise DeadlineExceeded(f"statement timeout after {timeout_ms:.0f} ms")
+        if self.latency_ms > 0:
+            await asyncio.sleep(self.latency_ms / 1000.0)
+
+    def fetch_accommodations(
+        self,
+        budget_min: Optional[float] = None,
+        budget_max: Optional[float] = None,
+        district: Optional[str] = None,
+        province: Optional[str] = None,
+        timeout_ms: Optional[float] = None
+    ) -> List[Dict]:
+        """Return accommodations matching the SQL filters, in ML model format."""
+        self._round_trip(timeout_ms)
+        return self._filter_accommodations(budget_min, budget_max, district, province)
+
+    async def fetch_accommodations_async(
+        self,
+        budget_min: Optional[float] = None,
+        budget_max: Optional[float] = None,
+        district: Optional[str] = None,
+        province: Optional[str] = None,
+        timeout_ms: Optional[float] = None
+    ) -> List[Dict]:
+        """Async variant of fetch_accommodations."""
+        await self._round_trip_async(timeout_ms)
+        return self._filter_accommodations(budget_min, budget_max, district, province)
+
+    def _filter_accommodations(self, budget_min, budget_max, district, province) -> List[Dict]:
+        accommodations = []
+        for acc in self.accommodations:
+            if budget_min is not None and budget_max is not None:
+                if not (acc.get('price_range_min', 0) <= budget_max and acc.get('price_range_max', 0) >= budget_min):
+                    continue
+            if district and acc.get('district') != district:
+                continue
+            if province and acc.get('province') != province:
+                continue
+
+            accommodations.append({
+                'id': acc['id'],
+                'name': acc['name'],
+                'type': acc.get('type') or [],
+                'amenities': acc.get('amenities') or [],
+                'rating': acc.get('rating'),
+                'district': acc.get('district'),
+                'price_range_min': acc.get('price_range_min') or 0,
+                'price_range_max': acc.get('price_range_max') or 0,
+                'province': acc.get('province'),
+                'interests': acc.get('interests') or [],
+                'travel_style': acc.get('travel_style') or [],
+                'group_size': acc.get('group_size') or 1,
+                'prior_bookings': acc.get('prior_bookings') or 0,
+                'availability': True,
+                'provider_name': acc.get('provider_name'),
+                'in_system': True
+            })
+
+        return accommodations
+
+    def fetch_guides(
+        self,
+        budget_min: Optional[float] = None,
+        budget_max: Optional[float] = None,
+        city: Optional[str] = None,
+        province: Optional[str] = None,
+        timeout_ms: Optional[float] = None
+    ) -> List[Dict]:
+        """Return guides matching the SQL filters, in ML model format."""
+        self._round_trip(timeout_ms)
+        return self._filter_guides(budget_min, budget_max, city, province)
+
+    async def fetch_guides_async(
+        self,
+        budget_min: Optional[float] = None,
+        budget_max: Optional[float] = None,
+        city: Optional[str] = None,
+        province: Optional[str] = None,
+        timeout_ms: Optional[float] = None
+    ) -> List[Dict]:
+        """Async variant of fetch_guides."""
+        await self._round_trip_async(timeout_ms)
+        return self._filter_guides(budget_min, budget_max, city, province)
+
+    def _filter_guides(self, budget_min, budget_max, city, province) -> List[Dict]:
+        guides = []
+        for guide in self.guides:
+            price = guide.get('price') or 0
+            if budget_min is not None and budget_max is not None:
+                if not (budget_min <= price <= budget_max):
+                    continue
+            if city and guide.get('city') != city:
+                continue
+            if province and guide.get('province') != province:
+                continue
+
+            guide_id = guide.get('user_id', guide['id'])
+            guides.append({
+                'id': guide_id,
+                'user_id': guide_id,
+                'name': guide['name'],
+                'experience': guide.get('experience') or [],
+                'languages': guide.get('languages') or [],
+                'expertise': guide.get('expertise') or [],
+                'rating': guide.get('rating'),
+                'price': price,
+                'availability': guide.get('availability', True),
+                'city': guide.get('city'),
+                'province': guide.get('province'),
+                'gender': guide.get('gender'),
+                'in_system': True
+            })
+
+        return guides
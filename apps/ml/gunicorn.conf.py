@@ -0,0 +1,29 @@
+"""
+Gunicorn settings for the production server:
+
+    gunicorn -c gunicorn.conf.py wsgi:app
+
+WEB_CONCURRENCY sets the worker processes (default: one per CPU, as scoring is
+CPU-bound) and WEB_THREADS the threads per worker, which overlap DB waits.
+"""
+
+import multiprocessing
+import os
+
+bind = f"0.0.0.0:{os.getenv('FLASK_PORT') or os.getenv('PORT', '5000')}"
+workers = int(os.getenv('WEB_CONCURRENCY', str(multiprocessing.cpu_count())))
+threads = int(os.getenv('WEB_THREADS', '4'))
+worker_class = 'gthread'
+
+# Load the app (and warm the engines) once in the master, then fork
+preload_app = True
+
+timeout = int(os.getenv('WEB_TIMEOUT_S', '30'))
+graceful_timeout = int(os.getenv('WEB_GRACEFUL_TIMEOUT_S', '30'))
+keepalive = 5
+
+# Recycle workers after this many requests (0 = never), staggered by the jitter
+max_requests = int(os.getenv('WEB_MAX_REQUESTS', '0'))
+max_requests_jitter = int(os.getenv('WEB_MAX_REQUESTS_JITTER', '0'))
+
+loglevel = os.getenv('GUNICORN_LOG_LEVEL', 'info')
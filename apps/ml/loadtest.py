@@ -0,0 +1,469 @@
+"""
+HTTP load-test harness for the recommendation API.
+Starts api.py against local Postgres or the in-memory fake data source, under
+the Flask dev server, a production WSGI server or the ASGI server (asgi_api.py), drives a concurrent mix of
+recommendation requests, and reports throughput, latency percentiles, error
+rates and database connections opened.
+
+Usage:
+    python loadtest.py --server dev --data-source fake --concurrency 8 --duration 30
+    python loadtest.py --server wsgi --workers 4 --threads 2 --mix accommodations=3,guides=1
+    python loadtest.py --server asgi --workers 2 --data-source postgres --concurrency 200
+    python loadtest.py --data-source fake --fake-latency-ms 50 --mix trip=1
+    python loadtest.py --url http://localhost:5000 --requests 2000
+    python loadtest.py --url http://localhost:5000 --traffic-class batch --concurrency 32
+"""
+
+import argparse
+import json
+import os
+import random
+import signal
+import socket
+import subprocess
+import sys
+import threading
+import time
+import urllib.error
+import urllib.request
+from typing import Dict, List, Optional, Tuple
+
+from queries import ACCOMMODATION_QUERIES, GUIDE_QUERIES
+
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+
+# Trip requests pair the engine shapes: the first accommodation shape with the first guide shape, ...
+TRIP_QUERIES = {
+    f"{acc_shape}+{guide_shape}": {"accommodations": ACCOMMODATION_QUERIES[acc_shape], "guides": GUIDE_QUERIES[guide_shape]}
+    for acc_shape, guide_shape in zip(ACCOMMODATION_QUERIES, GUIDE_QUERIES)
+}
+
+ENDPOINTS = {
+    "accommodations": ("/api/recommendations/accommodations", ACCOMMODATION_QUERIES),
+    "guides": ("/api/recommendations/guides", GUIDE_QUERIES),
+    "trip": ("/api/recommendations/trip", TRIP_QUERIES),
+}
+
+PERCENTILES = [50, 90, 99]
+
+
+# ============================================================================
+# Request mix
+# ============================================================================
+
+def parse_mix(spec: str) -> List[Tuple[str, str, float]]:
+    """
+    Parse a request mix such as "accommodations=3,guides:broad=1".
+
+    Each entry is endpoint[:shape]=weight. Without a shape, the weight is
+    split evenly across all of that endpoint's query shapes.
+
+    Args:
+        spec: Comma-separated mix specification
+
+    Returns:
+        List of (endpoint, shape, weight) tuples
+    """
+    mix = []
+    for entry in spec.split(","):
+        entry = entry.strip()
+        if not entry:
+            continue
+        target, _, weight = entry.partition("=")
+        endpoint, _, shape = target.partition(":")
+        weight = float(weight) if weight else 1.0
+
+        if endpoint not in ENDPOINTS:
+            raise ValueError(f"Unknown endpoint '{endpoint}' (expected one of {', '.join(ENDPOINTS)})")
+        queries = ENDPOINTS[endpoint][1]
+        if shape and shape not in queries:
+            raise ValueError(f"Unknown {endpoint} shape '{shape}' (expected one of {', '.join(queries)})")
+
+        shapes = [shape] if shape else list(queries)
+        mix.extend((endpoint, s, weight / len(shapes)) for s in shapes)
+
+    if not mix:
+        raise ValueError("Request mix is empty")
+    return mix
+
+
+# ============================================================================
+# Server lifecycle
+# ============================================================================
+
+def free_port() -> int:
+    """Ask the OS for an unused local TCP port."""
+    with socket.socket(socket.AF_INET, socket.SOCK_STREAM) as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def server_command(server: str, port: int, workers: int = 4, threads: int = 1) -> List[str]:
+    """
+    Build the command line that serves api.py.
+
+    Args:
+        server: "dev" for the Flask development server, "wsgi" for gunicorn,
+            "asgi" for uvicorn serving asgi_api.py
+        port: Port to listen on
+        workers: gunicorn or uvicorn worker processes (wsgi and asgi)
+        threads: Threads per gunicorn worker (wsgi only)
+
+    Returns:
+        Command argument list
+    """
+    if server == "dev":
+        return [sys.executable, "api.py"]
+    if server == "wsgi":
+        try:
+            import gunicorn  # noqa: F401
+        except ImportError:
+            raise SystemExit("gunicorn is required for --server wsgi (pip install gunicorn)")
+        # gunicorn.conf.py preloads the app once before forking, so the DB
+        # connection counter lives in memory shared by every worker
+        return [
+            sys.executable, "-m", "gunicorn", "-c", "gunicorn.conf.py",
+            "--workers", str(workers), "--threads", str(threads),
+            "--bind", f"127.0.0.1:{port}", "--log-level", "warning", "wsgi:app"
+        ]
+    if server == "asgi":
+        try:
+            import uvicorn  # noqa: F401
+        except ImportError:
+            raise SystemExit("uvicorn is required for --server asgi (pip install uvicorn)")
+        # Workers are spawned, not forked: db_connections_opened in /health is per worker
+        return [
+            sys.executable, "-m", "uvicorn", "--workers", str(workers),
+            "--host", "127.0.0.1", "--port", str(port), "--log-level", "warning", "asgi_api:app"
+        ]
+    raise ValueError(f"Unknown server '{server}'")
+
+
+def start_server(command: List[str], env: Dict[str, str], base_url: str, timeout: float = 60.0) -> subprocess.Popen:
+    """
+    Start the API server and wait until /ready answers (engines warm).
+
+    Args:
+        command: Server command line
+        env: Environment for the server process
+        base_url: URL the server will listen on
+        timeout: Seconds to wait for the server to come up
+
+    Returns:
+        The running server process
+    """
+    proc = subprocess.Popen(
+        command, cwd=BASE_DIR, env=env,
+        stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL,
+        start_new_session=True
+    )
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        if proc.poll() is not None:
+            raise RuntimeError(f"Server exited with code {proc.returncode}: {' '.join(command)}")
+        try:
+            with urllib.request.urlopen(f"{base_url}/ready", timeout=1.0):
+                return proc
+        except OSError:
+            time.sleep(0.2)
+
+    stop_server(proc)
+    raise RuntimeError(f"Server did not become ready within {timeout:.0f}s")
+
+
+def stop_server(proc: subprocess.Popen):
+    """Stop the server and any children it spawned (reloader, workers)."""
+    if proc.poll() is not None:
+        return
+    os.killpg(proc.pid, signal.SIGTERM)
+    try:
+        proc.wait(timeout=10)
+    except subprocess.TimeoutExpired:
+        os.killpg(proc.pid, signal.SIGKILL)
+        proc.wait()
+
+
+def fetch_health(base_url: str, timeout: float = 5.0) -> Dict:
+    """Return the /health document."""
+    with urllib.request.urlopen(f"{base_url}/health", timeout=timeout) as response:
+        return json.loads(response.read())
+
+
+# ============================================================================
+# Load generation
+# ============================================================================
+
+def send_request(
+    base_url: str,
+    path: str,
+    body: Dict,
+    timeout: float = 30.0,
+    headers: Optional[Dict[str, str]] = None
+) -> Tuple[Optional[int], float, Optional[str]]:
+    """
+    POST one JSON request (with optional extra headers).
+
+    Returns:
+        Tuple of (status code or None, latency in seconds, error message or None)
+    """
+    data = json.dumps(body).encode("utf-8")
+    req = urllib.request.Request(
+        f"{base_url}{path}", data=data, method="POST",
+        headers={"Content-Type": "application/json", **(headers or {})}
+    )
+    start = time.perf_counter()
+    try:
+        with urllib.request.urlopen(req, timeout=timeout) as response:
+            response.read()
+            status = response.status
+        error = None
+    except urllib.error.HTTPError as e:
+        status, error = e.code, f"HTTP {e.code}"
+    except (urllib.error.URLError, OSError) as e:
+        status, error = None, type(e).__name__
+    return status, time.perf_counter() - start, error
+
+
+def run_load(
+    base_url: str,
+    mix: List[Tuple[str, str, float]],
+    concurrency: int = 8,
+    duration: Optional[float] = 30.0,
+    total_requests: Optional[int] = None,
+    seed: int = 42,
+    timeout: float = 30.0,
+    headers: Optional[Dict[str, str]] = None
+) -> Tuple[List[Dict], float]:
+    """
+    Drive the request mix from concurrent client threads.
+
+    Runs until duration seconds have passed or total_requests have been
+    sent, whichever comes first.
+
+    Args:
+        base_url: Server base URL
+        mix: Weighted (endpoint, shape, weight) entries from parse_mix
+        concurrency: Number of client threads
+        duration: Run length in seconds (None for no limit)
+        total_requests: Total requests to send (None for no limit)
+        seed: Seed for the per-thread request choice
+        timeout: Per-request timeout in seconds
+        headers: Extra headers sent with every request (optional)
+
+    Returns:
+        Tuple of (per-request samples, elapsed wall time in seconds)
+    """
+    if duration is None and total_requests is None:
+        raise ValueError("Set a duration or a request count")
+
+    targets = [(endpoint, shape) for endpoint, shape, _ in mix]
+    weights = [weight for _, _, weight in mix]
+    samples = []
+    lock = threading.Lock()
+    sent = [0]
+    start = time.perf_counter()
+    deadline = start + duration if duration is not None else None
+
+    def claim() -> bool:
+        if deadline is not None and time.perf_counter() >= deadline:
+            return False
+        with lock:
+            if total_requests is not None and sent[0] >= total_requests:
+                return False
+            sent[0] += 1
+            return True
+
+    def worker(index: int):
+        rng = random.Random(seed + index)
+        local = []
+        while claim():
+            endpoint, shape = rng.choices(targets, weights)[0]
+            path, queries = ENDPOINTS[endpoint]
+            status, latency, error = send_request(base_url, path, queries[shape], timeout=timeout, headers=headers)
+            local.append({
+                "endpoint": endpoint, "shape": shape, "status": status,
+                "latency_ms": latency * 1000, "error": error
+            })
+        with lock:
+            samples.extend(local)
+
+    threads = [threading.Thread(target=worker, args=(i,), daemon=True) for i in range(concurrency)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    return samples, time.perf_counter() - start
+
+
+# ============================================================================
+# Reporting
+# ============================================================================
+
+def percentile(values: List[float], p: float) -> Optional[float]:
+    """Nearest-rank percentile of values (None when empty)."""
+    if not values:
+        return None
+    ordered = sorted(values)
+    rank = max(1, int(-(-p * len(ordered) // 100)))
+    return ordered[min(rank, len(ordered)) - 1]
+
+
+def _summary(samples: List[Dict], elapsed: float) -> Dict:
+    """Throughput, error rate and latency percentiles for a group of samples."""
+    latencies = [s["latency_ms"] for s in samples if s["error"] is None]
+    errors = sum(1 for s in samples if s["error"] is not None)
+    summary = {
+        "requests": len(samples),
+        "errors": errors,
+        "error_rate": errors / len(samples) if samples else 0.0,
+        "throughput_rps": len(samples) / elapsed if elapsed > 0 else 0.0,
+        "mean_ms": sum(latencies) / len(latencies) if latencies else None,
+        "max_ms": max(latencies) if latencies else None,
+    }
+    for p in PERCENTILES:
+        summary[f"p{p}_ms"] = percentile(latencies, p)
+    return summary
+
+
+def summarize(samples: List[Dict], elapsed: float) -> Dict:
+    """
+    Summarize load-test samples overall and per endpoint and shape.
+
+    Args:
+        samples: Per-request samples from run_load
+        elapsed: Wall time of the run in seconds
+
+    Returns:
+        Dictionary with "overall", "endpoints" and "errors_by_type" entries
+    """
+    groups = {}
+    for sample in samples:
+        groups.setdefault(sample["endpoint"], []).append(sample)
+        groups.setdefault(f"{sample['endpoint']}:{sample['shape']}", []).append(sample)
+
+    errors_by_type = {}
+    for sample in samples:
+        if sample["error"] is not None:
+            errors_by_type[sample["error"]] = errors_by_type.get(sample["error"], 0) + 1
+
+    return {
+        "overall": _summary(samples, elapsed),
+        "endpoints": {name: _summary(group, elapsed) for name, group in sorted(groups.items())},
+        "errors_by_type": errors_by_type,
+    }
+
+
+def _fmt_ms(value: Optional[float]) -> str:
+    return f"{value:8.1f}" if value is not None else "       -"
+
+
+def print_report(report: Dict):
+    """Print the summary as a table."""
+    header = f"{'target':<40} {'reqs':>7} {'rps':>8} {'err%':>6} " + " ".join(f"{'p' + str(p):>8}" for p in PERCENTILES) + f" {'max':>8}"
+    print(header)
+    print("-" * len(header))
+    rows = [("overall", report["overall"])] + list(report["endpoints"].items())
+    for name, s in rows:
+        print(f"{name:<40} {s['requests']:>7} {s['throughput_rps']:>8.1f} {s['error_rate'] * 100:>5.1f}% "
+              + " ".join(_fmt_ms(s[f'p{p}_ms']) for p in PERCENTILES) + f" {_fmt_ms(s['max_ms'])}")
+
+    db = report.get("db_connections")
+    if db:
+        print(f"\nDB connections opened: {db['opened']} ({db['per_request']:.2f} per request)")
+    if report["errors_by_type"]:
+        print("Errors: " + ", ".join(f"{k} x{v}" for k, v in sorted(report["errors_by_type"].items())))
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Load test the recommendation API over HTTP")
+    parser.add_argument("--server", choices=["dev", "wsgi", "asgi"], default="dev",
+                        help="Server to start: Flask dev server, gunicorn or uvicorn (ignored with --url)")
+    parser.add_argument("--url", default=None, help="Test an already-running server instead of starting one")
+    parser.add_argument("--data-source", choices=["fake", "postgres"], default="fake",
+                        help="fake serves catalog files from memory; postgres uses DATABASE_URL")
+    parser.add_argument("--fake-accommodations", default=None, help="Catalog for the fake data source")
+    parser.add_argument("--fake-guides", default=None, help="Catalog for the fake data source")
+    parser.add_argument("--fake-latency-ms", type=float, default=0.0, help="Simulated DB round trip per fetch")
+    parser.add_argument("--workers", type=int, default=4, help="gunicorn or uvicorn worker processes")
+    parser.add_argument("--threads", type=int, default=1, help="gunicorn threads per worker")
+    parser.add_argument("--mix", default="accommodations=1,guides=1", help="endpoint[:shape]=weight,...")
+    parser.add_argument("--concurrency", type=int, default=8, help="Concurrent client threads")
+    parser.add_argument("--duration", type=float, default=30.0, help="Seconds to run")
+    parser.add_argument("--requests", type=int, default=None, help="Stop after this many requests")
+    parser.add_argument("--warmup", type=int, default=20, help="Untimed requests sent before measuring")
+    parser.add_argument("--timeout", type=float, default=30.0, help="Per-request timeout in seconds")
+    parser.add_argument("--traffic-class", choices=["interactive", "batch"], default="interactive",
+                        help="Admission budget the requests count against (X-Traffic-Class)")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--output", default=None, help="Write the JSON report here")
+    args = parser.parse_args()
+
+    try:
+        mix = parse_mix(args.mix)
+    except ValueError as e:
+        parser.error(str(e))
+    headers = {"X-Traffic-Class": args.traffic_class}
+
+    proc = None
+    if args.url:
+        base_url = args.url.rstrip("/")
+    else:
+        port = free_port()
+        base_url = f"http://127.0.0.1:{port}"
+        env = dict(os.environ, FLASK_PORT=str(port), DATA_SOURCE=args.data_source,
+                   FAKE_DB_LATENCY_MS=str(args.fake_latency_ms))
+        if args.fake_accommodations:
+            env["FAKE_DB_ACCOMMODATIONS_FILE"] = os.path.abspath(args.fake_accommodations)
+        if args.fake_guides:
+            env["FAKE_DB_GUIDES_FILE"] = os.path.abspath(args.fake_guides)
+
+        command = server_command(args.server, port, workers=args.workers, threads=args.threads)
+        print(f"Starting {args.server} server ({args.data_source} data source) on {base_url}")
+        proc = start_server(command, env, base_url)
+
+    try:
+        if args.warmup:
+            run_load(base_url, mix, concurrency=args.concurrency, duration=None,
+                     total_requests=args.warmup, seed=args.seed, timeout=args.timeout, headers=headers)
+
+        before = fetch_health(base_url).get("db_connections_opened")
+        print(f"Running {args.concurrency} clients for "
+              + (f"{args.requests} requests" if args.requests else f"{args.duration:.0f}s") + "...\n")
+        samples, elapsed = run_load(
+            base_url, mix, concurrency=args.concurrency,
+            duration=None if args.requests else args.duration,
+            total_requests=args.requests, seed=args.seed, timeout=args.timeout, headers=headers
+        )
+        after = fetch_health(base_url).get("db_connections_opened")
+    finally:
+        if proc is not None:
+            stop_server(proc)
+
+    report = summarize(samples, elapsed)
+    report["config"] = {
+        "server": "external" if args.url else args.server,
+        "data_source": None if args.url else args.data_source,
+        "workers": args.workers if args.server in ("wsgi", "asgi") and not args.url else 1,
+        "concurrency": args.concurrency,
+        "traffic_class": args.traffic_class,
+        "mix": args.mix,
+        "elapsed_s": elapsed,
+    }
+    if before is not None and after is not None:
+        opened = after - before
+        report["db_connections"] = {
+            "opened": opened,
+            "per_request": opened / len(samples) if samples else 0.0,
+        }
+
+    print_report(report)
+
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as f:
+            json.dump(report, f, indent=2)
+        print(f"\n✓ Report written to {args.output}")
+
+
+if __name__ == "__main__":
+    main()
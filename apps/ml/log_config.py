@@ -0,0 +1,153 @@
+"""
+Non-blocking structured logging for the recommendation service.
+Request threads only enqueue log records; a background listener thread
+formats them (JSON Lines or plain text) and writes them out, so slow stdout
+never shows up in request latency.
+"""
+
+import atexit
+import json
+import logging
+import logging.handlers
+import os
+import queue
+import random
+import sys
+import threading
+from datetime import datetime, timezone
+from typing import Optional
+
+# Attributes every LogRecord has; anything else came in through `extra=`
+_RESERVED_ATTRS = set(vars(logging.LogRecord("", 0, "", 0, "", (), None))) | {"message", "asctime"}
+
+_listener: Optional[logging.handlers.QueueListener] = None
+_handler: Optional["DroppingQueueHandler"] = None
+_lock = threading.Lock()
+
+
+class JsonFormatter(logging.Formatter):
+    """Format records as one JSON object per line, including `extra=` fields."""
+
+    def format(self, record: logging.LogRecord) -> str:
+        entry = {
+            "ts": datetime.fromtimestamp(record.created, timezone.utc).isoformat(timespec="milliseconds"),
+            "level": record.levelname,
+            "logger": record.name,
+            "msg": record.getMessage(),
+        }
+        for key, value in vars(record).items():
+            if key not in _RESERVED_ATTRS and not key.startswith("_"):
+                entry[key] = value
+        if record.exc_info:
+            entry["exc"] = self.formatException(record.exc_info)
+        return json.dumps(entry, default=str)
+
+
+class DroppingQueueHandler(logging.handlers.QueueHandler):
+    """
+    QueueHandler that defers all formatting to the listener thread and drops
+    records (counting them) instead of blocking when the queue is full.
+    """
+
+    def __init__(self, log_queue: queue.Queue):
+        super().__init__(log_queue)
+        self.dropped = 0
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        # The queue never leaves this process, so the record can be handed
+        # over as-is; message interpolation happens in the listener thread
+        return record
+
+    def enqueue(self, record: logging.LogRecord):
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            self.dropped += 1
+
+
+class RowSampler:
+    """Decide which per-row debug lines to emit, at a fixed sampling rate."""
+
+    def __init__(self, rate: float):
+        """
+        Args:
+            rate: Fraction of rows to log (0 disables, 1 logs every row)
+        """
+        self.rate = rate
+
+    def sample(self) -> bool:
+        """True for roughly `rate` of calls."""
+        return self.rate >= 1.0 or (self.rate > 0.0 and random.random() < self.rate)
+
+
+def configure_logging(
+    level: Optional[str] = None,
+    fmt: Optional[str] = None,
+    stream=None,
+    queue_size: int = 10000
+) -> DroppingQueueHandler:
+    """
+    Route the root logger through a bounded queue to a background writer.
+
+    Safe to call more than once; only the first call installs handlers.
+
+    Args:
+        level: Log level name (default: LOG_LEVEL env var or INFO)
+        fmt: "json" or "text" (default: LOG_FORMAT env var or json)
+        stream: Output stream for the writer (default: stdout)
+        queue_size: Records buffered before new ones are dropped
+
+    Returns:
+        The installed queue handler (its `dropped` count is exported as a metric)
+    """
+    global _listener, _handler
+
+    with _lock:
+        if _handler is not None:
+            return _handler
+
+        level = (level or os.getenv("LOG_LEVEL", "INFO")).upper()
+        fmt = (fmt or os.getenv("LOG_FORMAT", "json")).lower()
+
+        output = logging.StreamHandler(stream or sys.stdout)
+        if fmt == "json":
+            output.setFormatter(JsonFormatter())
+        else:
+            output.setFormatter(logging.Formatter("%(asctime)s %(levelname)s %(name)s: %(message)s"))
+
+        _handler = DroppingQueueHandler(queue.Queue(maxsize=queue_size))
+        root = logging.getLogger()
+        root.addHandler(_handler)
+        root.setLevel(level)
+
+        _listener = logging.handlers.QueueListener(_handler.queue, output, respect_handler_level=True)
+        _listener.start()
+        atexit.register(shutdown_logging)
+        os.register_at_fork(after_in_child=_restart_after_fork)
+        return _handler
+
+
+def _restart_after_fork():
+    """
+    Give a forked worker (e.g. a preloaded gunicorn worker) its own queue and
+    writer thread; the parent's listener thread does not survive the fork.
+    """
+    global _listener
+
+    if _handler is None or _listener is None:
+        return
+    _handler.queue = queue.Queue(maxsize=_handler.queue.maxsize)
+    _listener = logging.handlers.QueueListener(_handler.queue, *_listener.handlers, respect_handler_level=True)
+    _listener.start()
+
+
+def shutdown_logging():
+    """Flush queued records and stop the background writer."""
+    global _listener, _handler
+
+    with _lock:
+        if _listener is not None:
+            _listener.stop()
+        if _handler is not None:
+            logging.getLogger().removeHandler(_handler)
+        _listener = _handler = None
@@ -0,0 +1,457 @@
+"""
+Lightweight in-process instrumentation for the recommendation service.
+Provides per-request stage timers, thread-safe counters and histograms that
+aggregate them across requests, and rendering in the Prometheus text format.
+
+Metrics are per process: under a multi-worker server each worker counts its
+own requests and a scrape is answered by one of them. The servers therefore
+render every per-process series with a worker="<pid>" label, so each series
+stays monotonic and totals are sum() over workers. A worker's series only
+update when a scrape reaches it, and values counted in a preloading master
+before the fork (e.g. startup catalog builds) appear in every worker's series.
+"""
+
+import bisect
+import math
+import threading
+import time
+from typing import Callable, Dict, List, Optional, Sequence, Tuple, Union
+
+# Histogram bucket upper bounds in milliseconds (+Inf is implicit)
+DEFAULT_BUCKETS_MS = (
+    0.1, 0.25, 0.5, 1, 2.5, 5, 10, 25, 50, 100, 250, 500, 1000, 2500, 5000, 10000
+)
+
+# Bucket upper bounds for item counts (candidate sets, fetched rows)
+COUNT_BUCKETS = (
+    0, 1, 10, 50, 100, 500, 1000, 5000, 10000, 50000, 100000, 500000, 1000000
+)
+
+
+class Histogram:
+    """Fixed-bucket histogram, safe to observe from many threads."""
+
+    def __init__(self, buckets: Sequence[float] = DEFAULT_BUCKETS_MS):
+        """
+        Initialize an empty histogram.
+
+        Args:
+            buckets: Sorted bucket upper bounds (an overflow bucket is added)
+        """
+        self.buckets = tuple(buckets)
+        self._counts = [0] * (len(self.buckets) + 1)
+        self._sum = 0.0
+        self._count = 0
+        self._lock = threading.Lock()
+
+    def observe(self, value: float):
+        """Record one value."""
+        index = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            self._counts[index] += 1
+            self._sum += value
+            self._count += 1
+
+    def snapshot(self) -> Dict:
+        """
+        Return a consistent copy of the histogram.
+
+        Returns:
+            Dictionary with count, sum and cumulative (upper_bound, count) buckets
+        """
+        with self._lock:
+            counts = list(self._counts)
+            total, count = self._sum, self._count
+
+        cumulative, running = [], 0
+        for bound, n in zip(self.buckets + (float('inf'),), counts):
+            running += n
+            cumulative.append((bound, running))
+        return {"count": count, "sum": total, "buckets": cumulative}
+
+    def quantile(self, q: float) -> Optional[float]:
+        """Estimate a quantile (0..1) as the upper bound of the bucket containing it."""
+        snap = self.snapshot()
+        if not snap["count"]:
+            return None
+        target = q * snap["count"]
+        for bound, cumulative in snap["buckets"]:
+            if cumulative >= target:
+                return bound
+        return float('inf')
+
+
+class LabeledHistogram:
+    """A family of histograms keyed by label values, e.g. (endpoint, stage)."""
+
+    metric_type = "histogram"
+
+    def __init__(self, name: str, help_text: str, label_names: Sequence[str], buckets: Sequence[float] = DEFAULT_BUCKETS_MS):
+        """
+        Initialize the histogram family.
+
+        Args:
+            name: Metric name
+            help_text: One-line description
+            label_names: Names of the labels that identify each histogram
+            buckets: Bucket upper bounds shared by every histogram
+        """
+        self.name = name
+        self.help_text = help_text
+        self.label_names = tuple(label_names)
+        self.buckets = tuple(buckets)
+        self._histograms: Dict[Tuple[str, ...], Histogram] = {}
+        self._lock = threading.Lock()
+
+    def labels(self, *values: str) -> Histogram:
+        """Return the histogram for these label values, creating it on first use."""
+        histogram = self._histograms.get(values)
+        if histogram is None:
+            if len(values) != len(self.label_names):
+                raise ValueError(f"{self.name} expects labels {self.label_names}, got {values}")
+            with self._lock:
+                histogram = self._histograms.setdefault(values, Histogram(self.buckets))
+        return histogram
+
+    def items(self) -> List[Tuple[Tuple[str, ...], Histogram]]:
+        """Return (label values, histogram) pairs, sorted by labels."""
+        with self._lock:
+            return sorted(self._histograms.items())
+
+
+class LabeledCounter:
+    """Monotonic counters keyed by label values."""
+
+    metric_type = "counter"
+
+    def __init__(self, name: str, help_text: str, label_names: Sequence[str] = ()):
+        """
+        Initialize the counter family.
+
+        Args:
+            name: Metric name
+            help_text: One-line description
+            label_names: Names of the labels that identify each counter
+        """
+        self.name = name
+        self.help_text = help_text
+        self.label_names = tuple(label_names)
+        self._values: Dict[Tuple[str, ...], float] = {}
+        self._lock = threading.Lock()
+
+    def inc(self, *values: str, amount: float = 1.0):
+        """Add amount to the counter for these label values."""
+        if len(values) != len(self.label_names):
+            raise ValueError(f"{self.name} expects labels {self.label_names}, got {values}")
+        with self._lock:
+            self._values[values] = self._values.get(values, 0.0) + amount
+
+    def value(self, *values: str) -> float:
+        """Current value for these label values (0 if never incremented)."""
+        with self._lock:
+            return self._values.get(values, 0.0)
+
+    def items(self) -> List[Tuple[Tuple[str, ...], float]]:
+        """Return (label values, value) pairs, sorted by labels."""
+        with self._lock:
+            return sorted(self._values.items())
+
+
+class CallbackGauge:
+    """
+    Metric whose value is read from a callback at scrape time.
+
+    Used for state that already lives elsewhere (connection counts, cache
+    and pool statistics). The callback returns a single number, or a dict of
+    {label values tuple: number} when label_names is set.
+    """
+
+    def __init__(
+        self,
+        name: str,
+        help_text: str,
+        callback: Callable[[], Union[float, Dict[Tuple[str, ...], float]]],
+        label_names: Sequence[str] = (),
+        metric_type: str = "gauge",
+        per_process: bool = True
+    ):
+        """
+        Args:
+            per_process: False for values shared by all workers (e.g. kept in
+                shared memory), which are rendered without a worker label
+        """
+        self.name = name
+        self.help_text = help_text
+        self.callback = callback
+        self.label_names = tuple(label_names)
+        self.metric_type = metric_type
+        self.per_process = per_process
+
+    def items(self) -> List[Tuple[Tuple[str, ...], float]]:
+        """Return (label values, value) pairs from the callback."""
+        value = self.callback()
+        if isinstance(value, dict):
+            return sorted(value.items())
+        return [((), value)]
+
+
+class MetricsRegistry:
+    """Ordered collection of metrics rendered together by /metrics."""
+
+    def __init__(self):
+        self._metrics: Dict[str, object] = {}
+        self._lock = threading.Lock()
+
+    def register(self, metric):
+        """Add a metric (replacing any metric with the same name) and return it."""
+        with self._lock:
+            self._metrics[metric.name] = metric
+        return metric
+
+    def metrics(self) -> List:
+        """Registered metrics in registration order."""
+        with self._lock:
+            return list(self._metrics.values())
+
+
+def _format_value(value: float) -> str:
+    """Format a sample value the way Prometheus expects."""
+    if math.isinf(value):
+        return "+Inf" if value > 0 else "-Inf"
+    if math.isnan(value):
+        return "NaN"
+    if float(value).is_integer():
+        return str(int(value))
+    return repr(float(value))
+
+
+def _escape_label(value) -> str:
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _format_labels(names: Sequence[str], values: Sequence) -> str:
+    if not names:
+        return ""
+    pairs = ",".join(f'{name}="{_escape_label(value)}"' for name, value in zip(names, values))
+    return "{" + pairs + "}"
+
+
+def render_prometheus(registry: "MetricsRegistry" = None, worker: Optional[str] = None) -> str:
+    """
+    Render every registered metric in the Prometheus text exposition format (0.0.4).
+
+    Args:
+        registry: Registry to render (defaults to the module REGISTRY)
+        worker: Worker id (the servers pass their pid) added as a leading
+            worker label to every per-process series (optional)
+
+    Returns:
+        Exposition text
+    """
+    registry = registry or REGISTRY
+    lines = []
+    for metric in registry.metrics():
+        metric_type = metric.metric_type
+        lines.append(f"# HELP {metric.name} {metric.help_text}")
+        lines.append(f"# TYPE {metric.name} {metric_type}")
+
+        label_names, prefix = metric.label_names, ()
+        if worker is not None and getattr(metric, "per_process", True):
+            label_names, prefix = ("worker",) + label_names, (worker,)
+
+        if metric_type == "histogram":
+            for values, histogram in metric.items():
+                values = prefix + values
+                snap = histogram.snapshot()
+                for bound, cumulative in snap["buckets"]:
+                    labels = _format_labels(label_names + ("le",), values + (_format_value(bound),))
+                    lines.append(f"{metric.name}_bucket{labels} {cumulative}")
+                labels = _format_labels(label_names, values)
+                lines.append(f"{metric.name}_sum{labels} {_format_value(snap['sum'])}")
+                lines.append(f"{metric.name}_count{labels} {snap['count']}")
+        else:
+            for values, value in metric.items():
+                lines.append(f"{metric.name}{_format_labels(label_names, prefix + values)} {_format_value(value)}")
+
+    return "\n".join(lines) + "\n"
+
+
+class _Stage:
+    """Context manager that adds its elapsed time to a StageTimer."""
+
+    __slots__ = ("_timer", "_name", "_start")
+
+    def __init__(self, timer: "StageTimer", name: str):
+        self._timer = timer
+        self._name = name
+
+    def __enter__(self):
+        self._start = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self._timer.add(self._name, (time.perf_counter() - self._start) * 1000)
+        return False
+
+
+class StageTimer:
+    """
+    Collects wall-clock time per named stage for one request.
+
+    Usage:
+        timer = StageTimer()
+        with timer.stage("filter"):
+            ...
+        timer.timings  # {"filter": 1.234} in milliseconds
+    """
+
+    enabled = True
+
+    def __init__(self):
+        self.started = time.perf_counter()
+        self.timings: Dict[str, float] = {}
+
+    def stage(self, name: str) -> _Stage:
+        """Time the enclosed block as stage `name` (repeated stages accumulate)."""
+        return _Stage(self, name)
+
+    def add(self, name: str, elapsed_ms: float):
+        """Add elapsed milliseconds to a stage."""
+        self.timings[name] = self.timings.get(name, 0.0) + elapsed_ms
+
+    def elapsed_ms(self) -> float:
+        """Milliseconds since the timer was created."""
+        return (time.perf_counter() - self.started) * 1000
+
+    def observe_into(self, histograms: LabeledHistogram, *labels: str):
+        """Record every stage into histograms labelled (*labels, stage)."""
+        for name, elapsed in self.timings.items():
+            histograms.labels(*labels, name).observe(elapsed)
+
+
+class _NullStage:
+    """No-op stand-in for _Stage."""
+
+    __slots__ = ()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        return False
+
+
+class NullTimer:
+    """StageTimer that records nothing; the default when timing is disabled."""
+
+    enabled = False
+    timings: Dict[str, float] = {}
+    _stage = _NullStage()
+
+    def stage(self, name: str) -> _NullStage:
+        return self._stage
+
+    def add(self, name: str, elapsed_ms: float):
+        pass
+
+    def elapsed_ms(self) -> float:
+        return 0.0
+
+    def observe_into(self, histograms: LabeledHistogram, *labels: str):
+        pass
+
+
+NULL_TIMER = NullTimer()
+
+# ============================================================================
+# Service metrics (rendered by GET /metrics)
+# ============================================================================
+
+REGISTRY = MetricsRegistry()
+
+HTTP_REQUESTS = REGISTRY.register(LabeledCounter(
+    "wbth_http_requests_total",
+    "HTTP requests handled, by endpoint and status code",
+    ("endpoint", "status")
+))
+
+HTTP_LATENCY = REGISTRY.register(LabeledHistogram(
+    "wbth_http_request_latency_ms",
+    "End-to-end HTTP request latency (ms)",
+    ("endpoint",)
+))
+
+# Per-stage latency of recommendation requests, labelled by endpoint and stage
+STAGE_LATENCY = REGISTRY.register(LabeledHistogram(
+    "wbth_stage_latency_ms",
+    "Time spent in each stage of a recommendation request (ms)",
+    ("endpoint", "stage")
+))
+
+CANDIDATES = REGISTRY.register(LabeledHistogram(
+    "wbth_candidates",
+    "Candidates left after hard filters per recommendation request",
+    ("endpoint",),
+    buckets=COUNT_BUCKETS
+))
+
+FILTER_INPUT = REGISTRY.register(LabeledCounter(
+    "wbth_filter_input_total",
+    "Items entering the hard filters",
+    ("endpoint",)
+))
+
+FILTER_REJECTIONS = REGISTRY.register(LabeledCounter(
+    "wbth_filter_rejections_total",
+    "Items removed by each hard-filter rule (first failing rule only)",
+    ("endpoint", "rule")
+))
+
+DB_FETCH_LATENCY = REGISTRY.register(LabeledHistogram(
+    "wbth_db_fetch_latency_ms",
+    "Catalog fetch latency from the data source (ms)",
+    ("table",)
+))
+
+DB_ROWS_FETCHED = REGISTRY.register(LabeledHistogram(
+    "wbth_db_rows_fetched",
+    "Rows returned per catalog fetch",
+    ("table",),
+    buckets=COUNT_BUCKETS
+))
+
+CATALOG_REQUESTS = REGISTRY.register(LabeledCounter(
+    "wbth_catalog_requests_total",
+    "Hybrid catalog lookups (DB fetch plus optional mock fallback)",
+    ("endpoint",)
+))
+
+MOCK_FALLBACKS = REGISTRY.register(LabeledCounter(
+    "wbth_mock_fallback_total",
+    "Hybrid catalog lookups that had to top up with mock data",
+    ("endpoint",)
+))
+
+DEGRADED_RESPONSES = REGISTRY.register(LabeledCounter(
+    "wbth_degraded_responses_total",
+    "Recommendation responses served degraded because of the request deadline",
+    ("endpoint", "reason")
+))
+
+ADMISSION_REJECTIONS = REGISTRY.register(LabeledCounter(
+    "wbth_admission_rejections_total",
+    "Requests rejected with 503 by admission control",
+    ("endpoint", "traffic_class")
+))
+
+ADMISSION_WAIT = REGISTRY.register(LabeledHistogram(
+    "wbth_admission_wait_ms",
+    "Time admitted requests spent queued for a slot (ms)",
+    ("endpoint", "traffic_class")
+))
+
+CATALOG_BUILDS = REGISTRY.register(LabeledHistogram(
+    "wbth_catalog_build_ms",
+    "Time to build a catalog version in the background, from load to swap (ms)",
+    ("endpoint",)
+))
@@ -0,0 +1,198 @@
+"""
+Opt-in per-request profiling for the recommendation API.
+Runs a request under cProfile or a lightweight wall-clock stack sampler and
+writes the profile, tagged with the canonical query, to a rotating local
+directory.
+
+Output per profiled request:
+    <timestamp>_<endpoint>_<tag>.prof    cProfile stats (pstats, snakeviz)
+    <timestamp>_<endpoint>_<tag>.folded  sampled stacks (speedscope, flamegraph.pl)
+    <timestamp>_<endpoint>_<tag>.json    metadata: canonical query, status, elapsed
+"""
+
+import cProfile
+import json
+import os
+import sys
+import threading
+import time
+from collections import Counter
+from datetime import datetime, timezone
+from typing import Dict, List, Optional
+
+PROFILE_MODES = ("cprofile", "sample")
+
+PROFILE_EXTENSIONS = {"cprofile": ".prof", "sample": ".folded"}
+
+
+class StackSampler:
+    """
+    Samples one thread's Python stack at a fixed interval from a background
+    thread. Far cheaper than cProfile on hot loops, at the cost of resolution.
+    """
+
+    def __init__(self, thread_id: int, interval: float = 0.002):
+        """
+        Args:
+            thread_id: Ident of the thread to sample (threading.get_ident())
+            interval: Seconds between samples
+        """
+        self.thread_id = thread_id
+        self.interval = interval
+        self.stacks: Counter = Counter()
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, name="stack-sampler", daemon=True)
+
+    def start(self):
+        self._thread.start()
+
+    def stop(self) -> Counter:
+        """Stop sampling and return {folded stack: sample count}."""
+        self._stop.set()
+        self._thread.join()
+        return self.stacks
+
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            frame = sys._current_frames().get(self.thread_id)
+            if frame is None:
+                continue
+            stack = []
+            while frame is not None:
+                code = frame.f_code
+                stack.append(f"{os.path.basename(code.co_filename)}:{code.co_name}")
+                frame = frame.f_back
+            self.stacks[";".join(reversed(stack))] += 1
+
+
+class ProfileSession:
+    """One in-flight profiled request."""
+
+    def __init__(self, mode: str, profiler=None, sampler: Optional[StackSampler] = None):
+        self.mode = mode
+        self.profiler = profiler
+        self.sampler = sampler
+        self.started = time.perf_counter()
+        self.stopped = False
+        self.released = False
+
+    def stop(self):
+        """Stop collecting (idempotent)."""
+        if self.stopped:
+            return
+        self.stopped = True
+        if self.profiler is not None:
+            self.profiler.disable()
+        if self.sampler is not None:
+            self.sampler.stop()
+
+
+class RequestProfiler:
+    """Starts profiling sessions and writes their output to a rotating directory."""
+
+    def __init__(self, directory: str = "profiles", max_profiles: int = 50, sample_interval: float = 0.002):
+        """
+        Args:
+            directory: Where profiles are written (created on demand)
+            max_profiles: Profiles kept; the oldest are deleted beyond this
+            sample_interval: Seconds between stack samples in "sample" mode
+        """
+        self.directory = directory
+        self.max_profiles = max_profiles
+        self.sample_interval = sample_interval
+        # cProfile installs a per-thread hook, but only one should run at a time
+        # so concurrent profiled requests do not distort each other
+        self._cprofile_lock = threading.Lock()
+
+    def start(self, mode: str) -> Optional[ProfileSession]:
+        """
+        Start profiling the current thread.
+
+        Args:
+            mode: "cprofile" or "sample"
+
+        Returns:
+            A session to pass to finish(), or None if cProfile is already busy
+        """
+        if mode == "cprofile":
+            if not self._cprofile_lock.acquire(blocking=False):
+                return None
+            profiler = cProfile.Profile()
+            profiler.enable()
+            return ProfileSession(mode, profiler=profiler)
+        if mode == "sample":
+            sampler = StackSampler(threading.get_ident(), self.sample_interval)
+            sampler.start()
+            return ProfileSession(mode, sampler=sampler)
+        raise ValueError(f"Unknown profile mode '{mode}' (expected one of {', '.join(PROFILE_MODES)})")
+
+    def finish(self, session: ProfileSession, endpoint: str, tag: str, metadata: Dict) -> str:
+        """
+        Stop a session and write its profile plus metadata.
+
+        Args:
+            session: Session returned by start()
+            endpoint: Endpoint name used in the file name
+            tag: Short query tag used in the file name
+            metadata: Extra fields for the .json sidecar (canonical query, status, ...)
+
+        Returns:
+            Path of the written profile
+        """
+        try:
+            session.stop()
+            elapsed_ms = (time.perf_counter() - session.started) * 1000
+
+            os.makedirs(self.directory, exist_ok=True)
+            stamp = datetime.now(timezone.utc).strftime("%Y%m%dT%H%M%S%f")
+            base = os.path.join(self.directory, f"{stamp}_{endpoint}_{tag}")
+            path = base + PROFILE_EXTENSIONS[session.mode]
+
+            if session.profiler is not None:
+                session.profiler.dump_stats(path)
+            else:
+                with open(path, 'w', encoding='utf-8') as f:
+                    for stack, count in session.sampler.stacks.most_common():
+                        f.write(f"{stack} {count}\n")
+
+            with open(base + ".json", 'w', encoding='utf-8') as f:
+                json.dump({
+                    "mode": session.mode,
+                    "endpoint": endpoint,
+                    "tag": tag,
+                    "elapsed_ms": round(elapsed_ms, 3),
+                    "profile": os.path.basename(path),
+                    **metadata
+                }, f, indent=2)
+        finally:
+            self.release(session)
+
+        self._rotate()
+        return path
+
+    def release(self, session: ProfileSession):
+        """Stop a session without writing anything (e.g. the request failed)."""
+        session.stop()
+        if session.mode == "cprofile" and not session.released:
+            self._cprofile_lock.release()
+        session.released = True
+
+    def profiles(self) -> List[str]:
+        """Metadata files of stored profiles, oldest first."""
+        if not os.path.isdir(self.directory):
+            return []
+        return sorted(
+            os.path.join(self.directory, name)
+            for name in os.listdir(self.directory) if name.endswith(".json")
+        )
+
+    def _rotate(self):
+        """Delete the oldest profiles beyond max_profiles."""
+        stored = self.profiles()
+        for meta in stored[:max(0, len(stored) - self.max_profiles)]:
+            base = meta[:-len(".json")]
+            for ext in (".json",) + tuple(PROFILE_EXTENSIONS.values()):
+                try:
+                    os.remove(base + ext)
+                except FileNotFoundError:
+                    pass
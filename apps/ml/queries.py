@@ -0,0 +1,192 @@
+"""
+Request parsing and canonical query form for the recommendation endpoints.
+A parsed query holds exactly the keyword arguments recommend() takes, so the
+same dict can be logged, compared, and replayed against the engines offline.
+"""
+
+import hashlib
+import json
+from typing import Dict, Optional, Tuple
+
+
+def parse_accommodation_query(data: Dict) -> Dict:
+    """
+    Extract AccommodationRecommender.recommend() arguments from a request body.
+
+    Args:
+        data: JSON body of /api/recommendations/accommodations
+
+    Returns:
+        Dictionary of recommend() keyword arguments with defaults applied
+    """
+    return {
+        "budget_min": data.get('budget_min', 1000.0),
+        "budget_max": data.get('budget_max', 50000.0),
+        "required_amenities": data.get('required_amenities', []),
+        "interests": data.get('interests', []),
+        "travel_style": data.get('travel_style', 'budget'),
+        "group_size": data.get('group_size', 1),
+        "accommodation_type": data.get('accommodation_type', 'any'),
+        "district": data.get('district'),
+        "province": data.get('province'),
+        "city_only": data.get('city_only', False),
+        "top_k": data.get('top_k', 10),
+    }
+
+
+def parse_guide_query(data: Dict) -> Dict:
+    """
+    Extract GuideRecommender.recommend() arguments from a request body.
+
+    Args:
+        data: JSON body of /api/recommendations/guides
+
+    Returns:
+        Dictionary of recommend() keyword arguments with defaults applied
+    """
+    return {
+        "budget_min": data.get('budget_min', 2000.0),
+        "budget_max": data.get('budget_max', 20000.0),
+        "languages": data.get('languages', ["English"]),
+        "expertise": data.get('expertise', []),
+        "city": data.get('city'),
+        "province": data.get('province'),
+        "city_only": data.get('city_only', False),
+        "gender_preference": data.get('gender_preference'),
+        "top_k": data.get('top_k', 10),
+    }
+
+
+QUERY_PARSERS = {
+    "accommodations": parse_accommodation_query,
+    "guides": parse_guide_query,
+}
+
+# Representative request bodies per engine, driven by the benchmark and load
+# test and used to warm a process up
+ACCOMMODATION_QUERIES = {
+    "broad": {
+        "budget_min": 1000, "budget_max": 50000,
+        "required_amenities": [], "interests": [],
+        "travel_style": "any", "group_size": 1, "top_k": 10
+    },
+    "luxury_province": {
+        "budget_min": 10000, "budget_max": 30000,
+        "required_amenities": ["wifi", "pool"], "interests": ["coastal", "luxury", "romantic"],
+        "travel_style": "luxury", "group_size": 2,
+        "district": "Galle", "province": "Southern", "top_k": 10
+    },
+    "budget_city_only": {
+        "budget_min": 1000, "budget_max": 5000,
+        "required_amenities": ["wifi"], "interests": ["cultural", "budget_friendly"],
+        "travel_style": "budget", "group_size": 1, "accommodation_type": "homestay",
+        "district": "Colombo", "province": "Western", "city_only": True, "top_k": 10
+    },
+    "family_top50": {
+        "budget_min": 5000, "budget_max": 15000,
+        "required_amenities": ["wifi", "parking", "restaurant"], "interests": ["family_friendly", "adventure"],
+        "travel_style": "family", "group_size": 4, "province": "Central", "top_k": 50
+    },
+}
+
+GUIDE_QUERIES = {
+    "broad": {
+        "budget_min": 2000, "budget_max": 20000, "languages": ["English"], "top_k": 10
+    },
+    "expertise_province": {
+        "budget_min": 5000, "budget_max": 15000, "languages": ["English"],
+        "expertise": ["Wildlife", "Photography"], "province": "Eastern", "top_k": 10
+    },
+    "multilingual_city_only": {
+        "budget_min": 3000, "budget_max": 12000, "languages": ["English", "French"],
+        "expertise": ["Cultural", "Historical"], "city": "Kandy", "province": "Central",
+        "city_only": True, "top_k": 10
+    },
+    "gender_top50": {
+        "budget_min": 2000, "budget_max": 20000, "languages": ["English", "Sinhala"],
+        "expertise": ["Hiking"], "gender_preference": "female", "top_k": 50
+    },
+}
+
+# Item fields returned for "compact": true, for callers that do not render reasons
+COMPACT_FIELDS = ("id", "score")
+
+
+def parse_response_fields(data: Dict) -> Optional[Tuple[str, ...]]:
+    """
+    Item fields a request body asks for. These shape the response only and
+    are not part of the query.
+
+    Args:
+        data: Request body; "fields" is a list or comma-separated string of
+            item fields, "compact": true is shorthand for COMPACT_FIELDS
+
+    Returns:
+        Tuple of field names, or None for every field
+
+    Raises:
+        ValueError: If "fields" is neither a string nor a list of strings
+    """
+    fields = data.get('fields')
+    if fields is None:
+        return COMPACT_FIELDS if data.get('compact') else None
+    if isinstance(fields, str):
+        fields = [name.strip() for name in fields.split(',') if name.strip()]
+    if not isinstance(fields, list) or not all(isinstance(name, str) for name in fields):
+        raise ValueError('"fields" must be a list of field names')
+    return tuple(fields)
+
+
+def parse_include_reasons(data: Dict, fields: Optional[Tuple[str, ...]]) -> bool:
+    """
+    Whether reasons should be generated: not when the body sends
+    "reasons": false, or asks for fields that leave them out.
+    """
+    return bool(data.get('reasons', True)) and (fields is None or 'reasons' in fields)
+
+
+# Sections of a /api/recommendations/trip request, one per engine
+TRIP_SECTIONS = ("accommodations", "guides")
+
+
+def split_trip_body(data: Dict) -> Dict[str, Dict]:
+    """
+    Split a trip request body into one body per endpoint.
+
+    Top-level fields are shared by both sections; fields inside the
+    "accommodations" and "guides" objects override them for that section.
+
+    Args:
+        data: JSON body of /api/recommendations/trip
+
+    Returns:
+        Dictionary of endpoint -> request body
+    """
+    shared = {key: value for key, value in data.items() if key not in TRIP_SECTIONS}
+    return {section: {**shared, **(data.get(section) or {})} for section in TRIP_SECTIONS}
+
+
+def parse_trip_query(data: Dict) -> Dict:
+    """
+    Extract both engines' recommend() arguments from a trip request body.
+
+    Returns:
+        Dictionary of endpoint -> recommend() keyword arguments
+    """
+    bodies = split_trip_body(data)
+    return {section: QUERY_PARSERS[section](bodies[section]) for section in TRIP_SECTIONS}
+
+
+def canonical_query(endpoint: str, query: Dict) -> str:
+    """
+    Stable text form of a parsed query: compact JSON with sorted keys.
+
+    Two requests that would run identical recommend() calls produce the
+    same string, whatever the key order or omitted defaults of their bodies.
+    """
+    return json.dumps({"endpoint": endpoint, "query": query}, sort_keys=True, separators=(",", ":"))
+
+
+def query_tag(canonical: str) -> str:
+    """Short hash of a canonical query, for file names and log correlation."""
+    return hashlib.sha1(canonical.encode("utf-8")).hexdigest()[:12]
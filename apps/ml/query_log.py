@@ -0,0 +1,175 @@
+"""
+Compact capture of recommendation requests for offline replay.
+Each request body is recorded with its endpoint and arrival time as one short
+JSON line (gzip-compressed when the path ends in .gz). Writes happen on a
+background thread so capture adds no I/O to request latency.
+
+Several worker processes may share one plain log: every line goes out in a
+single unbuffered O_APPEND write, so lines never interleave. A gzip log has
+a single writer, enforced with an exclusive lock on the file, because gzip
+streams appended from several processes corrupt each other; give each
+worker process its own path, or use a plain log, when running several.
+
+Line format:
+    {"t": <unix time>, "e": "<endpoint>", "q": <request body>}
+"""
+
+import fcntl
+import gzip
+import json
+import logging
+import os
+import queue
+import random
+import threading
+from typing import Dict, Iterator, Optional
+
+
+def _open(path: str, mode: str):
+    if path.endswith(".gz"):
+        return gzip.open(path, mode + "t", encoding="utf-8")
+    return open(path, mode, encoding="utf-8")
+
+
+logger = logging.getLogger('wbth.query_log')
+
+
+class _AppendWriter:
+    """Plain log: one O_APPEND write per line, safe to share between processes."""
+
+    def __init__(self, path: str):
+        self._fd = os.open(path, os.O_WRONLY | os.O_APPEND | os.O_CREAT, 0o644)
+
+    def write(self, line: str):
+        os.write(self._fd, line.encode("utf-8"))
+
+    def flush(self):
+        pass
+
+    def close(self):
+        os.close(self._fd)
+
+
+class _GzipWriter:
+    """gzip log, held under an exclusive lock so only one process writes it."""
+
+    def __init__(self, path: str):
+        self._raw = open(path, "ab")
+        try:
+            fcntl.flock(self._raw.fileno(), fcntl.LOCK_EX | fcntl.LOCK_NB)
+        except OSError:
+            self._raw.close()
+            raise RuntimeError(
+                f"{path} is already written by another process; a gzip query log takes "
+                "a single writer, so use one path per worker or a plain .jsonl log"
+            )
+        self._gzip = gzip.GzipFile(fileobj=self._raw, mode="ab")
+
+    def write(self, line: str):
+        self._gzip.write(line.encode("utf-8"))
+
+    def flush(self):
+        self._gzip.flush()
+
+    def close(self):
+        self._gzip.close()
+        self._raw.close()
+
+
+class QueryLog:
+    """Samples requests and appends them to a query log from a writer thread."""
+
+    def __init__(self, path: str, sample_rate: float = 1.0, flush_every: int = 100, queue_size: int = 10000):
+        """
+        Args:
+            path: Log file (.jsonl, or .jsonl.gz for gzip)
+            sample_rate: Fraction of requests to capture
+            flush_every: Flush a gzip log after this many lines (plain logs
+                are written line by line)
+            queue_size: Lines buffered before new ones are dropped
+        """
+        self.path = path
+        self.sample_rate = sample_rate
+        self.flush_every = flush_every
+        self.dropped = 0
+        self.disabled = False
+        self._queue: queue.Queue = queue.Queue(maxsize=queue_size)
+        self._writer: Optional[threading.Thread] = None
+        self._writer_pid: Optional[int] = None
+        self._lock = threading.Lock()
+
+    def record(self, endpoint: str, body: Dict, timestamp: float):
+        """Queue one request for capture (subject to sampling)."""
+        if self.disabled:
+            return
+        if self.sample_rate < 1.0 and random.random() >= self.sample_rate:
+            return
+        self._ensure_writer()
+        try:
+            self._queue.put_nowait({"t": round(timestamp, 6), "e": endpoint, "q": body})
+        except queue.Full:
+            self.dropped += 1
+
+    def _ensure_writer(self):
+        # Started lazily so each forked worker gets its own writer thread
+        if self._writer_pid == os.getpid():
+            return
+        with self._lock:
+            if self._writer_pid == os.getpid():
+                return
+            self._queue = queue.Queue(maxsize=self._queue.maxsize)
+            self._writer = threading.Thread(target=self._run, name="query-log-writer", daemon=True)
+            self._writer_pid = os.getpid()
+            self._writer.start()
+
+    def _run(self):
+        parent = os.path.dirname(self.path)
+        if parent:
+            os.makedirs(parent, exist_ok=True)
+        try:
+            writer = _GzipWriter(self.path) if self.path.endswith(".gz") else _AppendWriter(self.path)
+        except (OSError, RuntimeError) as e:
+            logger.error("Query capture disabled in this process: %s", e, extra={"pid": os.getpid()})
+            self.disabled = True
+            return
+        pending = 0
+        try:
+            while True:
+                try:
+                    entry = self._queue.get(timeout=1.0)
+                except queue.Empty:
+                    if pending:
+                        writer.flush()
+                        pending = 0
+                    continue
+                if entry is None:
+                    writer.flush()
+                    return
+                writer.write(json.dumps(entry, separators=(",", ":")) + "\n")
+                pending += 1
+                if pending >= self.flush_every:
+                    writer.flush()
+                    pending = 0
+        finally:
+            writer.close()
+
+    def close(self):
+        """Write out everything queued and stop the writer."""
+        if self._writer is not None and self._writer_pid == os.getpid():
+            self._queue.put(None)
+            self._writer.join()
+            self._writer = None
+            self._writer_pid = None
+
+
+def read_query_log(path: str) -> Iterator[Dict]:
+    """
+    Yield captured requests in file order.
+
+    Returns:
+        Generator of {"t": timestamp, "e": endpoint, "q": body} dicts
+    """
+    with _open(path, "r") as f:
+        for line in f:
+            if line.strip():
+                yield json.loads(line)
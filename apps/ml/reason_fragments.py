@@ -0,0 +1,166 @@
+"""
+Precomputed display text for recommendation reasons.
+
+Display text is computed once per vocabulary term, and each catalog record
+gets its reason fragments built once (see FragmentIndex): its terms per
+field (interests, amenities, languages, ...) and the fixed reason strings
+that depend only on the record. Building the reasons for a ranked item then comes down to
+matching the user's terms against the record's, which gives a bitmask over
+the record's terms, and joining the selected display strings; the joined
+text is kept per bitmask.
+"""
+
+from functools import lru_cache
+from typing import Callable, Container, Dict, Iterable, List, Optional, Tuple
+
+
+@lru_cache(maxsize=4096)
+def display_term(term: str) -> str:
+    """Display text for a vocabulary term, e.g. "hot_water" -> "Hot Water"."""
+    return term.replace('_', ' ').title()
+
+
+@lru_cache(maxsize=4096)
+def title_term(term: str) -> str:
+    """Title-cased term, underscores kept, e.g. "english" -> "English"."""
+    return term.title()
+
+
+class TermFragments:
+    """
+    One field of a record: its distinct terms, lower-cased for matching, and
+    the joined display text of each subset of them asked for so far.
+    """
+
+    __slots__ = ("keys", "label", "_joined")
+
+    def __init__(self, terms: Iterable[str], label: Callable[[str], str] = display_term):
+        """
+        Args:
+            terms: The record's terms for this field
+            label: Display text for a lower-cased term
+        """
+        self.keys = tuple(dict.fromkeys(map(str.lower, terms)))
+        self.label = label
+        self._joined: Dict[int, str] = {}
+
+    def __len__(self) -> int:
+        return len(self.keys)
+
+    def mask(self, wanted: Container[str]) -> int:
+        """Bitmask of the terms found in wanted (lower-cased terms)."""
+        bits = 0
+        for bit, key in enumerate(self.keys):
+            if key in wanted:
+                bits |= 1 << bit
+        return bits
+
+    def first(self, count: int) -> int:
+        """Bitmask of the first count terms."""
+        return (1 << min(count, len(self.keys))) - 1
+
+    def join(self, bits: int) -> str:
+        """Comma-separated display text of the terms selected by bits."""
+        text = self._joined.get(bits)
+        if text is None:
+            label = self.label
+            text = ", ".join(label(key) for bit, key in enumerate(self.keys) if bits >> bit & 1)
+            self._joined[bits] = text
+        return text
+
+
+@lru_cache(maxsize=16384)
+def _term_fragments(terms: Tuple[str, ...], label: Callable[[str], str]) -> TermFragments:
+    return TermFragments(terms, label)
+
+
+def term_fragments(terms: Iterable[str], label: Callable[[str], str] = display_term) -> TermFragments:
+    """
+    TermFragments for a list of terms, shared by every record with the same
+    list, so records outside a FragmentIndex (fresh database rows) reuse them
+    across requests.
+    """
+    return _term_fragments(tuple(terms), label)
+
+
+@lru_cache(maxsize=16384)
+def _list_reason(template: str, terms: Tuple[str, ...], label: Optional[Callable[[str], str]]) -> Optional[str]:
+    if not terms:
+        return None
+    return template.format(", ".join(map(label, terms) if label else terms))
+
+
+def list_reason(template: str, terms: Iterable[str], label: Optional[Callable[[str], str]] = None) -> Optional[str]:
+    """template filled with the comma-joined terms (display text if label is given), None without terms."""
+    return _list_reason(template, tuple(terms), label)
+
+
+class ReasonFragments(dict):
+    """
+    A record's reason fragments by name, each built from the record on first
+    use by the engine's builder for it.
+    """
+
+    __slots__ = ("record", "builders")
+
+    def __init__(self, record: Dict, builders: Dict[str, Callable[[Dict], object]]):
+        super().__init__()
+        self.record = record
+        self.builders = builders
+
+    def __missing__(self, name: str):
+        value = self[name] = self.builders[name](self.record)
+        return value
+
+
+class FragmentIndex:
+    """
+    Reason fragments for every record of a catalog, all built up front.
+
+    Records are looked up by identity, so the index holds on to them. Records
+    from elsewhere (e.g. fresh database rows) get fragments that are built as
+    the reasons need them. A Catalog adds and discards records as they change.
+    """
+
+    def __init__(self, records: List[Dict], builders: Dict[str, Callable[[Dict], object]]):
+        """
+        Args:
+            records: Catalog records; records must not be mutated
+            builders: The engine's REASON_FRAGMENTS
+        """
+        self.builders = builders
+        self._fragments: Dict[int, Tuple[object, ReasonFragments]] = {}
+        for record in records:
+            self.add(record)
+
+    def __len__(self) -> int:
+        return len(self._fragments)
+
+    def add(self, record: Dict):
+        """Build and keep the fragments of a record."""
+        fragments = ReasonFragments(record, self.builders)
+        for name in self.builders:
+            fragments[name]
+        self._fragments[id(record)] = (record, fragments)
+
+    def discard(self, record: Dict):
+        """Forget a record that has left the catalog."""
+        entry = self._fragments.get(id(record))
+        if entry is not None and entry[0] is record:
+            del self._fragments[id(record)]
+
+    def get(self, record: Dict) -> ReasonFragments:
+        """Fragments for record, built lazily if it is not in the index."""
+        entry = self._fragments.get(id(record))
+        if entry is not None and entry[0] is record:
+            return entry[1]
+        return ReasonFragments(record, self.builders)
+
+
+def lookup(
+    index: Optional[FragmentIndex],
+    record: Dict,
+    builders: Dict[str, Callable[[Dict], object]]
+) -> ReasonFragments:
+    """Fragments for record from index, or lazily built ones when there is no index."""
+    return index.get(record) if index is not None else ReasonFragments(record, builders)
@@ -5,9 +5,17 @@ as specified in architecture spec section 4.1
 """
 
 import json
+import logging
 import math
-from typing import List, Dict, Optional, Set
+from typing import Iterable, Iterator, List, Dict, Optional, Set, Tuple, Union
 
+from catalog_io import read_catalog
+from deadlines import NO_DEADLINE
+from metrics import NULL_TIMER
+from reason_fragments import FragmentIndex, display_term, list_reason, lookup, term_fragments
+from records import AccommodationRecord
+
+logger = logging.getLogger(__name__)
 
 
 class AccommodationRecommender:
@@ -36,22 +44,48 @@ class AccommodationRecommender:
         "cultural": [0.25, 0.10, 0.10, 0.15, 0.15, 0.05, 0.10, 0.05, 0.05],
     }
     
-    def __init__(self, accommodations: List[Dict], weights: Optional[List[float]] = None):
+    # Hard filter rules, in the order _apply_hard_filters applies them
+    FILTER_RULES = ["availability", "budget", "type", "district", "group_size"]
+    
+    # Scoring checks the deadline once per this many candidates
+    DEADLINE_CHECK_EVERY = 64
+    
+    # Reason text that depends only on the accommodation, built once per catalog
+    # record (see reason_fragments.FragmentIndex)
+    REASON_FRAGMENTS = {
+        "interests": lambda acc: term_fragments(acc.interests),
+        "amenities": lambda acc: term_fragments(acc.amenities),
+        "style": lambda acc: list_reason("🎯 {} travel style", acc.travel_style, display_term),
+        "type": lambda acc: list_reason("🏨 Type: {}", acc.type),
+        "amenity_list": lambda acc: list_reason("✨ Amenities: {}", acc.amenities[:4], display_term),
+    }
+    
+    def __init__(
+        self,
+        accommodations: Iterable[Dict],
+        weights: Optional[List[float]] = None,
+        fragments: Optional[FragmentIndex] = None
+    ):
         """
         Initialize recommender with accommodation data.
         
         Args:
-            accommodations: List of accommodation dictionaries
+            accommodations: List of accommodation dictionaries or AccommodationRecords,
+                or any iterable of them (e.g. the generator returned by iter_accommodations);
+                dictionaries are converted to records
             weights: Custom weights for scoring (optional, uses defaults if not provided)
+            fragments: Prebuilt reason fragments for (some of) the accommodations;
+                the rest are built when their reasons are (optional)
         """
-        self.accommodations = accommodations
+        self.accommodations = AccommodationRecord.from_dicts(accommodations)
         self.weights = weights if weights is not None else self.DEFAULT_WEIGHTS
+        self.fragments = fragments
         
         # Validate weights
         if len(self.weights) != 9:
             raise ValueError("Weights must have exactly 9 values")
         if not math.isclose(sum(self.weights), 1.0, rel_tol=0.01):
-            print(f"Warning: Weights sum to {sum(self.weights):.2f}, not 1.0")
+            logger.warning("Weights sum to %.2f, not 1.0", sum(self.weights))
     
     def _get_dynamic_weights(self, travel_style: str) -> List[float]:
         """
@@ -66,7 +100,7 @@ class AccommodationRecommender:
         # Use travel style specific weights if available
         if travel_style and travel_style.lower() in self.TRAVEL_STYLE_WEIGHTS:
             weights = self.TRAVEL_STYLE_WEIGHTS[travel_style.lower()]
-            print(f"Using {travel_style} travel style weights")
+            logger.debug("Using %s travel style weights", travel_style)
             return weights
         
         # Fall back to default or custom weights
@@ -84,7 +118,12 @@ class AccommodationRecommender:
         district: Optional[str] = None,
         province: Optional[str] = None,
         city_only: bool = False,
-        top_k: int = 10
+        top_k: int = 10,
+        timer=NULL_TIMER,
+        funnel: Optional[Dict] = None,
+        deadline=NO_DEADLINE,
+        include_reasons: bool = True,
+        explanations: Optional[Dict] = None
     ) -> Dict:
         """
         Generate accommodation recommendations.
@@ -101,19 +140,37 @@ class AccommodationRecommender:
             province: Preferred province (optional)
             city_only: If True, hard filter to city only (optional)
             top_k: Number of recommendations to return
+            timer: StageTimer that records filter/score/sort/reasons times (optional)
+            funnel: Dict filled with the candidate funnel: input size, rejections
+                per hard-filter rule and candidates passed (optional)
+            deadline: Deadline after which scoring stops and the best-so-far
+                top-k is returned, marked "partial" (optional)
+            include_reasons: If False, recommendations carry no "reasons" (see explain())
+            explanations: Dict filled with id -> (accommodation, score components)
+                for each returned recommendation, the inputs explain() needs (optional)
         
         Returns:
             Dictionary with recommendations and metadata
         """
         # Apply hard rule filters
-        candidates = self._apply_hard_filters(
-            budget_min=budget_min,
-            budget_max=budget_max,
-            required_amenities=required_amenities,
-            group_size=group_size,
-            accommodation_type=accommodation_type,
-            district=district if city_only else None
-        )
+        rejections = {}
+        with timer.stage("filter"):
+            candidates = self._apply_hard_filters(
+                budget_min=budget_min,
+                budget_max=budget_max,
+                required_amenities=required_amenities,
+                group_size=group_size,
+                accommodation_type=accommodation_type,
+                district=district if city_only else None,
+                rejections=rejections
+            )
+        
+        if funnel is not None:
+            funnel.update({
+                "input": len(self.accommodations),
+                "rejected": rejections,
+                "passed": len(candidates)
+            })
         
         if not candidates:
             return {
@@ -125,72 +182,85 @@ class AccommodationRecommender:
                 "message": "No accommodations match your criteria"
             }
         
-        # Get dynamic weights based on travel style
-        active_weights = self._get_dynamic_weights(travel_style)
-        
-        # Score and rank candidates
-        scored_candidates = []
-        for acc in candidates:
-            score, score_components = self._calculate_score(
-                accommodation=acc,
-                budget_min=budget_min,
-                budget_max=budget_max,
-                interests=interests,
-                travel_style=travel_style,
-                required_amenities=required_amenities,
-                group_size=group_size,
-                district=district,
-                province=province,
-                candidates=candidates,
-                weights=active_weights
-            )
+        with timer.stage("score"):
+            # Get dynamic weights based on travel style
+            active_weights = self._get_dynamic_weights(travel_style)
             
-            scored_candidates.append({
-                "accommodation": acc,
-                "score": score,
-                "score_components": score_components
-            })
+            # Score and rank candidates
+            scored_candidates = []
+            for index, acc in enumerate(candidates):
+                if index and index % self.DEADLINE_CHECK_EVERY == 0 and deadline.expired():
+                    break
+                score, score_components = self._calculate_score(
+                    accommodation=acc,
+                    budget_min=budget_min,
+                    budget_max=budget_max,
+                    interests=interests,
+                    travel_style=travel_style,
+                    required_amenities=required_amenities,
+                    group_size=group_size,
+                    district=district,
+                    province=province,
+                    candidates=candidates,
+                    weights=active_weights
+                )
+                
+                scored_candidates.append({
+                    "accommodation": acc,
+                    "score": score,
+                    "score_components": score_components
+                })
         
         # Sort by score (descending), then rating, then prior_bookings
-        scored_candidates.sort(
-            key=lambda x: (
-                x["score"],
-                x["accommodation"].get("rating", 0),
-                x["accommodation"].get("prior_bookings", 0)
-            ),
-            reverse=True
-        )
-        
-        # Generate top-k recommendations with reasons
-        recommendations = []
-        for item in scored_candidates[:top_k]:
-            acc = item["accommodation"]
-            reasons = self._generate_reasons(
-                item["score_components"], 
-                acc,
-                user_interests=interests,
-                user_amenities=required_amenities
+        with timer.stage("sort"):
+            scored_candidates.sort(
+                key=lambda x: (
+                    x["score"],
+                    x["accommodation"].rating or 0,
+                    x["accommodation"].prior_bookings
+                ),
+                reverse=True
             )
-            
-            recommendations.append({
-                "id": acc["id"],
-                "name": acc["name"],
-                "district": acc["district"],
-                "province": acc["province"],
-                "price_range_min": acc["price_range_min"],
-                "price_range_max": acc["price_range_max"],
-                "rating": acc.get("rating"),
-                "score": round(item["score"], 3),
-                "reasons": reasons
-            })
         
-        return {
+        # Generate top-k recommendations with reasons
+        with timer.stage("reasons"):
+            top = scored_candidates[:top_k]
+            if include_reasons:
+                reasons = self._generate_reasons(
+                    [(item["accommodation"], item["score_components"]) for item in top],
+                    user_interests=interests,
+                    user_amenities=required_amenities
+                )
+            recommendations = []
+            for index, item in enumerate(top):
+                acc = item["accommodation"]
+                recommendation = {
+                    "id": acc.id,
+                    "name": acc.name,
+                    "district": acc.district,
+                    "province": acc.province,
+                    "price_range_min": acc.price_range_min,
+                    "price_range_max": acc.price_range_max,
+                    "rating": acc.rating,
+                    "score": round(item["score"], 3),
+                }
+                if include_reasons:
+                    recommendation["reasons"] = reasons[index]
+                recommendations.append(recommendation)
+                if explanations is not None:
+                    explanations[acc.id] = (acc, item["score_components"])
+        
+        results = {
             "recommendations": recommendations,
             "total_candidates": len(candidates),
             "filters_applied": self._get_filters_applied(
                 budget_min, budget_max, required_amenities, group_size, accommodation_type, district, city_only
             ),
         }
+        if len(scored_candidates) < len(candidates):
+            results["partial"] = True
+            results["scored_candidates"] = len(scored_candidates)
+        return results
     
     def _apply_hard_filters(
         self,
@@ -199,20 +269,30 @@ class AccommodationRecommender:
         required_amenities: List[str],
         group_size: int,
         accommodation_type: Optional[str] = None,
-        district: Optional[str] = None
+        district: Optional[str] = None,
+        rejections: Optional[Dict[str, int]] = None
     ) -> List[Dict]:
-        """Apply hard rule filters to accommodations."""
+        """
+        Apply hard rule filters to accommodations.
+        
+        Args:
+            rejections: Dict filled with the number of items each rule
+                (FILTER_RULES) removed; an item counts against the first rule it fails
+        """
         filtered = []
+        rejected = dict.fromkeys(self.FILTER_RULES, 0)
         
         for acc in self.accommodations:
             # 1. Availability filter
-            if not acc.get("availability", True):
+            if not acc.availability:
+                rejected["availability"] += 1
                 continue
             
             # 2. Budget window filter (price ranges intersect)
-            acc_min = acc.get("price_range_min", 0)
-            acc_max = acc.get("price_range_max", float('inf'))
+            acc_min = acc.price_range_min
+            acc_max = acc.price_range_max if acc.price_range_max is not None else float('inf')
             if not (acc_min <= budget_max and acc_max >= budget_min):
+                rejected["budget"] += 1
                 continue
             
             # 3. Required amenities filter - REMOVED
@@ -223,24 +303,27 @@ class AccommodationRecommender:
             
             # 4. Accommodation type filter (case-insensitive)
             if accommodation_type and accommodation_type != "any":
-                acc_types = acc.get("type", [])
                 # Convert both to lowercase for case-insensitive comparison
-                acc_types_lower = [t.lower() for t in acc_types]
+                acc_types_lower = [t.lower() for t in acc.type]
                 if accommodation_type.lower() not in acc_types_lower:
+                    rejected["type"] += 1
                     continue
             
             # 5. Location filter (if city_only is True) - case-insensitive
             if district:
-                acc_location = acc.get("district", "")
-                if acc_location.lower() != district.lower():
+                if (acc.district or "").lower() != district.lower():
+                    rejected["district"] += 1
                     continue
             
             # 6. Group size filter
-            if acc.get("group_size", 0) < group_size:
+            if acc.group_size < group_size:
+                rejected["group_size"] += 1
                 continue
             
             filtered.append(acc)
         
+        if rejections is not None:
+            rejections.update(rejected)
         return filtered
     
     def _calculate_score(
@@ -265,17 +348,17 @@ class AccommodationRecommender:
         # S_interests: Jaccard similarity on interests
         s_interests = self._jaccard_similarity(
             set(interests),
-            set(accommodation.get("interests", []))
+            set(accommodation.interests)
         )
         
         # S_style: Binary match on travel_style
-        s_style = 1.0 if travel_style in accommodation.get("travel_style", []) else 0.0
+        s_style = 1.0 if travel_style in accommodation.travel_style else 0.0
         
         # S_price: Price alignment score (with affordability bonus for budget travelers)
         s_price = self._price_alignment_score(
             budget_min, budget_max,
-            accommodation.get("price_range_min", 0),
-            accommodation.get("price_range_max", 0),
+            accommodation.price_range_min,
+            accommodation.price_range_max or 0,
             travel_style=travel_style
         )
         
@@ -283,32 +366,32 @@ class AccommodationRecommender:
         user_desired_amenities = set(required_amenities + ["wifi", "pool", "parking"])  # Common desires
         s_amenities = self._jaccard_similarity(
             user_desired_amenities,
-            set(accommodation.get("amenities", []))
+            set(accommodation.amenities)
         )
         
         # S_location: Tiered location score
         s_location = self._location_score(
-            accommodation.get("district"),
-            accommodation.get("province"),
+            accommodation.district,
+            accommodation.province,
             district,
             province
         )
         
         # S_group: Binary fit check (already filtered, but score for transparency)
-        s_group = 1.0 if accommodation.get("group_size", 0) >= group_size else 0.0
+        s_group = 1.0 if accommodation.group_size >= group_size else 0.0
         
         # S_rating: Normalized rating
-        rating = accommodation.get("rating", 0)
+        rating = accommodation.rating
         s_rating = min(1.0, rating / 5.0) if rating else 0.5
         
         # S_popularity: Log-scaled prior bookings
         s_popularity = self._popularity_score(
-            accommodation.get("prior_bookings", 0),
+            accommodation.prior_bookings,
             candidates
         )
         
         # S_db_priority: Strong boost for real database accommodations
-        s_db_priority = 1.0 if accommodation.get("in_system", False) else 0.0
+        s_db_priority = 1.0 if accommodation.in_system else 0.0
         
         # Calculate weighted total
         components = {
@@ -413,7 +496,7 @@ class AccommodationRecommender:
     def _popularity_score(self, prior_bookings: int, candidates: List[Dict]) -> float:
         """Calculate log-scaled popularity score."""
         # Get max prior_bookings from candidates
-        max_bookings = max((acc.get("prior_bookings", 0) for acc in candidates), default=1)
+        max_bookings = max((acc.prior_bookings for acc in candidates), default=1)
         
         if max_bookings == 0:
             return 0.0
@@ -422,100 +505,154 @@ class AccommodationRecommender:
         score = math.log(1 + prior_bookings) / math.log(1 + max_bookings)
         return score
     
+    def _reason_flags(self, ranked: List[Tuple[Dict, Dict[str, float]]]) -> Dict[str, List[bool]]:
+        """
+        Decide which threshold reasons fire for every ranked accommodation at
+        once, a column of the score component matrix at a time.
+        
+        Args:
+            ranked: (accommodation, score components) pairs in rank order
+        
+        Returns:
+            Dict of reason name -> one flag per ranked accommodation
+        """
+        components = [item[1] for item in ranked]
+        district = [c["district"] for c in components]
+        return {
+            "city": [score >= 0.9 for score in district],
+            "province": [0.5 <= score < 0.9 for score in district],
+            "style": [c["style"] > 0 for c in components],
+            "interests": [c["interests"] > 0.1 for c in components],
+            "amenities": [c["amenities"] > 0.3 for c in components],
+            "rating": [(acc.rating or 0) >= 4.0 for acc, _ in ranked],
+            "price": [c["price"] > 0.7 for c in components],
+            "popularity": [c["popularity"] > 0.6 for c in components],
+            "group": [acc.group_size > 0 and c["group"] > 0 for acc, c in ranked],
+            "in_system": [bool(acc.in_system) for acc, _ in ranked],
+        }
+    
     def _generate_reasons(
-        self, 
-        score_components: Dict[str, float], 
-        accommodation: Dict,
+        self,
+        ranked: List[Tuple[Dict, Dict[str, float]]],
         user_interests: List[str] = None,
         user_amenities: List[str] = None
-    ) -> List[str]:
-        """Generate comprehensive reasons for recommendation showing all matches."""
-        reasons = []
-        user_interests = user_interests or []
-        user_amenities = user_amenities or []
-        
-        # Always show location if it matches
-        if score_components["district"] >= 0.9:
-            reasons.append(f"📍 Within {accommodation.get('district', 'selected city')}")
-        elif score_components["district"] >= 0.5:
-            reasons.append(f"📍 Within {accommodation.get('province', 'selected province')}")
-        
-        # Always show travel style if it matches
-        if score_components["style"] > 0:
-            styles = accommodation.get("travel_style", [])
-            if styles:
-                style_text = ", ".join([s.replace('_', ' ').title() for s in styles])
-                reasons.append(f"🎯 {style_text} travel style")
-        
-        # Show matching interests with user request comparison
-        if user_interests:
-            acc_interests = set([i.lower() for i in accommodation.get("interests", [])])
-            user_interests_lower = set([i.lower() for i in user_interests])
-            matching_interests = acc_interests & user_interests_lower
+    ) -> List[List[str]]:
+        """
+        Generate comprehensive reasons showing all matches, for every ranked
+        accommodation in one pass.
+        
+        Args:
+            ranked: (accommodation, score components) pairs in rank order
+            user_interests: User interests from the query
+            user_amenities: Required amenities from the query
+        
+        Returns:
+            One list of reason strings per ranked accommodation
+        """
+        flags = self._reason_flags(ranked)
+        user_interests_lower = {i.lower() for i in user_interests or []}
+        user_amenities_lower = dict.fromkeys(a.lower() for a in user_amenities or [])
+        
+        all_reasons = []
+        for index, (accommodation, _) in enumerate(ranked):
+            reasons = []
+            fragments = lookup(self.fragments, accommodation, self.REASON_FRAGMENTS)
+            
+            # Always show location if it matches
+            if flags["city"][index]:
+                reasons.append(f"📍 Within {accommodation.district or 'selected city'}")
+            elif flags["province"][index]:
+                reasons.append(f"📍 Within {accommodation.province or 'selected province'}")
+            
+            # Always show travel style if it matches
+            if flags["style"][index] and fragments["style"]:
+                reasons.append(fragments["style"])
+            
+            # Show matching interests with user request comparison
+            if user_interests_lower:
+                acc_interests = fragments["interests"]
+                matching_interests = acc_interests.mask(user_interests_lower)
+                
+                if matching_interests:
+                    reasons.append(f"💚 Matching interests: {acc_interests.join(matching_interests)}")
+                elif flags["interests"][index] and acc_interests:
+                    # Show accommodation interests even if no direct match
+                    reasons.append(f"💚 Interests: {acc_interests.join(acc_interests.first(3))}")
+            
+            # Show accommodation type
+            if fragments["type"]:
+                reasons.append(fragments["type"])
+            
+            # Show amenities with user request comparison
+            if user_amenities_lower:
+                acc_amenities = fragments["amenities"]
+                matching_amenities = acc_amenities.mask(user_amenities_lower)
+                missing_amenities = [a for a in user_amenities_lower if a not in acc_amenities.keys]
+                
+                if matching_amenities:
+                    reasons.append(f"✨ Has requested: {acc_amenities.join(matching_amenities)}")
+                
+                if missing_amenities and len(missing_amenities) <= 3:
+                    missing_text = ", ".join(display_term(a) for a in missing_amenities)
+                    reasons.append(f"⚠️ Missing: {missing_text}")
+            elif flags["amenities"][index] and fragments["amenity_list"]:
+                # Fallback: show amenities if no user request
+                reasons.append(fragments["amenity_list"])
+            
+            # Show rating if available and good
+            if flags["rating"][index]:
+                reasons.append(f"⭐ {accommodation.rating:.1f}/5.0 rating")
             
-            if matching_interests:
-                matched_text = ", ".join([i.replace('_', ' ').title() for i in matching_interests])
-                reasons.append(f"💚 Matching interests: {matched_text}")
-            elif score_components["interests"] > 0.1:
-                # Show accommodation interests even if no direct match
-                interests_list = [i.replace('_', ' ').title() for i in list(acc_interests)[:3]]
-                if interests_list:
-                    reasons.append(f"💚 Interests: {', '.join(interests_list)}")
-        
-        # Show accommodation type
-        acc_types = accommodation.get("type", [])
-        if acc_types:
-            type_text = ", ".join(acc_types)
-            reasons.append(f"🏨 Type: {type_text}")
-        
-        # Show amenities with user request comparison
-        if user_amenities:
-            acc_amenities = set([a.lower() for a in accommodation.get("amenities", [])])
-            user_amenities_lower = set([a.lower() for a in user_amenities])
-            matching_amenities = acc_amenities & user_amenities_lower
-            missing_amenities = user_amenities_lower - acc_amenities
+            # Show price alignment
+            if flags["price"][index]:
+                reasons.append("💰 Within budget")
             
-            if matching_amenities:
-                matched_text = ", ".join([a.replace('_', ' ').title() for a in matching_amenities])
-                reasons.append(f"✨ Has requested: {matched_text}")
+            # Show popularity if high
+            if flags["popularity"][index]:
+                reasons.append("🔥 Popular choice")
             
-            if missing_amenities and len(missing_amenities) <= 3:
-                missing_text = ", ".join([a.replace('_', ' ').title() for a in missing_amenities])
-                reasons.append(f"⚠️ Missing: {missing_text}")
-        elif score_components["amenities"] > 0.3:
-            # Fallback: show amenities if no user request
-            amenities = accommodation.get("amenities", [])
-            if amenities:
-                amenity_text = ", ".join([a.replace('_', ' ').title() for a in amenities[:4]])
-                reasons.append(f"✨ Amenities: {amenity_text}")
-        
-        # Show rating if available and good
-        rating = accommodation.get("rating", 0)
-        if rating >= 4.0:
-            reasons.append(f"⭐ {rating:.1f}/5.0 rating")
-        
-        # Show price alignment
-        if score_components["price"] > 0.7:
-            reasons.append(f"💰 Within budget")
-        
-        # Show popularity if high
-        if score_components["popularity"] > 0.6:
-            reasons.append(f"🔥 Popular choice")
-        
-        # Group size match
-        group_size = accommodation.get("group_size", 0)
-        if group_size > 0 and score_components["group"] > 0:
-            reasons.append(f"👥 Accommodates up to {group_size} people")
-        
-        # Show database availability
-        if accommodation.get("in_system", False):
-            reasons.append("✅ Available in our system")
-        
-        # Ensure we have at least 1 reason
-        if not reasons:
-            reasons.append(f"Located in {accommodation.get('district', 'your area')}")
-        
-        return reasons
+            # Group size match
+            if flags["group"][index]:
+                reasons.append(f"👥 Accommodates up to {accommodation.group_size} people")
+            
+            # Show database availability
+            if flags["in_system"][index]:
+                reasons.append("✅ Available in our system")
+            
+            # Ensure we have at least 1 reason
+            if not reasons:
+                reasons.append(f"Located in {accommodation.district or 'your area'}")
+            
+            all_reasons.append(reasons)
+        
+        return all_reasons
+    
+    def explain(
+        self,
+        accommodation: Dict,
+        score_components: Dict[str, float],
+        interests: List[str] = None,
+        required_amenities: List[str] = None,
+        **query
+    ) -> List[str]:
+        """
+        Reasons for one recommended accommodation, as recommend() would give them.
+        
+        Args:
+            accommodation: The recommended accommodation (record or dictionary)
+            score_components: Its score components, as reported through recommend(explanations=...)
+            interests: User interests from the query
+            required_amenities: Required amenities from the query
+            **query: The rest of the recommend() arguments (unused)
+        
+        Returns:
+            List of reason strings
+        """
+        if not isinstance(accommodation, AccommodationRecord):
+            accommodation = AccommodationRecord.from_dict(accommodation)
+        return self._generate_reasons(
+            [(accommodation, score_components)], user_interests=interests, user_amenities=required_amenities
+        )[0]
     
     def _get_filters_applied(
         self,
@@ -549,9 +686,25 @@ class AccommodationRecommender:
 
 
 def load_accommodations(filename: str = "data/mock_accommodations.json") -> List[Dict]:
-    """Load accommodations from JSON file."""
-    with open(filename, 'r', encoding='utf-8') as f:
-        return json.load(f)
+    """Load accommodations from a JSON or JSON Lines file."""
+    return list(read_catalog(filename))
+
+
+def iter_accommodations(
+    filename: str = "data/mock_accommodations.json",
+    batch_size: Optional[int] = None
+) -> Union[Iterator[Dict], Iterator[List[Dict]]]:
+    """
+    Stream accommodations from a JSON or JSON Lines file.
+    
+    Args:
+        filename: Path to the catalog file (.jsonl is streamed line by line)
+        batch_size: If given, yield lists of this many accommodations
+    
+    Returns:
+        Generator of accommodations, or of accommodation batches when batch_size is set
+    """
+    return read_catalog(filename, batch_size=batch_size)
 
 
 if __name__ == "__main__":
@@ -0,0 +1,188 @@
+"""
+Compact record types for catalog items.
+
+Catalogs arrive as dictionaries (JSON files, database rows). The engines
+keep them as slotted records instead: fields are attributes, categorical
+strings (districts, provinces, tags, ...) are interned so every record
+shares one copy of each, and tag lists are tuples. Records still answer
+record["field"] and record.get("field", default), and to_dict() gives the
+dictionary form back, so code written against dictionaries keeps working.
+"""
+
+import sys
+from dataclasses import dataclass, fields
+from typing import Any, Dict, FrozenSet, Iterable, Iterator, List, Optional, Tuple
+
+
+def _interned(value):
+    """Intern strings; leave anything else (None, numbers) as it is."""
+    return sys.intern(value) if type(value) is str else value
+
+
+def _terms(values) -> Tuple[str, ...]:
+    """Tag list as a tuple of interned strings; None becomes empty."""
+    return tuple(_interned(value) for value in values) if values else ()
+
+
+class _DictCompatible:
+    """Read-only dictionary access to a record's fields and extra keys."""
+
+    __slots__ = ()
+
+    # Field names of the record type in declaration order, and as a set;
+    # filled in by _dict_compatible
+    _ORDER: Tuple[str, ...] = ()
+    FIELDS: FrozenSet[str] = frozenset()
+
+    def __getitem__(self, key: str) -> Any:
+        if key in self.FIELDS:
+            return getattr(self, key)
+        if self.extra is not None and key in self.extra:
+            return self.extra[key]
+        raise KeyError(key)
+
+    def get(self, key: str, default: Any = None) -> Any:
+        if key in self.FIELDS:
+            return getattr(self, key)
+        return self.extra.get(key, default) if self.extra is not None else default
+
+    def __contains__(self, key: str) -> bool:
+        return key in self.FIELDS or (self.extra is not None and key in self.extra)
+
+    def keys(self) -> List[str]:
+        return [name for name in self._ORDER if name != "extra"] + list(self.extra or ())
+
+    def items(self) -> List[Tuple[str, Any]]:
+        return [(key, self[key]) for key in self.keys()]
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(self.keys())
+
+    def __len__(self) -> int:
+        return len(self.FIELDS) + len(self.extra or ())
+
+    def to_dict(self) -> Dict:
+        """The record as a dictionary, tag tuples as lists and extra keys included."""
+        data = {}
+        for name in self._ORDER:
+            if name != "extra":
+                value = getattr(self, name)
+                data[name] = list(value) if type(value) is tuple else value
+        if self.extra:
+            data.update(self.extra)
+        return data
+
+    @classmethod
+    def from_dicts(cls, items: Iterable) -> List:
+        """Records for items; items that already are records are kept as they are."""
+        return [item if type(item) is cls else cls.from_dict(item) for item in items]
+
+
+def _dict_compatible(cls):
+    """Fill in the field names _DictCompatible looks keys up in."""
+    order = tuple(field.name for field in fields(cls))
+    cls._ORDER = order
+    cls.FIELDS = frozenset(name for name in order if name != "extra")
+    return cls
+
+
+@_dict_compatible
+@dataclass(slots=True, eq=False)
+class AccommodationRecord(_DictCompatible):
+    """
+    One accommodation. Missing fields take the defaults the engine has always
+    assumed for them; keys the engine does not know are kept in extra.
+    """
+
+    id: Any
+    name: Optional[str] = None
+    type: Tuple[str, ...] = ()
+    amenities: Tuple[str, ...] = ()
+    rating: Optional[float] = None
+    district: Optional[str] = None
+    province: Optional[str] = None
+    price_range_min: float = 0
+    price_range_max: Optional[float] = None
+    interests: Tuple[str, ...] = ()
+    travel_style: Tuple[str, ...] = ()
+    group_size: int = 0
+    prior_bookings: int = 0
+    availability: bool = True
+    in_system: bool = False
+    provider_id: Any = None
+    provider_name: Optional[str] = None
+    extra: Optional[Dict] = None
+
+    @classmethod
+    def from_dict(cls, data: Dict) -> "AccommodationRecord":
+        """Record for an accommodation dictionary (catalog file or database row)."""
+        get = data.get
+        extra = {key: value for key, value in data.items() if key not in cls.FIELDS}
+        return cls(
+            id=data["id"],
+            name=get("name"),
+            type=_terms(get("type")),
+            amenities=_terms(get("amenities")),
+            rating=get("rating"),
+            district=_interned(get("district")),
+            province=_interned(get("province")),
+            price_range_min=get("price_range_min", 0),
+            price_range_max=get("price_range_max"),
+            interests=_terms(get("interests")),
+            travel_style=_terms(get("travel_style")),
+            group_size=get("group_size", 0),
+            prior_bookings=get("prior_bookings", 0),
+            availability=get("availability", True),
+            in_system=get("in_system", False),
+            provider_id=get("provider_id"),
+            provider_name=get("provider_name"),
+            extra=extra or None,
+        )
+
+
+@_dict_compatible
+@dataclass(slots=True, eq=False)
+class GuideRecord(_DictCompatible):
+    """
+    One guide. Missing fields take the defaults the engine has always
+    assumed for them; keys the engine does not know are kept in extra.
+    """
+
+    id: Any
+    user_id: Any = None
+    name: Optional[str] = None
+    gender: Optional[str] = None
+    city: Optional[str] = None
+    province: Optional[str] = None
+    languages: Tuple[str, ...] = ()
+    expertise: Tuple[str, ...] = ()
+    experience: Tuple[str, ...] = ()
+    price: Optional[float] = None
+    rating: Optional[float] = None
+    prior_bookings: int = 0
+    availability: bool = True
+    in_system: bool = False
+    extra: Optional[Dict] = None
+
+    @classmethod
+    def from_dict(cls, data: Dict) -> "GuideRecord":
+        """Record for a guide dictionary (catalog file or database row)."""
+        get = data.get
+        extra = {key: value for key, value in data.items() if key not in cls.FIELDS}
+        return cls(
+            id=data["id"],
+            user_id=get("user_id"),
+            name=get("name"),
+            gender=_interned(get("gender")),
+            city=_interned(get("city")),
+            province=_interned(get("province")),
+            languages=_terms(get("languages")),
+            expertise=_terms(get("expertise")),
+            experience=tuple(get("experience") or ()),
+            price=get("price"),
+            rating=get("rating"),
+            prior_bookings=get("prior_bookings", 0),
+            availability=get("availability", True),
+            in_system=get("in_system", False),
+            extra=extra or None,
+        )
@@ -0,0 +1,396 @@
+"""
+Offline replay of captured recommendation traffic.
+Feeds a query log (see query_log.py) at its original or an accelerated pace
+into the engines in-process or through the HTTP API, and compares two
+configurations: latency distribution per endpoint and ranking differences
+for the same requests.
+
+Targets:
+    engine                                   in-process engines on the catalog files
+    engine:{"accommodations": {"weights": [0.40, 0.05, 0.05, 0.10, 0.10, 0.05, 0.10, 0.05, 0.10]}}
+                                             same, with constructor options per endpoint
+    http://localhost:5000                    a running API
+
+Usage:
+    python replay.py logs/queries.jsonl --a engine --speed 0
+    python replay.py logs/queries.jsonl --a http://localhost:5000 --b http://localhost:5001 --speed 4
+    python replay.py logs/queries.jsonl.gz --a engine --b 'engine:{"accommodations": {"weights": [0.40, 0.05, 0.05, 0.10, 0.10, 0.05, 0.10, 0.05, 0.10]}}'
+"""
+
+import argparse
+import json
+import os
+import sys
+import threading
+import time
+import urllib.error
+import urllib.request
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, List, Optional
+
+from catalog_io import read_catalog
+from loadtest import ENDPOINTS, PERCENTILES, percentile
+from queries import QUERY_PARSERS, canonical_query, split_trip_body
+from query_log import read_query_log
+
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+
+DEFAULT_CATALOGS = {
+    "accommodations": os.path.join(BASE_DIR, "data", "mock_accommodations.json"),
+    "guides": os.path.join(BASE_DIR, "data", "mock_guides.json"),
+}
+
+
+# ============================================================================
+# Targets
+# ============================================================================
+
+class EngineTarget:
+    """Runs requests through the recommendation engines in this process."""
+
+    def __init__(self, catalogs: Dict[str, str], options: Optional[Dict[str, Dict]] = None, name: str = "engine"):
+        """
+        Args:
+            catalogs: Catalog file per endpoint
+            options: Engine constructor keyword arguments per endpoint
+            name: Label used in reports
+        """
+        self.catalogs = catalogs
+        self.options = options or {}
+        self.name = name
+        self._engines: Dict = {}
+        self._lock = threading.Lock()
+
+    def _engine(self, endpoint: str):
+        # Built on first use so a log with one endpoint only loads one catalog
+        with self._lock:
+            if endpoint not in self._engines:
+                from recommender import AccommodationRecommender
+                from GuidesRecommendationModel.guide_recommender import GuideRecommender
+
+                classes = {"accommodations": AccommodationRecommender, "guides": GuideRecommender}
+                records = read_catalog(self.catalogs[endpoint])
+                self._engines[endpoint] = classes[endpoint](records, **self.options.get(endpoint, {}))
+            return self._engines[endpoint]
+
+    def prepare(self, endpoints):
+        """Build engines up front so catalog loading is not timed."""
+        for endpoint in endpoints:
+            self._engine(endpoint)
+
+    def run(self, endpoint: str, body: Dict) -> Dict:
+        engine = self._engine(endpoint)
+        query = QUERY_PARSERS[endpoint](body)
+        start = time.perf_counter()
+        try:
+            results = engine.recommend(**query)
+        except Exception as e:
+            return {"latency_ms": (time.perf_counter() - start) * 1000, "ids": None, "error": type(e).__name__}
+        return {
+            "latency_ms": (time.perf_counter() - start) * 1000,
+            "ids": [r["id"] for r in results["recommendations"]],
+            "error": None,
+        }
+
+
+class HttpTarget:
+    """Runs requests against a running API."""
+
+    def __init__(self, base_url: str, timeout: float = 30.0):
+        self.base_url = base_url.rstrip("/")
+        self.timeout = timeout
+        self.name = self.base_url
+
+    def prepare(self, endpoints):
+        pass
+
+    def run(self, endpoint: str, body: Dict) -> Dict:
+        req = urllib.request.Request(
+            self.base_url + ENDPOINTS[endpoint][0], data=json.dumps(body).encode("utf-8"), method="POST",
+            headers={"Content-Type": "application/json"}
+        )
+        start = time.perf_counter()
+        try:
+            with urllib.request.urlopen(req, timeout=self.timeout) as response:
+                payload = json.loads(response.read())
+            error = None
+        except urllib.error.HTTPError as e:
+            payload, error = None, f"HTTP {e.code}"
+        except (urllib.error.URLError, OSError, ValueError) as e:
+            payload, error = None, type(e).__name__
+        latency_ms = (time.perf_counter() - start) * 1000
+        ids = [r["id"] for r in payload.get("recommendations", [])] if payload else None
+        return {"latency_ms": latency_ms, "ids": ids, "error": error}
+
+
+def parse_target(spec: str, catalogs: Dict[str, str]):
+    """
+    Build a target from its command-line form.
+
+    Args:
+        spec: "engine", "engine:<json options>" or an http(s):// base URL
+        catalogs: Catalog file per endpoint for engine targets
+
+    Returns:
+        EngineTarget or HttpTarget
+    """
+    if spec.startswith(("http://", "https://")):
+        return HttpTarget(spec)
+    if spec == "engine":
+        return EngineTarget(catalogs)
+    if spec.startswith("engine:"):
+        try:
+            options = json.loads(spec[len("engine:"):])
+        except ValueError as e:
+            raise ValueError(f"Invalid engine options in '{spec}': {e}")
+        unknown = set(options) - set(QUERY_PARSERS)
+        if unknown:
+            raise ValueError(f"Unknown endpoint(s) in engine options: {', '.join(sorted(unknown))}")
+        return EngineTarget(catalogs, options, name=spec)
+    raise ValueError(f"Unknown target '{spec}' (expected engine, engine:<json> or an http:// URL)")
+
+
+# ============================================================================
+# Replay
+# ============================================================================
+
+def load_entries(path: str, endpoint: Optional[str] = None, limit: Optional[int] = None) -> List[Dict]:
+    """
+    Read captured requests, optionally for one endpoint and capped in number.
+    Trip requests are replayed as their accommodation and guide halves.
+    """
+    entries = []
+    for captured in read_query_log(path):
+        if captured["e"] == "trip":
+            expanded = [{"t": captured["t"], "e": section, "q": body}
+                        for section, body in split_trip_body(captured["q"]).items()]
+        else:
+            expanded = [captured]
+        for entry in expanded:
+            if entry["e"] not in QUERY_PARSERS or (endpoint is not None and entry["e"] != endpoint):
+                continue
+            entries.append(entry)
+            if limit is not None and len(entries) >= limit:
+                return entries
+    return entries
+
+
+def replay(entries: List[Dict], target, speed: float = 1.0, concurrency: int = 1) -> List[Dict]:
+    """
+    Send every captured request to a target on the original schedule.
+
+    Args:
+        entries: Captured requests in arrival order
+        target: EngineTarget or HttpTarget
+        speed: Pace multiplier over the captured timestamps (0 sends back to back)
+        concurrency: Requests that may be in flight at once
+
+    Returns:
+        One sample per entry, in entry order, with latency_ms, ids, error and
+        lag_ms (how late the request was sent relative to its schedule)
+    """
+    target.prepare({entry["e"] for entry in entries})
+    samples: List[Optional[Dict]] = [None] * len(entries)
+
+    def send(index: int, lag_ms: float):
+        entry = entries[index]
+        sample = target.run(entry["e"], entry["q"])
+        sample["endpoint"] = entry["e"]
+        sample["lag_ms"] = lag_ms
+        samples[index] = sample
+
+    first_ts = entries[0]["t"] if entries else 0.0
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=max(1, concurrency)) as pool:
+        for index, entry in enumerate(entries):
+            due = (entry["t"] - first_ts) / speed if speed > 0 else 0.0
+            wait = due - (time.perf_counter() - started)
+            if wait > 0:
+                time.sleep(wait)
+            lag_ms = max(0.0, -wait) * 1000 if speed > 0 else 0.0
+            if concurrency <= 1:
+                send(index, lag_ms)
+            else:
+                pool.submit(send, index, lag_ms)
+    return samples
+
+
+# ============================================================================
+# Comparison
+# ============================================================================
+
+def latency_summary(samples: List[Dict]) -> Dict:
+    """Latency distribution and error count of a group of samples."""
+    latencies = [s["latency_ms"] for s in samples if s["error"] is None]
+    summary = {
+        "requests": len(samples),
+        "errors": sum(1 for s in samples if s["error"] is not None),
+        "mean_ms": sum(latencies) / len(latencies) if latencies else None,
+        "max_ms": max(latencies) if latencies else None,
+        "max_lag_ms": max((s["lag_ms"] for s in samples), default=0.0),
+    }
+    for p in PERCENTILES:
+        summary[f"p{p}_ms"] = percentile(latencies, p)
+    return summary
+
+
+def ranking_diff(entries: List[Dict], samples_a: List[Dict], samples_b: List[Dict], max_examples: int = 5) -> Dict:
+    """
+    Compare the rankings two targets returned for the same requests.
+
+    Returns:
+        Dictionary with the number of requests compared, how many returned the
+        identical ranking, the same set in a different order, a different top
+        result, the mean top-k overlap, and a few differing queries
+    """
+    compared = identical = same_set = top1_changed = 0
+    overlap_total = 0.0
+    examples = []
+    for entry, a, b in zip(entries, samples_a, samples_b):
+        if a["ids"] is None or b["ids"] is None:
+            continue
+        compared += 1
+        if a["ids"] == b["ids"]:
+            identical += 1
+            overlap_total += 1.0
+            continue
+        if set(a["ids"]) == set(b["ids"]):
+            same_set += 1
+        if a["ids"][:1] != b["ids"][:1]:
+            top1_changed += 1
+        depth = max(len(a["ids"]), len(b["ids"]))
+        overlap_total += len(set(a["ids"]) & set(b["ids"])) / depth
+        canonical = canonical_query(entry["e"], QUERY_PARSERS[entry["e"]](entry["q"]))
+        if len(examples) < max_examples and all(example["query"] != canonical for example in examples):
+            examples.append({"query": canonical, "a": a["ids"], "b": b["ids"]})
+    return {
+        "compared": compared,
+        "identical": identical,
+        "reordered": same_set,
+        "top1_changed": top1_changed,
+        "mean_overlap": overlap_total / compared if compared else None,
+        "examples": examples,
+    }
+
+
+def _pct_change(a: Optional[float], b: Optional[float]) -> Optional[float]:
+    if a is None or b is None or a == 0:
+        return None
+    return (b - a) / a * 100
+
+
+def compare(entries: List[Dict], samples_a: List[Dict], samples_b: Optional[List[Dict]] = None) -> Dict:
+    """
+    Build the replay report: latency per endpoint for each target and, when
+    two targets were replayed, the latency change and ranking differences.
+    """
+    report = {"requests": len(entries), "endpoints": {}}
+    for endpoint in sorted({entry["e"] for entry in entries}):
+        indexes = [i for i, entry in enumerate(entries) if entry["e"] == endpoint]
+        section = {"a": latency_summary([samples_a[i] for i in indexes])}
+        if samples_b is not None:
+            section["b"] = latency_summary([samples_b[i] for i in indexes])
+            section["change_pct"] = {
+                key: _pct_change(section["a"][key], section["b"][key])
+                for key in ["mean_ms"] + [f"p{p}_ms" for p in PERCENTILES]
+            }
+            section["ranking"] = ranking_diff(
+                [entries[i] for i in indexes], [samples_a[i] for i in indexes], [samples_b[i] for i in indexes]
+            )
+        report["endpoints"][endpoint] = section
+    return report
+
+
+def _fmt_ms(value: Optional[float]) -> str:
+    return f"{value:8.1f}" if value is not None else "       -"
+
+
+def _fmt_pct(value: Optional[float]) -> str:
+    return f"{value:+7.1f}%" if value is not None else "       -"
+
+
+def print_report(report: Dict, name_a: str, name_b: Optional[str] = None):
+    """Print latency and ranking comparison tables."""
+    print(f"A: {name_a}")
+    if name_b:
+        print(f"B: {name_b}")
+    print()
+
+    keys = ["mean_ms"] + [f"p{p}_ms" for p in PERCENTILES]
+    header = f"{'endpoint':<16} {'run':<6} {'reqs':>6} {'errs':>5} " + " ".join(f"{k[:-3]:>8}" for k in keys) + f" {'max lag':>8}"
+    print(header)
+    print("-" * len(header))
+    for endpoint, section in report["endpoints"].items():
+        for run in ("a", "b"):
+            if run not in section:
+                continue
+            s = section[run]
+            print(f"{endpoint:<16} {run.upper():<6} {s['requests']:>6} {s['errors']:>5} "
+                  + " ".join(_fmt_ms(s[k]) for k in keys) + f" {_fmt_ms(s['max_lag_ms'])}")
+        if "change_pct" in section:
+            print(f"{'':<16} {'B vs A':<6} {'':>6} {'':>5} " + " ".join(_fmt_pct(section['change_pct'][k]) for k in keys))
+
+    for endpoint, section in report["endpoints"].items():
+        ranking = section.get("ranking")
+        if not ranking or not ranking["compared"]:
+            continue
+        print(f"\n{endpoint} rankings ({ranking['compared']} requests compared):")
+        print(f"  identical      {ranking['identical']:>6}")
+        print(f"  reordered      {ranking['reordered']:>6}")
+        print(f"  top-1 changed  {ranking['top1_changed']:>6}")
+        print(f"  mean overlap   {ranking['mean_overlap']:>6.3f}")
+        for example in ranking["examples"]:
+            print(f"  differs: {example['query']}")
+            print(f"    A: {example['a']}")
+            print(f"    B: {example['b']}")
+
+
+def main(argv: Optional[List[str]] = None):
+    parser = argparse.ArgumentParser(description="Replay a captured query log against one or two targets")
+    parser.add_argument("log", help="Query log written by the API (QUERY_LOG_FILE)")
+    parser.add_argument("--a", required=True, help="Baseline target: engine, engine:<json> or http:// URL")
+    parser.add_argument("--b", default=None, help="Candidate target to compare against the baseline")
+    parser.add_argument("--speed", type=float, default=1.0,
+                        help="Pace multiplier over captured timestamps (1 = original, 0 = back to back)")
+    parser.add_argument("--concurrency", type=int, default=1, help="Requests in flight at once")
+    parser.add_argument("--endpoint", choices=sorted(QUERY_PARSERS), default=None, help="Only replay one endpoint")
+    parser.add_argument("--limit", type=int, default=None, help="Replay at most this many requests")
+    parser.add_argument("--catalog-accommodations", default=DEFAULT_CATALOGS["accommodations"])
+    parser.add_argument("--catalog-guides", default=DEFAULT_CATALOGS["guides"])
+    parser.add_argument("--output", default=None, help="Write the full report as JSON")
+    args = parser.parse_args(argv)
+
+    catalogs = {"accommodations": args.catalog_accommodations, "guides": args.catalog_guides}
+    try:
+        target_a = parse_target(args.a, catalogs)
+        target_b = parse_target(args.b, catalogs) if args.b else None
+    except ValueError as e:
+        sys.exit(str(e))
+
+    entries = load_entries(args.log, args.endpoint, args.limit)
+    if not entries:
+        sys.exit(f"No requests to replay in {args.log}")
+    span = entries[-1]["t"] - entries[0]["t"]
+    print(f"Replaying {len(entries)} requests spanning {span:.1f}s"
+          + (f" at {args.speed:g}x" if args.speed > 0 else " back to back"))
+
+    samples_a = replay(entries, target_a, args.speed, args.concurrency)
+    print("✓ A done")
+    samples_b = None
+    if target_b is not None:
+        samples_b = replay(entries, target_b, args.speed, args.concurrency)
+        print("✓ B done")
+    print()
+
+    report = compare(entries, samples_a, samples_b)
+    print_report(report, target_a.name, target_b.name if target_b else None)
+
+    if args.output:
+        report["targets"] = {"a": target_a.name, "b": target_b.name if target_b else None}
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(report, f, indent=2)
+        print(f"\n✓ Report written to {args.output}")
+
+
+if __name__ == "__main__":
+    main()
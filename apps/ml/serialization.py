@@ -0,0 +1,122 @@
+"""
+Response encoding for the recommendation endpoints.
+Payloads are serialized with orjson when it is installed (falling back to the
+standard json module), optionally trimmed to the item fields the caller asked
+for, and compressed with brotli or gzip when the client accepts it and the body
+is large enough for compression to pay off.
+"""
+
+import decimal
+import gzip
+import json
+from typing import Dict, Iterable, Optional, Tuple
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+JSON_BACKEND = "orjson" if orjson is not None else "json"
+
+
+def _default(value):
+    # Same as Flask's JSON provider: NUMERIC columns come back as Decimal
+    if isinstance(value, decimal.Decimal):
+        return str(value)
+    raise TypeError(f"Object of type {type(value).__name__} is not JSON serializable")
+
+
+def dumps(payload) -> bytes:
+    """Serialize a response payload to compact UTF-8 JSON."""
+    if orjson is not None:
+        return orjson.dumps(payload, default=_default)
+    return json.dumps(payload, default=_default, separators=(",", ":")).encode("utf-8")
+
+
+def loads(body: bytes):
+    """Parse JSON produced by dumps()."""
+    if orjson is not None:
+        return orjson.loads(body)
+    return json.loads(body)
+
+
+def select_fields(results: Dict, fields: Optional[Iterable[str]]) -> Dict:
+    """
+    Keep only the requested fields of each recommendation ("id" is always kept).
+
+    Args:
+        results: Result set with a "recommendations" list
+        fields: Item fields to keep, or None to keep everything
+
+    Returns:
+        The same results dict, with its recommendations trimmed in place
+    """
+    if fields is None:
+        return results
+    keep = ("id",) + tuple(name for name in fields if name != "id")
+    results["recommendations"] = [
+        {name: rec[name] for name in keep if name in rec} for rec in results.get("recommendations", [])
+    ]
+    return results
+
+
+def accepted_encodings(accept_encoding: str) -> Dict[str, float]:
+    """Parse an Accept-Encoding header into {coding: q}."""
+    accepted = {}
+    for part in accept_encoding.split(","):
+        coding, _, params = part.strip().partition(";")
+        if not coding:
+            continue
+        q = 1.0
+        params = params.strip()
+        if params.startswith("q="):
+            try:
+                q = float(params[2:])
+            except ValueError:
+                q = 0.0
+        accepted[coding.strip().lower()] = q
+    return accepted
+
+
+def choose_encoding(accept_encoding: str) -> Optional[str]:
+    """Best content coding both sides support: brotli if installed and accepted, else gzip."""
+    accepted = accepted_encodings(accept_encoding or "")
+    wildcard = accepted.get("*", 0.0)
+    candidates = (["br"] if brotli is not None else []) + ["gzip"]
+    best = max(candidates, key=lambda coding: accepted.get(coding, wildcard))
+    return best if accepted.get(best, wildcard) > 0 else None
+
+
+def compress(
+    body: bytes,
+    accept_encoding: str,
+    min_bytes: int = 1024,
+    gzip_level: int = 5,
+    brotli_quality: int = 4
+) -> Tuple[bytes, Optional[str]]:
+    """
+    Compress a response body if the client accepts it and it is worth it.
+
+    Args:
+        body: Serialized response
+        accept_encoding: The request's Accept-Encoding header
+        min_bytes: Bodies smaller than this are sent as they are
+        gzip_level: gzip compression level (1-9)
+        brotli_quality: brotli quality (0-11)
+
+    Returns:
+        Tuple of (body, Content-Encoding or None when uncompressed)
+    """
+    if len(body) < min_bytes:
+        return body, None
+    encoding = choose_encoding(accept_encoding)
+    if encoding == "br":
+        return brotli.compress(body, quality=brotli_quality), "br"
+    if encoding == "gzip":
+        return gzip.compress(body, compresslevel=gzip_level, mtime=0), "gzip"
+    return body, None
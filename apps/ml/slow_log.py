@@ -0,0 +1,140 @@
+"""
+Slow-request log for the recommendation API.
+Requests over a latency threshold are appended to a JSON Lines file with the
+canonical query, catalog version, candidate and DB row counts and the full
+stage breakdown, so the exact recommend() call can be replayed offline.
+
+Usage:
+    python slow_log.py show logs/slow_requests.jsonl
+    python slow_log.py replay logs/slow_requests.jsonl --line 3 --catalog data/mock_guides.json
+"""
+
+import argparse
+import json
+import os
+import sys
+import threading
+import time
+from typing import Dict, Iterable, Iterator, List, Optional
+
+from catalog_io import read_catalog
+from metrics import StageTimer
+
+
+class SlowRequestLog:
+    """Thread-safe JSON Lines writer with a size cap and one rotated backup."""
+
+    def __init__(self, path: str, threshold_ms: float = 500.0, max_bytes: int = 50 * 1024 * 1024):
+        """
+        Args:
+            path: JSON Lines file to append to (parent directory is created)
+            threshold_ms: Requests at or above this total latency are logged
+            max_bytes: Size at which the file is rotated to <path>.1
+        """
+        self.path = path
+        self.threshold_ms = threshold_ms
+        self.max_bytes = max_bytes
+        self._lock = threading.Lock()
+
+    def is_slow(self, elapsed_ms: float) -> bool:
+        return elapsed_ms >= self.threshold_ms
+
+    def record(self, entry: Dict):
+        """Append one entry (adds a timestamp if missing)."""
+        entry.setdefault("ts", time.time())
+        line = json.dumps(entry, default=str) + "\n"
+        with self._lock:
+            parent = os.path.dirname(self.path)
+            if parent:
+                os.makedirs(parent, exist_ok=True)
+            if os.path.exists(self.path) and os.path.getsize(self.path) + len(line) > self.max_bytes:
+                os.replace(self.path, self.path + ".1")
+            with open(self.path, 'a', encoding='utf-8') as f:
+                f.write(line)
+
+
+def read_slow_log(path: str) -> Iterator[Dict]:
+    """Yield entries from a slow log."""
+    with open(path, 'r', encoding='utf-8') as f:
+        for line in f:
+            if line.strip():
+                yield json.loads(line)
+
+
+def replay_entry(entry: Dict, catalog: Iterable[Dict], section: Optional[str] = None) -> Dict:
+    """
+    Re-run a logged request's recommend() call against a catalog.
+
+    Args:
+        entry: Slow log entry
+        catalog: Records to build the engine from (the logged catalog_version
+            tells you which catalog the original request ran against)
+        section: For trip requests, which engine to replay ("accommodations" or "guides")
+
+    Returns:
+        Dictionary with the results, stage timings and total milliseconds
+    """
+    # Imported here so reading a log does not pull in both engines
+    from recommender import AccommodationRecommender
+    from GuidesRecommendationModel.guide_recommender import GuideRecommender
+
+    engines = {"accommodations": AccommodationRecommender, "guides": GuideRecommender}
+    endpoint, query = entry["endpoint"], entry["query"]
+    if endpoint == "trip":
+        if section not in engines:
+            raise ValueError("Trip entries need a section: accommodations or guides")
+        endpoint, query = section, query[section]
+    engine = engines[endpoint](catalog)
+
+    timer = StageTimer()
+    results = engine.recommend(**query, timer=timer)
+    return {"results": results, "stages_ms": timer.timings, "total_ms": timer.elapsed_ms()}
+
+
+def _print_entry(index: int, entry: Dict):
+    stages = ", ".join(f"{k}={v:.1f}" for k, v in sorted(entry.get("stages_ms", {}).items(), key=lambda kv: -kv[1]))
+    print(f"[{index}] {entry['endpoint']} {entry['elapsed_ms']:.1f} ms  tag={entry.get('tag')}  "
+          f"catalog={entry.get('catalog_version')}  candidates={entry.get('candidates')}")
+    print(f"     stages: {stages}")
+
+
+def main(argv: Optional[List[str]] = None):
+    parser = argparse.ArgumentParser(description="Inspect and replay the slow-request log")
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    show = sub.add_parser("show", help="List logged slow requests")
+    show.add_argument("log")
+    show.add_argument("--endpoint", default=None)
+
+    replay = sub.add_parser("replay", help="Re-run one logged request against a catalog")
+    replay.add_argument("log")
+    replay.add_argument("--line", type=int, default=0, help="Entry index (as listed by show)")
+    replay.add_argument("--catalog", required=True, help="Catalog file or shard directory for the engine")
+    replay.add_argument("--section", choices=["accommodations", "guides"], default=None,
+                        help="Engine to replay for a trip entry")
+    args = parser.parse_args(argv)
+
+    entries = list(read_slow_log(args.log))
+    if args.command == "show":
+        for index, entry in enumerate(entries):
+            if args.endpoint is None or entry["endpoint"] == args.endpoint:
+                _print_entry(index, entry)
+        return
+
+    if not 0 <= args.line < len(entries):
+        sys.exit(f"No entry {args.line} in {args.log} ({len(entries)} entries)")
+    entry = entries[args.line]
+    _print_entry(args.line, entry)
+
+    try:
+        replayed = replay_entry(entry, read_catalog(args.catalog), args.section)
+    except ValueError as e:
+        sys.exit(str(e))
+    print(f"\nReplayed in {replayed['total_ms']:.1f} ms against {args.catalog}")
+    for stage, ms in sorted(replayed["stages_ms"].items(), key=lambda kv: -kv[1]):
+        print(f"  {stage:<10} {ms:9.2f} ms")
+    print(f"  candidates {replayed['results']['total_candidates']}")
+
+
+if __name__ == "__main__":
+    main()
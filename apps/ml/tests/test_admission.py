@@ -0,0 +1,90 @@
+"""
+Unit tests for admission control.
+"""
+
+import asyncio
+import threading
+import time
+
+from admission import AdmissionController, AdmissionLimiter, AsyncAdmissionLimiter
+
+
+def test_limiter_queues_then_rejects():
+    """Requests beyond the limit wait in the queue; beyond the queue they are rejected at once."""
+    limiter = AdmissionLimiter(max_concurrent=1, max_queue=1, queue_timeout_ms=2000)
+    assert limiter.try_acquire()
+
+    admitted = []
+    waiter = threading.Thread(target=lambda: admitted.append(limiter.try_acquire()))
+    waiter.start()
+    while limiter.waiting == 0:
+        time.sleep(0.001)
+
+    started = time.perf_counter()
+    assert not limiter.try_acquire()
+    assert time.perf_counter() - started < 0.1
+
+    limiter.release()
+    waiter.join()
+    assert admitted == [True]
+    assert limiter.active == 1 and limiter.waiting == 0
+
+
+def test_limiter_queue_timeout():
+    """A queued request gives up after the queue timeout."""
+    limiter = AdmissionLimiter(max_concurrent=1, max_queue=4, queue_timeout_ms=30)
+    assert limiter.try_acquire()
+    started = time.perf_counter()
+    assert not limiter.try_acquire()
+    assert time.perf_counter() - started >= 0.025
+    assert limiter.waiting == 0
+
+
+def test_traffic_classes_have_separate_budgets():
+    """A saturated batch budget does not consume interactive slots."""
+    controller = AdmissionController({
+        "interactive": {"concurrency": 1, "queue": 0, "retry_after_s": 1},
+        "batch": {"concurrency": 1, "queue": 0, "retry_after_s": 5},
+    })
+    batch = controller.limiter("guides", "batch")
+    assert batch.try_acquire()
+    assert not batch.try_acquire()
+    assert controller.limiter("guides", "interactive").try_acquire()
+    assert controller.limiter("accommodations", "batch").try_acquire()
+    assert controller.in_flight() == {
+        ("guides", "batch"): 1, ("guides", "interactive"): 1, ("accommodations", "batch"): 1
+    }
+    assert controller.retry_after_s("batch") == 5
+
+
+def test_async_limiter_hands_slot_to_first_waiter():
+    """Released slots go to queued coroutines in arrival order; a full queue rejects at once."""
+    async def scenario():
+        limiter = AsyncAdmissionLimiter(max_concurrent=1, max_queue=2, queue_timeout_ms=2000)
+        assert await limiter.try_acquire()
+        first = asyncio.ensure_future(limiter.try_acquire())
+        second = asyncio.ensure_future(limiter.try_acquire())
+        await asyncio.sleep(0)
+        assert limiter.waiting == 2
+        assert not await limiter.try_acquire()
+
+        limiter.release()
+        assert await first and not second.done()
+        limiter.release()
+        assert await second
+        assert limiter.active == 1 and limiter.waiting == 0
+
+    asyncio.run(scenario())
+
+
+def test_async_limiter_queue_timeout():
+    """A queued coroutine gives up after the queue timeout and leaves the queue."""
+    async def scenario():
+        limiter = AsyncAdmissionLimiter(max_concurrent=1, max_queue=4, queue_timeout_ms=30)
+        assert await limiter.try_acquire()
+        assert not await limiter.try_acquire()
+        assert limiter.waiting == 0
+        limiter.release()
+        assert limiter.active == 0
+
+    asyncio.run(scenario())
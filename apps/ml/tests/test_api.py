@@ -0,0 +1,444 @@
+"""
+Integration tests for the Flask API running on the in-memory fake data source.
+Tests request handling, the mock fallback and DB connection accounting.
+"""
+
+import gzip
+import json
+import os
+
+import pytest
+
+import api
+import serialization
+from fake_db import FakeDatabase
+from query_log import read_query_log
+from slow_log import read_slow_log, replay_entry
+
+ACCOMMODATIONS = [
+    {
+        "id": "db-1", "name": "Galle Beach Hotel", "type": ["hotel"],
+        "amenities": ["wifi", "pool"], "rating": 4.6, "district": "Galle",
+        "price_range_min": 8000, "price_range_max": 20000, "province": "Southern",
+        "interests": ["coastal"], "travel_style": ["luxury"], "group_size": 4,
+        "prior_bookings": 120, "availability": True
+    },
+    {
+        "id": "db-2", "name": "Kandy Homestay", "type": ["homestay"],
+        "amenities": ["wifi"], "rating": 4.1, "district": "Kandy",
+        "price_range_min": 2000, "price_range_max": 4000, "province": "Central",
+        "interests": ["cultural"], "travel_style": ["budget"], "group_size": 2,
+        "prior_bookings": 40, "availability": True
+    },
+]
+
+GUIDES = [
+    {
+        "id": "g-1", "user_id": "u-1", "name": "Nimal", "gender": "male",
+        "city": "Kandy", "province": "Central", "languages": ["English", "Sinhala"],
+        "expertise": ["Cultural"], "experience": ["5 years in Kandy"],
+        "price": 6000, "rating": 4.7, "prior_bookings": 30, "availability": True
+    },
+    {
+        "id": "g-2", "user_id": "u-2", "name": "Kumari", "gender": "female",
+        "city": "Ella", "province": "Uva", "languages": ["English"],
+        "expertise": ["Hiking"], "experience": ["3 years in Ella"],
+        "price": 25000, "rating": 4.2, "prior_bookings": 10, "availability": True
+    },
+]
+
+
+@pytest.fixture
+def client(monkeypatch, tmp_path):
+    """Flask test client backed by the fake database and a one-record mock fallback."""
+    mock_accommodations = tmp_path / "mock_accommodations.json"
+    mock_accommodations.write_text(json.dumps([dict(ACCOMMODATIONS[0], id="mock-1")]))
+    mock_guides = tmp_path / "mock_guides.json"
+    mock_guides.write_text(json.dumps([dict(GUIDES[0], id="mock-g", user_id="mock-g")]))
+
+    monkeypatch.setattr(api, "fake_db", FakeDatabase(ACCOMMODATIONS, GUIDES))
+    monkeypatch.setattr(api, "MOCK_ACCOMMODATIONS_FILE", str(mock_accommodations))
+    monkeypatch.setattr(api, "MOCK_GUIDES_FILE", str(mock_guides))
+    monkeypatch.setattr(api, "slow_log", api.SlowRequestLog(str(tmp_path / "slow.jsonl"), threshold_ms=60000))
+    monkeypatch.setattr(api, "result_cache", api.ResultCache())
+    monkeypatch.setattr(api, "explanation_cache", api.ExplanationCache())
+    api.app.config["TESTING"] = True
+    return api.app.test_client()
+
+
+class TestFakeDatabase:
+    """Test that the fake applies the same filters as the SQL fetchers."""
+
+    def test_accommodation_filters(self):
+        """Budget overlap, district and province filters match the WHERE clause."""
+        db = FakeDatabase(ACCOMMODATIONS, GUIDES)
+        assert [a["id"] for a in db.fetch_accommodations(1000, 5000)] == ["db-2"]
+        assert [a["id"] for a in db.fetch_accommodations(district="Galle")] == ["db-1"]
+        assert db.fetch_accommodations(province="Uva") == []
+        assert all(a["in_system"] for a in db.fetch_accommodations())
+
+    def test_guide_filters(self):
+        """Guides are filtered on price range, city and province and keyed by user id."""
+        db = FakeDatabase(ACCOMMODATIONS, GUIDES)
+        guides = db.fetch_guides(2000, 20000)
+        assert [g["id"] for g in guides] == ["u-1"]
+        assert guides[0]["user_id"] == "u-1"
+        assert db.fetch_guides(city="Ella")[0]["name"] == "Kumari"
+
+
+class TestEndpoints:
+    """Test the recommendation endpoints end to end."""
+
+    def test_accommodations(self, client):
+        """DB rows are marked in_system and topped up from the mock catalog."""
+        response = client.post("/api/recommendations/accommodations", json={
+            "budget_min": 5000, "budget_max": 25000, "interests": ["coastal"], "top_k": 5
+        })
+        assert response.status_code == 200
+        recs = {r["id"]: r for r in response.get_json()["recommendations"]}
+        assert recs["db-1"]["in_system"] is True
+        assert recs["mock-1"]["in_system"] is False
+
+    def test_guides(self, client):
+        """Guide recommendations come back for a valid request."""
+        response = client.post("/api/recommendations/guides", json={
+            "budget_min": 2000, "budget_max": 20000, "languages": ["English"], "top_k": 1
+        })
+        assert response.status_code == 200
+        assert response.get_json()["recommendations"][0]["id"] == "u-1"
+
+    def test_guides_require_language(self, client):
+        """An empty language list is rejected."""
+        response = client.post("/api/recommendations/guides", json={"languages": []})
+        assert response.status_code == 400
+
+    def test_metrics_endpoint(self, client):
+        """/metrics exposes request, stage, candidate, DB and fallback metrics."""
+        client.post("/api/recommendations/guides", json={"languages": ["English"], "top_k": 5})
+        response = client.get("/metrics")
+
+        assert response.status_code == 200
+        assert response.mimetype == "text/plain"
+        text = response.get_data(as_text=True)
+        worker = f'worker="{os.getpid()}"'
+        assert f'wbth_http_requests_total{{{worker},endpoint="/api/recommendations/guides",status="200"}}' in text
+        assert f'wbth_stage_latency_ms_count{{{worker},endpoint="guides",stage="score"}}' in text
+        assert f'wbth_candidates_count{{{worker},endpoint="guides"}}' in text
+        assert f'wbth_db_fetch_latency_ms_count{{{worker},table="guides"}}' in text
+        assert f'wbth_mock_fallback_total{{{worker},endpoint="guides"}}' in text
+        # Shared by all workers, so not per worker
+        assert "\nwbth_db_connections_opened_total " in text
+
+    def test_debug_funnel(self, client):
+        """The funnel header returns per-rule rejections, which also feed metrics."""
+        response = client.post(
+            "/api/recommendations/accommodations",
+            json={"budget_min": 1000, "budget_max": 5000, "group_size": 3, "top_k": 5},
+            headers={"X-Debug-Funnel": "1"}
+        )
+        funnel = response.get_json()["funnel"]
+        assert funnel["input"] - sum(funnel["rejected"].values()) == funnel["passed"]
+        assert funnel["rejected"]["budget"] >= 1
+
+        text = client.get("/metrics").get_data(as_text=True)
+        assert f'wbth_filter_rejections_total{{worker="{os.getpid()}",endpoint="accommodations",rule="budget"}}' in text
+
+    def test_admin_profile_header(self, client, monkeypatch, tmp_path):
+        """X-Profile needs the admin token and writes a profile tagged with the query."""
+        monkeypatch.setattr(api, "PROFILE_ADMIN_TOKEN", "secret")
+        monkeypatch.setattr(api, "profiler", api.RequestProfiler(str(tmp_path)))
+        body = {"languages": ["English"], "top_k": 1}
+
+        response = client.post("/api/recommendations/guides", json=body, headers={"X-Profile": "cprofile"})
+        assert "X-Profile-File" not in response.headers
+
+        response = client.post(
+            "/api/recommendations/guides", json=body,
+            headers={"X-Profile": "cprofile", "X-Admin-Token": "secret"}
+        )
+        name = response.headers["X-Profile-File"]
+        assert name.endswith(".prof") and "_guides_" in name
+        meta = json.loads((tmp_path / name.replace(".prof", ".json")).read_text())
+        assert json.loads(meta["canonical_query"])["query"]["languages"] == ["English"]
+
+    def test_slow_log_entry_replays(self, client, monkeypatch, tmp_path):
+        """Slow requests are logged with enough detail to replay the engine call."""
+        monkeypatch.setattr(api, "slow_log", api.SlowRequestLog(str(tmp_path / "slow.jsonl"), threshold_ms=0))
+        response = client.post("/api/recommendations/guides", json={"languages": ["English"], "top_k": 5})
+        total_candidates = response.get_json()["total_candidates"]
+
+        entries = list(read_slow_log(str(tmp_path / "slow.jsonl")))
+        assert len(entries) == 1
+        entry = entries[0]
+        assert entry["endpoint"] == "guides"
+        assert entry["query"]["languages"] == ["English"]
+        assert entry["rows"] == {"db_rows": 1, "mock_rows": 1}
+        assert entry["catalog_version"].startswith("postgres:mock_guides.json@")
+        assert {"db_fetch", "filter", "score", "total"} <= set(entry["stages_ms"])
+
+        catalog = api.fake_db.fetch_guides(2000.0, 20000.0) + list(api.iter_guides(api.MOCK_GUIDES_FILE))
+        replayed = replay_entry(entry, catalog)
+        assert replayed["results"]["total_candidates"] == total_candidates
+
+    def test_query_log_captures_bodies(self, client, monkeypatch, tmp_path):
+        """Recommendation bodies are captured with their endpoint for replay."""
+        query_log = api.QueryLog(str(tmp_path / "queries.jsonl"))
+        monkeypatch.setattr(api, "query_log", query_log)
+        client.post("/api/recommendations/guides", json={"languages": ["English"], "top_k": 5})
+        client.post("/api/recommendations/accommodations", json={"top_k": 1})
+        query_log.close()
+
+        entries = list(read_query_log(str(tmp_path / "queries.jsonl")))
+        assert [entry["e"] for entry in entries] == ["guides", "accommodations"]
+        assert entries[0]["q"] == {"languages": ["English"], "top_k": 5}
+        assert entries[0]["t"] <= entries[1]["t"]
+
+    def test_db_timeout_serves_cached_result(self, client, monkeypatch):
+        """A fetch that outlives the deadline is answered from the last good result."""
+        body = {"languages": ["English"], "top_k": 5}
+        fresh = client.post("/api/recommendations/guides", json=body).get_json()
+        assert fresh["degraded"] is False
+
+        monkeypatch.setattr(api, "REQUEST_DEADLINE_MS", 20)
+        api.fake_db.latency_ms = 500
+        degraded = client.post("/api/recommendations/guides", json=body).get_json()
+        assert degraded["degraded"] is True
+        assert degraded["degraded_reason"] == "db_timeout"
+        assert degraded["degraded_source"] == "cache"
+        assert [r["id"] for r in degraded["recommendations"]] == [r["id"] for r in fresh["recommendations"]]
+
+        text = client.get("/metrics").get_data(as_text=True)
+        assert f'wbth_result_cache_hits_total{{worker="{os.getpid()}",endpoint="guides"}} 1' in text
+
+    def test_db_timeout_without_cache_serves_snapshot(self, client, monkeypatch):
+        """With nothing cached, the mock catalog is ranked on its own."""
+        monkeypatch.setattr(api, "REQUEST_DEADLINE_MS", 20)
+        api.fake_db.latency_ms = 500
+        response = client.post("/api/recommendations/accommodations", json={"top_k": 3})
+        results = response.get_json()
+        assert response.status_code == 200
+        assert results["degraded_source"] == "snapshot"
+        assert [r["id"] for r in results["recommendations"]] == ["mock-1"]
+        assert results["recommendations"][0]["in_system"] is False
+
+        text = client.get("/metrics").get_data(as_text=True)
+        assert f'wbth_result_cache_misses_total{{worker="{os.getpid()}",endpoint="accommodations"}} 1' in text
+
+    def test_admission_rejects_with_retry_after(self, client, monkeypatch):
+        """Requests over the batch budget get 503 and Retry-After; interactive ones still run."""
+        controller = api.AdmissionController({
+            "interactive": {"concurrency": 4, "queue": 0, "retry_after_s": 1},
+            "batch": {"concurrency": 1, "queue": 0, "retry_after_s": 7},
+        })
+        monkeypatch.setattr(api, "admission", controller)
+        assert controller.limiter("guides", "batch").try_acquire()
+
+        body = {"languages": ["English"]}
+        rejected = client.post("/api/recommendations/guides", json=body, headers={"X-Traffic-Class": "batch"})
+        assert rejected.status_code == 503
+        assert rejected.headers["Retry-After"] == "7"
+        assert rejected.get_json()["traffic_class"] == "batch"
+
+        admitted = client.post("/api/recommendations/guides", json=body)
+        assert admitted.status_code == 200
+        assert controller.in_flight()[("guides", "interactive")] == 0
+
+    def test_trip_matches_single_endpoints(self, client):
+        """A trip request returns what the two single endpoints return for the same fields."""
+        body = {
+            "province": "Central",
+            "accommodations": {"top_k": 2},
+            "guides": {"languages": ["English"], "top_k": 2},
+        }
+        trip = client.post("/api/recommendations/trip", json=body).get_json()
+        accommodations = client.post(
+            "/api/recommendations/accommodations", json={"province": "Central", "top_k": 2}
+        ).get_json()
+        guides = client.post(
+            "/api/recommendations/guides", json={"province": "Central", "languages": ["English"], "top_k": 2}
+        ).get_json()
+
+        assert trip["degraded"] is False
+        for section, single in (("accommodations", accommodations), ("guides", guides)):
+            assert [r["id"] for r in trip[section]["recommendations"]] == [r["id"] for r in single["recommendations"]]
+            assert trip[section]["total_candidates"] == single["total_candidates"]
+
+    def test_trip_fetches_concurrently(self, client):
+        """The fetch phase costs the slower fetch, not the sum of both."""
+        api.fake_db.latency_ms = 150
+        body = {"accommodations": {"top_k": 1}, "guides": {"languages": ["English"]}}
+        response = client.post("/api/recommendations/trip", json=body, headers={"X-Debug-Timings": "1"})
+        timings = response.get_json()["timings"]
+        assert 150 <= timings["db_fetch"] < 280
+
+    def test_trip_requires_guide_language(self, client):
+        response = client.post("/api/recommendations/trip", json={"guides": {"languages": []}})
+        assert response.status_code == 400
+
+    def test_health_counts_db_connections(self, client):
+        """Each DB fetch is counted as one opened connection."""
+        before = client.get("/health").get_json()["db_connections_opened"]
+        client.post("/api/recommendations/guides", json={"languages": ["English"]})
+        client.post("/api/recommendations/accommodations", json={"top_k": 1})
+        after = client.get("/health").get_json()["db_connections_opened"]
+        assert after - before == 2
+
+    def test_ready_after_preload(self, client, monkeypatch):
+        """/ready fails until preload() has warmed both engines."""
+        monkeypatch.setattr(api, "engines_ready", api.threading.Event())
+        assert client.get("/ready").status_code == 503
+        api.preload()
+        assert client.get("/ready").get_json() == {"status": "ready"}
+
+    def test_warm_up_fills_caches_before_ready(self, client, monkeypatch, tmp_path):
+        """
+        preload() runs the hottest logged queries on the mock catalogs before
+        /ready flips, without fetching from the database; failures are counted.
+        """
+        log_file = tmp_path / "queries.jsonl"
+        hot = {"languages": ["English"], "top_k": 3}
+        entries = [{"t": 0, "e": "guides", "q": hot}] * 3 + [
+            {"t": 0, "e": "accommodations", "q": {"province": "Southern"}},
+            {"t": 0, "e": "guides", "q": {"languages": []}},
+        ]
+        log_file.write_text("".join(json.dumps(entry) + "\n" for entry in entries))
+        monkeypatch.setattr(api, "WARMUP_QUERY_LOG", str(log_file))
+        monkeypatch.setattr(api, "engines_ready", api.threading.Event())
+        def no_fetch(*args, **kwargs):
+            raise AssertionError("warm-up fetched from the database")
+        monkeypatch.setattr(api.fake_db, "fetch_accommodations", no_fetch)
+        monkeypatch.setattr(api.fake_db, "fetch_guides", no_fetch)
+
+        warmed = {}
+        warm_up = api.warm_up
+        def recording_warm_up():
+            assert client.get("/ready").status_code == 503
+            warmed.update(warm_up())
+            return warmed
+        monkeypatch.setattr(api, "warm_up", recording_warm_up)
+        api.preload()
+
+        assert client.get("/ready").status_code == 200
+        assert warmed["queries"] == 3 and warmed["failed"] == 1
+        assert api.result_cache.get(api.canonical_query("guides", api.parse_guide_query(hot))) is not None
+        assert api.explanation_cache.get(api.canonical_query("accommodations", api.parse_accommodation_query({"province": "Southern"})))
+
+    def test_mock_catalog_parsed_once(self, client):
+        """
+        The mock catalog is shared between requests. A changed file is re-read in
+        the background while the current catalog keeps being served.
+        """
+        catalog = api.mock_catalog("guides")
+        assert api.mock_catalog("guides") is catalog
+        assert all(record["in_system"] is False for record in catalog)
+
+        with open(api.MOCK_GUIDES_FILE, "w") as f:
+            json.dump([dict(GUIDES[1], id="mock-g2", user_id="mock-g2")], f)
+        stat = os.stat(api.MOCK_GUIDES_FILE)
+        os.utime(api.MOCK_GUIDES_FILE, ns=(stat.st_atime_ns, stat.st_mtime_ns + 10**9))
+        served = api.mock_catalog("guides")
+        api.catalogs.reload("guides").result()
+        assert served is catalog
+        assert [record["id"] for record in api.mock_catalog("guides")] == ["mock-g2"]
+        assert [record["id"] for record in catalog] == ["mock-g"]
+
+    def test_admin_catalog_reload(self, client, monkeypatch):
+        """The reload endpoint needs the catalog admin token and reports each catalog's build."""
+        monkeypatch.setattr(api, "CATALOG_ADMIN_TOKEN", "secret")
+        monkeypatch.setattr(api, "PROFILE_ADMIN_TOKEN", "profiling")
+        assert client.post("/api/admin/catalogs/reload", headers={"X-Admin-Token": "profiling"}).status_code == 403
+        assert client.post("/api/admin/catalogs/reload").status_code == 403
+        assert client.post("/api/admin/catalogs/reload", headers={"X-Admin-Token": "wrong"}).status_code == 403
+
+        before = api.mock_catalog("guides")
+        response = client.post("/api/admin/catalogs/reload", headers={"X-Admin-Token": "secret"})
+        assert response.status_code == 200
+        reloaded = response.get_json()["reloaded"]
+        assert set(reloaded) == {"accommodations", "guides"}
+        assert reloaded["guides"]["items"] == 1 and reloaded["guides"]["build_ms"] >= 0
+        assert reloaded["guides"]["file"] == "mock_guides.json"
+        assert api.mock_catalog("guides") is not before
+
+    def test_admin_catalog_changes(self, client, monkeypatch):
+        """Items changed through the admin endpoint show up in the next request."""
+        monkeypatch.setattr(api, "CATALOG_ADMIN_TOKEN", "secret")
+        admin = {"X-Admin-Token": "secret"}
+        body = {"budget_min": 1000, "budget_max": 30000, "languages": ["English"], "top_k": 5}
+        first = client.post("/api/recommendations/guides", json=body).get_json()["recommendations"]
+        assert "mock-g" in [rec["id"] for rec in first]
+
+        changes = {"endpoint": "guides", "patch": [{"id": "mock-g", "fields": {"name": "Renamed"}}]}
+        assert client.post("/api/admin/catalogs/changes", json=changes).status_code == 403
+        applied = client.post("/api/admin/catalogs/changes", json=changes, headers=admin).get_json()
+        assert applied["patched"] == 1 and applied["missing"] == []
+        renamed = client.post("/api/recommendations/guides", json=body).get_json()["recommendations"]
+        assert next(rec for rec in renamed if rec["id"] == "mock-g")["name"] == "Renamed"
+
+        changes = {"endpoint": "guides", "remove": ["mock-g", "nope"],
+                   "upsert": [dict(GUIDES[1], id="mock-new", user_id="mock-new")]}
+        applied = client.post("/api/admin/catalogs/changes", json=changes, headers=admin).get_json()
+        assert applied["removed"] == 1 and applied["missing"] == ["nope"] and applied["items"] == 1
+        ids = [rec["id"] for rec in client.post("/api/recommendations/guides", json=body).get_json()["recommendations"]]
+        assert "mock-g" not in ids and "mock-new" in ids
+
+        bad = {"endpoint": "guides", "patch": [{"id": "mock-new", "fields": {"id": "other"}}]}
+        assert client.post("/api/admin/catalogs/changes", json=bad, headers=admin).status_code == 400
+        assert client.post("/api/admin/catalogs/changes", json={"endpoint": "x"}, headers=admin).status_code == 400
+
+        response = client.post(
+            "/api/admin/catalogs/reload", headers={"X-Admin-Token": "secret"}, json={"endpoints": ["trips"]}
+        )
+        assert response.status_code == 400
+
+    def test_compact_fields(self, client):
+        """"compact" returns only ids and scores; bad "fields" are rejected."""
+        full = client.post("/api/recommendations/guides", json={"languages": ["English"]}).get_json()
+        compact = client.post("/api/recommendations/guides", json={"languages": ["English"], "compact": True}).get_json()
+        assert compact["recommendations"] == [
+            {"id": rec["id"], "score": rec["score"]} for rec in full["recommendations"]
+        ]
+        response = client.post("/api/recommendations/guides", json={"languages": ["English"], "fields": 3})
+        assert response.status_code == 400
+
+    def test_gzip_negotiated(self, client, monkeypatch):
+        """Responses above the size threshold are gzipped when the client accepts it."""
+        monkeypatch.setattr(api, "COMPRESS_MIN_BYTES", 0)
+        monkeypatch.setattr(serialization, "brotli", None)
+        body = {"languages": ["English"]}
+        plain = client.post("/api/recommendations/guides", json=body)
+        zipped = client.post("/api/recommendations/guides", json=body, headers={"Accept-Encoding": "gzip"})
+        assert "Content-Encoding" not in plain.headers
+        assert zipped.headers["Content-Encoding"] == "gzip"
+        assert zipped.headers["Vary"] == "Accept-Encoding"
+        assert json.loads(gzip.decompress(zipped.data)) == plain.get_json()
+
+    def test_explain_after_compact_request(self, client):
+        """Reasons skipped by a compact request are built on demand from the cached components."""
+        query = {"languages": ["English"], "city": "Kandy"}
+        full = client.post("/api/recommendations/guides", json=query).get_json()["recommendations"][0]
+        api.explanation_cache = api.ExplanationCache()
+
+        compact = client.post("/api/recommendations/guides", json=dict(query, compact=True)).get_json()
+        assert "reasons" not in compact["recommendations"][0]
+        explained = client.post("/api/recommendations/explain", json={
+            "endpoint": "guides", "query": query, "item_id": full["id"]
+        }).get_json()
+        assert explained["cached"] is True
+        assert explained["reasons"] == full["reasons"]
+        assert "location" in explained["score_components"]
+
+    def test_explain_reranks_on_miss(self, client):
+        """Without a cached ranking the query is ranked again; unknown items get 404."""
+        query = {"top_k": 5}
+        full = client.post("/api/recommendations/accommodations", json=query).get_json()["recommendations"][0]
+        api.explanation_cache = api.ExplanationCache()
+
+        body = {"endpoint": "accommodations", "query": query, "item_id": full["id"]}
+        explained = client.post("/api/recommendations/explain", json=body).get_json()
+        assert explained["cached"] is False and explained["reasons"] == full["reasons"]
+        assert client.post("/api/recommendations/explain", json=dict(body, item_id="nope")).status_code == 404
+        assert client.post("/api/recommendations/explain", json=dict(body, endpoint="trips")).status_code == 400
+
+        text = client.get("/metrics").get_data(as_text=True)
+        assert f'wbth_explanation_cache_misses_total{{worker="{os.getpid()}",endpoint="accommodations"}} 1' in text
+        assert f'wbth_explanation_cache_hits_total{{worker="{os.getpid()}",endpoint="accommodations"}} 1' in text
@@ -0,0 +1,204 @@
+"""
+Tests for the ASGI server on the in-memory fake data source.
+Requests are driven straight through the ASGI callable on an asyncio loop.
+"""
+
+import asyncio
+import json
+import os
+import time
+
+import pytest
+
+import api
+import asgi_api
+from fake_db import FakeDatabase
+from test_api import ACCOMMODATIONS, GUIDES
+
+ACCOMMODATION_BODY = {"budget_min": 5000, "budget_max": 25000, "province": "Southern", "top_k": 5}
+GUIDE_BODY = {"budget_min": 1000, "budget_max": 30000, "languages": ["English"], "top_k": 5}
+
+
+async def call(method: str, path: str, body=None, headers=()):
+    """Send one request through the ASGI app and return (status, headers, decoded body)."""
+    payload = json.dumps(body).encode() if body is not None else b''
+    scope = {
+        'type': 'http', 'method': method, 'path': path,
+        'headers': [(name.lower().encode(), value.encode()) for name, value in headers],
+    }
+    received = [{'type': 'http.request', 'body': payload, 'more_body': False}]
+    sent = []
+
+    async def receive():
+        return received.pop(0) if received else {'type': 'http.disconnect'}
+
+    async def send(message):
+        sent.append(message)
+
+    await asgi_api.app(scope, receive, send)
+    start, content = sent
+    response_headers = {name.decode(): value.decode() for name, value in start['headers']}
+    data = content['body']
+    if response_headers.get('content-type') == 'application/json':
+        data = json.loads(data)
+    return start['status'], response_headers, data
+
+
+def run(*requests):
+    """Run requests concurrently on one loop, with the app's lifespan around them."""
+    async def scenario():
+        await asgi_api.startup()
+        try:
+            return await asyncio.gather(*(call(*request) for request in requests))
+        finally:
+            await asgi_api.shutdown()
+    return asyncio.run(scenario())
+
+
+@pytest.fixture
+def fake_catalog(monkeypatch, tmp_path):
+    """Point both servers at the fake database and a one-record mock fallback."""
+    mock_accommodations = tmp_path / "mock_accommodations.json"
+    mock_accommodations.write_text(json.dumps([dict(ACCOMMODATIONS[0], id="mock-1")]))
+    mock_guides = tmp_path / "mock_guides.json"
+    mock_guides.write_text(json.dumps([dict(GUIDES[0], id="mock-g", user_id="mock-g")]))
+
+    monkeypatch.setattr(api, "fake_db", FakeDatabase(ACCOMMODATIONS, GUIDES))
+    monkeypatch.setattr(api, "MOCK_ACCOMMODATIONS_FILE", str(mock_accommodations))
+    monkeypatch.setattr(api, "MOCK_GUIDES_FILE", str(mock_guides))
+    monkeypatch.setattr(api, "slow_log", None)
+    monkeypatch.setattr(api, "result_cache", api.ResultCache())
+    monkeypatch.setattr(api, "explanation_cache", api.ExplanationCache())
+    monkeypatch.setattr(api, "engines_ready", api.threading.Event())
+    monkeypatch.setattr(api, "WARMUP_ENABLED", False)
+    monkeypatch.setattr(asgi_api, "admission", None)
+    return api.fake_db
+
+
+def test_matches_flask_responses(fake_catalog):
+    """Both recommendation endpoints return what the Flask routes return."""
+    client = api.app.test_client()
+    flask_acc = client.post('/api/recommendations/accommodations', json=ACCOMMODATION_BODY).get_json()
+    flask_guides = client.post('/api/recommendations/guides', json=GUIDE_BODY).get_json()
+
+    (status_acc, headers, acc), (status_guides, _, guides) = run(
+        ('POST', '/api/recommendations/accommodations', ACCOMMODATION_BODY),
+        ('POST', '/api/recommendations/guides', GUIDE_BODY),
+    )
+    assert status_acc == status_guides == 200
+    assert headers['access-control-allow-origin'] == '*'
+    assert acc == flask_acc
+    assert guides == flask_guides
+
+
+def test_validation_and_routing(fake_catalog):
+    """Bad bodies get 400, unknown paths 404 and wrong methods 405."""
+    (missing_language, _, error), (empty, _, _), (unknown, _, _), (wrong_method, _, _), (health, _, info), \
+        (ready, _, _) = run(
+            ('POST', '/api/match/guides', dict(GUIDE_BODY, languages=[])),
+            ('POST', '/api/recommendations/accommodations', None),
+            ('GET', '/api/nothing'),
+            ('GET', '/api/recommendations/trip'),
+            ('GET', '/health'),
+            ('GET', '/ready'),
+        )
+    assert missing_language == 400 and 'language' in error['error']
+    assert (empty, unknown, wrong_method, health, ready) == (400, 404, 405, 200, 200)
+    assert info['server'] == 'asgi'
+
+
+def test_db_waits_overlap(fake_catalog):
+    """Concurrent requests wait on the database together rather than one after another."""
+    fake_catalog.latency_ms = 100
+    started = time.perf_counter()
+    responses = run(*[('POST', '/api/recommendations/guides', GUIDE_BODY)] * 20)
+    elapsed = time.perf_counter() - started
+
+    assert all(status == 200 for status, _, _ in responses)
+    assert elapsed < 1.0
+
+
+def test_trip_fetches_concurrently(fake_catalog):
+    """Both trip fetches are awaited together."""
+    fake_catalog.latency_ms = 150
+    body = {"province": "Central", "top_k": 3, "guides": {"languages": ["English"]}}
+    [(status, headers, results)] = run(('POST', '/api/recommendations/trip', body, [('X-Debug-Timings', '1')]))
+
+    assert status == 200 and not results['degraded']
+    assert results['accommodations']['recommendations'] and results['guides']['recommendations']
+    assert 150 <= results['timings']['db_fetch'] < 280
+    assert 'db_fetch;dur=' in headers['server-timing']
+
+
+def test_db_timeout_serves_snapshot(monkeypatch, fake_catalog):
+    """A fetch outliving the deadline is cancelled and the snapshot is served."""
+    monkeypatch.setattr(api, "REQUEST_DEADLINE_MS", 20)
+    fake_catalog.latency_ms = 200
+    [(status, _, results)] = run(('POST', '/api/recommendations/accommodations', ACCOMMODATION_BODY))
+
+    assert status == 200
+    assert results['degraded'] and results['degraded_reason'] == 'db_timeout'
+    assert results['degraded_source'] == 'snapshot'
+
+
+def test_admission_rejects_over_budget(monkeypatch, fake_catalog):
+    """Requests beyond the endpoint's budget get 503 with Retry-After."""
+    budgets = {"interactive": {"concurrency": 1, "queue": 0, "retry_after_s": 3},
+               "batch": {"concurrency": 1, "queue": 0, "retry_after_s": 3}}
+    monkeypatch.setattr(asgi_api, "admission", asgi_api.AdmissionController(
+        budgets, limiter_class=asgi_api.AsyncAdmissionLimiter
+    ))
+    fake_catalog.latency_ms = 50
+    responses = run(*[('POST', '/api/recommendations/guides', GUIDE_BODY)] * 2)
+
+    statuses = sorted(status for status, _, _ in responses)
+    assert statuses == [200, 503]
+    rejected = next(headers for status, headers, _ in responses if status == 503)
+    assert rejected['retry-after'] == '3'
+
+
+def test_explain(fake_catalog):
+    """Explain works from a fresh ranking and from the components a compact request left behind."""
+    [(_, _, full)] = run(('POST', '/api/recommendations/guides', GUIDE_BODY))
+    item = full['recommendations'][0]
+    api.explanation_cache = api.ExplanationCache()
+
+    explain_body = {"endpoint": "guides", "query": GUIDE_BODY, "item_id": item['id']}
+    [(status, _, explained)] = run(('POST', '/api/recommendations/explain', explain_body))
+    assert status == 200 and explained['reasons'] == item['reasons'] and not explained['cached']
+
+    [(_, _, compact), (_, _, again)] = run(
+        ('POST', '/api/recommendations/guides', dict(GUIDE_BODY, compact=True)),
+        ('POST', '/api/recommendations/explain', explain_body),
+    )
+    assert compact['recommendations'][0] == {"id": item['id'], "score": item['score']}
+    assert again['cached'] and again['reasons'] == item['reasons']
+
+    [(_, _, text)] = run(('GET', '/metrics'))
+    text = text.decode()
+    assert f'wbth_explanation_cache_misses_total{{worker="{os.getpid()}",endpoint="guides"}} 1' in text
+    assert f'wbth_explanation_cache_hits_total{{worker="{os.getpid()}",endpoint="guides"}} 1' in text
+
+
+def test_admin_catalog_reload(monkeypatch, fake_catalog):
+    """The reload endpoint is served here too, behind the same catalog admin token."""
+    monkeypatch.setattr(api, "CATALOG_ADMIN_TOKEN", "secret")
+    [(denied, _, _), (status, _, body)] = run(
+        ('POST', '/api/admin/catalogs/reload', None),
+        ('POST', '/api/admin/catalogs/reload', {"endpoints": ["guides"]}, [('X-Admin-Token', 'secret')]),
+    )
+    assert denied == 403 and status == 200
+    assert list(body['reloaded']) == ['guides'] and body['reloaded']['guides']['items'] == 1
+
+
+def test_admin_catalog_changes(monkeypatch, fake_catalog):
+    """Catalog changes are served here too, behind the same catalog admin token."""
+    monkeypatch.setattr(api, "CATALOG_ADMIN_TOKEN", "secret")
+    changes = {"endpoint": "guides", "remove": ["mock-g"]}
+    [(denied, _, _), (status, _, body)] = run(
+        ('POST', '/api/admin/catalogs/changes', changes),
+        ('POST', '/api/admin/catalogs/changes', changes, [('X-Admin-Token', 'secret')]),
+    )
+    assert denied == 403 and status == 200
+    assert body['removed'] == 1 and body['items'] == 0
+    assert [record['id'] for record in api.mock_catalog('guides')] == []
@@ -0,0 +1,60 @@
+"""
+Unit tests for the performance benchmark harness.
+Tests scaling detection, baseline comparison and the results document.
+"""
+
+import pytest
+
+from benchmark import compare_to_baseline, run_benchmarks, scaling_exponent
+
+
+class TestScalingExponent:
+    """Test empirical growth exponent estimation."""
+
+    def test_linear(self):
+        """10x the items in 10x the time is linear."""
+        assert scaling_exponent(1000, 0.01, 10000, 0.1) == pytest.approx(1.0)
+
+    def test_quadratic(self):
+        """10x the items in 100x the time is quadratic."""
+        assert scaling_exponent(1000, 0.01, 10000, 1.0) == pytest.approx(2.0)
+
+    def test_unmeasurable(self):
+        """Zero times give no estimate."""
+        assert scaling_exponent(1000, 0.0, 10000, 0.1) is None
+
+
+class TestBaselineComparison:
+    """Test regression detection against a stored baseline."""
+
+    def _doc(self, total_ms):
+        return {"results": [{"engine": "guides", "shape": "broad", "size": 1000, "total_ms": total_ms}]}
+
+    def test_regression_detected(self):
+        """A run 50% slower than baseline is a regression at 25% tolerance."""
+        regressions = compare_to_baseline(self._doc(15.0), self._doc(10.0), tolerance=0.25)
+        assert len(regressions) == 1
+        assert "regression" in regressions[0]["reason"]
+
+    def test_within_tolerance(self):
+        """Small slowdowns and speedups pass."""
+        assert compare_to_baseline(self._doc(11.0), self._doc(10.0), tolerance=0.25) == []
+        assert compare_to_baseline(self._doc(5.0), self._doc(10.0), tolerance=0.25) == []
+
+    def test_noise_floor(self):
+        """Sub-millisecond runs are too noisy to gate on."""
+        assert compare_to_baseline(self._doc(0.9), self._doc(0.3), noise_floor_ms=2.0) == []
+
+
+def test_results_document():
+    """A tiny benchmark run produces per-stage timings and memory for each shape."""
+    results = run_benchmarks(["accommodations", "guides"], [60, 120], shapes=["broad"], repeats=1)
+
+    assert {(r["engine"], r["size"]) for r in results["results"]} == {
+        ("accommodations", 60), ("accommodations", 120), ("guides", 60), ("guides", 120)
+    }
+    for result in results["results"]:
+        assert set(result["stages_ms"]) == {"filter", "score", "sort", "reasons"}
+        assert result["peak_memory_bytes"] > 0
+        assert result["candidates"] > 0
+    assert "scaling_exponent" in results["results"][1]
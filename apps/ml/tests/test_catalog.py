@@ -0,0 +1,94 @@
+"""
+Unit tests for the incrementally updated in-memory catalog.
+"""
+
+import pytest
+
+from recommender import AccommodationRecommender
+from catalog import Catalog
+from records import AccommodationRecord
+
+
+def item(item_id, **fields):
+    return dict({"id": item_id, "name": f"Stay {item_id}", "amenities": ["wifi"], "price_range_min": 5000}, **fields)
+
+
+@pytest.fixture
+def catalog():
+    return Catalog(
+        [item(f"a-{i}") for i in range(10)], AccommodationRecord,
+        fragment_builders=AccommodationRecommender.REASON_FRAGMENTS
+    )
+
+
+def ids(view):
+    return [record.id for record in view.records()]
+
+
+def test_changes_show_in_new_views(catalog):
+    """upsert, patch and remove are visible in the next view."""
+    catalog.upsert(item("a-new"))
+    catalog.patch("a-3", {"price_range_min": 9000})
+    assert catalog.remove("a-5") and not catalog.remove("a-5")
+
+    view = catalog.view()
+    assert view.version == catalog.version == 3
+    assert len(catalog) == len(view.records()) == 10
+    assert "a-5" not in ids(view) and "a-new" in ids(view)
+    assert catalog.get("a-3").price_range_min == 9000
+    assert catalog.get("a-3").name == "Stay a-3"
+
+
+def test_views_are_snapshots(catalog):
+    """A view taken before a change keeps seeing the catalog as it was."""
+    before = catalog.view()
+    records = before.records()
+    old = catalog.get("a-1")
+
+    catalog.patch("a-1", {"rating": 4.9})
+    catalog.remove("a-2")
+    catalog.upsert(item("a-new"))
+
+    assert before.records() is records
+    assert ids(before) == [f"a-{i}" for i in range(10)]
+    assert old in records and old.rating is None
+    assert catalog.view().records() is catalog.view().records()
+
+
+def test_compaction_keeps_live_records():
+    """Tombstones past the threshold are compacted away without losing or resurrecting items."""
+    catalog = Catalog([item(f"a-{i}") for i in range(8)], AccommodationRecord, compact_ratio=0.5, compact_min=2)
+    before = catalog.view()
+    for round_ in range(3):
+        for i in range(4):
+            catalog.patch(f"a-{i}", {"group_size": round_ + 1})
+    catalog.remove("a-7")
+
+    assert catalog.compactions >= 1
+    assert sorted(ids(catalog.view())) == [f"a-{i}" for i in range(7)]
+    assert all(catalog.get(f"a-{i}").group_size == 3 for i in range(4))
+    assert ids(before) == [f"a-{i}" for i in range(8)]
+
+
+def test_patch_errors(catalog):
+    """patch refuses unknown items and id changes."""
+    with pytest.raises(KeyError):
+        catalog.patch("missing", {"rating": 4.0})
+    with pytest.raises(ValueError):
+        catalog.patch("a-1", {"id": "a-99"})
+
+
+def test_duplicate_ids_keep_last():
+    catalog = Catalog([item("a-1", rating=3.0), item("a-1", rating=4.0)], AccommodationRecord)
+    assert len(catalog) == 1 and catalog.get("a-1").rating == 4.0
+
+
+def test_fragment_index_follows_changes(catalog):
+    """Reason fragments are built for new records and dropped for replaced ones."""
+    old = catalog.get("a-1")
+    new = catalog.patch("a-1", {"amenities": ["pool", "spa"]})
+    catalog.remove("a-2")
+
+    assert len(catalog.fragments) == 9
+    assert catalog.fragments.get(new)["amenities"].keys == ("pool", "spa")
+    assert catalog.fragments.get(old) is not catalog.fragments.get(old)
@@ -0,0 +1,158 @@
+"""
+Unit tests for catalog file I/O.
+Tests JSON / JSON Lines round trips, streaming reads and incremental appends.
+"""
+
+import json
+import types
+
+import pytest
+
+from catalog_io import append_records, iter_batches, read_catalog, write_catalog
+from recommender import AccommodationRecommender, iter_accommodations, load_accommodations
+from GuidesRecommendationModel.guide_data_generator import generate_mock_guides, save_mock_data
+from GuidesRecommendationModel.guide_recommender import GuideRecommender, iter_guides, load_guides
+
+
+@pytest.fixture
+def records():
+    """Create a small catalog of accommodation-shaped records."""
+    return [
+        {
+            "id": f"acc-{i}",
+            "name": f"Hotel {i}",
+            "district": "Galle",
+            "province": "Southern",
+            "price_range_min": 1000.0 * (i + 1),
+            "price_range_max": 2000.0 * (i + 1),
+            "amenities": ["wifi"],
+            "interests": ["coastal"],
+            "travel_style": ["luxury"],
+            "group_size": 4,
+            "rating": 4.0,
+            "prior_bookings": i,
+            "availability": True
+        }
+        for i in range(5)
+    ]
+
+
+class TestJsonLines:
+    """Test JSON Lines reading and writing."""
+
+    def test_round_trip(self, tmp_path, records):
+        """Records written as JSON Lines read back unchanged."""
+        path = str(tmp_path / "catalog.jsonl")
+
+        assert write_catalog(records, path) == 5
+        assert load_accommodations(path) == records
+
+        with open(path, encoding='utf-8') as f:
+            assert len(f.readlines()) == 5
+
+    def test_json_array_still_supported(self, tmp_path, records):
+        """Plain JSON array files keep working."""
+        path = str(tmp_path / "catalog.json")
+        write_catalog(records, path)
+
+        with open(path, encoding='utf-8') as f:
+            assert json.load(f) == records
+        assert list(read_catalog(path)) == records
+
+    def test_reader_is_lazy(self, tmp_path, records):
+        """Readers return generators rather than materialized lists."""
+        path = str(tmp_path / "catalog.jsonl")
+        write_catalog(records, path)
+
+        stream = iter_accommodations(path)
+        assert isinstance(stream, types.GeneratorType)
+        assert next(stream)["id"] == "acc-0"
+
+    def test_batches(self, tmp_path, records):
+        """batch_size yields lists of records with a short final batch."""
+        path = str(tmp_path / "catalog.jsonl")
+        write_catalog(records, path)
+
+        batches = list(iter_accommodations(path, batch_size=2))
+        assert [len(b) for b in batches] == [2, 2, 1]
+
+    def test_append_is_incremental(self, tmp_path, records):
+        """append_records extends an existing file and accepts generators."""
+        path = str(tmp_path / "catalog.jsonl")
+        write_catalog(records[:2], path)
+
+        written = append_records((r for r in records[2:]), path)
+
+        assert written == 3
+        assert [r["id"] for r in read_catalog(path)] == [r["id"] for r in records]
+
+    def test_blank_lines_skipped_and_bad_lines_reported(self, tmp_path):
+        """Blank lines are ignored; malformed lines raise with a line number."""
+        path = tmp_path / "catalog.jsonl"
+        path.write_text('{"id": "a"}\n\n{"id": "b"}\nnot json\n', encoding='utf-8')
+
+        stream = read_catalog(str(path))
+        assert next(stream)["id"] == "a"
+        assert next(stream)["id"] == "b"
+        with pytest.raises(ValueError, match=":4:"):
+            next(stream)
+
+    def test_generators_write_every_jsonl_extension(self, tmp_path):
+        """The mock data generators write .ndjson and upper-case names as JSON Lines too."""
+        path = str(tmp_path / "guides.NDJSON")
+        guides = generate_mock_guides(3)
+        save_mock_data(guides, path)
+        save_mock_data(guides[:1], path, append=True)
+
+        with open(path, encoding='utf-8') as f:
+            assert len(f.readlines()) == 4
+        assert load_guides(path) == guides + guides[:1]
+
+    def test_append_requires_jsonl(self, tmp_path, records):
+        """Incremental appends are only supported for JSON Lines files."""
+        with pytest.raises(ValueError):
+            append_records(records, str(tmp_path / "catalog.json"))
+
+    def test_iter_batches_rejects_non_positive_size(self):
+        """A zero batch size is a caller error."""
+        with pytest.raises(ValueError):
+            list(iter_batches([], 0))
+
+
+class TestRecommendersFromStreams:
+    """Test that recommenders can be built straight from record streams."""
+
+    def test_accommodation_recommender_accepts_generator(self, tmp_path, records):
+        """AccommodationRecommender consumes a streamed catalog."""
+        path = str(tmp_path / "catalog.jsonl")
+        write_catalog(records, path)
+
+        recommender = AccommodationRecommender(iter_accommodations(path))
+        results = recommender.recommend(
+            budget_min=1000,
+            budget_max=50000,
+            required_amenities=[],
+            interests=[],
+            travel_style="luxury",
+            group_size=1,
+            top_k=3
+        )
+
+        assert results["total_candidates"] == 5
+        assert len(results["recommendations"]) == 3
+
+    def test_guide_recommender_accepts_generator(self, tmp_path):
+        """GuideRecommender consumes a streamed catalog."""
+        guides = [
+            {"id": "g1", "name": "Guide 1", "languages": ["English"], "price": 5000, "availability": True},
+            {"id": "g2", "name": "Guide 2", "languages": ["French"], "price": 5000, "availability": True},
+        ]
+        path = str(tmp_path / "guides.jsonl")
+        write_catalog(guides, path)
+
+        assert load_guides(path) == guides
+
+        recommender = GuideRecommender(iter_guides(path))
+        results = recommender.recommend(budget_min=1000, budget_max=10000, languages=["English"])
+
+        assert [r["id"] for r in results["recommendations"]] == ["g1"]
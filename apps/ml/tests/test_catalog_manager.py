@@ -0,0 +1,79 @@
+"""
+Unit tests for background catalog builds and swaps.
+"""
+
+import threading
+
+import pytest
+
+from catalog import Catalog
+from catalog_manager import CatalogManager
+from records import GuideRecord
+
+
+class Builds:
+    """Build function whose builds can be held until released."""
+
+    def __init__(self):
+        self.source = ("guides.json", 1)
+        self.calls = 0
+        self.fail = False
+        self.hold = threading.Event()
+        self.hold.set()
+
+    def __call__(self, endpoint):
+        self.calls += 1
+        self.hold.wait(5)
+        if self.fail:
+            raise ValueError("bad catalog file")
+        source = self.source
+        return source, Catalog([{"id": f"g-{source[1]}"}], GuideRecord)
+
+
+def ids(catalog):
+    return [record.id for record in catalog.view().records()]
+
+
+def test_first_load_waits_then_changes_build_in_background():
+    """The first get builds; a newer source is built while the live catalog keeps serving."""
+    builds = Builds()
+    manager = CatalogManager(builds)
+    first = manager.get("guides", builds.source)
+    assert ids(first) == ["g-1"] and manager.current("guides").generation == 1
+
+    builds.hold.clear()
+    builds.source = ("guides.json", 2)
+    assert manager.get("guides", builds.source) is first
+    assert manager.get("guides", builds.source) is first
+    builds.hold.set()
+    loaded = manager.reload("guides").result()
+
+    assert builds.calls == 2
+    assert ids(manager.get("guides", builds.source)) == ["g-2"]
+    assert loaded.generation == 2 and loaded.build_ms >= 0
+    assert ids(first) == ["g-1"]
+
+
+def test_new_identity_is_waited_for():
+    """A source with another identity (a different file) is never served from the old catalog."""
+    builds = Builds()
+    manager = CatalogManager(builds)
+    manager.get("guides", builds.source)
+    builds.source = ("other.json", 1)
+    assert manager.current("guides").source == ("guides.json", 1)
+    manager.get("guides", builds.source)
+    assert manager.current("guides").source == ("other.json", 1)
+
+
+def test_failed_build_keeps_live_catalog():
+    """A failing build reports its error and leaves the live catalog in place."""
+    builds = Builds()
+    manager = CatalogManager(builds)
+    live = manager.get("guides", builds.source)
+    builds.fail = True
+    with pytest.raises(ValueError):
+        manager.reload("guides").result()
+    assert manager.current("guides").catalog is live
+
+    builds.fail = False
+    assert manager.reload("guides").result().generation == 2
@@ -0,0 +1,34 @@
+"""
+Unit tests for the fallback result cache.
+"""
+
+from deadlines import ResultCache
+
+
+def test_result_cache_isolates_stored_results():
+    """Neither the caller's later changes nor a reader's changes reach the stored copy."""
+    cache = ResultCache(max_entries=1)
+    results = {"recommendations": [{"id": "g-1", "score": 0.9, "reasons": ["Speaks English"]}]}
+    cache.put("q", results)
+    results["recommendations"][0]["score"] = 0.1
+
+    served, age = cache.get("q")
+    assert served["recommendations"][0]["score"] == 0.9 and age >= 0
+    served["degraded"] = True
+    assert "degraded" not in cache.get("q")[0]
+
+    cache.put("other", results)
+    assert cache.get("q") is None and len(cache) == 1
+
+
+def test_result_cache_counts_lookups_per_endpoint():
+    """Lookups that name an endpoint are counted as hits or misses; others are not."""
+    cache = ResultCache()
+    cache.put("q", {"recommendations": []})
+    cache.get("q", "guides")
+    cache.get("missing", "guides")
+    cache.get("missing", "accommodations")
+    cache.get("q")
+
+    assert cache.hits() == {("guides",): 1}
+    assert cache.misses() == {("guides",): 1, ("accommodations",): 1}
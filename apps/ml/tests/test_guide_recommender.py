@@ -6,6 +6,7 @@ Tests hard filters, scoring functions, and full recommendation pipeline.
 import sys
 sys.path.append('..')
 
+from deadlines import Deadline
 from GuidesRecommendationModel.guide_recommender import GuideRecommender
 
 
@@ -335,6 +336,88 @@ def test_reason_generation():
     print(f"✓ Reason generation test passed ({len(reasons)} reasons)")
 
 
+def test_filter_funnel():
+    """Test per-rule rejection counts."""
+    guides = [
+        {"id": "1", "name": "A", "languages": ["English"], "price": 5000, "city": "Kandy", "gender": "female", "availability": True},
+        {"id": "2", "name": "B", "languages": ["French"], "price": 5000, "city": "Kandy", "gender": "female", "availability": True},
+        {"id": "3", "name": "C", "languages": ["English"], "price": 50000, "city": "Kandy", "gender": "female", "availability": True},
+        {"id": "4", "name": "D", "languages": ["English"], "price": 5000, "city": "Galle", "gender": "female", "availability": True},
+        {"id": "5", "name": "E", "languages": ["English"], "price": 5000, "city": "Kandy", "gender": "male", "availability": True},
+        {"id": "6", "name": "F", "languages": ["English"], "price": 5000, "city": "Kandy", "gender": "female", "availability": False},
+    ]
+    
+    funnel = {}
+    results = GuideRecommender(guides).recommend(
+        budget_min=2000,
+        budget_max=20000,
+        languages=["English"],
+        city="Kandy",
+        city_only=True,
+        gender_preference="female",
+        funnel=funnel
+    )
+    
+    assert funnel == {
+        "input": 6,
+        "rejected": {"availability": 1, "language": 1, "budget": 1, "city": 1, "gender": 1},
+        "passed": 1
+    }
+    assert results["total_candidates"] == 1
+    
+    print("✓ Filter funnel test passed")
+
+
+def test_deadline_returns_partial_results():
+    """Test that scoring stops at the deadline and returns the best-so-far top-k."""
+    guides = [
+        {"id": str(i), "name": f"G{i}", "languages": ["English"], "price": 5000,
+         "city": "Kandy", "rating": 4.0, "availability": True}
+        for i in range(200)
+    ]
+    recommender = GuideRecommender(guides)
+    
+    results = recommender.recommend(
+        budget_min=2000, budget_max=20000, languages=["English"], top_k=5, deadline=Deadline(0)
+    )
+    assert results["partial"] is True
+    assert results["scored_candidates"] == GuideRecommender.DEADLINE_CHECK_EVERY
+    assert results["total_candidates"] == 200
+    assert len(results["recommendations"]) == 5
+    
+    complete = recommender.recommend(
+        budget_min=2000, budget_max=20000, languages=["English"], top_k=5, deadline=Deadline(60000)
+    )
+    assert "partial" not in complete
+    
+    print("✓ Deadline test passed")
+
+
+
+def test_explain_matches_inline_reasons():
+    """Test that explain() rebuilds the reasons recommend() skipped."""
+    guides = [
+        {"id": str(i), "name": f"G{i}", "languages": ["English", "French"], "price": 4000 + i * 1000,
+         "city": "Kandy" if i % 2 else "Galle", "province": "Central", "expertise": ["Wildlife"],
+         "experience": ["5 years in Wildlife"], "rating": 4.0 + i / 10, "prior_bookings": i * 10,
+         "availability": True, "in_system": i % 2 == 0}
+        for i in range(5)
+    ]
+    recommender = GuideRecommender(guides)
+    query = dict(budget_min=2000, budget_max=20000, languages=["English"], expertise=["Wildlife"],
+                 city="Kandy", top_k=3)
+    full = recommender.recommend(**query)
+    
+    explanations = {}
+    lazy = recommender.recommend(**query, include_reasons=False, explanations=explanations)
+    assert all("reasons" not in rec for rec in lazy["recommendations"])
+    for rec in full["recommendations"]:
+        guide, components = explanations[rec["id"]]
+        assert recommender.explain(guide, components, **query) == rec["reasons"]
+    
+    print("✓ Explain test passed")
+
+
 if __name__ == "__main__":
     print("Running guide recommender tests...\n")
     
@@ -345,6 +428,9 @@ if __name__ == "__main__":
     test_reason_generation()
     test_full_pipeline()
     test_edge_cases()
+    test_filter_funnel()
+    test_deadline_returns_partial_results()
+    test_explain_matches_inline_reasons()
     
     print("\n" + "="*60)
     print("✓ All tests passed!")
@@ -0,0 +1,55 @@
+"""
+Unit tests for the HTTP load-test harness.
+Tests request-mix parsing, percentiles and report aggregation.
+"""
+
+import pytest
+
+from loadtest import parse_mix, percentile, summarize
+
+
+class TestParseMix:
+    """Test request mix specifications."""
+
+    def test_endpoint_weight_split_across_shapes(self):
+        """An endpoint without a shape spreads its weight over every shape."""
+        mix = parse_mix("accommodations=4,guides:broad=1")
+        accommodation_weights = [w for e, _, w in mix if e == "accommodations"]
+        assert len(accommodation_weights) == 4
+        assert sum(accommodation_weights) == pytest.approx(4.0)
+        assert ("guides", "broad", 1.0) in mix
+
+    def test_unknown_targets_rejected(self):
+        """Unknown endpoints and shapes raise ValueError."""
+        with pytest.raises(ValueError):
+            parse_mix("hotels=1")
+        with pytest.raises(ValueError):
+            parse_mix("guides:nope=1")
+
+
+def test_percentile_nearest_rank():
+    """Nearest-rank percentiles over 1..100."""
+    values = list(range(1, 101))
+    assert percentile(values, 50) == 50
+    assert percentile(values, 99) == 99
+    assert percentile(values, 100) == 100
+    assert percentile([], 50) is None
+
+
+def test_summarize():
+    """Errors are counted separately and excluded from latency percentiles."""
+    samples = [
+        {"endpoint": "guides", "shape": "broad", "status": 200, "latency_ms": 10.0, "error": None},
+        {"endpoint": "guides", "shape": "broad", "status": 200, "latency_ms": 30.0, "error": None},
+        {"endpoint": "guides", "shape": "broad", "status": 500, "latency_ms": 5.0, "error": "HTTP 500"},
+        {"endpoint": "accommodations", "shape": "broad", "status": None, "latency_ms": 1.0, "error": "URLError"},
+    ]
+    report = summarize(samples, elapsed=2.0)
+
+    assert report["overall"]["requests"] == 4
+    assert report["overall"]["throughput_rps"] == 2.0
+    assert report["overall"]["error_rate"] == 0.5
+    assert report["endpoints"]["guides"]["p50_ms"] == 10.0
+    assert report["endpoints"]["guides"]["max_ms"] == 30.0
+    assert report["endpoints"]["accommodations"]["p99_ms"] is None
+    assert report["errors_by_type"] == {"HTTP 500": 1, "URLError": 1}
@@ -0,0 +1,49 @@
+"""
+Unit tests for queued structured logging.
+Tests JSON formatting, non-blocking enqueueing and row sampling.
+"""
+
+import json
+import logging
+import queue
+
+from log_config import DroppingQueueHandler, JsonFormatter, RowSampler
+
+
+def _record(msg, *args, **extra):
+    record = logging.LogRecord("wbth.api", logging.INFO, __file__, 1, msg, args, None)
+    record.__dict__.update(extra)
+    return record
+
+
+def test_json_formatter_includes_extra_fields():
+    """Messages are interpolated and extra= fields become JSON keys."""
+    line = JsonFormatter().format(_record("Found %d guides", 3, endpoint="guides", found=3))
+    entry = json.loads(line)
+    assert entry["msg"] == "Found 3 guides"
+    assert entry["level"] == "INFO"
+    assert entry["logger"] == "wbth.api"
+    assert entry["endpoint"] == "guides"
+    assert entry["found"] == 3
+    assert "args" not in entry
+
+
+def test_queue_handler_defers_formatting_and_drops_when_full():
+    """Records are queued untouched, and overflow is counted instead of blocking."""
+    handler = DroppingQueueHandler(queue.Queue(maxsize=1))
+    first = _record("kept %s", "x")
+    handler.emit(first)
+    handler.emit(_record("dropped"))
+
+    queued = handler.queue.get_nowait()
+    assert queued is first
+    assert queued.args == ("x",)
+    assert handler.dropped == 1
+
+
+def test_row_sampler():
+    """Rate 0 logs nothing, rate 1 logs everything, and fractions sample."""
+    assert not any(RowSampler(0.0).sample() for _ in range(100))
+    assert all(RowSampler(1.0).sample() for _ in range(100))
+    hits = sum(RowSampler(0.1).sample() for _ in range(10000))
+    assert 500 < hits < 1500
@@ -0,0 +1,130 @@
+"""
+Unit tests for the in-process instrumentation.
+Tests histograms, stage timers and engine stage coverage.
+"""
+
+import pytest
+
+from metrics import (
+    NULL_TIMER,
+    CallbackGauge,
+    Histogram,
+    LabeledCounter,
+    LabeledHistogram,
+    MetricsRegistry,
+    StageTimer,
+    render_prometheus,
+)
+from recommender import AccommodationRecommender
+from GuidesRecommendationModel.guide_recommender import GuideRecommender
+from data.scale_generator import iter_scale_records
+
+
+class TestHistogram:
+    """Test bucketed latency histograms."""
+
+    def test_cumulative_buckets(self):
+        """Bucket counts are cumulative and values land in the first bound >= value."""
+        histogram = Histogram(buckets=(1, 10, 100))
+        for value in (0.5, 1, 5, 50, 500):
+            histogram.observe(value)
+
+        snap = histogram.snapshot()
+        assert snap["count"] == 5
+        assert snap["sum"] == pytest.approx(556.5)
+        assert snap["buckets"] == [(1, 2), (10, 3), (100, 4), (float('inf'), 5)]
+
+    def test_quantile(self):
+        """Quantiles resolve to bucket upper bounds."""
+        histogram = Histogram(buckets=(1, 10, 100))
+        for value in [0.5] * 90 + [50] * 10:
+            histogram.observe(value)
+        assert histogram.quantile(0.5) == 1
+        assert histogram.quantile(0.99) == 100
+        assert Histogram().quantile(0.5) is None
+
+    def test_labels(self):
+        """Labelled histograms are created once per label tuple."""
+        family = LabeledHistogram("test_ms", "test", ("endpoint", "stage"))
+        assert family.labels("guides", "filter") is family.labels("guides", "filter")
+        with pytest.raises(ValueError):
+            family.labels("guides")
+
+
+class TestStageTimer:
+    """Test per-request stage timing."""
+
+    def test_stages_accumulate(self):
+        """Repeated stages add up and feed labelled histograms."""
+        timer = StageTimer()
+        timer.add("db_fetch", 2.0)
+        timer.add("db_fetch", 3.0)
+        with timer.stage("score"):
+            pass
+
+        assert timer.timings["db_fetch"] == 5.0
+        assert timer.timings["score"] >= 0.0
+
+        family = LabeledHistogram("test_ms", "test", ("endpoint", "stage"))
+        timer.observe_into(family, "guides")
+        assert family.labels("guides", "db_fetch").snapshot()["count"] == 1
+
+    def test_null_timer_records_nothing(self):
+        """The disabled timer is a no-op."""
+        with NULL_TIMER.stage("score"):
+            pass
+        NULL_TIMER.add("filter", 1.0)
+        assert NULL_TIMER.timings == {}
+
+    def test_engines_report_every_stage(self):
+        """Both engines time filter, score, sort and reasons."""
+        timer = StageTimer()
+        AccommodationRecommender(iter_scale_records("accommodations", 200)).recommend(
+            budget_min=1000, budget_max=50000, required_amenities=[], interests=[],
+            travel_style="any", group_size=1, timer=timer
+        )
+        assert set(timer.timings) == {"filter", "score", "sort", "reasons"}
+
+        timer = StageTimer()
+        GuideRecommender(iter_scale_records("guides", 200)).recommend(
+            budget_min=2000, budget_max=20000, languages=["English"], timer=timer
+        )
+        assert set(timer.timings) == {"filter", "score", "sort", "reasons"}
+
+
+def test_render_prometheus():
+    """Counters, callback gauges and histograms render in the text exposition format."""
+    registry = MetricsRegistry()
+    requests = registry.register(LabeledCounter("test_requests_total", "Requests", ("endpoint", "status")))
+    latency = registry.register(LabeledHistogram("test_latency_ms", "Latency", ("endpoint",), buckets=(1, 10)))
+    registry.register(CallbackGauge("test_pool_in_use", "Pool", lambda: 3))
+
+    requests.inc("/health", "200")
+    requests.inc("/health", "200")
+    requests.inc('/a"b', "500")
+    latency.labels("/health").observe(5)
+
+    text = render_prometheus(registry)
+    assert "# TYPE test_requests_total counter" in text
+    assert 'test_requests_total{endpoint="/health",status="200"} 2' in text
+    assert 'test_requests_total{endpoint="/a\\"b",status="500"} 1' in text
+    assert "# TYPE test_latency_ms histogram" in text
+    assert 'test_latency_ms_bucket{endpoint="/health",le="1"} 0' in text
+    assert 'test_latency_ms_bucket{endpoint="/health",le="10"} 1' in text
+    assert 'test_latency_ms_bucket{endpoint="/health",le="+Inf"} 1' in text
+    assert 'test_latency_ms_count{endpoint="/health"} 1' in text
+    assert "test_pool_in_use 3" in text
+
+
+def test_render_worker_label():
+    """A worker id is added to per-process series only."""
+    registry = MetricsRegistry()
+    registry.register(LabeledCounter("test_requests_total", "Requests", ("endpoint",))).inc("/health")
+    registry.register(LabeledHistogram("test_latency_ms", "Latency", (), buckets=(1,))).labels().observe(5)
+    registry.register(CallbackGauge("test_shared_total", "Shared", lambda: 7, per_process=False))
+
+    text = render_prometheus(registry, worker="42")
+    assert 'test_requests_total{worker="42",endpoint="/health"} 1' in text
+    assert 'test_latency_ms_bucket{worker="42",le="+Inf"} 1' in text
+    assert 'test_latency_ms_count{worker="42"} 1' in text
+    assert "test_shared_total 7" in text
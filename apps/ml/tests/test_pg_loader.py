@@ -0,0 +1,78 @@
+"""
+Unit tests for the Postgres COPY bulk loader.
+Tests COPY text encoding and record-to-row mapping (no database needed).
+"""
+
+from data.pg_loader import (
+    ACCOMMODATION_COLUMNS,
+    GUIDE_COLUMNS,
+    PROVIDER_COLUMNS,
+    USER_COLUMNS,
+    accommodation_rows,
+    copy_field,
+    copy_line,
+    guide_rows,
+    is_local_database,
+    pg_array,
+)
+from data.scale_generator import iter_scale_records
+
+
+class TestCopyEncoding:
+    """Test COPY text-format encoding."""
+
+    def test_scalars(self):
+        """NULLs, booleans and numbers use COPY text representations."""
+        assert copy_field(None) == '\\N'
+        assert copy_field(True) == 't'
+        assert copy_field(False) == 'f'
+        assert copy_field(4.5) == '4.5'
+        assert copy_field(12) == '12'
+
+    def test_special_characters_escaped(self):
+        """Tabs, newlines and backslashes cannot break the row framing."""
+        assert copy_field('a\tb\nc\\d') == 'a\\tb\\nc\\\\d'
+
+    def test_arrays(self):
+        """Lists become quoted Postgres array literals."""
+        assert pg_array([]) == '{}'
+        assert pg_array(['wifi', 'hot water']) == '{"wifi","hot water"}'
+        assert pg_array(['say "hi"']) == '{"say \\"hi\\""}'
+        assert copy_field(['a\\b']) == '{"a\\\\\\\\b"}'
+
+    def test_line(self):
+        """Rows are tab separated and newline terminated."""
+        assert copy_line(('x', None, ['a'])) == 'x\t\\N\t{"a"}\n'
+
+
+class TestRowMapping:
+    """Test record to table row mapping."""
+
+    def test_accommodation_rows_match_columns(self):
+        """Generated accommodations map onto every target column."""
+        acc = next(iter_scale_records("accommodations", 1))
+        user, provider, accommodation = accommodation_rows(acc)
+
+        assert len(user) == len(USER_COLUMNS)
+        assert len(provider) == len(PROVIDER_COLUMNS)
+        assert len(accommodation) == len(ACCOMMODATION_COLUMNS)
+        assert accommodation[ACCOMMODATION_COLUMNS.index("provider_id")] == provider[1] == user[0]
+        assert user[USER_COLUMNS.index("role")] == "accommodation_provider"
+
+    def test_guide_rows_match_columns(self):
+        """Generated guides map onto every target column."""
+        guide = next(iter_scale_records("guides", 1))
+        user, profile = guide_rows(guide)
+
+        assert len(user) == len(USER_COLUMNS)
+        assert len(profile) == len(GUIDE_COLUMNS)
+        assert profile[0] == user[0] == guide["user_id"]
+        assert user[USER_COLUMNS.index("role")] == "guide"
+
+
+def test_is_local_database():
+    """Only local hosts and Unix sockets count as local."""
+    assert is_local_database("postgresql://postgres@localhost:5432/wbth")
+    assert is_local_database("postgresql://postgres@127.0.0.1/wbth")
+    assert is_local_database("dbname=wbth host=/var/run/postgresql")
+    assert not is_local_database("postgresql://user:pw@db.example.com:5432/wbth")
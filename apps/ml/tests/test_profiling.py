@@ -0,0 +1,69 @@
+"""
+Unit tests for the per-request profiler.
+Tests cProfile and sampled output, metadata tagging and directory rotation.
+"""
+
+import json
+import os
+import pstats
+import time
+
+from profiling import RequestProfiler
+
+
+def _busy(seconds=0.05):
+    end = time.perf_counter() + seconds
+    while time.perf_counter() < end:
+        sum(range(100))
+
+
+def test_cprofile_output(tmp_path):
+    """cProfile sessions write loadable stats and a metadata sidecar."""
+    profiler = RequestProfiler(str(tmp_path))
+    session = profiler.start("cprofile")
+    _busy(0.01)
+    path = profiler.finish(session, "guides", "abc123", {"canonical_query": "{}"})
+
+    assert path.endswith("_guides_abc123.prof")
+    assert pstats.Stats(path).total_calls > 0
+    with open(path[:-len(".prof")] + ".json") as f:
+        meta = json.load(f)
+    assert meta["mode"] == "cprofile"
+    assert meta["canonical_query"] == "{}"
+
+
+def test_only_one_cprofile_at_a_time(tmp_path):
+    """A second cProfile session is refused until the first is released."""
+    profiler = RequestProfiler(str(tmp_path))
+    first = profiler.start("cprofile")
+    assert profiler.start("cprofile") is None
+    profiler.release(first)
+    profiler.release(first)
+    second = profiler.start("cprofile")
+    assert second is not None
+    profiler.release(second)
+
+
+def test_sampler_output(tmp_path):
+    """The stack sampler writes folded stacks that include the busy function."""
+    profiler = RequestProfiler(str(tmp_path), sample_interval=0.001)
+    session = profiler.start("sample")
+    _busy()
+    path = profiler.finish(session, "accommodations", "def456", {})
+
+    with open(path) as f:
+        lines = f.read().splitlines()
+    assert lines
+    assert any("test_profiling.py:_busy" in line for line in lines)
+    assert all(line.rsplit(" ", 1)[1].isdigit() for line in lines)
+
+
+def test_rotation(tmp_path):
+    """Only the newest max_profiles profiles are kept."""
+    profiler = RequestProfiler(str(tmp_path), max_profiles=2)
+    for i in range(4):
+        profiler.finish(profiler.start("sample"), "guides", f"q{i}", {})
+
+    assert len(profiler.profiles()) == 2
+    assert len(os.listdir(tmp_path)) == 4
+    assert all("_q2" in p or "_q3" in p for p in profiler.profiles())
@@ -0,0 +1,61 @@
+"""
+Unit tests for request parsing and canonical queries.
+"""
+
+import pytest
+
+from queries import (
+    COMPACT_FIELDS,
+    canonical_query,
+    parse_accommodation_query,
+    parse_guide_query,
+    parse_response_fields,
+    parse_trip_query,
+    query_tag,
+)
+
+
+def test_defaults_match_recommend_arguments():
+    """Parsed queries fill defaults for every recommend() argument."""
+    query = parse_guide_query({"languages": ["French"]})
+    assert query["languages"] == ["French"]
+    assert query["budget_min"] == 2000.0
+    assert query["top_k"] == 10
+
+    query = parse_accommodation_query({})
+    assert query["accommodation_type"] == "any"
+    assert query["city_only"] is False
+
+
+def test_canonical_query_is_stable():
+    """Key order and omitted defaults do not change the canonical form."""
+    a = parse_guide_query({"top_k": 10, "languages": ["English"], "city": "Kandy"})
+    b = parse_guide_query({"city": "Kandy"})
+    assert canonical_query("guides", a) == canonical_query("guides", b)
+    assert query_tag(canonical_query("guides", a)) == query_tag(canonical_query("guides", b))
+    assert canonical_query("guides", a) != canonical_query("guides", parse_guide_query({"city": "Galle"}))
+
+
+def test_trip_sections_override_shared_fields():
+    """Top-level trip fields apply to both engines unless a section overrides them."""
+    query = parse_trip_query({
+        "province": "Central",
+        "top_k": 5,
+        "accommodations": {"district": "Kandy"},
+        "guides": {"languages": ["French"], "top_k": 3},
+    })
+    assert query["accommodations"]["province"] == query["guides"]["province"] == "Central"
+    assert query["accommodations"]["district"] == "Kandy"
+    assert query["accommodations"]["top_k"] == 5
+    assert query["guides"]["top_k"] == 3
+    assert query["guides"]["languages"] == ["French"]
+
+
+def test_response_fields():
+    """"fields" takes a list or a comma-separated string; "compact" selects ids and scores."""
+    assert parse_response_fields({}) is None
+    assert parse_response_fields({"compact": True}) == COMPACT_FIELDS
+    assert parse_response_fields({"fields": "id, score,reasons"}) == ("id", "score", "reasons")
+    assert parse_response_fields({"fields": ["name"], "compact": True}) == ("name",)
+    with pytest.raises(ValueError):
+        parse_response_fields({"fields": [1, 2]})
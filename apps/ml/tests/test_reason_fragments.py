@@ -0,0 +1,40 @@
+"""
+Unit tests for the precomputed reason fragments.
+"""
+
+from reason_fragments import FragmentIndex, display_term, list_reason, term_fragments
+from recommender import AccommodationRecommender
+from records import AccommodationRecord
+
+
+def test_term_fragments_mask_and_join():
+    """Terms match case-insensitively, once each, and are joined in the record's order."""
+    terms = term_fragments(["Beach_Access", "wifi", "WiFi", "hot_water"])
+    assert terms.keys == ("beach_access", "wifi", "hot_water")
+    bits = terms.mask({"hot_water", "beach_access", "gym"})
+    assert bits == 0b101
+    assert terms.join(bits) == "Beach Access, Hot Water"
+    assert terms.join(terms.first(2)) == "Beach Access, Wifi"
+    assert terms.mask({"gym"}) == 0
+    assert term_fragments(["Beach_Access", "wifi", "WiFi", "hot_water"]) is terms
+
+
+def test_list_reason():
+    assert list_reason("Type: {}", ["hotel", "villa"]) == "Type: hotel, villa"
+    assert list_reason("{} travel style", ["solo_traveler"], display_term) == "Solo Traveler travel style"
+    assert list_reason("Type: {}", []) is None
+
+
+def test_fragment_index():
+    """Catalog records get fully built fragments; other records get lazily built ones."""
+    catalog = [AccommodationRecord(id="a", interests=("surfing",), amenities=("pool",), type=("villa",))]
+    index = FragmentIndex(catalog, AccommodationRecommender.REASON_FRAGMENTS)
+    fragments = index.get(catalog[0])
+    assert set(fragments) == set(AccommodationRecommender.REASON_FRAGMENTS)
+    assert fragments["style"] is None and fragments["type"] == "🏨 Type: villa"
+    assert index.get(catalog[0]) is fragments
+
+    fresh = index.get(AccommodationRecord.from_dict(catalog[0]))
+    assert fresh is not fragments and not fresh
+    assert fresh["type"] == "🏨 Type: villa" and list(fresh) == ["type"]
+
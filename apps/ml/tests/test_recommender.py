@@ -5,7 +5,9 @@ Tests filter logic, scoring functions, and full recommendation pipeline.
 
 import pytest
 import json
+from reason_fragments import FragmentIndex
 from recommender import AccommodationRecommender
+from records import AccommodationRecord
 
 
 # Sample test data
@@ -412,3 +414,69 @@ class TestEdgeCases:
 
 if __name__ == "__main__":
     pytest.main([__file__, "-v"])
+
+
+def test_filter_funnel(sample_accommodations):
+    """Each rejected accommodation is counted against the first rule it fails."""
+    recommender = AccommodationRecommender(sample_accommodations)
+    funnel = {}
+    results = recommender.recommend(
+        budget_min=1000,
+        budget_max=5000,
+        required_amenities=[],
+        interests=[],
+        travel_style="budget",
+        group_size=1,
+        funnel=funnel
+    )
+
+    assert set(funnel["rejected"]) == set(AccommodationRecommender.FILTER_RULES)
+    assert funnel["input"] == len(sample_accommodations)
+    assert funnel["passed"] == results["total_candidates"]
+    assert funnel["input"] - sum(funnel["rejected"].values()) == funnel["passed"]
+    assert funnel["rejected"]["budget"] >= 1
+
+
+def test_explain_matches_inline_reasons(sample_accommodations):
+    """Reasons built later by explain() equal the ones recommend() builds inline."""
+    recommender = AccommodationRecommender(sample_accommodations)
+    query = dict(budget_min=1000, budget_max=50000, required_amenities=["wifi"], interests=["beach"],
+                 travel_style="luxury", group_size=2, top_k=3)
+    full = recommender.recommend(**query)
+
+    explanations = {}
+    lazy = recommender.recommend(**query, include_reasons=False, explanations=explanations)
+    assert all("reasons" not in rec for rec in lazy["recommendations"])
+    assert [rec["id"] for rec in lazy["recommendations"]] == list(explanations)
+    for rec in full["recommendations"]:
+        item, components = explanations[rec["id"]]
+        assert recommender.explain(item, components, **query) == rec["reasons"]
+
+
+def test_indexed_fragments_give_same_reasons(sample_accommodations):
+    """Reasons built from a prebuilt fragment index match freshly built ones."""
+    query = dict(
+        budget_min=1000, budget_max=50000, required_amenities=["wifi", "hot_water"],
+        interests=["coastal", "romantic"], travel_style="luxury", group_size=2
+    )
+    records = AccommodationRecord.from_dicts(sample_accommodations)
+    index = FragmentIndex(records, AccommodationRecommender.REASON_FRAGMENTS)
+    plain = AccommodationRecommender(sample_accommodations).recommend(**query)
+    indexed = AccommodationRecommender(records, fragments=index).recommend(**query)
+    assert indexed == plain
+    beach = next(rec for rec in plain["recommendations"] if rec["id"] == "test-1")
+    assert "💚 Matching interests: Coastal, Romantic" in beach["reasons"]
+    assert "⚠️ Missing: Hot Water" in beach["reasons"]
+
+
+def test_reason_flags_follow_thresholds(recommender):
+    """Each flag column holds one decision per ranked accommodation."""
+    components = {"district": 0.9, "style": 0.0, "interests": 0.2, "amenities": 0.1,
+                  "price": 0.71, "popularity": 0.6, "group": 1.0}
+    ranked = [(acc, dict(components, district=district))
+              for acc, district in zip(recommender.accommodations, (1.0, 0.6, 0.2))]
+    flags = recommender._reason_flags(ranked)
+    assert flags["city"] == [True, False, False]
+    assert flags["province"] == [False, True, False]
+    assert flags["price"] == [True] * 3 and flags["popularity"] == [False] * 3
+    assert flags["rating"][0] and not any(flags["in_system"])
@@ -0,0 +1,48 @@
+"""
+Unit tests for the compact catalog record types.
+"""
+
+import pytest
+
+from records import AccommodationRecord, GuideRecord
+
+ACCOMMODATION = {
+    "id": "a-1", "name": "Lagoon Villa", "type": ["villa"], "amenities": ["wifi", "pool"],
+    "rating": 4.5, "district": "Galle", "province": "Southern", "price_range_min": 9000.0,
+    "price_range_max": 15000.0, "interests": ["beach"], "travel_style": ["romantic"],
+    "group_size": 4, "prior_bookings": 12, "availability": True, "image_url": "villa.jpg",
+}
+
+
+def test_round_trip_keeps_fields_and_extra_keys():
+    """to_dict gives the dictionary back, with defaults filled in for absent fields."""
+    record = AccommodationRecord.from_dict(ACCOMMODATION)
+    assert record.amenities == ("wifi", "pool")
+    assert record.extra == {"image_url": "villa.jpg"}
+    assert record.to_dict() == dict(ACCOMMODATION, in_system=False, provider_id=None, provider_name=None)
+
+
+def test_dictionary_access():
+    """Records answer [], get, in and keys like the dictionaries they replace."""
+    record = GuideRecord.from_dict({"id": "g-1", "languages": ["English"], "bio": "Hi"})
+    assert record["id"] == "g-1" and record["bio"] == "Hi"
+    assert record.get("price") is None and record.get("missing", 3) == 3
+    assert "bio" in record and "missing" not in record
+    assert record.availability is True and record.experience == ()
+    assert list(record)[:2] == ["id", "user_id"] and record.keys()[-1] == "bio"
+    with pytest.raises(KeyError):
+        record["missing"]
+
+
+def test_categorical_strings_are_shared():
+    """Equal districts and tags in different records are one string object."""
+    first = AccommodationRecord.from_dict(dict(ACCOMMODATION, district="".join(["Ga", "lle"])))
+    second = AccommodationRecord.from_dict(dict(ACCOMMODATION, amenities=["".join(["wi", "fi"])]))
+    assert first.district is second.district
+    assert first.amenities[0] is second.amenities[0]
+
+
+def test_from_dicts_keeps_records():
+    record = AccommodationRecord.from_dict(ACCOMMODATION)
+    converted = AccommodationRecord.from_dicts([record, ACCOMMODATION])
+    assert converted[0] is record and converted[1].id == "a-1"
@@ -0,0 +1,104 @@
+"""
+Unit tests for query log capture and the replay harness.
+"""
+
+import json
+import time
+
+from query_log import QueryLog, read_query_log
+from replay import EngineTarget, compare, load_entries, parse_target, ranking_diff, replay
+
+ACCOMMODATIONS = [
+    {
+        "id": f"acc-{i}", "name": f"Hotel {i}", "type": ["hotel"], "amenities": ["wifi"],
+        "rating": 3.0 + i * 0.3, "district": "Galle", "price_range_min": 3000, "price_range_max": 9000,
+        "province": "Southern", "interests": ["coastal"], "travel_style": ["budget"], "group_size": 4,
+        "prior_bookings": 10 * (5 - i), "availability": True
+    }
+    for i in range(5)
+]
+
+
+def _write_log(path, count=6, spacing=0.05):
+    log = QueryLog(path)
+    start = time.time()
+    for i in range(count):
+        log.record("accommodations", {"top_k": 3, "district": "Galle"}, start + i * spacing)
+    log.close()
+
+
+def test_gzip_round_trip_and_sampling(tmp_path):
+    """Entries survive a gzip round trip; a zero sample rate captures nothing."""
+    path = str(tmp_path / "logs" / "queries.jsonl.gz")
+    _write_log(path, count=3)
+    entries = list(read_query_log(path))
+    assert len(entries) == 3
+    assert entries[0] == {"t": entries[0]["t"], "e": "accommodations", "q": {"top_k": 3, "district": "Galle"}}
+
+    empty = QueryLog(str(tmp_path / "none.jsonl"), sample_rate=0.0)
+    empty.record("guides", {}, time.time())
+    empty.close()
+    assert not (tmp_path / "none.jsonl").exists()
+
+
+def test_shared_plain_log_and_single_gzip_writer(tmp_path):
+    """Writers sharing a plain log keep whole lines; a second gzip writer is refused."""
+    path = str(tmp_path / "queries.jsonl")
+    logs = [QueryLog(path, flush_every=1) for _ in range(2)]
+    for i in range(200):
+        logs[i % 2].record("guides", {"languages": ["English"], "n": i}, time.time())
+    for log in logs:
+        log.close()
+    assert sorted(entry["q"]["n"] for entry in read_query_log(path)) == list(range(200))
+
+    gz_path = str(tmp_path / "queries.jsonl.gz")
+    first, second = QueryLog(gz_path), QueryLog(gz_path)
+    first.record("guides", {"n": 1}, time.time())
+    time.sleep(0.1)
+    second.record("guides", {"n": 2}, time.time())
+    second._writer.join(5)
+    assert second.disabled and not first.disabled
+    first.close()
+    assert [entry["q"] for entry in read_query_log(gz_path)] == [{"n": 1}]
+
+
+def test_replay_keeps_pace_and_compares_configs(tmp_path):
+    """Paced replay takes the captured span; different weights show up as ranking diffs."""
+    log_path = str(tmp_path / "queries.jsonl")
+    _write_log(log_path, count=6, spacing=0.05)
+    catalog = tmp_path / "accommodations.json"
+    catalog.write_text(json.dumps(ACCOMMODATIONS))
+    catalogs = {"accommodations": str(catalog), "guides": str(catalog)}
+
+    entries = load_entries(log_path)
+    baseline = EngineTarget(catalogs)
+    start = time.perf_counter()
+    samples_a = replay(entries, baseline, speed=1.0)
+    assert time.perf_counter() - start >= 0.25 * 0.9
+
+    popularity_only = parse_target(
+        'engine:{"accommodations": {"weights": [0, 0, 0, 0, 0, 0, 0, 1, 0]}}', catalogs
+    )
+    samples_b = replay(entries, popularity_only, speed=0)
+    report = compare(entries, samples_a, samples_b)
+
+    section = report["endpoints"]["accommodations"]
+    assert section["a"]["requests"] == section["b"]["requests"] == 6
+    assert section["a"]["errors"] == 0
+    assert set(section["change_pct"]) == {"mean_ms", "p50_ms", "p90_ms", "p99_ms"}
+    assert section["ranking"]["compared"] == 6
+
+
+def test_ranking_diff_counts():
+    """Identical, reordered and changed rankings are told apart."""
+    entries = [{"e": "guides", "q": {"top_k": k}} for k in (1, 2, 3)]
+    a = [{"ids": ["x", "y"]}, {"ids": ["x", "y"]}, {"ids": ["x", "y"]}]
+    b = [{"ids": ["x", "y"]}, {"ids": ["y", "x"]}, {"ids": ["z", "y"]}]
+
+    diff = ranking_diff(entries, a, b)
+    assert diff["compared"] == 3
+    assert diff["identical"] == 1
+    assert diff["reordered"] == 1
+    assert diff["top1_changed"] == 2
+    assert abs(diff["mean_overlap"] - (1 + 1 + 0.5) / 3) < 1e-9
+    assert len(diff["examples"]) == 2
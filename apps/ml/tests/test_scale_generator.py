@@ -0,0 +1,137 @@
+"""
+Unit tests for the vectorized scale-test data generator.
+Tests determinism, record shape, skew and sharded output formats.
+"""
+
+import itertools
+from collections import Counter
+
+import numpy as np
+
+from catalog_io import read_catalog
+from data.scale_generator import (
+    DISTRICTS,
+    generate_catalog,
+    iter_scale_records,
+    shard_sizes,
+    zipf_weights,
+)
+from recommender import AccommodationRecommender
+from GuidesRecommendationModel.guide_recommender import GuideRecommender
+
+ACCOMMODATION_KEYS = {
+    "id", "name", "provider_id", "type", "amenities", "rating", "district",
+    "price_range_min", "price_range_max", "province", "interests",
+    "travel_style", "group_size", "prior_bookings", "availability"
+}
+GUIDE_KEYS = {
+    "id", "user_id", "name", "gender", "city", "province", "languages",
+    "expertise", "experience", "price", "rating", "prior_bookings", "availability"
+}
+
+
+class TestDeterminism:
+    """Test that seeds fully determine the output."""
+
+    def test_same_seed_same_records(self):
+        """Two runs with the same seed produce identical records."""
+        first = list(iter_scale_records("accommodations", 500, seed=7))
+        second = list(iter_scale_records("accommodations", 500, seed=7))
+        assert first == second
+
+    def test_different_seed_different_records(self):
+        """Changing the seed changes the catalog."""
+        a = list(iter_scale_records("guides", 100, seed=1))
+        b = list(iter_scale_records("guides", 100, seed=2))
+        assert [g["id"] for g in a] != [g["id"] for g in b]
+
+    def test_output_independent_of_worker_count(self, tmp_path):
+        """Shards are seeded per shard, so the worker count does not matter."""
+        serial = generate_catalog("guides", 300, str(tmp_path / "serial"), rows_per_shard=100, workers=1)
+        parallel = generate_catalog("guides", 300, str(tmp_path / "parallel"), rows_per_shard=100, workers=2)
+
+        assert len(serial) == len(parallel) == 3
+        assert list(read_catalog(str(tmp_path / "serial"))) == list(read_catalog(str(tmp_path / "parallel")))
+
+
+class TestRecordShape:
+    """Test that generated records match the mock JSON data format."""
+
+    def test_accommodation_fields(self):
+        """Accommodations carry every field the recommender and API expect."""
+        records = list(iter_scale_records("accommodations", 200))
+        for acc in records:
+            assert set(acc) == ACCOMMODATION_KEYS
+            assert acc["price_range_min"] < acc["price_range_max"]
+            assert 2.5 <= acc["rating"] <= 5.0
+            assert 0 <= acc["prior_bookings"] <= 500
+            assert len(acc["type"]) == 1
+            assert acc["district"] in acc["name"]
+
+    def test_guide_fields(self):
+        """Guides carry every field the recommender and API expect."""
+        records = list(iter_scale_records("guides", 200))
+        for guide in records:
+            assert set(guide) == GUIDE_KEYS
+            assert 1 <= len(guide["experience"]) <= 3
+            assert all(" years in " in e for e in guide["experience"])
+            assert 2000 <= guide["price"] <= 20000
+            assert guide["languages"]
+
+    def test_records_feed_recommenders(self):
+        """Generated catalogs can be scored end to end."""
+        accommodations = AccommodationRecommender(iter_scale_records("accommodations", 300))
+        results = accommodations.recommend(
+            budget_min=1000,
+            budget_max=50000,
+            required_amenities=["wifi"],
+            interests=["coastal"],
+            travel_style="luxury",
+            group_size=2,
+            top_k=5
+        )
+        assert len(results["recommendations"]) == 5
+
+        guides = GuideRecommender(iter_scale_records("guides", 300))
+        results = guides.recommend(budget_min=2000, budget_max=20000, languages=["English"], top_k=5)
+        assert len(results["recommendations"]) == 5
+
+
+class TestSkew:
+    """Test configurable distribution skew."""
+
+    def test_zipf_weights(self):
+        """Zipf weights are normalized and decreasing; skew 0 is uniform."""
+        weights = zipf_weights(10, 1.0)
+        assert np.isclose(weights.sum(), 1.0)
+        assert np.all(np.diff(weights) < 0)
+        assert np.allclose(zipf_weights(4, 0.0), 0.25)
+
+    def test_district_skew(self):
+        """High skew concentrates records in the top-ranked district."""
+        records = itertools.islice(iter_scale_records("accommodations", 2000, district_skew=2.0), 2000)
+        counts = Counter(acc["district"] for acc in records)
+        assert counts.most_common(1)[0][0] == DISTRICTS[0]
+        assert counts[DISTRICTS[0]] > 2000 * 0.4
+
+
+class TestSharding:
+    """Test shard splitting and file formats."""
+
+    def test_shard_sizes(self):
+        """Rows are split evenly across the minimum number of shards."""
+        assert shard_sizes(10, 4) == [4, 3, 3]
+        assert shard_sizes(8, 4) == [4, 4]
+        assert shard_sizes(0, 4) == []
+
+    def test_npz_and_jsonl_round_trip(self, tmp_path):
+        """Columnar and JSON Lines shards decode to the in-memory records."""
+        expected = list(iter_scale_records("accommodations", 250, rows_per_shard=100))
+
+        npz_paths = generate_catalog("accommodations", 250, str(tmp_path / "npz"), fmt="npz", rows_per_shard=100, workers=1)
+        jsonl_paths = generate_catalog("accommodations", 250, str(tmp_path / "jsonl"), fmt="jsonl", rows_per_shard=100, workers=1)
+
+        assert all(p.endswith(".npz") for p in npz_paths)
+        assert all(p.endswith(".jsonl") for p in jsonl_paths)
+        assert list(read_catalog(str(tmp_path / "npz"))) == expected
+        assert list(read_catalog(str(tmp_path / "jsonl"))) == expected
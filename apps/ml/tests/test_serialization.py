@@ -0,0 +1,49 @@
+"""
+Unit tests for response serialization, field selection and compression.
+"""
+
+import decimal
+import gzip
+import json
+
+import serialization
+from serialization import choose_encoding, compress, dumps, select_fields
+
+
+def test_dumps_matches_json():
+    """Both backends emit the same compact JSON; Decimal is written as a string like Flask does."""
+    payload = {"recommendations": [{"id": "a", "score": 0.5, "reasons": ["Near you"]}], "rating": decimal.Decimal("4.5")}
+    assert json.loads(dumps(payload)) == {**payload, "rating": "4.5"}
+
+
+def test_select_fields_keeps_id():
+    results = {"recommendations": [{"id": "a", "name": "A", "score": 0.9, "reasons": ["x"]}], "total_candidates": 1}
+    select_fields(results, ("score",))
+    assert results == {"recommendations": [{"id": "a", "score": 0.9}], "total_candidates": 1}
+    assert select_fields({"recommendations": [{"id": "a"}]}, None) == {"recommendations": [{"id": "a"}]}
+
+
+def test_choose_encoding(monkeypatch):
+    """q-values are honoured, q=0 refuses a coding, and brotli is preferred only when installed."""
+    monkeypatch.setattr(serialization, "brotli", None)
+    assert choose_encoding("gzip, deflate, br") == "gzip"
+    assert choose_encoding("gzip;q=0, identity") is None
+    assert choose_encoding("*") == "gzip"
+    assert choose_encoding("") is None
+
+    monkeypatch.setattr(serialization, "brotli", object())
+    assert choose_encoding("gzip, br") == "br"
+    assert choose_encoding("gzip, br;q=0.5") == "gzip"
+
+
+def test_compress_threshold(monkeypatch):
+    """Small bodies go out as they are; large ones are compressed when accepted."""
+    monkeypatch.setattr(serialization, "brotli", None)
+    small = b'{"a":1}'
+    assert compress(small, "gzip", min_bytes=1024) == (small, None)
+
+    large = dumps({"reasons": ["Matches your travel style"] * 200})
+    body, encoding = compress(large, "gzip", min_bytes=1024)
+    assert encoding == "gzip" and len(body) < len(large) / 5
+    assert gzip.decompress(body) == large
+    assert compress(large, "identity", min_bytes=1024) == (large, None)
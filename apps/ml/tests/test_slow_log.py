@@ -0,0 +1,22 @@
+"""
+Unit tests for the slow-request log.
+"""
+
+from slow_log import SlowRequestLog, read_slow_log
+
+
+def test_threshold_and_rotation(tmp_path):
+    """Entries append as JSON Lines and the file rotates past max_bytes."""
+    path = str(tmp_path / "logs" / "slow.jsonl")
+    log = SlowRequestLog(path, threshold_ms=100, max_bytes=200)
+
+    assert log.is_slow(100) and not log.is_slow(99.9)
+
+    for i in range(5):
+        log.record({"endpoint": "guides", "elapsed_ms": 150 + i, "padding": "x" * 40})
+
+    current = list(read_slow_log(path))
+    backup = list(read_slow_log(path + ".1"))
+    assert current and backup
+    assert current[-1]["elapsed_ms"] == 154
+    assert all("ts" in entry for entry in current + backup)
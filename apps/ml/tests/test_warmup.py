@@ -0,0 +1,46 @@
+"""
+Unit tests for picking the startup warm-up queries.
+"""
+
+import json
+
+from queries import ACCOMMODATION_QUERIES, GUIDE_QUERIES
+from warmup import canned_queries, hottest_queries, warmup_queries
+
+
+def test_hottest_queries_count_canonical_queries():
+    """Bodies with the same parsed query count together; trips count for each section."""
+    entries = [
+        {"t": 0, "e": "guides", "q": {"languages": ["English"], "top_k": 10}},
+        {"t": 1, "e": "guides", "q": {"top_k": 10, "languages": ["English"]}},
+        {"t": 2, "e": "guides", "q": {"languages": ["English"], "fields": "id,score"}},
+        {"t": 3, "e": "accommodations", "q": {"province": "Central"}},
+        {"t": 4, "e": "trip", "q": {"province": "Central", "guides": {"languages": ["Tamil"]}}},
+        {"t": 5, "e": "explain", "q": {"endpoint": "guides", "item_id": "g-1"}},
+    ]
+    hottest = hottest_queries(entries, limit=2)
+    assert hottest == [
+        ("guides", {"languages": ["English"], "top_k": 10}),
+        ("accommodations", {"province": "Central"}),
+    ]
+    assert len(hottest_queries(entries, limit=10)) == 3
+
+
+def test_canned_queries_alternate_engines():
+    canned = canned_queries()
+    assert [endpoint for endpoint, _ in canned[:4]] == ["accommodations", "guides"] * 2
+    assert len(canned) == len(ACCOMMODATION_QUERIES) + len(GUIDE_QUERIES)
+
+
+def test_warmup_queries_fall_back_to_canned(tmp_path):
+    """Without a usable query log the canned queries are used, up to the limit."""
+    assert warmup_queries(None, 3) == canned_queries()[:3]
+    assert warmup_queries(str(tmp_path / "missing.jsonl"), 3) == canned_queries()[:3]
+
+    broken = tmp_path / "broken.jsonl"
+    broken.write_text("{not json\n")
+    assert warmup_queries(str(broken), 3) == canned_queries()[:3]
+
+    logged = tmp_path / "queries.jsonl"
+    logged.write_text(json.dumps({"t": 0, "e": "guides", "q": {"languages": ["Tamil"]}}) + "\n")
+    assert warmup_queries(str(logged), 3) == [("guides", {"languages": ["Tamil"]})]
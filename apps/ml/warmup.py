@@ -0,0 +1,89 @@
+"""
+Queries to warm a process up with before it reports ready.
+The hottest query keys of a captured query log are used when there is one,
+otherwise the canned query shapes the benchmark and load test drive
+(queries.py). Running them (api.warm_up) leaves their results in the result
+and explanation caches.
+"""
+
+import itertools
+import logging
+import os
+from collections import Counter
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from queries import ACCOMMODATION_QUERIES, GUIDE_QUERIES, QUERY_PARSERS, canonical_query, split_trip_body
+from query_log import read_query_log
+
+logger = logging.getLogger('wbth.warmup')
+
+# Query log lines read when picking the hottest queries
+MAX_LOG_ENTRIES = 100000
+
+
+def hottest_queries(entries: Iterable[Dict], limit: int) -> List[Tuple[str, Dict]]:
+    """
+    The most frequent queries among captured requests, hottest first.
+
+    Requests are counted by canonical query, so bodies that only differ in
+    key order or omitted defaults count as one. A trip request counts once
+    for each of its sections.
+
+    Args:
+        entries: Query log entries, as read_query_log yields them
+        limit: Maximum number of queries to return
+
+    Returns:
+        List of (endpoint, request body) pairs
+    """
+    counts = Counter()
+    bodies = {}
+    for entry in entries:
+        endpoint, body = entry.get('e'), entry.get('q')
+        if not isinstance(body, dict):
+            continue
+        if endpoint == 'trip':
+            sections = split_trip_body(body).items()
+        elif endpoint in QUERY_PARSERS:
+            sections = [(endpoint, body)]
+        else:
+            continue
+        for section, section_body in sections:
+            key = canonical_query(section, QUERY_PARSERS[section](section_body))
+            counts[key] += 1
+            bodies.setdefault(key, (section, section_body))
+    return [bodies[key] for key, _ in counts.most_common(limit)]
+
+
+def canned_queries() -> List[Tuple[str, Dict]]:
+    """The canned query shapes for both engines, alternating between them."""
+    pairs = zip(
+        (('accommodations', body) for body in ACCOMMODATION_QUERIES.values()),
+        (('guides', body) for body in GUIDE_QUERIES.values()),
+    )
+    return [query for pair in pairs for query in pair]
+
+
+def warmup_queries(query_log_file: Optional[str], limit: int) -> List[Tuple[str, Dict]]:
+    """
+    Pick the warm-up queries.
+
+    Args:
+        query_log_file: Captured query log (optional); its hottest queries
+            are used if it has any
+        limit: Maximum number of queries
+
+    Returns:
+        List of (endpoint, request body) pairs
+    """
+    if query_log_file and os.path.exists(query_log_file):
+        try:
+            entries = itertools.islice(read_query_log(query_log_file), MAX_LOG_ENTRIES)
+            hottest = hottest_queries(entries, limit)
+        except (OSError, ValueError) as e:
+            logger.warning("Could not read warm-up queries from %s: %s", query_log_file, e)
+            hottest = []
+        if hottest:
+            return hottest
+    return canned_queries()[:limit]
+
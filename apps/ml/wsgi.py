@@ -0,0 +1,22 @@
+"""
+WSGI entry point for production servers.
+Importing this module loads the catalogs and warms both engines (api.preload),
+then freezes the garbage collector's view of everything built so far. Under a
+preloading server (gunicorn.conf.py sets preload_app) that happens once in the
+master: forked workers share the catalog pages copy-on-write, and because
+frozen objects are never scanned by the collector, those pages stay shared.
+
+Usage:
+    gunicorn -c gunicorn.conf.py wsgi:app
+"""
+
+import gc
+import os
+
+from api import app, preload
+
+if os.getenv('PRELOAD_ENGINES', 'true').lower() in ('1', 'true', 'yes'):
+    preload()
+
+gc.collect()
+gc.freeze()